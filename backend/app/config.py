@@ -11,12 +11,56 @@ SNAPSHOT_INTERVAL_SECONDS = 180 if LOW_RESOURCE_MODE else 60
 TRAIL_CHECK_INTERVAL_SECONDS = 10 if LOW_RESOURCE_MODE else 5
 WS_RECONNECT_FAILURE_THRESHOLD = 3
 
+# v2 equity snapshots (fed from worker ticks): write when equity moves more
+# than the deadband %, or at least every SNAPSHOT_INTERVAL_SECONDS.
+SNAPSHOT_DEADBAND_PCT = float(os.getenv("SNAPSHOT_DEADBAND_PCT", "0.1"))
+SNAPSHOT_FLUSH_SECONDS = 10.0 if LOW_RESOURCE_MODE else 5.0
+SNAPSHOT_FLUSH_MAX_ROWS = 500
+# Live account state (from the same ticks) is written through to `accounts`
+# at most this often, one bulk UPDATE for every changed account.
+LIVE_STATE_FLUSH_SECONDS = 30.0 if LOW_RESOURCE_MODE else 10.0
+# Raw snapshots older than this are deleted once rolled up (0 = keep forever).
+# Opt-in: deleting history must never be an upgrade side effect.
+RAW_SNAPSHOT_RETENTION_DAYS = int(os.getenv("RAW_SNAPSHOT_RETENTION_DAYS", "0"))
+ROLLUP_MAINTENANCE_SECONDS = 3600
+# Cold archive: snapshots and closed trades older than this move into per-month
+# files under archive/ instead of being pruned (0 = off).
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+
+# Deal mirror / realized P&L: background sync for live accounts, and how far
+# before the per-account watermark each sync re-reads.
+PNL_SYNC_INTERVAL_SECONDS = 900 if LOW_RESOURCE_MODE else 300
+PNL_SYNC_OVERLAP_SECONDS = 60
+# First sync of an account mirrors this much deal history into `deals`.
+DEALS_BACKFILL_DAYS = int(os.getenv("DEALS_BACKFILL_DAYS", "365"))
+
+# ETag'd response cache for polled analytics endpoints
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_GZIP_MIN_BYTES = 1024
+
+# Monte-Carlo risk of ruin: runs above one chunk of paths are spread over a
+# process pool; results are cached per rules / risk / R distribution.
+RISK_SIM_WORKERS = int(os.getenv("RISK_SIM_WORKERS", "1" if LOW_RESOURCE_MODE else str(min(4, os.cpu_count() or 1))))
+RISK_SIM_CHUNK_PATHS = 100_000
+RISK_SIM_CACHE_ENTRIES = 128
+
 # MT5
 MT5_INIT_RETRIES = 3
 
+# v2 refresh-all: max accounts logging in at once (each one holds a terminal + worker)
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "2" if LOW_RESOURCE_MODE else "8"))
+
 # Trading
 DEFAULT_ORDER_DEVIATION = 20
 DEFAULT_MAGIC = 234000
+# Prepared trade tickets (/api/trading/v2/prepare → /execute): lifetime, and
+# how far the quote may move from the prepared entry before execute refuses.
+TRADE_TICKET_TTL_SECONDS = 30
+TRADE_TICKET_MAX_DRIFT_POINTS = DEFAULT_ORDER_DEVIATION
+# Per-server symbol catalog: re-checked (one hash compare) at most this often
+# per server when a worker connects; resolutions memoised per server.
+SYMBOL_CATALOG_REFRESH_SECONDS = 6 * 3600
+SYMBOL_CATALOG_MEMO_ENTRIES = 2048
 
 # ── MT5 bridge (Linux/Wine) ──────────────────────────────────────────────────
 # On non-Windows the app talks to a bridge server (running under Wine) that
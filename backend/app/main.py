@@ -21,9 +21,18 @@ from app.routes import news, system as system_routes
 from app.routes import mt5_v2, trading_v2
 from app.routes import settings as settings_routes
 from app.services.worker_pool import pool as worker_pool
+from app.services.snapshot_writer import snapshot_writer
+from app.services.live_state import live_state
+from app.services.exposure import exposure
+from app.services.symbol_catalog import symbol_catalog
+from app.services.risk_of_ruin import risk_of_ruin
+from app.services.db_writer import db_writer
+from app.services.equity_rollups import maintenance_loop as equity_rollup_maintenance
+from app.services import pnl_sync
+from app.services.trade_history import normalize_legacy_timestamps
 from app.database import engine, Base
 # Import all models so Base.metadata knows about them
-from app.models import Fund, FundProgram, FundPhaseRule, Account, EquitySnapshot, TradeRecord, AppSetting  # noqa: F401
+from app.models import Fund, FundProgram, FundPhaseRule, Account, EquitySnapshot, TradeRecord, AppSetting, PositionRule, EquityRollup, DailyAccountStats, Deal, TradeStats, ExecutionTiming, SymbolCatalogEntry, SymbolCatalogServer  # noqa: F401
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -48,6 +57,7 @@ def _migrate():
             ("daily_open_date", "VARCHAR(10)"),
             ("peak_eod_balance", "FLOAT"),
             ("symbol_aliases", "TEXT"),
+            ("deals_synced_at", "INTEGER"),
         ]:
             if col not in acct_cols:
                 conn.execute(text(f"ALTER TABLE accounts ADD COLUMN {col} {coltype}"))
@@ -82,6 +92,15 @@ def _migrate():
             if col not in tr_cols:
                 conn.execute(text(f"ALTER TABLE trade_records ADD COLUMN {col} {coltype}"))
 
+        # deals new columns
+        deal_cols = {c["name"] for c in inspector.get_columns("deals")}
+        for col, coltype in [
+            ("sl", "FLOAT"),
+            ("tp", "FLOAT"),
+        ]:
+            if col not in deal_cols:
+                conn.execute(text(f"ALTER TABLE deals ADD COLUMN {col} {coltype}"))
+
         # Composite indexes for analytics hot paths (idempotent)
         for stmt in (
             "CREATE INDEX IF NOT EXISTS ix_trade_records_account_executed "
@@ -90,9 +109,16 @@ def _migrate():
             "ON equity_snapshots(account_db_id, recorded_at)",
             "CREATE INDEX IF NOT EXISTS ix_fund_programs_fund_id "
             "ON fund_programs(fund_id)",
+            "CREATE INDEX IF NOT EXISTS ix_trade_records_symbol_executed "
+            "ON trade_records(symbol, executed_at)",
+            "CREATE INDEX IF NOT EXISTS ix_trade_records_success_executed "
+            "ON trade_records(success, executed_at)",
         ):
             conn.execute(text(stmt))
 
+        # Second-precision executed_at values break the trade-history keyset (idempotent)
+        normalize_legacy_timestamps(conn)
+
         conn.commit()
 
 _migrate()
@@ -130,9 +156,30 @@ app.include_router(trading_v2.router, prefix="/api/trading/v2", tags=["Trading v
 app.include_router(settings_routes.router, prefix="/api/settings", tags=["Settings"])
 
 
+_background_tasks: list[asyncio.Task] = []
+
+
+@app.on_event("startup")
+async def _start_snapshot_writer() -> None:
+    await snapshot_writer.start(worker_pool)
+    await live_state.start(worker_pool)
+    await exposure.start(worker_pool)
+    await symbol_catalog.start(worker_pool)
+    _background_tasks.append(asyncio.create_task(equity_rollup_maintenance()))
+    _background_tasks.append(asyncio.create_task(pnl_sync.sync_loop(worker_pool)))
+
+
 @app.on_event("shutdown")
 async def _shutdown_worker_pool() -> None:
+    for task in _background_tasks:
+        task.cancel()
     await worker_pool.shutdown_all()
+    await snapshot_writer.stop()
+    await live_state.stop()
+    await exposure.stop()
+    await symbol_catalog.stop()
+    risk_of_ruin.shutdown()
+    db_writer.stop()
 
 
 # Serve frontend static files (must be AFTER API routers)
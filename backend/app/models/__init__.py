@@ -3,5 +3,12 @@ from app.models.accounts import Account
 from app.models.equity_snapshot import EquitySnapshot
 from app.models.trade_record import TradeRecord
 from app.models.app_settings import AppSetting
+from app.models.position_rule import PositionRule
+from app.models.equity_rollup import EquityRollup
+from app.models.daily_account_stats import DailyAccountStats
+from app.models.deal import Deal
+from app.models.trade_stats import TradeStats
+from app.models.execution_timing import ExecutionTiming
+from app.models.symbol_catalog import SymbolCatalogEntry, SymbolCatalogServer
 
-__all__ = ["Fund", "FundProgram", "FundPhaseRule", "Account", "EquitySnapshot", "TradeRecord", "AppSetting"]
+__all__ = ["Fund", "FundProgram", "FundPhaseRule", "Account", "EquitySnapshot", "TradeRecord", "AppSetting", "PositionRule", "EquityRollup", "DailyAccountStats", "Deal", "TradeStats", "ExecutionTiming", "SymbolCatalogEntry", "SymbolCatalogServer"]
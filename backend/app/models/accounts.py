@@ -25,6 +25,7 @@ class Account(Base):
     daily_open_date = Column(String(10), nullable=True)    # YYYY-MM-DD of last daily reset
     peak_eod_balance = Column(Float, nullable=True)        # highest EOD balance ever (for trailing DD)
     symbol_aliases = Column(Text, nullable=True)           # JSON: {"EURUSD": "EURUSD.m", "GOLD": "XAUUSD"}
+    deals_synced_at = Column(Integer, nullable=True)       # broker time (epoch s) of newest deal seen by P&L sync
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
 
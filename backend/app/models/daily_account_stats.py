@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, Float, String, Text, TIMESTAMP, ForeignKey, UniqueConstraint, Index
+from app.database import Base
+
+
+class DailyAccountStats(Base):
+    """Per-account, per-UTC-day journal aggregates.
+
+    Updated incrementally whenever a trade record is written or closed and
+    whenever equity snapshots land, so the journal pages over these rows
+    instead of loading every trade and snapshot.
+    """
+
+    __tablename__ = "daily_account_stats"
+
+    id = Column(Integer, primary_key=True)
+    account_db_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    day = Column(String(10), nullable=False)               # YYYY-MM-DD (UTC)
+    trade_count = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    buy_count = Column(Integer, nullable=False, default=0)
+    sell_count = Column(Integer, nullable=False, default=0)
+    total_lots = Column(Float, nullable=False, default=0.0)
+    total_risk = Column(Float, nullable=False, default=0.0)   # successful trades only
+    rr_sum = Column(Float, nullable=False, default=0.0)       # avg R:R = rr_sum / rr_count
+    rr_count = Column(Integer, nullable=False, default=0)
+    symbols = Column(Text, nullable=True)                     # comma list, first-traded order
+    closed_count = Column(Integer, nullable=False, default=0)
+    realized_pnl = Column(Float, nullable=False, default=0.0)
+    open_balance = Column(Float, nullable=True)
+    close_balance = Column(Float, nullable=True)
+    first_snapshot_at = Column(TIMESTAMP, nullable=True)
+    last_snapshot_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("account_db_id", "day", name="uq_daily_account_stats_day"),
+        Index("ix_daily_account_stats_day", "day"),
+    )
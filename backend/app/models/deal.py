@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, Float, String, TIMESTAMP, ForeignKey, Index, UniqueConstraint
+from app.database import Base
+
+
+class Deal(Base):
+    """Local mirror of an account's MT5 deal history (broker fills).
+
+    Filled incrementally by the realized-P&L sync, so history, P&L matching
+    and deal statistics are answered from SQLite even while the terminal is
+    offline. `time` is the broker timestamp converted like the legacy
+    `/api/mt5/history` did (`datetime.fromtimestamp`).
+    """
+
+    __tablename__ = "deals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_db_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    ticket = Column(Integer, nullable=False)
+    order = Column(Integer, nullable=True)
+    position_id = Column(Integer, nullable=True)
+    symbol = Column(String(32), nullable=True)
+    type = Column(Integer, nullable=False)           # DEAL_TYPE_* (0 BUY, 1 SELL, 2 BALANCE, ...)
+    entry = Column(Integer, nullable=True)           # DEAL_ENTRY_* (0 IN, 1 OUT, 2 INOUT, 3 OUT_BY)
+    volume = Column(Float, nullable=True)
+    price = Column(Float, nullable=True)
+    sl = Column(Float, nullable=True)                # stop loss / take profit at fill time
+    tp = Column(Float, nullable=True)
+    profit = Column(Float, nullable=True)
+    commission = Column(Float, nullable=True)
+    swap = Column(Float, nullable=True)
+    fee = Column(Float, nullable=True)
+    magic = Column(Integer, nullable=True)
+    comment = Column(String(100), nullable=True)
+    time = Column(TIMESTAMP, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("account_db_id", "ticket", name="uq_deals_account_ticket"),
+        Index("ix_deals_account_time", "account_db_id", "time"),
+        Index("ix_deals_account_order", "account_db_id", "order"),
+        Index("ix_deals_account_position", "account_db_id", "position_id"),
+    )
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, Float, String, TIMESTAMP, ForeignKey, UniqueConstraint
+from app.database import Base
+
+
+class EquityRollup(Base):
+    """OHLC equity/balance per account per time bucket (5m, 1h, 1d).
+
+    Maintained incrementally from raw `equity_snapshots` as they are written,
+    so long-range charts and the journal read a few hundred rows instead of
+    scanning every raw snapshot.
+    """
+
+    __tablename__ = "equity_rollups"
+
+    id = Column(Integer, primary_key=True)
+    account_db_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    resolution = Column(String(3), nullable=False)      # 5m | 1h | 1d
+    bucket_start = Column(TIMESTAMP, nullable=False)
+    open_equity = Column(Float, nullable=False)
+    high_equity = Column(Float, nullable=False)
+    low_equity = Column(Float, nullable=False)
+    close_equity = Column(Float, nullable=False)
+    open_balance = Column(Float, nullable=False)
+    high_balance = Column(Float, nullable=False)
+    low_balance = Column(Float, nullable=False)
+    close_balance = Column(Float, nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    first_at = Column(TIMESTAMP, nullable=False)        # timestamps of the open/close samples,
+    last_at = Column(TIMESTAMP, nullable=False)         # so out-of-order merges stay correct
+
+    __table_args__ = (
+        UniqueConstraint("account_db_id", "resolution", "bucket_start", name="uq_equity_rollups_bucket"),
+    )
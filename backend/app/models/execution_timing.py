@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, Float, String, TIMESTAMP, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ExecutionTiming(Base):
+    """Where the time went for one account's order in a batch trade.
+
+    Stage durations are milliseconds on the monotonic clock; a stage the
+    route does not have is NULL (v1 has no symbol resolution, v2 checks
+    margin inside the order call). `total_ms` runs from the request start
+    until the trade record is written. Prepared tickets (`v2_ticket`) only
+    time their `/execute` request: the rule re-check if one ran, the order
+    and the write.
+    """
+
+    __tablename__ = "execution_timings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trade_record_id = Column(Integer, ForeignKey("trade_records.id", ondelete="CASCADE"), nullable=False, unique=True)
+    account_db_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    server = Column(String(100), nullable=True)
+    route = Column(String(16), nullable=False)       # v1 | v2 | v2_ticket
+    connect_ms = Column(Float, nullable=True)        # worker spawn (v2) / terminal login (v1)
+    resolve_ms = Column(Float, nullable=True)
+    quote_ms = Column(Float, nullable=True)          # account info, symbol spec, tick
+    size_ms = Column(Float, nullable=True)
+    rules_ms = Column(Float, nullable=True)
+    margin_ms = Column(Float, nullable=True)
+    order_ms = Column(Float, nullable=True)          # place_market_order round trip incl. order_send
+    db_ms = Column(Float, nullable=True)
+    total_ms = Column(Float, nullable=True)
+    requested_price = Column(Float, nullable=True)
+    fill_price = Column(Float, nullable=True)
+    slippage_points = Column(Float, nullable=True)   # positive = filled worse than requested
+    recorded_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_execution_timings_recorded", "recorded_at"),
+        Index("ix_execution_timings_account_recorded", "account_db_id", "recorded_at"),
+        Index("ix_execution_timings_server_recorded", "server", "recorded_at"),
+    )
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Boolean, Text, TIMESTAMP, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class PositionRule(Base):
+    """Position-management rule owned by an account's worker process.
+
+    Persisted so a respawned worker restores its trailing stops, break-even
+    moves and scale-out ladders instead of silently dropping them.
+    """
+
+    __tablename__ = "position_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_db_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    ticket = Column(Integer, nullable=False)
+    kind = Column(String(20), nullable=False)       # trailing | breakeven | scale_out
+    params = Column(Text, nullable=False)           # JSON, e.g. {"trail_pips": 15}
+    state = Column(Text, nullable=True)             # JSON, engine-owned progress
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_position_rules_account_active", "account_db_id", "active"),
+    )
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, Float, String, TIMESTAMP, UniqueConstraint
+from app.database import Base
+
+
+class SymbolCatalogEntry(Base):
+    """One broker symbol with its contract spec, shared by every account on `server`."""
+
+    __tablename__ = "symbol_catalog"
+
+    id = Column(Integer, primary_key=True, index=True)
+    server = Column(String(100), nullable=False)
+    name = Column(String(64), nullable=False)
+    description = Column(String(200), nullable=True)
+    path = Column(String(200), nullable=True)
+    digits = Column(Integer, nullable=True)
+    point = Column(Float, nullable=True)
+    contract_size = Column(Float, nullable=True)
+    volume_min = Column(Float, nullable=True)
+    volume_max = Column(Float, nullable=True)
+    volume_step = Column(Float, nullable=True)
+    filling = Column(Integer, nullable=True)        # ORDER_FILLING_* the worker would pick
+
+    __table_args__ = (
+        UniqueConstraint("server", "name", name="uq_symbol_catalog_server_name"),
+    )
+
+
+class SymbolCatalogServer(Base):
+    """Catalog hash per broker server: a refresh with the same hash changes nothing."""
+
+    __tablename__ = "symbol_catalog_servers"
+
+    server = Column(String(100), primary_key=True)
+    catalog_hash = Column(String(40), nullable=False)
+    symbol_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(TIMESTAMP, nullable=False)
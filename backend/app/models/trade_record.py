@@ -33,4 +33,8 @@ class TradeRecord(Base):
 
     __table_args__ = (
         Index("ix_trade_records_account_executed", "account_db_id", "executed_at"),
+        # Trade-history filters; SQLite appends the rowid (id) to every index,
+        # so each one also serves the (executed_at, id) keyset order.
+        Index("ix_trade_records_symbol_executed", "symbol", "executed_at"),
+        Index("ix_trade_records_success_executed", "success", "executed_at"),
     )
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, Float, String, TIMESTAMP, ForeignKey, UniqueConstraint
+from app.database import Base
+
+
+class TradeStats(Base):
+    """Running performance aggregates of closed trades per account and group.
+
+    One row per (account, dimension, key): dimension is all | symbol | tag |
+    weekday | hour. Every column is a running sum, count or extreme that a
+    trade close folds in with O(1) work, so win rate, expectancy, profit
+    factor, average R, streaks, drawdown and the Sharpe-like ratio are read
+    without touching trade records.
+    """
+
+    __tablename__ = "trade_stats"
+
+    id = Column(Integer, primary_key=True)
+    account_db_id = Column(Integer, ForeignKey("accounts.id", ondelete="CASCADE"), nullable=False)
+    dimension = Column(String(8), nullable=False)
+    key = Column(String(64), nullable=False)             # "" for dimension "all"
+    closed_count = Column(Integer, nullable=False, default=0)
+    win_count = Column(Integer, nullable=False, default=0)
+    loss_count = Column(Integer, nullable=False, default=0)
+    pnl_sum = Column(Float, nullable=False, default=0.0)
+    pnl_sq_sum = Column(Float, nullable=False, default=0.0)
+    gross_profit = Column(Float, nullable=False, default=0.0)
+    gross_loss = Column(Float, nullable=False, default=0.0)   # ≤ 0
+    largest_win = Column(Float, nullable=False, default=0.0)
+    largest_loss = Column(Float, nullable=False, default=0.0)  # ≤ 0
+    r_sum = Column(Float, nullable=False, default=0.0)         # P&L / risk_amount
+    r_count = Column(Integer, nullable=False, default=0)
+    streak = Column(Integer, nullable=False, default=0)        # > 0 wins, < 0 losses in a row
+    max_win_streak = Column(Integer, nullable=False, default=0)
+    max_loss_streak = Column(Integer, nullable=False, default=0)
+    cum_pnl = Column(Float, nullable=False, default=0.0)
+    peak_pnl = Column(Float, nullable=False, default=0.0)
+    max_drawdown = Column(Float, nullable=False, default=0.0)  # of cumulative realized P&L
+    last_closed_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("account_db_id", "dimension", "key", name="uq_trade_stats_group"),
+    )
@@ -1,40 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List
 import logging
 from app.database import get_db
 from app.models.accounts import Account
-from app.models.funds import Fund, FundProgram
 from app.schemas import AccountCreate, AccountUpdate, AccountResponse
 from app.services.mt5_service import MT5Service
 from app.services.mt5_terminal import create_terminal_copy, delete_terminal_copy, resolve_base_path
 from app.services.encryption import encrypt_password
 from app.services.mt5_auth import login_account
 from app.services.symbol_resolver import parse_aliases, serialize_aliases
-from app.services.phase_detector import detect_phase, parse_starting_balance
+from app.services.phase_detector import detect_phase, find_fund_by_server, parse_starting_balance
+from app.services.reference_cache import reference_cache
 from app.services.rule_checker import RuleChecker
+from app.utils.async_helpers import run_mt5
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
-def _find_fund_by_server(server: str, funds: list) -> Optional[Fund]:
-    """Find matching fund from server name."""
-    for fund in funds:
-        if fund.server_pattern.lower() in server.lower():
-            return fund
-    return None
-
-
 @router.get("/", response_model=List[AccountResponse])
-async def get_accounts(db: Session = Depends(get_db)):
+def get_accounts(db: Session = Depends(get_db)):
     """Get all accounts"""
     accounts = db.query(Account).all()
     return accounts
 
 
 @router.get("/{account_id}", response_model=AccountResponse)
-async def get_account(account_id: int, db: Session = Depends(get_db)):
+def get_account(account_id: int, db: Session = Depends(get_db)):
     """Get account by ID"""
     account = db.query(Account).filter(Account.id == account_id).first()
     if not account:
@@ -48,13 +41,18 @@ async def create_account(account_data: AccountCreate, db: Session = Depends(get_
     Only 3 fields required: account_id, password, server.
     account_type, fund_program_id, and current_phase are auto-detected.
     Also logs into MT5 to read account name and detect phase."""
+    # MT5 login + DB work, all on the MT5 thread (never on the event loop).
+    return await run_mt5(_create_account, account_data, db)
+
+
+def _create_account(account_data: AccountCreate, db: Session) -> Account:
     existing = db.query(Account).filter(Account.account_id == account_data.account_id).first()
     if existing:
         raise HTTPException(status_code=400, detail="Account already exists")
 
     # Always try to match fund from server pattern
-    funds = db.query(Fund).all()
-    matched_fund = _find_fund_by_server(account_data.server, funds)
+    funds = reference_cache.get(db).funds
+    matched_fund = find_fund_by_server(account_data.server, funds)
 
     # Set account type and defaults based on fund match
     if matched_fund:
@@ -140,7 +138,7 @@ async def create_account(account_data: AccountCreate, db: Session = Depends(get_
 
 
 @router.put("/{account_id}", response_model=AccountResponse)
-async def update_account(
+def update_account(
     account_id: int,
     account_data: AccountUpdate,
     db: Session = Depends(get_db),
@@ -172,7 +170,7 @@ async def update_account(
 
 
 @router.post("/{account_id}/advance-phase")
-async def advance_phase(account_id: int, db: Session = Depends(get_db)):
+def advance_phase(account_id: int, db: Session = Depends(get_db)):
     """Advance account to next phase when profit target is achieved."""
     account = db.query(Account).filter(Account.id == account_id).first()
     if not account:
@@ -198,7 +196,7 @@ async def advance_phase(account_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/{account_id}")
-async def delete_account(account_id: int, db: Session = Depends(get_db)):
+def delete_account(account_id: int, db: Session = Depends(get_db)):
     """Delete account and its dedicated MT5 terminal folder"""
     account = db.query(Account).filter(Account.id == account_id).first()
     if not account:
@@ -219,17 +217,21 @@ async def delete_account(account_id: int, db: Session = Depends(get_db)):
 @router.post("/refresh-all")
 async def refresh_all_accounts(db: Session = Depends(get_db)):
     """Init all accounts: login to MT5 one by one, fetch data, detect phase, save to DB."""
+    return await run_mt5(_refresh_all_accounts, db)
+
+
+def _refresh_all_accounts(db: Session) -> dict:
     accounts = db.query(Account).all()
     if not accounts:
         return {"results": []}
 
-    funds = db.query(Fund).all()
+    funds = reference_cache.get(db).funds
     mt5 = MT5Service()
     results = []
 
     for account in accounts:
         try:
-            matched_fund = _find_fund_by_server(account.server, funds)
+            matched_fund = find_fund_by_server(account.server, funds)
 
             # Only shutdown if switching to a different terminal path (avoids slow re-init per account)
             next_path = account.mt5_path or mt5.default_exe_path()
@@ -303,7 +305,7 @@ class SymbolAliasUpsert(BaseModel):
 
 
 @router.get("/{account_id}/symbol-aliases")
-async def get_symbol_aliases(account_id: int, db: Session = Depends(get_db)):
+def get_symbol_aliases(account_id: int, db: Session = Depends(get_db)):
     """Return the per-account symbol alias map (requested → resolved)."""
     account = db.query(Account).filter(Account.id == account_id).first()
     if not account:
@@ -312,7 +314,7 @@ async def get_symbol_aliases(account_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/{account_id}/symbol-aliases")
-async def upsert_symbol_alias(
+def upsert_symbol_alias(
     account_id: int, payload: SymbolAliasUpsert, db: Session = Depends(get_db),
 ):
     """Set or update one alias entry for the account."""
@@ -323,11 +325,12 @@ async def upsert_symbol_alias(
     aliases[payload.requested.strip()] = payload.resolved.strip()
     account.symbol_aliases = serialize_aliases(aliases)
     db.commit()
+    reference_cache.invalidate()
     return {"account_id": account.id, "aliases": aliases}
 
 
 @router.delete("/{account_id}/symbol-aliases/{requested}")
-async def delete_symbol_alias(account_id: int, requested: str, db: Session = Depends(get_db)):
+def delete_symbol_alias(account_id: int, requested: str, db: Session = Depends(get_db)):
     """Remove a single alias entry."""
     account = db.query(Account).filter(Account.id == account_id).first()
     if not account:
@@ -337,4 +340,5 @@ async def delete_symbol_alias(account_id: int, requested: str, db: Session = Dep
     aliases.pop(requested.upper(), None)
     account.symbol_aliases = serialize_aliases(aliases) if aliases else None
     db.commit()
+    reference_cache.invalidate()
     return {"account_id": account.id, "aliases": aliases}
@@ -1,26 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException  # noqa: F401 (HTTPException used below)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 from typing import Optional
 from collections import defaultdict
-from datetime import datetime, timedelta
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
 from app.database import get_db
 from app.models.accounts import Account
-from app.models.funds import FundProgram, FundPhaseRule
+from app.models.daily_account_stats import DailyAccountStats
+from app.models.funds import Fund, FundPhaseRule, FundProgram
 from app.models.equity_snapshot import EquitySnapshot
+from app.models.equity_rollup import EquityRollup
 from app.models.trade_record import TradeRecord
+from app.services.cold_archive import cold_archive
+from app.services.live_state import LIVE_TABLE, live_state
+from app.services.response_cache import response_cache
+from app.services.reference_cache import reference_cache
 from app.services.rule_checker import RuleChecker
-from app.services.mt5_provider import mt5 as _mt5
+from app.services import daily_stats, execution_timings, pnl_sync, trade_history, trade_stats
+from app.services.risk_of_ruin import MIN_TRADES, phase_rules, risk_of_ruin
+from app.services.downsample import lttb_indices
+from app.services.equity_rollups import RESOLUTIONS, TIER_RAW, bucket_start, select_tier
+from app.services.trade_history import TradeFilters, serialize_trade
 import logging
+import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+# Tables each cached response is built from (see `response_cache`).
+_SUMMARY_TABLES = (Account.__tablename__, LIVE_TABLE)
+_FUND_STATUS_TABLES = (
+    Account.__tablename__, Fund.__tablename__, FundProgram.__tablename__, FundPhaseRule.__tablename__, LIVE_TABLE,
+)
+_JOURNAL_TABLES = (DailyAccountStats.__tablename__,)
+_TRADE_HISTORY_TABLES = (TradeRecord.__tablename__,)
+
+
 @router.get("/summary")
-async def get_summary(db: Session = Depends(get_db)):
-    """Get analytics summary for all accounts (uses DB-stored values for speed)."""
-    accounts = db.query(Account).all()
+def get_summary(request: Request, db: Session = Depends(get_db)):
+    """Get analytics summary for all accounts (live values where a worker streams them, else DB-stored)."""
+    return response_cache.respond(request, _SUMMARY_TABLES, lambda: _summary(db))
+
+
+def _summary(db: Session) -> dict:
+    accounts = live_state.overlay(db.query(Account).all())
 
     total_balance = 0
     total_equity = 0
@@ -41,6 +68,7 @@ async def get_summary(db: Session = Depends(get_db)):
         "total_accounts": len(accounts),
         "fund_accounts": fund_accounts,
         "personal_accounts": personal_accounts,
+        "live_accounts": sum(1 for a in accounts if a.live),
         "total_balance": round(total_balance, 2),
         "total_equity": round(total_equity, 2),
         "total_profit": round(total_profit, 2),
@@ -57,70 +85,50 @@ def _status_label(current_pct: float, limit_pct: float) -> str:
 
 
 @router.get("/fund-status")
-async def get_fund_status(db: Session = Depends(get_db)):
-    """Get fund rule status for all fund accounts (no MT5 login, uses DB values)."""
-    accounts = (
+def get_fund_status(request: Request, db: Session = Depends(get_db)):
+    """Get fund rule status for all fund accounts (no MT5 login).
+
+    Balance, equity and margin come from the live state store for accounts
+    with a streaming worker, otherwise from the stored account values.
+    """
+    return response_cache.respond(request, _FUND_STATUS_TABLES, lambda: _fund_status(db))
+
+
+def _fund_status(db: Session) -> dict:
+    accounts = live_state.overlay(
         db.query(Account)
         .filter(Account.account_type == "fund", Account.fund_program_id.isnot(None))
-        .options(
-            joinedload(Account.fund_program).joinedload(FundProgram.fund),
-            joinedload(Account.fund_program).joinedload(FundProgram.phase_rules),
-        )
         .all()
     )
 
-    checker = RuleChecker(db)
+    programs = reference_cache.get(db).programs
+    margin_used = [a.live.margin_used_pct if a.live else 0.0 for a in accounts]
+    batch = RuleChecker(db).evaluate_account_rules(accounts, margin_used)
     results = []
 
-    for account in accounts:
+    for i, account in enumerate(accounts):
         balance = account.balance or 0
         equity = account.equity or 0
         starting_balance = account.starting_balance or balance
 
-        # Use tracked daily_open_equity if available, fall back to balance
-        daily_starting_equity = account.daily_open_equity if account.daily_open_equity else balance
-
-        rules = checker.check_account_rules(
-            account_type=account.account_type,
-            fund_program_id=account.fund_program_id,
-            current_phase=account.current_phase,
-            balance=balance,
-            equity=equity,
-            starting_balance=starting_balance,
-            daily_starting_equity=daily_starting_equity,
-        )
+        rules = batch.result(i)
 
         profit_info = {"achieved": False, "target": None, "current": 0, "progress": 0}
         if account.fund_program_id and account.current_phase:
-            profit_info = checker.check_profit_target(
-                fund_program_id=account.fund_program_id,
-                current_phase=account.current_phase,
-                starting_balance=starting_balance,
-                current_equity=equity,
-            )
-
-        # Use pre-loaded relationships (no N+1)
+            profit_info = batch.profit_target(i)
+
+        # Program metadata from the reference cache (no per-account queries)
         fund_name = None
         program_name = None
         daily_drawdown_limit = 0
         max_drawdown_limit = 0
 
-        program = account.fund_program
+        program = programs.get(account.fund_program_id)
         if program:
             program_name = program.program_name
-            if program.fund:
-                fund_name = program.fund.fund_name
-
-            # Find matching phase rule
-            phase_rule = None
-            if account.current_phase:
-                phase_rule = next(
-                    (r for r in program.phase_rules if r.phase_name == account.current_phase),
-                    None,
-                )
-            if not phase_rule and program.phase_rules:
-                phase_rule = min(program.phase_rules, key=lambda r: r.phase_order)
+            fund_name = program.fund_name or None
 
+            phase_rule = program.phase_or_first(account.current_phase)
             if phase_rule:
                 daily_drawdown_limit = phase_rule.daily_drawdown
                 max_drawdown_limit = phase_rule.max_drawdown
@@ -154,84 +162,149 @@ async def get_fund_status(db: Session = Depends(get_db)):
             "violations": rules.get("violations", []),
             "best_day_pct": rules.get("best_day_pct"),
             "best_day_limit": rules.get("best_day_limit"),
+            "live": account.live is not None,
+            "updated_at": account.live.updated_at.isoformat() if account.live else None,
         })
 
     return {"accounts": results}
 
 
-def _serialize_trade(t: TradeRecord) -> dict:
+@router.get("/pre-trade-status")
+def get_pre_trade_status(
+    risk_amount: float = Query(0.0, ge=0),
+    account_ids: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Pre-trade rule status of every fund account at one proposed risk amount.
+
+    Evaluated in one vectorised pass, cheap enough to call on every move of
+    a portfolio risk slider.
+    """
+    query = db.query(Account).filter(Account.account_type == "fund", Account.fund_program_id.isnot(None))
+    if account_ids:
+        try:
+            ids = [int(x) for x in account_ids.split(",") if x.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="account_ids must be a comma-separated list of ids")
+        query = query.filter(Account.id.in_(ids))
+    accounts = query.all()
+    batch = RuleChecker(db).evaluate_pre_trade(accounts, risk_amount)
     return {
-        "id": t.id,
-        "account_login": t.account_login,
-        "symbol": t.symbol,
-        "direction": t.direction,
-        "lot_size": t.lot_size,
-        "entry_price": t.entry_price,
-        "sl_price": t.sl_price,
-        "tp_price": t.tp_price,
-        "sl_pips": t.sl_pips,
-        "tp_pips": t.tp_pips,
-        "risk_pct": t.risk_pct,
-        "risk_amount": t.risk_amount,
-        "reward_amount": t.reward_amount,
-        "rr_ratio": t.rr_ratio,
-        "order_ticket": t.order_ticket,
-        "success": t.success,
-        "error_msg": t.error_msg,
-        "notes": t.notes,
-        "tags": t.tags,
-        "close_price": t.close_price,
-        "realized_pnl": t.realized_pnl,
-        "closed_at": t.closed_at.isoformat() if t.closed_at else None,
-        "executed_at": t.executed_at.isoformat() if t.executed_at else None,
+        "risk_amount": risk_amount,
+        "accounts": [
+            {"account_id": a.id, "account_login": a.account_id, **batch.status(i)}
+            for i, a in enumerate(accounts)
+        ],
     }
 
 
 @router.post("/sync-realized-pnl")
-async def sync_realized_pnl(db: Session = Depends(get_db)):
-    """Match closed MT5 deals to trade records by order ticket and fill realized_pnl."""
-    from app.services.mt5_singleton import mt5_service, get_connected_account_id
-    if not mt5_service.is_initialized or not get_connected_account_id():
+async def sync_realized_pnl():
+    """Mirror new MT5 deals locally and fill realized_pnl on matching trade records.
+
+    Every account with a live worker syncs in parallel through the pool; the
+    legacy connected account syncs over the in-process MT5 if it has no
+    worker. Each account only fetches deals since its watermark.
+    """
+    from app.services.worker_pool import pool
+
+    results = await pnl_sync.sync_connected(pool)
+    if not results:
         raise HTTPException(status_code=400, detail="MT5 must be connected to sync P&L")
 
-    # Pull all trade records that have an order ticket but no realized_pnl yet
-    pending = (
-        db.query(TradeRecord)
-        .filter(TradeRecord.order_ticket.isnot(None), TradeRecord.realized_pnl.is_(None))
-        .all()
-    )
-    if not pending:
-        return {"synced": 0, "message": "Nothing to sync"}
-
-    # Fetch last 365 days of MT5 history
-    date_from = datetime.now() - timedelta(days=365)
-    deals = _mt5.history_deals_get(date_from, datetime.now())
-    if deals is None:
-        raise HTTPException(status_code=500, detail="Failed to fetch MT5 deal history")
-
-    # Build lookup: order → list of OUT deals (closing deals)
-    from collections import defaultdict as _ddict
-    order_to_deal: dict = _ddict(list)
-    for d in deals:
-        # DEAL_ENTRY_OUT = 1 (closing deal)
-        if hasattr(d, "entry") and d.entry == 1:
-            order_to_deal[d.order].append(d)
-
-    synced = 0
-    for trade in pending:
-        closing_deals = order_to_deal.get(trade.order_ticket, [])
-        if not closing_deals:
-            continue
-        # Sum profit across all closing deals for this order (partial closes)
-        total_pnl = sum(d.profit + getattr(d, "commission", 0) + getattr(d, "swap", 0) for d in closing_deals)
-        last_deal = max(closing_deals, key=lambda d: d.time)
-        trade.realized_pnl = round(total_pnl, 2)
-        trade.close_price = last_deal.price
-        trade.closed_at = datetime.fromtimestamp(last_deal.time)
-        synced += 1
+    total_pending = sum(r.pending for r in results)
+    response = {
+        "synced": sum(r.synced for r in results),
+        "total_pending": total_pending,
+        "accounts": [r.as_dict() for r in results],
+    }
+    if total_pending == 0:
+        response["message"] = "Nothing to sync"
+    return response
 
-    db.commit()
-    return {"synced": synced, "total_pending": len(pending)}
+
+@router.get("/stats")
+def get_trade_stats(dimension: str = "all", account_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Performance statistics of closed trades per `dimension` group.
+
+    Served from the incrementally maintained `trade_stats` rows; with an
+    `account_id` the account's equity drawdown (daily rollups) is included.
+    """
+    if dimension not in trade_stats.DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of: {', '.join(trade_stats.DIMENSIONS)}")
+    return {
+        "dimension": dimension,
+        "account_id": account_id,
+        "groups": trade_stats.group_stats(db, dimension, account_id),
+        "equity_drawdown": trade_stats.equity_drawdown(db, account_id) if account_id is not None else None,
+    }
+
+
+@router.get("/execution-latency")
+def get_execution_latency(
+    days: int = Query(30, ge=1, le=365),
+    account_id: Optional[int] = None,
+    server: Optional[str] = None,
+    route: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """p50/p95/p99 per batch-trade stage (ms): overall, per route, per broker server, per account.
+
+    Stages: connect, resolve, quote, size, rules, margin, order, db, total;
+    plus fill slippage in points (positive = worse than requested). Prepared
+    tickets (`v2_ticket`) time only the execute request, so compare totals
+    within one route.
+    """
+    return execution_timings.latency_report(db, days, account_id, server, route)
+
+
+@router.get("/risk-of-ruin")
+def get_risk_of_ruin(
+    program_id: int,
+    phase: Optional[str] = None,
+    risk_pct: float = Query(1.0, gt=0, le=10),
+    account_id: Optional[int] = None,
+    paths: int = Query(100_000, ge=1_000, le=1_000_000),
+    max_days: int = Query(60, ge=1, le=250),
+    trades_per_day: Optional[int] = Query(None, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    """Monte-Carlo pass / breach probabilities of a fund phase at `risk_pct` per trade.
+
+    Paths resample the R-multiples of closed trades (one account's, or all);
+    trades per day default to the historical rate. Results are cached, so
+    a risk slider only pays for values it has not shown yet.
+    """
+    program = reference_cache.get(db).programs.get(program_id)
+    if program is None:
+        raise HTTPException(status_code=404, detail="Program not found")
+    rules = phase_rules(program, phase)
+    if rules is None:
+        raise HTTPException(status_code=404, detail="Phase not found")
+    dist = risk_of_ruin.distribution(db, account_id)
+    if len(dist.r_multiples) < MIN_TRADES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Need at least {MIN_TRADES} closed trades with a risk amount (have {len(dist.r_multiples)})",
+        )
+    per_day = trades_per_day or max(1, min(20, round(dist.trades_per_day)))
+    started = time.perf_counter()
+    summary, cached = risk_of_ruin.simulate(
+        (program_id, phase), rules, dist, risk_pct, paths, max_days, per_day,
+    )
+    return {
+        "program_id": program_id,
+        "phase": phase,
+        "risk_pct": risk_pct,
+        "account_id": account_id,
+        "max_days": max_days,
+        "trades_per_day": per_day,
+        "rules": asdict(rules),
+        "distribution": dist.as_dict(),
+        **summary,
+        "cached": cached,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
 
 
 class TradeNoteUpdate(BaseModel):
@@ -239,7 +312,7 @@ class TradeNoteUpdate(BaseModel):
 
 
 @router.patch("/trade/{trade_id}/note")
-async def update_trade_note(trade_id: int, data: TradeNoteUpdate, db: Session = Depends(get_db)):
+def update_trade_note(trade_id: int, data: TradeNoteUpdate, db: Session = Depends(get_db)):
     """Update the notes field on a trade record."""
     trade = db.query(TradeRecord).filter(TradeRecord.id == trade_id).first()
     if not trade:
@@ -254,12 +327,17 @@ class TradeTagsUpdate(BaseModel):
 
 
 @router.patch("/trade/{trade_id}/tags")
-async def update_trade_tags(trade_id: int, data: TradeTagsUpdate, db: Session = Depends(get_db)):
+def update_trade_tags(trade_id: int, data: TradeTagsUpdate, db: Session = Depends(get_db)):
     """Update the tags field on a trade record."""
     trade = db.query(TradeRecord).filter(TradeRecord.id == trade_id).first()
     if not trade:
         raise HTTPException(status_code=404, detail="Trade not found")
+    old_tags = trade.tags
     trade.tags = data.tags.strip()
+    if trade.realized_pnl is not None:
+        changed = set(trade_stats.tag_keys(old_tags)) ^ set(trade_stats.tag_keys(trade.tags))
+        if changed:
+            trade_stats.recompute(db, trade.account_db_id, {("tag", t) for t in changed})
     db.commit()
     return {"id": trade_id, "tags": trade.tags}
 
@@ -270,7 +348,7 @@ class AccountAnalyticsUpdate(BaseModel):
 
 
 @router.patch("/account/{account_id}")
-async def update_account_analytics(
+def update_account_analytics(
     account_id: int,
     data: AccountAnalyticsUpdate,
     db: Session = Depends(get_db),
@@ -292,104 +370,198 @@ async def update_account_analytics(
 
 
 @router.get("/equity-curve")
-async def get_equity_curve(account_id: Optional[int] = None, limit: int = 500, db: Session = Depends(get_db)):
-    """Get equity curve snapshots. Optionally filter by account DB id."""
-    query = db.query(EquitySnapshot)
+def get_equity_curve(
+    account_id: Optional[int] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    max_points: int = Query(500, ge=3, le=5000),
+    resolution: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Equity curve over [from, to] as columnar series, one per account.
+
+    Reads the finest tier (raw, 5m, 1h, 1d) that still has enough points for
+    the window — `resolution` forces one — then LTTB-downsamples each account
+    to at most `max_points`. Defaults: `to` = now, `from` = first day on record.
+    """
+    if resolution is not None and resolution != TIER_RAW and resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of: raw, {', '.join(RESOLUTIONS)}")
+    end = _naive_utc(to) if to else datetime.utcnow()
+    start = _naive_utc(from_) if from_ else _first_equity_day(db, account_id) or end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    # Oversample the source tier so the downsampler has shape to choose from.
+    tier = resolution or select_tier(start, end, max_points * 4)
+
+    if tier == TIER_RAW:
+        def raw(session: Session) -> list:
+            q = session.query(
+                EquitySnapshot.account_db_id, EquitySnapshot.recorded_at,
+                EquitySnapshot.equity, EquitySnapshot.balance,
+            ).filter(EquitySnapshot.recorded_at >= start, EquitySnapshot.recorded_at <= end)
+            if account_id is not None:
+                q = q.filter(EquitySnapshot.account_db_id == account_id)
+            return q.order_by(EquitySnapshot.account_db_id, EquitySnapshot.recorded_at).all()
+
+        rows = raw(db)
+        with cold_archive.sessions(EquitySnapshot.__tablename__, start, end + timedelta(microseconds=1)) as archived:
+            if archived:
+                for _, session in archived:
+                    rows.extend(raw(session))
+                rows.sort(key=lambda r: (r[0], r[1]))
+    else:
+        q = db.query(
+            EquityRollup.account_db_id, EquityRollup.bucket_start,
+            EquityRollup.close_equity, EquityRollup.close_balance,
+        ).filter(
+            EquityRollup.resolution == tier,
+            EquityRollup.bucket_start >= bucket_start(start, RESOLUTIONS[tier]),
+            EquityRollup.bucket_start <= end,
+        )
+        if account_id is not None:
+            q = q.filter(EquityRollup.account_db_id == account_id)
+        rows = q.order_by(EquityRollup.account_db_id, EquityRollup.bucket_start).all()
+
+    by_account: dict = defaultdict(list)
+    for row in rows:
+        by_account[row[0]].append(row)
+
+    series = []
+    for acc_id, acc_rows in by_account.items():
+        xs = [r[1].timestamp() for r in acc_rows]
+        keep = lttb_indices(xs, [r[2] for r in acc_rows], max_points)
+        series.append({
+            "account_db_id": acc_id,
+            "times": [acc_rows[i][1].isoformat() for i in keep],
+            "equity": [acc_rows[i][2] for i in keep],
+            "balance": [acc_rows[i][3] for i in keep],
+        })
+    return {"tier": tier, "from": start.isoformat(), "to": end.isoformat(), "series": series}
+
+
+def _naive_utc(dt: datetime) -> datetime:
+    """Stored timestamps are naive UTC; normalise client-supplied aware values."""
+    return dt.astimezone(timezone.utc).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def _first_equity_day(db: Session, account_id: Optional[int]) -> Optional[datetime]:
+    q = db.query(func.min(EquityRollup.bucket_start)).filter(EquityRollup.resolution == "1d")
     if account_id is not None:
-        query = query.filter(EquitySnapshot.account_db_id == account_id)
-    snapshots = query.order_by(EquitySnapshot.recorded_at.asc()).limit(limit).all()
-
-    data = [
-        {
-            "time": s.recorded_at.isoformat() if s.recorded_at else None,
-            "balance": s.balance,
-            "equity": s.equity,
-            "profit": s.profit,
-            "account_db_id": s.account_db_id,
-        }
-        for s in snapshots
-    ]
-    return {"data": data}
+        q = q.filter(EquityRollup.account_db_id == account_id)
+    return q.scalar()
 
 
 @router.get("/journal")
-async def get_journal(
+def get_journal(
+    request: Request,
     account_id: Optional[int] = None,
     days: int = 90,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
     db: Session = Depends(get_db),
 ):
-    """Get trading journal grouped by day. Returns JournalDay objects with trade + balance data."""
-    cutoff = datetime.utcnow() - timedelta(days=days)
-
-    # Trade records
-    trade_query = db.query(TradeRecord).filter(TradeRecord.executed_at >= cutoff)
-    if account_id is not None:
-        trade_query = trade_query.filter(TradeRecord.account_db_id == account_id)
-    all_trades = trade_query.order_by(TradeRecord.executed_at.asc()).all()
-
-    # Equity snapshots for balance_change
-    snap_query = db.query(EquitySnapshot).filter(EquitySnapshot.recorded_at >= cutoff)
+    """Trading journal grouped by day, newest first, from `daily_account_stats`.
+
+    Pages with `before` (exclusive YYYY-MM-DD) + `limit`; `next_before` is set
+    when more days remain. Trades are not inlined — fetch them per day from
+    `/journal/{day}/trades`.
+    """
+    since_day = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+    page_size = limit or days + 1
+
+    def build() -> dict:
+        page = daily_stats.journal_page(db, since_day, account_id=account_id, before=before, limit=page_size)
+        next_before = page[-1]["date"] if len(page) == page_size else None
+        return {"days": page, "next_before": next_before}
+
+    return response_cache.respond(request, _JOURNAL_TABLES, build, vary=(since_day,))
+
+
+@router.get("/journal/{day}/trades")
+def get_journal_day_trades(day: str, account_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Trades executed on one UTC day (lazy companion of `/journal`)."""
+    try:
+        start = datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="day must be YYYY-MM-DD")
+    end = start + timedelta(days=1)
+
+    def day_trades(session: Session) -> list[TradeRecord]:
+        query = session.query(TradeRecord).filter(TradeRecord.executed_at >= start, TradeRecord.executed_at < end)
+        if account_id is not None:
+            query = query.filter(TradeRecord.account_db_id == account_id)
+        return query.order_by(TradeRecord.executed_at.asc()).all()
+
+    trades = day_trades(db)
+    with cold_archive.sessions(TradeRecord.__tablename__, start, end) as archived:
+        for _, session in archived:
+            trades.extend(day_trades(session))
+        trades.sort(key=lambda t: (t.executed_at, t.id))
+        return {"date": day, "trades": [serialize_trade(t) for t in trades]}
+
+
+def _trade_filters(
+    account_id: Optional[int] = None,
+    account_ids: Optional[str] = None,
+    symbol: Optional[str] = None,
+    success: Optional[bool] = None,
+    tag: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> TradeFilters:
+    """Shared trade-history filters. `account_ids` is a comma list; `account_id` kept for old clients."""
+    ids: list[int] = []
+    if account_ids:
+        try:
+            ids = [int(x) for x in account_ids.split(",") if x.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="account_ids must be a comma-separated list of ids")
     if account_id is not None:
-        snap_query = snap_query.filter(EquitySnapshot.account_db_id == account_id)
-    all_snaps = snap_query.order_by(EquitySnapshot.recorded_at.asc()).all()
-
-    # Group snapshots by day → list of balance floats (already asc)
-    snap_by_day: dict = defaultdict(list)
-    for s in all_snaps:
-        if s.recorded_at:
-            snap_by_day[s.recorded_at.date().isoformat()].append(s.balance)
-
-    # Group trades by day
-    trade_by_day: dict = defaultdict(list)
-    for t in all_trades:
-        if t.executed_at:
-            trade_by_day[t.executed_at.date().isoformat()].append(t)
-
-    # All active days (newest first)
-    all_days = sorted(
-        set(list(snap_by_day.keys()) + list(trade_by_day.keys())),
-        reverse=True,
+        ids.append(account_id)
+    return TradeFilters(
+        account_ids=tuple(ids) or None,
+        symbol=symbol or None,
+        success=success,
+        tag=tag or None,
+        date_from=_naive_utc(date_from) if date_from else None,
+        date_to=_naive_utc(date_to) if date_to else None,
     )
 
-    journal_days = []
-    for day in all_days:
-        day_trades = trade_by_day.get(day, [])
-        day_snaps = snap_by_day.get(day, [])
-
-        symbols = list(dict.fromkeys(t.symbol for t in day_trades))
-        rr_vals = [t.rr_ratio for t in day_trades if t.rr_ratio and t.rr_ratio > 0]
-        total_risk = sum((t.risk_amount or 0) for t in day_trades if t.success)
 
-        if len(day_snaps) >= 2:
-            balance_change: Optional[float] = round(day_snaps[-1] - day_snaps[0], 2)
-        elif len(day_snaps) == 1:
-            balance_change = 0.0
-        else:
-            balance_change = None
-
-        journal_days.append({
-            "date": day,
-            "trade_count": len(day_trades),
-            "success_count": sum(1 for t in day_trades if t.success),
-            "symbols": symbols,
-            "buy_count": sum(1 for t in day_trades if t.direction == "BUY"),
-            "sell_count": sum(1 for t in day_trades if t.direction == "SELL"),
-            "total_lots": round(sum(t.lot_size for t in day_trades), 2),
-            "total_risk": round(total_risk, 2),
-            "avg_rr": round(sum(rr_vals) / len(rr_vals), 2) if rr_vals else None,
-            "balance_change": balance_change,
-            "trades": [_serialize_trade(t) for t in day_trades],
-        })
+@router.get("/trade-history")
+def get_trade_history(
+    request: Request,
+    filters: TradeFilters = Depends(_trade_filters),
+    cursor: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """Trade records newest first, one keyset page at a time.
 
-    return {"days": journal_days}
+    Pass the returned `next_cursor` back as `cursor` for the next page; it is
+    null on the last page.
+    """
+    def build() -> dict:
+        try:
+            trades, next_cursor = trade_history.page(db, filters, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"trades": [serialize_trade(t) for t in trades], "next_cursor": next_cursor}
 
+    return response_cache.respond(request, _TRADE_HISTORY_TABLES, build)
 
-@router.get("/trade-history")
-async def get_trade_history(account_id: Optional[int] = None, limit: int = 200, db: Session = Depends(get_db)):
-    """Get trade records. Optionally filter by account DB id."""
-    query = db.query(TradeRecord)
-    if account_id is not None:
-        query = query.filter(TradeRecord.account_db_id == account_id)
-    trades = query.order_by(TradeRecord.executed_at.desc()).limit(limit).all()
 
-    return {"trades": [_serialize_trade(t) for t in trades]}
+@router.get("/trade-history/export")
+def export_trade_history(
+    filters: TradeFilters = Depends(_trade_filters),
+    fmt: str = Query("csv", alias="format"),
+):
+    """Stream every matching trade as CSV or NDJSON."""
+    if fmt not in trade_history.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(trade_history.EXPORT_FORMATS)}")
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        trade_history.iter_export(filters, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="trade-history.{fmt}"'},
+    )
@@ -6,6 +6,7 @@ from app.database import get_db
 from app.models.funds import Fund, FundProgram, FundPhaseRule
 from app.schemas import FundCreate, FundResponse, FundFromTemplateRequest
 from app.services.fund_templates import load_templates
+from app.services.reference_cache import reference_cache
 
 router = APIRouter()
 
@@ -57,12 +58,13 @@ def _create_fund_from_data(data: dict, db: Session) -> Fund:
             db.add(rule)
 
     db.commit()
+    reference_cache.invalidate()
     db.refresh(fund)
     return fund
 
 
 @router.get("/", response_model=List[FundResponse])
-async def get_funds(db: Session = Depends(get_db)):
+def get_funds(db: Session = Depends(get_db)):
     """Get all funds with programs and phase rules"""
     funds = (
         db.query(Fund)
@@ -73,7 +75,7 @@ async def get_funds(db: Session = Depends(get_db)):
 
 
 @router.post("/refresh-templates")
-async def refresh_templates(db: Session = Depends(get_db)):
+def refresh_templates(db: Session = Depends(get_db)):
     """Upsert all hard-coded templates into the DB (delete existing + recreate)."""
     updated = []
     errors = []
@@ -92,7 +94,7 @@ async def refresh_templates(db: Session = Depends(get_db)):
 
 
 @router.post("/from-template", response_model=FundResponse)
-async def create_fund_from_template(
+def create_fund_from_template(
     request: FundFromTemplateRequest, db: Session = Depends(get_db)
 ):
     """Create a fund from a template"""
@@ -120,7 +122,7 @@ async def create_fund_from_template(
 
 
 @router.post("/", response_model=FundResponse)
-async def create_fund(fund_data: FundCreate, db: Session = Depends(get_db)):
+def create_fund(fund_data: FundCreate, db: Session = Depends(get_db)):
     """Create new fund with programs and phase rules"""
     existing = db.query(Fund).filter(Fund.fund_name == fund_data.fund_name).first()
     if existing:
@@ -139,7 +141,7 @@ async def create_fund(fund_data: FundCreate, db: Session = Depends(get_db)):
 
 
 @router.delete("/{fund_id}")
-async def delete_fund(fund_id: int, db: Session = Depends(get_db)):
+def delete_fund(fund_id: int, db: Session = Depends(get_db)):
     """Delete fund and all its programs/rules"""
     fund = db.query(Fund).filter(Fund.id == fund_id).first()
     if not fund:
@@ -147,5 +149,6 @@ async def delete_fund(fund_id: int, db: Session = Depends(get_db)):
 
     db.delete(fund)
     db.commit()
+    reference_cache.invalidate()
 
     return {"message": "Fund deleted successfully"}
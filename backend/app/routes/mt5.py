@@ -1,10 +1,12 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional
 from app.database import get_db
 from app.models.accounts import Account
 from app.models.funds import FundProgram
+from app.services import deal_history
 from app.services.mt5_auth import login_account
 from app.services.mt5_singleton import (
     mt5_service,
@@ -15,8 +17,9 @@ from app.websocket import manager
 import asyncio
 import json
 import logging
-from app.utils.async_helpers import run_mt5, run_db
+from app.utils.async_helpers import AsyncDB, get_async_db, run_mt5, run_db
 from app.services.mt5_provider import mt5 as _mt5
+from app.services.symbol_catalog import ServerCatalog, account_server, symbol_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -63,11 +66,11 @@ class TrailingStopRequest(BaseModel):
 
 
 @router.post("/connect")
-async def connect_mt5(request: ConnectRequest, db: Session = Depends(get_db)):
+async def connect_mt5(request: ConnectRequest, adb: AsyncDB = Depends(get_async_db)):
     """Connect to MT5 account. Shuts down any existing connection first."""
     account_id = request.account_id
 
-    account = db.query(Account).filter(Account.id == account_id).first()
+    account = await adb.run(lambda db: db.query(Account).filter(Account.id == account_id).first())
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -99,7 +102,7 @@ async def connect_mt5(request: ConnectRequest, db: Session = Depends(get_db)):
         account.balance = info.get("balance")
         account.equity = info.get("equity")
         account.profit = info.get("profit")
-        db.commit()
+        await adb.run(lambda db: db.commit())
 
     return {
         "success": True,
@@ -212,17 +215,18 @@ async def list_trailing_stops():
 
 
 @router.get("/risk-status")
-async def get_risk_status(db: Session = Depends(get_db)):
+async def get_risk_status(adb: AsyncDB = Depends(get_async_db)):
     """Live drawdown status for the connected account (uses live MT5 equity)."""
     if not get_connected_account_id() or not mt5_service.is_initialized:
         raise HTTPException(status_code=400, detail="No MT5 account connected")
 
-    account = (
+    connected_id = get_connected_account_id()
+    account = await adb.run(lambda db: (
         db.query(Account)
-        .filter(Account.id == get_connected_account_id())
+        .filter(Account.id == connected_id)
         .options(joinedload(Account.fund_program).joinedload(FundProgram.phase_rules))
         .first()
-    )
+    ))
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
 
@@ -264,49 +268,60 @@ async def get_risk_status(db: Session = Depends(get_db)):
 
 @router.get("/symbols")
 async def search_symbols(search: str = ""):
-    """Search available MT5 symbols. Requires an active connection."""
+    """Search available MT5 symbols. Requires an active connection.
+
+    Served from the connected account's server catalog when one is loaded,
+    so typing in the symbol box does not call `symbols_get` per keystroke.
+    Without one, the terminal's full list is matched the same way (case-
+    insensitive, prefix matches first) rather than as an MT5 group pattern.
+    """
     if not mt5_service.is_initialized:
         raise HTTPException(status_code=400, detail="MT5 not connected")
 
-    symbols = await run_mt5(_mt5.symbols_get, search) if search else await run_mt5(_mt5.symbols_get)
+    account_id = get_connected_account_id()
+    catalog = symbol_catalog.get(await run_db(account_server, account_id)) if account_id else None
+    if catalog is not None:
+        return catalog.search(search, 60)
+
+    symbols = await run_mt5(_mt5.symbols_get)
     if not symbols:
         return []
-    return [s.name for s in symbols[:60]]
+    return ServerCatalog("", "", ({"name": s.name} for s in symbols), memo_entries=0).search(search, 60)
 
 
-@router.get("/history")
-async def get_mt5_history(days: int = 30):
-    """Pull closed deals directly from MT5 terminal for the last N days."""
-    if not mt5_service.is_initialized or not get_connected_account_id():
+def _history_account(account_id: Optional[int]) -> int:
+    account_id = account_id or get_connected_account_id()
+    if not account_id:
         raise HTTPException(status_code=400, detail="No MT5 account connected")
+    return account_id
 
-    from datetime import timedelta
-    date_from = datetime.now() - timedelta(days=days)
-    deals = await run_mt5(_mt5.history_deals_get, date_from, datetime.now())
-    if deals is None:
-        return []
 
-    result = []
-    for d in deals:
-        # Only include actual buy/sell deals, not balance/credit/bonus ops
-        if d.type not in (_mt5.DEAL_TYPE_BUY, _mt5.DEAL_TYPE_SELL):
-            continue
-        result.append({
-            "ticket": d.ticket,
-            "order": d.order,
-            "time": datetime.fromtimestamp(d.time).isoformat(),
-            "symbol": d.symbol,
-            "type": "BUY" if d.type == _mt5.DEAL_TYPE_BUY else "SELL",
-            "volume": d.volume,
-            "price": d.price,
-            "sl": d.sl,
-            "tp": d.tp,
-            "profit": d.profit,
-            "commission": d.commission,
-            "swap": d.swap,
-            "comment": d.comment,
-        })
-    return result
+@router.get("/history")
+def get_mt5_history(
+    days: int = 30,
+    account_id: Optional[int] = None,
+    symbol: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Closed buy/sell deals of the last N days, from the local deal mirror.
+
+    The mirror is filled by the realized-P&L sync, so this never waits on the
+    terminal; `account_id` defaults to the connected account.
+    """
+    account_id = _history_account(account_id)
+    since = datetime.now() - timedelta(days=days)
+    return [
+        deal_history.serialize_deal(d)
+        for d in deal_history.history(db, account_id, since, symbol=symbol)
+    ]
+
+
+@router.get("/history/summary")
+def get_mt5_history_summary(days: int = 30, account_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Per-symbol totals of closing deals over the last N days, from the deal mirror."""
+    account_id = _history_account(account_id)
+    since = datetime.now() - timedelta(days=days)
+    return deal_history.summary(db, account_id, since)
 
 
 @router.get("/server-time")
@@ -10,16 +10,43 @@ Differences from v1:
 - /status — list of active workers, not single connected_account_id.
 - /stream — WebSocket broadcasting events from ALL active workers, tagged
   with account_db_id.
+- /refresh-all — refreshes every account in parallel (temporary workers for
+  inactive accounts), streams per-account progress as Server-Sent Events.
+- /positions/bulk — close / partial-close / move SL-TP on filtered positions
+  across many accounts, one worker RPC per account, all in parallel.
+- /live — latest tick state of every streaming account, from memory.
+- /exposure — net lots, notional and open risk per symbol, account and
+  account group across all streaming accounts (also pushed on /stream as
+  `exposure` events when positions change).
+- /symbols — symbol autocomplete from the per-server catalog (prefix then
+  substring matches), refreshed when a worker connects.
+- /rules/{account_db_id} — trailing / break-even / scale-out rules evaluated
+  inside the account's worker on every tick (see workers/position_rules.py).
 """
 from __future__ import annotations
 
 import asyncio
 import json
 import logging
+import time
+from dataclasses import asdict
+from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from app.config import REFRESH_CONCURRENCY
+from app.database import SessionLocal
+from app.models.accounts import Account
+from app.services.account_refresh import RefreshOutcome, apply_refresh_results, refresh_accounts
+from app.services.bulk_positions import run_bulk
+from app.services.exposure import exposure, exposure_limits
+from app.services.live_state import live_state
+from app.services.reference_cache import reference_cache
+from app.services.symbol_catalog import account_server, symbol_catalog
 from app.services.worker_pool import WorkerError, WorkerLimitReached, WorkerNotRunning, pool
+from app.utils.async_helpers import run_db
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +98,90 @@ async def status():
     }
 
 
+@router.get("/live")
+async def live():
+    """Latest tick state (balance, equity, margin, positions) of every streaming account."""
+    return {str(aid): state.as_dict() for aid, state in sorted(live_state.snapshot().items())}
+
+
+def _exposure_groups(account_db_ids: list[int]) -> tuple[dict[int, str], dict[int, str], dict]:
+    """(login by account, group by account, settings): fund accounts group by fund name."""
+    db = SessionLocal()
+    try:
+        ref = reference_cache.get(db)
+        logins: dict[int, str] = {}
+        groups: dict[int, str] = {}
+        if account_db_ids:
+            rows = (
+                db.query(Account.id, Account.account_id, Account.fund_program_id)
+                .filter(Account.id.in_(account_db_ids))
+                .all()
+            )
+            for aid, login, program_id in rows:
+                logins[aid] = login
+                program = ref.programs.get(program_id) if program_id else None
+                groups[aid] = program.fund_name if program else "personal"
+        return logins, groups, ref.settings
+    finally:
+        db.close()
+
+
+@router.get("/exposure")
+async def exposure_view():
+    """Net exposure and open risk across streaming accounts, from memory."""
+    accounts = exposure.account_totals()
+    logins, groups, settings = await run_db(_exposure_groups, list(accounts))
+    max_net_lots, max_open_risk = exposure_limits(settings)
+    return {
+        "symbols": exposure.symbol_totals(),
+        "accounts": {
+            str(aid): {"account_id": logins.get(aid), "group": groups.get(aid, "personal"), "symbols": symbols}
+            for aid, symbols in accounts.items()
+        },
+        "groups": exposure.group_totals(groups),
+        "total_open_risk": round(exposure.total_open_risk(), 2),
+        "limits": {"max_net_lots": max_net_lots, "max_open_risk": max_open_risk},
+    }
+
+
+@router.get("/symbols")
+async def symbols(
+    q: str = "",
+    account_db_id: Optional[int] = None,
+    server: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=200),
+):
+    """Autocomplete from the broker server's symbol catalog (by `server` or an account's).
+
+    With `account_db_id` the server is the account's; a different `server`
+    is rejected. A server without a catalog yet is fetched through the
+    account's worker when it is running.
+    """
+    if account_db_id is not None:
+        account_srv = await run_db(account_server, account_db_id)
+        if account_srv is None:
+            raise HTTPException(status_code=404, detail="account not found")
+        if server is not None and server != account_srv:
+            raise HTTPException(status_code=400, detail=f"account {account_db_id} is on server {account_srv}, not {server}")
+        server = account_srv
+    elif server is None:
+        raise HTTPException(status_code=400, detail="server or account_db_id required")
+    catalog = symbol_catalog.get(server)
+    if catalog is None and account_db_id is not None and pool.is_active(account_db_id):
+        try:
+            await symbol_catalog.refresh(pool, account_db_id, server)
+        except (WorkerError, WorkerNotRunning, asyncio.TimeoutError) as e:
+            raise HTTPException(status_code=503, detail=f"symbol catalog unavailable: {e}")
+        catalog = symbol_catalog.get(server)
+    if catalog is None:
+        raise HTTPException(status_code=404, detail=f"no symbol catalog for server {server}")
+    names = catalog.search(q, limit)
+    return {
+        "server": server,
+        "symbols": [{**catalog.spec(name), "description": catalog.entries[name].get("description")} for name in names],
+    }
+
+
 @router.post("/call/{account_db_id}/{method}")
 async def call_worker(account_db_id: int, method: str, params: dict | None = None):
     """Generic RPC bridge — useful for ad-hoc commands and debugging.
@@ -94,7 +205,7 @@ async def stream(websocket: WebSocket):
     """Broadcast events from all worker processes to the connected client.
 
     Message format on the wire:
-        {"account_db_id": <int>, "event": "tick" | "health", "data": {...}}
+        {"account_db_id": <int>, "event": "tick" | "health" | "exposure", "data": {...}}
     """
     await websocket.accept()
     queue = await pool.subscribe()
@@ -114,3 +225,171 @@ async def stream(websocket: WebSocket):
         logger.warning("v2 stream error: %s", e)
     finally:
         await pool.unsubscribe(queue)
+
+
+# ── /refresh-all — parallel refresh streamed as SSE ──────────────────────────
+def _load_account_refs() -> list[tuple[int, str]]:
+    db = SessionLocal()
+    try:
+        return [(a.id, a.account_id) for a in db.query(Account.id, Account.account_id).all()]
+    finally:
+        db.close()
+
+
+def _persist_refresh(outcomes: list[RefreshOutcome]) -> dict[int, dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        return apply_refresh_results(db, outcomes)
+    finally:
+        db.close()
+
+
+def _outcome_payload(o: RefreshOutcome) -> dict[str, Any]:
+    info = o.info or {}
+    payload: dict[str, Any] = {
+        "id": o.account_db_id,
+        "account_id": o.account_id,
+        "status": o.status,
+        "elapsed_ms": o.elapsed_ms,
+        "temporary_worker": o.temporary_worker,
+    }
+    if o.status == "success":
+        payload.update({
+            "mt5_name": info.get("name", ""),
+            "balance": info.get("balance", 0),
+            "equity": info.get("equity", 0),
+            "profit": info.get("profit", 0),
+            "positions_count": o.positions_count,
+        })
+    else:
+        payload["error"] = o.error
+    return payload
+
+
+def _sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/refresh-all")
+async def refresh_all():
+    """Refresh every account in parallel and stream progress as Server-Sent Events.
+
+    Events:
+        progress — one per account as soon as it finishes
+        done     — final summary after all results are committed in one batch
+    """
+    accounts = await run_db(_load_account_refs)
+
+    concurrency = REFRESH_CONCURRENCY
+    free = pool.free_slots()
+    if free is not None:
+        # Capped servers (Linux/Wine) can't run more temporary workers than free slots.
+        concurrency = max(1, min(concurrency, free))
+
+    async def event_stream():
+        started = time.perf_counter()
+        outcomes: list[RefreshOutcome] = []
+        async for outcome in refresh_accounts(pool, accounts, concurrency=concurrency):
+            outcomes.append(outcome)
+            yield _sse("progress", _outcome_payload(outcome))
+
+        try:
+            updated = await run_db(_persist_refresh, outcomes)
+        except Exception as e:
+            logger.exception("refresh-all batch write failed")
+            yield _sse("error", {"message": f"failed to save results: {e}"})
+            return
+
+        results = []
+        for o in outcomes:
+            payload = _outcome_payload(o)
+            payload.update(updated.get(o.account_db_id, {}))
+            results.append(payload)
+        yield _sse("done", {
+            "results": results,
+            "total": len(outcomes),
+            "successful": sum(1 for o in outcomes if o.status == "success"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ── /positions/bulk — cross-account bulk operations ──────────────────────────
+class BulkPositionsRequest(BaseModel):
+    op: str                                   # close | partial_close | modify
+    account_ids: Optional[list[int]] = None   # default: every active worker
+    symbol: Optional[str] = None
+    direction: Optional[str] = None           # BUY | SELL
+    magic: Optional[int] = None
+    comment: Optional[str] = None
+    fraction: Optional[float] = None          # partial_close
+    sl: Optional[float] = None                # modify
+    tp: Optional[float] = None                # modify
+    sl_to_entry: bool = False                 # modify: stop to open price
+
+
+@router.post("/positions/bulk")
+async def bulk_positions(req: BulkPositionsRequest):
+    """Run one operation on all matching positions across accounts in parallel.
+
+    Each account's worker filters and executes locally; the response lists
+    per-account status, counts, per-ticket results and elapsed time.
+    """
+    account_ids = req.account_ids if req.account_ids is not None else sorted(pool.active_account_ids())
+    position_filter = {"symbol": req.symbol, "direction": req.direction, "magic": req.magic, "comment": req.comment}
+    params = {"fraction": req.fraction, "sl": req.sl, "tp": req.tp, "sl_to_entry": req.sl_to_entry}
+
+    started = time.perf_counter()
+    try:
+        outcomes = await run_bulk(pool, account_ids, req.op, position_filter, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "op": req.op,
+        "accounts": [asdict(o) for o in outcomes],
+        "matched": sum(o.matched for o in outcomes),
+        "succeeded": sum(o.succeeded for o in outcomes),
+        "failed": sum(o.failed for o in outcomes),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+# ── /rules — worker-resident position management ─────────────────────────────
+class PositionRuleRequest(BaseModel):
+    ticket: int
+    kind: str                  # trailing | breakeven | scale_out
+    params: dict[str, Any] = {}
+
+
+async def _rule_call(account_db_id: int, method: str, params: dict[str, Any]) -> Any:
+    try:
+        return await pool.call(account_db_id, method, params, timeout=10.0)
+    except WorkerNotRunning:
+        raise HTTPException(status_code=409, detail="worker not running")
+    except WorkerError as e:
+        raise HTTPException(status_code=400, detail={"code": e.code, "message": e.message})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="worker call timed out")
+
+
+@router.post("/rules/{account_db_id}")
+async def set_position_rule(account_db_id: int, req: PositionRuleRequest):
+    """Attach a rule to an open position. Persisted; survives worker respawn."""
+    rule = await _rule_call(account_db_id, "set_position_rule", req.model_dump())
+    return {"account_db_id": account_db_id, "rule": rule}
+
+
+@router.get("/rules/{account_db_id}")
+async def list_position_rules(account_db_id: int):
+    rules = await _rule_call(account_db_id, "list_position_rules", {})
+    return {"account_db_id": account_db_id, "rules": rules}
+
+
+@router.delete("/rules/{account_db_id}/{rule_id}")
+async def remove_position_rule(account_db_id: int, rule_id: int):
+    return await _rule_call(account_db_id, "remove_position_rule", {"rule_id": rule_id})
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.funds import Fund
+from app.services.reference_cache import reference_cache
 from app.services.settings import (
     KEY_DEFAULT_MT5_BASE_PATH,
     KEY_DEFAULT_TERMINALS_DIR,
@@ -29,7 +30,7 @@ class PathPayload(BaseModel):
 
 
 @router.get("")
-async def list_settings(db: Session = Depends(get_db)):
+def list_settings(db: Session = Depends(get_db)):
     """Return all known app settings + their current values + per-fund overrides."""
     settings = get_all_settings(db)
     fund_overrides = [
@@ -45,7 +46,7 @@ async def list_settings(db: Session = Depends(get_db)):
 
 
 @router.put("/{key}")
-async def upsert_setting(key: str, payload: SettingUpdate, db: Session = Depends(get_db)):
+def upsert_setting(key: str, payload: SettingUpdate, db: Session = Depends(get_db)):
     if key not in KNOWN_KEYS:
         raise HTTPException(status_code=400, detail=f"unknown setting key: {key}")
     set_setting(db, key, payload.value)
@@ -83,12 +84,13 @@ async def validate_terminals_dir(payload: PathPayload):
 
 # ── Per-fund MT5 base path override ───────────────────────────────────────────
 @router.put("/funds/{fund_id}/mt5-base-path")
-async def set_fund_mt5_base_path(fund_id: int, payload: PathPayload, db: Session = Depends(get_db)):
+def set_fund_mt5_base_path(fund_id: int, payload: PathPayload, db: Session = Depends(get_db)):
     fund = db.query(Fund).filter(Fund.id == fund_id).first()
     if not fund:
         raise HTTPException(status_code=404, detail="fund not found")
     fund.mt5_base_path = payload.path.strip() or None
     db.commit()
+    reference_cache.invalidate()
     return {
         "fund_id": fund.id,
         "fund_name": fund.fund_name,
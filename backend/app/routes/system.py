@@ -1,58 +1,128 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+import datetime
 import os
-import shutil
 import logging
-from app.database import _db_path, engine, SessionLocal, Base
+from typing import Optional
+from app.database import _db_path, engine, Base
+from app.config import ARCHIVE_AFTER_DAYS
+from app.services import db_backup
+from app.services.cold_archive import cold_archive
+from app.services.db_writer import db_writer
+from app.services.reference_cache import reference_cache
+from app.services.table_versions import table_versions
+from app.utils.async_helpers import run_db
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-SQLITE_MAGIC = b"SQLite format 3\x00"
+_BACKUP_MEDIA_TYPES = {
+    "db": "application/octet-stream",
+    "db.gz": "application/gzip",
+    "tar": "application/x-tar",
+    "tar.gz": "application/gzip",
+}
 
 
 @router.get("/backup")
-async def backup_database():
-    """Download the SQLite database file."""
+async def backup_database(compress: bool = False):
+    """Download a consistent online backup of the database (optionally gzipped).
+
+    Once anything has been archived the download is a tar bundle of the
+    database and the `archive/` directory.
+    """
     if not os.path.exists(_db_path):
         raise HTTPException(status_code=404, detail="Database file not found")
 
-    filename = f"traderdiary-backup-{__import__('datetime').date.today().isoformat()}.db"
+    try:
+        if not os.path.exists(cold_archive.manifest_path):
+            path = await run_db(db_backup.create_backup, _db_path, compress=compress)
+            ext = "db.gz" if compress else "db"
+        else:
+            hot = await run_db(db_backup.create_backup, _db_path)
+            try:
+                archived = await db_writer.run(
+                    lambda _s: db_backup.snapshot_archive(cold_archive.directory, _db_path)
+                )
+            except Exception:
+                os.remove(hot)
+                raise
+            path = await run_db(db_backup.create_bundle, hot, archived, compress=compress)
+            ext = "tar.gz" if compress else "tar"
+    except Exception as e:
+        logger.error("Backup failed: %s", e)
+        raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
+
+    filename = f"traderdiary-backup-{datetime.date.today().isoformat()}.{ext}"
     return FileResponse(
-        path=_db_path,
-        media_type="application/octet-stream",
+        path=path,
+        media_type=_BACKUP_MEDIA_TYPES[ext],
         filename=filename,
+        background=BackgroundTask(os.remove, path),
     )
 
 
 @router.post("/restore")
 async def restore_database(file: UploadFile = File(...)):
-    """Replace the database with an uploaded backup. Validates SQLite magic bytes."""
-    content = await file.read()
+    """Replace the database with an uploaded backup (.db, .db.gz, .tar or .tar.gz).
 
-    # Validate SQLite magic
-    if not content.startswith(SQLITE_MAGIC):
-        raise HTTPException(status_code=400, detail="Invalid file: not a SQLite database")
-
-    # Write to a temp file first, then replace
-    tmp_path = _db_path + ".restore_tmp"
+    The upload is streamed to disk in chunks, integrity-checked, then swapped
+    in atomically; the live database is untouched if any step fails. The
+    cold archive is replaced by the bundle's (none for a plain database); the
+    previous one is renamed aside.
+    """
+    spool = db_backup.UploadSpool(_db_path)
     try:
-        with open(tmp_path, "wb") as f:
-            f.write(content)
-
-        # Dispose all connections
-        engine.dispose()
-
-        # Replace existing DB
-        shutil.move(tmp_path, _db_path)
-        logger.info("Database restored from upload (%d bytes)", len(content))
+        while chunk := await file.read(db_backup.CHUNK_SIZE):
+            await run_db(spool.write, chunk)
+        tmp_path = await run_db(spool.close)
+        db_file, archive = await run_db(db_backup.unpack, tmp_path, _db_path)
 
-        # Recreate tables (new DB may be missing none, but ensures schema)
-        Base.metadata.create_all(bind=engine)
+        def swap():
+            # Dispose all connections, then replace the file and its WAL/SHM
+            engine.dispose()
+            cold_archive.dispose()
+            db_backup.swap_in(_db_path, db_file)
+            moved_aside = db_backup.swap_archive(cold_archive.directory, archive)
+            engine.dispose()
+            cold_archive.dispose()
+            # Recreate tables (new DB may be missing none, but ensures schema)
+            Base.metadata.create_all(bind=engine)
+            return moved_aside
 
-        return {"message": "Database restored successfully", "size_bytes": len(content)}
+        # Between writer batches, so no intent is mid-transaction on the old file
+        aside = await db_writer.exclusive(swap)
+    except db_backup.InvalidBackupError as e:
+        spool.discard()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
+        spool.discard()
         logger.error("Restore failed: %s", e)
         raise HTTPException(status_code=500, detail=f"Restore failed: {str(e)}")
+    spool.discard()     # the bundle, once unpacked; a plain database was renamed into place
+
+    logger.info("Database restored from upload (%d bytes)", spool.bytes_out)
+    if aside:
+        logger.info("Previous cold archive kept at %s", aside)
+
+    reference_cache.invalidate()
+    table_versions.bump_all()
+
+    return {"message": "Database restored successfully", "size_bytes": spool.bytes_out}
+
+
+@router.get("/archive")
+def get_archive_manifest():
+    """Cold-archive manifest: archived months with per-table row counts and time ranges."""
+    return {"archive_after_days": ARCHIVE_AFTER_DAYS, **cold_archive.manifest()}
+
+
+@router.post("/archive/run")
+async def run_archive(after_days: Optional[int] = Query(None, ge=1)):
+    """Archive now instead of waiting for the hourly maintenance pass."""
+    days = after_days or ARCHIVE_AFTER_DAYS
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="Archiving is off; set ARCHIVE_AFTER_DAYS or pass after_days")
+    moved = await cold_archive.run(after_days=days)
+    return {"archived": moved, "after_days": days}
@@ -1,18 +1,20 @@
 import asyncio
+import time
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.database import get_db
 from app.models.accounts import Account
-from app.models.trade_record import TradeRecord
 from app.schemas import PositionCalculateRequest, BatchTradeRequest, SymbolCheckRequest
+from app.services.execution_timings import StageTimer
 from app.services.mt5_service import MT5Service
 from app.services.position_sizer import PositionSizer
 from app.services.rule_checker import RuleChecker
 from app.services.mt5_auth import login_account
 from app.services.stealth import batch_delay_seconds
 from app.services.settings import get_setting, KEY_STEALTH_MODE
+from app.services.trade_records import save_trade_record
 import logging
 from app.utils.async_helpers import run_mt5, run_db
 
@@ -127,6 +129,7 @@ def _prepare_for_execution(
     account: Account,
     request: "BatchTradeRequest",
     db: Session,
+    timer: StageTimer,
 ) -> dict:
     """Per-account pre-trade phase: login, calc, fund rule check, margin check.
 
@@ -136,32 +139,38 @@ def _prepare_for_execution(
       - {"ready": False, "error": str, "account_id": ..., "account": ..., "calc": None}
     """
     try:
-        if not login_account(account, mt5):
+        with timer.stage("connect"):
+            logged_in = login_account(account, mt5)
+        if not logged_in:
             return {"ready": False, "error": "login failed", "account_id": account.account_id, "account": account, "calc": None}
 
-        info = mt5.get_account_info()
+        with timer.stage("quote"):
+            info = mt5.get_account_info()
         if not info:
             mt5.logout()
             return {"ready": False, "error": "no account_info", "account_id": account.account_id, "account": account, "calc": None}
 
-        _reset_daily_equity_if_needed(account, info["equity"], info["balance"], db)
+        with timer.stage("db"):
+            _reset_daily_equity_if_needed(account, info["equity"], info["balance"], db)
 
-        calc = sizer.calculate(
-            balance=info["balance"],
-            symbol=request.symbol,
-            direction=request.direction,
-            sl_price=request.sl_price,
-            risk_type=request.risk_type,
-            risk_value=request.risk_value,
-            tp_price=request.tp_price,
-        )
+        with timer.stage("size"):
+            calc = sizer.calculate(
+                balance=info["balance"],
+                symbol=request.symbol,
+                direction=request.direction,
+                sl_price=request.sl_price,
+                risk_type=request.risk_type,
+                risk_value=request.risk_value,
+                tp_price=request.tp_price,
+            )
 
         if account.account_type == "fund" and account.fund_program_id:
             risk_amount = calc.get("risk_amount", 0.0) or 0.0
-            rule_result = checker.get_pre_trade_status(
-                account=account,
-                proposed_risk_amount=risk_amount,
-            )
+            with timer.stage("rules"):
+                rule_result = checker.get_pre_trade_status(
+                    account=account,
+                    proposed_risk_amount=risk_amount,
+                )
             if rule_result.get("blocked"):
                 reasons = rule_result.get("block_reasons", [])
                 error_msg = f"Blocked: {' | '.join(reasons)}"
@@ -177,12 +186,13 @@ def _prepare_for_execution(
 
         margin_ok = True
         if not calc.get("error") and calc.get("lot_size", 0) > 0:
-            margin_ok = sizer.validate_margin(
-                request.symbol,
-                calc["lot_size"],
-                request.direction,
-                info["margin_free"],
-            )
+            with timer.stage("margin"):
+                margin_ok = sizer.validate_margin(
+                    request.symbol,
+                    calc["lot_size"],
+                    request.direction,
+                    info["margin_free"],
+                )
 
         mt5.logout()
         return {
@@ -200,25 +210,37 @@ def _execute_single_trade(
     account: Account,
     calc: dict,
     request: "BatchTradeRequest",
+    timer: StageTimer,
 ) -> dict:
     """Per-account order phase: login + place_market_order. Returns the MT5 result dict."""
     try:
-        if not login_account(account, mt5):
+        with timer.stage("connect"):
+            logged_in = login_account(account, mt5)
+        if not logged_in:
             return {"success": False, "error": "login failed"}
-        result = mt5.place_market_order(
-            symbol=request.symbol,
-            volume=calc["lot_size"],
-            order_type=request.direction,
-            sl=calc["sl_price"],
-            tp=calc["tp_price"],
-            comment="TraderDiary Batch",
-        )
+        with timer.stage("order"):
+            result = mt5.place_market_order(
+                symbol=request.symbol,
+                volume=calc["lot_size"],
+                order_type=request.direction,
+                sl=calc["sl_price"],
+                tp=calc["tp_price"],
+                comment="TraderDiary Batch",
+            )
+        if result.get("success"):
+            info = mt5.get_symbol_info(request.symbol)
+            timer.fill(result, request.direction, info["point"] if info else None)
         mt5.logout()
         return result
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+def _load_account_map(db: Session, account_ids: list[int]) -> dict[int, Account]:
+    accounts = db.query(Account).filter(Account.id.in_(account_ids)).all()
+    return {a.id: a for a in accounts}
+
+
 @router.post("/check-symbol")
 async def check_symbol(
     request: SymbolCheckRequest,
@@ -230,12 +252,7 @@ async def check_symbol(
     tick = None
 
     # One DB hit instead of N
-    accounts = (
-        db.query(Account)
-        .filter(Account.id.in_(request.account_ids))
-        .all()
-    )
-    account_map = {a.id: a for a in accounts}
+    account_map = await run_db(_load_account_map, db, request.account_ids)
 
     # Preserve client-requested order
     for account_id in request.account_ids:
@@ -274,12 +291,7 @@ async def calculate_position(
     sizer = PositionSizer(mt5)
     checker = RuleChecker(db)
 
-    accounts = (
-        db.query(Account)
-        .filter(Account.id.in_(request.account_ids))
-        .all()
-    )
-    account_map = {a.id: a for a in accounts}
+    account_map = await run_db(_load_account_map, db, request.account_ids)
 
     results = []
     for account_id in request.account_ids:
@@ -306,19 +318,15 @@ async def execute_batch(
     Fund accounts that currently violate drawdown/best-day rules are HARD BLOCKED:
     they are skipped and a failed trade record is saved with the violation reason.
     """
+    started = time.perf_counter()
     mt5 = MT5Service()
     sizer = PositionSizer(mt5)
     checker = RuleChecker(db)
 
     # Read DB-persisted stealth mode once; None falls back to env STEALTH_MODE in stealth.py
-    stealth_mode = get_setting(db, KEY_STEALTH_MODE) or None
+    stealth_mode = await run_db(get_setting, db, KEY_STEALTH_MODE) or None
 
-    accounts = (
-        db.query(Account)
-        .filter(Account.id.in_(request.account_ids))
-        .all()
-    )
-    account_map = {a.id: a for a in accounts}
+    account_map = await run_db(_load_account_map, db, request.account_ids)
 
     # Phase 1: per-account pre-trade prep
     prepared = []
@@ -327,19 +335,21 @@ async def execute_batch(
         account = account_map.get(account_id)
         if not account:
             continue
+        timer = StageTimer("v1", started)
         outcome = await run_mt5(
-            _prepare_for_execution, mt5, sizer, checker, account, request, db
+            _prepare_for_execution, mt5, sizer, checker, account, request, db, timer
         )
+        outcome["timer"] = timer
 
         if outcome.get("blocked"):
-            _save_trade_record(
-                db=db,
+            await save_trade_record(
                 account=outcome["account"],
                 symbol=request.symbol,
                 direction=request.direction,
                 calc=outcome["calc"],
                 success=False,
                 error_msg=outcome["error"],
+                timer=timer,
             )
             blocked_results.append({
                 "account_id": outcome["account_id"],
@@ -367,13 +377,12 @@ async def execute_batch(
     for idx, entry in enumerate(prepared):
         account = entry["account"]
         calc = entry["calc"]
-        result = await run_mt5(_execute_single_trade, mt5, account, calc, request)
+        result = await run_mt5(_execute_single_trade, mt5, account, calc, request, entry["timer"])
 
         success = result.get("success", False)
         order_ticket = result.get("order")
 
-        _save_trade_record(
-            db=db,
+        await save_trade_record(
             account=account,
             symbol=request.symbol,
             direction=request.direction,
@@ -381,6 +390,7 @@ async def execute_batch(
             success=success,
             order_ticket=order_ticket,
             error_msg=result.get("error"),
+            timer=entry["timer"],
         )
 
         results.append({
@@ -405,41 +415,3 @@ async def execute_batch(
         "failed": len(results) - successful - blocked_count,
         "results": results,
     }
-
-
-def _save_trade_record(
-    db: Session,
-    account: Account,
-    symbol: str,
-    direction: str,
-    calc: dict,
-    success: bool,
-    order_ticket=None,
-    error_msg=None,
-):
-    """Persist a trade record to the database."""
-    try:
-        record = TradeRecord(
-            account_db_id=account.id,
-            account_login=account.account_id,
-            symbol=symbol,
-            direction=direction,
-            lot_size=calc.get("lot_size", 0),
-            entry_price=calc.get("entry_price"),
-            sl_price=calc.get("sl_price"),
-            tp_price=calc.get("tp_price"),
-            sl_pips=calc.get("sl_pips"),
-            tp_pips=calc.get("tp_pips"),
-            risk_pct=calc.get("risk_pct"),
-            risk_amount=calc.get("risk_amount"),
-            reward_amount=calc.get("reward_amount"),
-            rr_ratio=calc.get("rr_ratio"),
-            order_ticket=order_ticket,
-            success=success,
-            error_msg=error_msg,
-        )
-        db.add(record)
-        db.commit()
-    except Exception as e:
-        logger.warning("Failed to save trade record for %s: %s", account.account_id, e)
-        db.rollback()
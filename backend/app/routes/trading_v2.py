@@ -6,29 +6,41 @@ runs N calls in parallel (asyncio.gather) instead of serially.
 
 The position sizer + rule checker still run in the master (they need
 the DB and are pure Python). MT5 reads/writes (symbol info, ticks,
-order_send) go through `pool.call`.
+order_send) go through `pool.call`; DB steps go through the request's
+`AsyncDB`, so a slow query never stalls order dispatch on the event loop.
+
+`/prepare` does the sizing work once and returns a ticket id; `/execute`
+then only sends the orders (see `services/trade_tickets.py`).
 """
 from __future__ import annotations
 
 import asyncio
 import logging
-from typing import Any
+import time
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.database import get_db
 from app.models.accounts import Account
-from app.models.trade_record import TradeRecord
+from app.config import TRADE_TICKET_MAX_DRIFT_POINTS
 from app.schemas import (
     BatchTradeRequest,
+    ExecuteTicketRequest,
     PositionCalculateRequest,
     SymbolCheckRequest,
 )
+from app.services.execution_timings import StageTimer
+from app.services.exposure import exposure, exposure_limits
 from app.services.position_sizer import PositionSizer
+from app.services.reference_cache import ReferenceData, reference_cache
 from app.services.rule_checker import RuleChecker
-from app.services.symbol_resolver import parse_aliases, resolve_symbol
+from app.services.symbol_catalog import symbol_catalog
+from app.services.symbol_resolver import resolve_symbol
+from app.services.trade_records import save_trade_record
+from app.services.trade_tickets import TradeTicket, trade_tickets
 from app.services.worker_pool import WorkerError, WorkerNotRunning, pool
+from app.utils.async_helpers import AsyncDB, get_async_db
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -71,44 +83,12 @@ async def _ensure_worker(account_db_id: int) -> bool:
         return False
 
 
-def _save_trade_record(
-    db: Session,
-    account: Account,
-    symbol: str,
-    direction: str,
-    calc: dict,
-    success: bool,
-    order_ticket: Any = None,
-    error_msg: str | None = None,
-) -> None:
-    try:
-        record = TradeRecord(
-            account_db_id=account.id,
-            account_login=account.account_id,
-            symbol=symbol,
-            direction=direction,
-            lot_size=calc.get("lot_size", 0) if calc else 0,
-            entry_price=calc.get("entry_price") if calc else None,
-            sl_price=calc.get("sl_price") if calc else None,
-            tp_price=calc.get("tp_price") if calc else None,
-            sl_pips=calc.get("sl_pips") if calc else None,
-            tp_pips=calc.get("tp_pips") if calc else None,
-            risk_pct=calc.get("risk_pct") if calc else None,
-            risk_amount=calc.get("risk_amount") if calc else None,
-            reward_amount=calc.get("reward_amount") if calc else None,
-            rr_ratio=calc.get("rr_ratio") if calc else None,
-            order_ticket=order_ticket,
-            success=success,
-            error_msg=error_msg,
-        )
-        db.add(record)
-        db.commit()
-    except Exception as e:
-        logger.warning("Failed to save trade record for %s: %s", account.account_id, e)
-        db.rollback()
+def _load_account_map(db: Session, account_ids: list[int]) -> dict[int, Account]:
+    accounts = db.query(Account).filter(Account.id.in_(account_ids)).all()
+    return {a.id: a for a in accounts}
 
 
-def _reset_daily_equity_if_needed(account: Account, live_equity: float, live_balance: float, db: Session) -> None:
+def _reset_daily_equity_if_needed(db: Session, account: Account, live_equity: float, live_balance: float) -> None:
     today_str = datetime.utcnow().date().isoformat()
     if account.daily_open_date == today_str:
         return
@@ -123,17 +103,30 @@ def _reset_daily_equity_if_needed(account: Account, live_equity: float, live_bal
     db.refresh(account)
 
 
+def _exposure_warnings(ref: ReferenceData, direction: str, sized: list[tuple[str, dict]]) -> list[str]:
+    """Combined-exposure warnings for the orders a batch would open (never blocks)."""
+    max_net_lots, max_open_risk = exposure_limits(ref.settings)
+    if not (max_net_lots or max_open_risk):
+        return []
+    orders = [
+        (symbol, direction, calc.get("lot_size") or 0.0, calc.get("risk_amount") or 0.0)
+        for symbol, calc in sized
+        if calc and "error" not in calc
+    ]
+    return exposure.check(orders, max_net_lots=max_net_lots, max_open_risk=max_open_risk)
+
+
 # ── /check-symbol — parallel availability check ───────────────────────────────
 @router.post("/check-symbol")
-async def check_symbol_v2(request: SymbolCheckRequest, db: Session = Depends(get_db)):
+async def check_symbol_v2(request: SymbolCheckRequest, adb: AsyncDB = Depends(get_async_db)):
     """Per-account symbol availability with broker-variant resolution.
 
     Each account runs the symbol resolver in parallel. The response includes
     the resolved symbol name (which may differ from `request.symbol`) and a
     list of alternatives the UI can show if the user wants to pick manually.
     """
-    accounts = db.query(Account).filter(Account.id.in_(request.account_ids)).all()
-    account_map = {a.id: a for a in accounts}
+    account_map = await adb.run(_load_account_map, request.account_ids)
+    ref = await adb.run(reference_cache.get)
 
     async def check_one(account: Account) -> dict:
         ok = await _ensure_worker(account.id)
@@ -147,8 +140,8 @@ async def check_symbol_v2(request: SymbolCheckRequest, db: Session = Depends(get
                 "alternatives": [],
                 "tick": None,
             }
-        aliases = parse_aliases(account.symbol_aliases)
-        result = await resolve_symbol(pool, account.id, request.symbol, aliases)
+        aliases = ref.aliases_for(account.id)
+        result = await resolve_symbol(pool, account.id, request.symbol, aliases, account.server)
         tick = None
         if result.available and result.resolved:
             try:
@@ -174,175 +167,217 @@ async def check_symbol_v2(request: SymbolCheckRequest, db: Session = Depends(get
     return {"results": out, "tick": tick}
 
 
-# ── /calculate-position — parallel sizing across accounts ─────────────────────
-@router.post("/calculate-position")
-async def calculate_position_v2(request: PositionCalculateRequest, db: Session = Depends(get_db)):
-    """Per-account EA sizing + rule check. All workers in parallel."""
-    accounts = (
-        db.query(Account).filter(Account.id.in_(request.account_ids)).all()
-    )
-    account_map = {a.id: a for a in accounts}
-    checker = RuleChecker(db)
-
-    async def calc_one(account: Account) -> dict:
-        if not await _ensure_worker(account.id):
-            return {"account_id": account.account_id, "error": "worker not ready"}
-        aliases = parse_aliases(account.symbol_aliases)
-        resolved = await resolve_symbol(pool, account.id, request.symbol, aliases)
+# ── Shared prepare step ───────────────────────────────────────────────────────
+async def _returning(value: Any) -> Any:
+    return value
+
+
+async def _prepare_legs(
+    request: PositionCalculateRequest,
+    adb: AsyncDB,
+    ref: ReferenceData,
+    route: str = "v2",
+    started: Optional[float] = None,
+) -> list[dict]:
+    """Resolve, fetch spec + quote, size and rule-gate every account in parallel.
+
+    A leg is `ready` when it can be sent; legs the fund-rule gate refuses are
+    also `blocked`. Sized legs carry `rule_status` either way. Every leg has
+    a `timer` (stage latencies, see `execution_timings`).
+    """
+    account_map = await adb.run(_load_account_map, request.account_ids)
+
+    async def prepare_one(account: Account) -> dict:
+        timer = StageTimer(route, started)
+        leg = {"ready": False, "account": account, "account_id": account.account_id, "calc": None, "timer": timer}
+        with timer.stage("connect"):
+            ok = await _ensure_worker(account.id)
+        if not ok:
+            return {**leg, "error": "worker not ready"}
+        aliases = ref.aliases_for(account.id)
+        with timer.stage("resolve"):
+            resolved = await resolve_symbol(pool, account.id, request.symbol, aliases, account.server)
         if not resolved.available or not resolved.resolved:
-            return {
-                "account_id": account.account_id,
-                "error": "symbol not available on this account",
-                "alternatives": resolved.alternatives,
-            }
+            return {**leg, "error": "symbol not available on this account", "alternatives": resolved.alternatives}
         symbol = resolved.resolved
+        # The server's symbol catalog already has the spec; only ask the worker without one.
+        catalog = symbol_catalog.get(account.server)
+        cached_spec = catalog.spec(symbol) if catalog is not None else None
+        spec_call = (_returning(cached_spec) if cached_spec is not None
+                     else pool.call(account.id, "get_symbol_info", {"symbol": symbol}))
         try:
-            info, sym_info, tick = await asyncio.gather(
-                pool.call(account.id, "get_account_info"),
-                pool.call(account.id, "get_symbol_info", {"symbol": symbol}),
-                pool.call(account.id, "get_tick_price", {"symbol": symbol}),
-            )
+            with timer.stage("quote"):
+                info, sym_info, tick = await asyncio.gather(
+                    pool.call(account.id, "get_account_info"),
+                    spec_call,
+                    pool.call(account.id, "get_tick_price", {"symbol": symbol}),
+                )
         except (WorkerError, WorkerNotRunning, asyncio.TimeoutError) as e:
-            return {"account_id": account.account_id, "error": f"worker call failed: {e}"}
+            return {**leg, "error": f"worker call failed: {e}"}
 
         if not info:
-            return {"account_id": account.account_id, "error": "no account_info"}
-
-        _reset_daily_equity_if_needed(account, info["equity"], info["balance"], db)
-
-        sizer = PositionSizer(_PreFetchedMT5(sym_info, tick))
-        calc = sizer.calculate(
-            balance=info["balance"],
-            symbol=symbol,
-            direction=request.direction,
-            sl_price=request.sl_price,
-            risk_type=request.risk_type,
-            risk_value=request.risk_value,
-            tp_price=request.tp_price,
-        )
-
-        # Margin check by comparing required margin estimate vs margin_free.
-        # For v2 we just check that account has positive margin_free.
+            return {**leg, "error": "no account_info"}
+
+        with timer.stage("db"):
+            await adb.run(_reset_daily_equity_if_needed, account, info["equity"], info["balance"])
+
+        with timer.stage("size"):
+            sizer = PositionSizer(_PreFetchedMT5(sym_info, tick))
+            calc = sizer.calculate(
+                balance=info["balance"],
+                symbol=symbol,
+                direction=request.direction,
+                sl_price=request.sl_price,
+                risk_type=request.risk_type,
+                risk_value=request.risk_value,
+                tp_price=request.tp_price,
+            )
+        # Prepare only checks that the account has free margin at all; the
+        # worker checks the margin of the actual volume right before sending.
         margin_ok = info.get("margin_free", 0.0) > 0
-
-        risk_amount = calc.get("risk_amount", 0.0) or 0.0
-        reward_amount = calc.get("reward_amount", 0.0) or 0.0
-        rule_status = checker.get_pre_trade_status(
-            account=account,
-            proposed_risk_amount=risk_amount,
-            proposed_reward_amount=reward_amount,
-        )
-
         return {
-            "account_id": account.account_id,
+            **leg,
+            "ready": "error" not in calc,
             "balance": info["balance"],
             "resolved_symbol": symbol,
             "confidence": resolved.confidence,
-            "calculation": calc,
+            "calc": calc,
             "margin_ok": margin_ok,
-            "rule_status": rule_status,
+            "point": (sym_info or {}).get("point"),
+            "filling": (sym_info or {}).get("filling"),
         }
 
-    results = await asyncio.gather(
-        *[calc_one(account_map[aid]) for aid in request.account_ids if aid in account_map]
+    legs = await asyncio.gather(
+        *[prepare_one(account_map[aid]) for aid in request.account_ids if aid in account_map]
     )
-    return {"results": results}
+    await _gate_legs(legs, adb)
+    return legs
 
 
-# ── /execute-batch — parallel order placement ─────────────────────────────────
-@router.post("/execute-batch")
-async def execute_batch_v2(request: BatchTradeRequest, db: Session = Depends(get_db)):
-    """Place identical orders on N accounts IN PARALLEL via worker pool.
+async def _gate_legs(legs: list[dict], adb: AsyncDB) -> None:
+    """Fund-rule gate for every sized leg in one vectorised pass."""
+    sized = [leg for leg in legs if leg["calc"] is not None and "resolved_symbol" in leg]
+    if not sized:
+        return
+    checker = RuleChecker(adb.session)
+    t0 = time.perf_counter()
+    batch = await adb.run(lambda _db: checker.evaluate_pre_trade(
+        [leg["account"] for leg in sized],
+        [leg["calc"].get("risk_amount", 0.0) or 0.0 for leg in sized],
+    ))
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    for i, leg in enumerate(sized):
+        leg["timer"].add("rules", elapsed_ms)
+        leg["rule_status"] = batch.status(i)
+        if batch.blocked[i]:
+            reasons = leg["rule_status"]["block_reasons"]
+            leg.update(ready=False, blocked=True, error=f"Blocked: {' | '.join(reasons)}")
+
+
+def _leg_result(leg: dict) -> dict:
+    """The `/calculate-position` view of a leg."""
+    if "resolved_symbol" not in leg:
+        out = {"account_id": leg["account_id"], "error": leg["error"]}
+        if "alternatives" in leg:
+            out["alternatives"] = leg["alternatives"]
+        return out
+    return {
+        "account_id": leg["account_id"],
+        "balance": leg["balance"],
+        "resolved_symbol": leg["resolved_symbol"],
+        "confidence": leg["confidence"],
+        "calculation": leg["calc"],
+        "margin_ok": leg["margin_ok"],
+        "rule_status": leg.get("rule_status"),
+    }
 
-    Total latency ≈ slowest single account's roundtrip + small overhead,
-    NOT sum across accounts.
-    """
-    accounts = (
-        db.query(Account).filter(Account.id.in_(request.account_ids)).all()
-    )
-    account_map = {a.id: a for a in accounts}
-    checker = RuleChecker(db)
 
-    # Phase 1: prepare in parallel
-    async def prepare_one(account: Account) -> dict:
-        if not await _ensure_worker(account.id):
-            return {"ready": False, "account": account, "account_id": account.account_id, "error": "worker not ready", "calc": None}
-        aliases = parse_aliases(account.symbol_aliases)
-        resolved = await resolve_symbol(pool, account.id, request.symbol, aliases)
-        if not resolved.available or not resolved.resolved:
-            return {
-                "ready": False,
-                "account": account,
-                "account_id": account.account_id,
-                "error": "symbol not available on this account",
-                "calc": None,
-                "alternatives": resolved.alternatives,
-            }
-        symbol = resolved.resolved
-        try:
-            info, sym_info, tick = await asyncio.gather(
-                pool.call(account.id, "get_account_info"),
-                pool.call(account.id, "get_symbol_info", {"symbol": symbol}),
-                pool.call(account.id, "get_tick_price", {"symbol": symbol}),
-            )
-        except (WorkerError, WorkerNotRunning, asyncio.TimeoutError) as e:
-            return {"ready": False, "account": account, "account_id": account.account_id, "error": f"worker call failed: {e}", "calc": None}
+def _leg_warnings(ref: ReferenceData, direction: str, legs: list[dict], ready_only: bool) -> list[str]:
+    return _exposure_warnings(ref, direction, [
+        (leg["resolved_symbol"], leg["calc"])
+        for leg in legs
+        if "resolved_symbol" in leg and (leg["ready"] or not ready_only)
+    ])
 
-        if not info:
-            return {"ready": False, "account": account, "account_id": account.account_id, "error": "no account_info", "calc": None}
-
-        _reset_daily_equity_if_needed(account, info["equity"], info["balance"], db)
-
-        sizer = PositionSizer(_PreFetchedMT5(sym_info, tick))
-        calc = sizer.calculate(
-            balance=info["balance"],
-            symbol=symbol,
-            direction=request.direction,
-            sl_price=request.sl_price,
-            risk_type=request.risk_type,
-            risk_value=request.risk_value,
-            tp_price=request.tp_price,
-        )
 
-        if account.account_type == "fund" and account.fund_program_id:
-            risk_amount = calc.get("risk_amount", 0.0) or 0.0
-            rule_result = checker.get_pre_trade_status(
-                account=account,
-                proposed_risk_amount=risk_amount,
-            )
-            if rule_result.get("blocked"):
-                reasons = rule_result.get("block_reasons", [])
-                error_msg = f"Blocked: {' | '.join(reasons)}"
-                return {
-                    "ready": False,
-                    "blocked": True,
-                    "account": account,
-                    "account_id": account.account_id,
-                    "calc": calc,
-                    "error": error_msg,
-                }
+# ── /calculate-position — parallel sizing across accounts ─────────────────────
+@router.post("/calculate-position")
+async def calculate_position_v2(request: PositionCalculateRequest, adb: AsyncDB = Depends(get_async_db)):
+    """Per-account EA sizing + rule check. All workers in parallel."""
+    ref = await adb.run(reference_cache.get)
+    legs = await _prepare_legs(request, adb, ref)
+    return {
+        "results": [_leg_result(leg) for leg in legs],
+        "exposure_warnings": _leg_warnings(ref, request.direction, legs, ready_only=False),
+    }
 
-        margin_ok = info.get("margin_free", 0.0) > 0
-        return {
-            "ready": True,
-            "account": account,
-            "account_id": account.account_id,
-            "resolved_symbol": symbol,
-            "calc": calc,
-            "margin_ok": margin_ok,
-        }
 
-    prepared = await asyncio.gather(
-        *[prepare_one(account_map[aid]) for aid in request.account_ids if aid in account_map]
-    )
+# ── /prepare + /execute — prepared trade tickets ──────────────────────────────
+@router.post("/prepare")
+async def prepare_trade_v2(request: PositionCalculateRequest, adb: AsyncDB = Depends(get_async_db)):
+    """`/calculate-position`, kept as a ticket that `/execute` sends as-is.
+
+    The ticket lives `TRADE_TICKET_TTL_SECONDS` and can be executed once.
+    """
+    ref = await adb.run(reference_cache.get)
+    legs = await _prepare_legs(request, adb, ref)
+    warnings = _leg_warnings(ref, request.direction, legs, ready_only=True)
+    ticket = trade_tickets.put(TradeTicket(request.symbol, request.direction, legs, warnings))
+    return {
+        "ticket_id": ticket.id,
+        "expires_in": trade_tickets.ttl,
+        "results": [
+            {**_leg_result(leg), "ready": leg["ready"], "blocked": leg.get("blocked", False)}
+            for leg in legs
+        ],
+        "exposure_warnings": warnings,
+    }
+
+
+@router.post("/execute")
+async def execute_ticket_v2(request: ExecuteTicketRequest, adb: AsyncDB = Depends(get_async_db)):
+    """Send a prepared ticket: one order round trip per account, in parallel.
+
+    Each worker refuses its order when the quote drifted more than
+    `max_drift_points` from the prepared entry or the volume no longer fits
+    the free margin. 404 when the ticket expired or was already executed.
+    """
+    started = time.perf_counter()
+    ticket = trade_tickets.take(request.ticket_id)
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Trade ticket expired or already executed — prepare again")
+    # Ticket rows time the /execute request only: the prepare stages ran
+    # in another request, maybe minutes earlier, and would not add up.
+    for leg in ticket.legs:
+        leg["timer"] = StageTimer("v2_ticket", started)
+    if ticket.rules_stale():
+        await _regate_ticket(ticket, adb)
+    drift = request.max_drift_points
+    return await _execute_ticket(ticket, TRADE_TICKET_MAX_DRIFT_POINTS if drift is None else drift)
+
+
+async def _regate_ticket(ticket: TradeTicket, adb: AsyncDB) -> None:
+    """Re-run the rule gate on fresh account rows (gate inputs or trades changed since prepare)."""
+    legs = [leg for leg in ticket.legs if leg["ready"]]
+    if not legs:
+        return
+    fresh = await adb.run(_load_account_map, [leg["account"].id for leg in legs])
+    for leg in legs:
+        leg["account"] = fresh.get(leg["account"].id, leg["account"])
+    await _gate_legs(legs, adb)
+
 
-    blocked = [p for p in prepared if p.get("blocked")]
-    failed_margin = [p for p in prepared if p.get("ready") and not p.get("margin_ok")]
-    ready = [p for p in prepared if p.get("ready") and p.get("margin_ok")]
+async def _execute_ticket(ticket: TradeTicket, max_drift_points: float) -> dict:
+    blocked = [leg for leg in ticket.legs if leg.get("blocked")]
+    failed_margin = [leg for leg in ticket.legs if leg["ready"] and not leg["margin_ok"]]
+    ready = [leg for leg in ticket.legs if leg["ready"] and leg["margin_ok"]]
 
-    # Persist blocked records up-front
-    for p in blocked:
-        _save_trade_record(db, p["account"], request.symbol, request.direction, p["calc"], False, error_msg=p["error"])
+    # Persist blocked records up-front (one writer batch)
+    await asyncio.gather(*[
+        save_trade_record(leg["account"], ticket.symbol, ticket.direction, leg["calc"], False,
+                          error_msg=leg["error"], timer=leg["timer"])
+        for leg in blocked
+    ])
 
     if failed_margin:
         raise HTTPException(
@@ -350,42 +385,50 @@ async def execute_batch_v2(request: BatchTradeRequest, db: Session = Depends(get
             detail=f"{len(failed_margin)} account(s) don't have enough margin",
         )
 
-    # Phase 2: parallel execution
-    async def execute_one(p: dict) -> dict:
-        account = p["account"]
-        calc = p["calc"]
-        symbol = p.get("resolved_symbol") or request.symbol
+    async def execute_one(leg: dict) -> dict:
+        account = leg["account"]
+        calc = leg["calc"]
+        symbol = leg["resolved_symbol"]
+        point = leg.get("point")
+        timer = leg["timer"]
         try:
-            result = await pool.call(account.id, "place_market_order", {
-                "symbol": symbol,
-                "volume": calc["lot_size"],
-                "order_type": request.direction,
-                "sl": calc.get("sl_price", 0.0),
-                "tp": calc.get("tp_price", 0.0),
-                "comment": "TraderDiary Batch v2",
-            }, timeout=15.0)
+            with timer.stage("order"):
+                result = await pool.call(account.id, "place_market_order", {
+                    "symbol": symbol,
+                    "volume": calc["lot_size"],
+                    "order_type": ticket.direction,
+                    "sl": calc.get("sl_price", 0.0),
+                    "tp": calc.get("tp_price", 0.0),
+                    "comment": "TraderDiary Batch v2",
+                    "type_filling": leg.get("filling"),
+                    "reference_price": calc.get("entry_price"),
+                    "max_drift": max_drift_points * point if point else None,
+                    "check_margin": True,
+                }, timeout=15.0)
         except (WorkerError, WorkerNotRunning, asyncio.TimeoutError) as e:
             result = {"success": False, "error": f"worker call failed: {e}"}
+        timer.fill(result, ticket.direction, point)
 
         success = result.get("success", False)
         order_ticket = result.get("order")
-        _save_trade_record(
-            db, account, request.symbol, request.direction, calc,
-            success=success, order_ticket=order_ticket, error_msg=result.get("error"),
+        await save_trade_record(
+            account, ticket.symbol, ticket.direction, calc,
+            success=success, order_ticket=order_ticket, error_msg=result.get("error"), timer=timer,
         )
         return {
             "account_id": account.account_id,
             "resolved_symbol": symbol,
             "success": success,
             "order": order_ticket,
+            "price": result.get("price"),
             "error": result.get("error"),
         }
 
-    execution_results = await asyncio.gather(*[execute_one(p) for p in ready])
+    execution_results = await asyncio.gather(*[execute_one(leg) for leg in ready])
 
     blocked_results = [
-        {"account_id": p["account_id"], "success": False, "blocked": True, "error": p["error"]}
-        for p in blocked
+        {"account_id": leg["account_id"], "success": False, "blocked": True, "error": leg["error"]}
+        for leg in blocked
     ]
     all_results = blocked_results + execution_results
 
@@ -396,4 +439,20 @@ async def execute_batch_v2(request: BatchTradeRequest, db: Session = Depends(get
         "blocked": len(blocked_results),
         "failed": len(all_results) - successful - len(blocked_results),
         "results": all_results,
+        "exposure_warnings": ticket.exposure_warnings,
     }
+
+
+# ── /execute-batch — parallel order placement ─────────────────────────────────
+@router.post("/execute-batch")
+async def execute_batch_v2(request: BatchTradeRequest, adb: AsyncDB = Depends(get_async_db)):
+    """Place identical orders on N accounts IN PARALLEL via worker pool.
+
+    `/prepare` + `/execute` in one request. Total latency ≈ slowest single
+    account's roundtrip + small overhead, NOT sum across accounts.
+    """
+    started = time.perf_counter()
+    ref = await adb.run(reference_cache.get)
+    legs = await _prepare_legs(PositionCalculateRequest(**request.model_dump()), adb, ref, "v2", started)
+    warnings = _leg_warnings(ref, request.direction, legs, ready_only=True)
+    return await _execute_ticket(TradeTicket(request.symbol, request.direction, legs, warnings), TRADE_TICKET_MAX_DRIFT_POINTS)
@@ -190,6 +190,18 @@ class BatchTradeRequest(BaseModel):
         return v
 
 
+class ExecuteTicketRequest(BaseModel):
+    ticket_id: str
+    max_drift_points: Optional[float] = None  # default TRADE_TICKET_MAX_DRIFT_POINTS
+
+    @field_validator("max_drift_points")
+    @classmethod
+    def drift_non_negative(cls, v: Optional[float]) -> Optional[float]:
+        if v is not None and v < 0:
+            raise ValueError("max_drift_points must be 0 or greater")
+        return v
+
+
 # --- Template Schema ---
 
 class FundFromTemplateRequest(BaseModel):
@@ -0,0 +1,154 @@
+"""Parallel "refresh all accounts" over the worker pool.
+
+The legacy `/api/accounts/refresh-all` logs into every account one after the
+other through a single in-process `MT5Service`. This module fans the same
+work out across worker processes instead:
+
+  1. For each account, reuse its live worker or spawn a temporary one.
+  2. Fetch `get_account_info` + `get_positions` from that worker.
+  3. Kill the worker again if we spawned it just for the refresh.
+
+At most `concurrency` accounts are in flight at once (each one owns a
+terminal + MT5 login, so unbounded fan-out would exhaust RAM). Outcomes are
+yielded as soon as each account finishes so the route can stream progress,
+and `apply_refresh_results` writes every successful outcome in ONE commit.
+
+Total wall time ≈ ceil(N / concurrency) × slowest login, not N × login.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional, Protocol
+
+from sqlalchemy.orm import Session
+
+from app.models.accounts import Account
+from app.services.phase_detector import detect_phase, find_fund_by_server, parse_starting_balance
+from app.services.reference_cache import reference_cache
+
+logger = logging.getLogger(__name__)
+
+_BOOT_PING_TIMEOUT = 15.0
+
+
+class RefreshPoolLike(Protocol):
+    """Subset of `WorkerPool` used here, so tests can pass a fake."""
+
+    def is_active(self, account_db_id: int) -> bool: ...
+    async def spawn(self, account_db_id: int) -> None: ...
+    async def kill(self, account_db_id: int, *, graceful: bool = True) -> None: ...
+    async def call(self, account_db_id: int, method: str, params: dict | None = None, *, timeout: float = 10.0): ...
+
+
+@dataclass
+class RefreshOutcome:
+    account_db_id: int
+    account_id: str
+    status: str                      # success | failed | error
+    info: Optional[dict[str, Any]] = None
+    positions_count: int = 0
+    temporary_worker: bool = False
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+
+async def _refresh_one(pool: RefreshPoolLike, account_db_id: int, account_id: str) -> RefreshOutcome:
+    started = time.perf_counter()
+    temporary = not pool.is_active(account_db_id)
+    outcome = RefreshOutcome(account_db_id, account_id, "error", temporary_worker=temporary)
+    try:
+        if temporary:
+            await pool.spawn(account_db_id)
+            # Bootstrap (terminal launch + MT5 login) finishes before the first pong.
+            await pool.call(account_db_id, "ping", timeout=_BOOT_PING_TIMEOUT)
+        info, positions = await asyncio.gather(
+            pool.call(account_db_id, "get_account_info"),
+            pool.call(account_db_id, "get_positions"),
+        )
+        if info:
+            outcome.status = "success"
+            outcome.info = info
+            outcome.positions_count = len(positions or [])
+        else:
+            outcome.status = "failed"
+            outcome.error = "Login failed"
+    except Exception as e:
+        outcome.error = str(e) or type(e).__name__
+    finally:
+        if temporary:
+            try:
+                await pool.kill(account_db_id)
+            except Exception as e:
+                logger.warning("failed to stop temporary worker %d: %s", account_db_id, e)
+        outcome.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    return outcome
+
+
+async def refresh_accounts(
+    pool: RefreshPoolLike,
+    accounts: list[tuple[int, str]],
+    *,
+    concurrency: int,
+) -> AsyncIterator[RefreshOutcome]:
+    """Refresh `(account_db_id, account_id)` pairs, yielding outcomes as they finish."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(account_db_id: int, account_id: str) -> RefreshOutcome:
+        async with semaphore:
+            return await _refresh_one(pool, account_db_id, account_id)
+
+    tasks = [asyncio.create_task(bounded(aid, login)) for aid, login in accounts]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away mid-stream: don't leave temporary workers behind.
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def apply_refresh_results(db: Session, outcomes: list[RefreshOutcome]) -> dict[int, dict[str, Any]]:
+    """Persist successful outcomes in a single transaction.
+
+    Mirrors the per-account updates of the legacy refresh-all (name, balance,
+    equity, profit, starting balance auto-fill, phase detection). Returns
+    `{account_db_id: {"mt5_name", "current_phase"}}` for the streamed summary.
+    """
+    successes = {o.account_db_id: o for o in outcomes if o.status == "success" and o.info}
+    if not successes:
+        return {}
+
+    accounts = db.query(Account).filter(Account.id.in_(list(successes))).all()
+    funds = reference_cache.get(db).funds
+
+    updated: dict[int, dict[str, Any]] = {}
+    for account in accounts:
+        info = successes[account.id].info or {}
+        account.mt5_name = info.get("name", "")
+        account.balance = info.get("balance")
+        account.equity = info.get("equity")
+        account.profit = info.get("profit")
+
+        if not account.starting_balance:
+            parsed_bal = parse_starting_balance(account.mt5_name) if account.mt5_name else None
+            account.starting_balance = parsed_bal or info.get("balance")
+
+        matched_fund = find_fund_by_server(account.server, funds)
+        if matched_fund and account.mt5_name:
+            detected = detect_phase(account.mt5_name, matched_fund)
+            if detected:
+                for prog in matched_fund.programs:
+                    if prog.program_name == detected["program_name"]:
+                        account.fund_program_id = prog.id
+                        account.current_phase = detected["phase_name"]
+                        break
+
+        updated[account.id] = {"mt5_name": account.mt5_name, "current_phase": account.current_phase}
+
+    db.commit()
+    return updated
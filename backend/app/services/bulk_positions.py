@@ -0,0 +1,165 @@
+"""Cross-account bulk position operations (flatten, partial close, move SL/TP).
+
+The legacy `/api/mt5/close-all-positions` closes the tickets of the single
+connected account one by one. Here the master sends ONE `bulk_positions` RPC
+to every targeted worker at once; each worker filters its own positions and
+executes the operation locally, so flattening N accounts costs one round trip
+(bounded by the slowest account), not N × tickets round trips.
+
+Filter (all optional, AND-ed):
+  symbol     prefix match, case-insensitive ("EURUSD" hits "EURUSD.r", "EURUSDm")
+  direction  "BUY" | "SELL"
+  magic      exact magic number
+  comment    case-insensitive substring of the position comment
+
+Operations:
+  close          close the whole position
+  partial_close  close `fraction` of each position (rounded down to volume_step;
+                 skipped when that is below the minimum lot or leaves less)
+  modify         set `sl` / `tp` (absolute prices; omitted keeps the current
+                 value) or `sl_to_entry` to move the stop to the open price
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional, Protocol
+
+from app.workers.position_rules import close_volume
+
+OP_CLOSE = "close"
+OP_PARTIAL_CLOSE = "partial_close"
+OP_MODIFY = "modify"
+OPS = (OP_CLOSE, OP_PARTIAL_CLOSE, OP_MODIFY)
+
+_BULK_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class PositionFilter:
+    symbol: Optional[str] = None
+    direction: Optional[str] = None
+    magic: Optional[int] = None
+    comment: Optional[str] = None
+
+    def matches(self, pos: dict[str, Any]) -> bool:
+        if self.symbol and not str(pos.get("symbol", "")).upper().startswith(self.symbol.upper()):
+            return False
+        if self.direction and pos.get("type") != self.direction:
+            return False
+        if self.magic is not None and pos.get("magic") != self.magic:
+            return False
+        if self.comment and self.comment.lower() not in str(pos.get("comment") or "").lower():
+            return False
+        return True
+
+
+def parse_filter(raw: Optional[dict[str, Any]]) -> PositionFilter:
+    raw = raw or {}
+    direction = raw.get("direction")
+    if direction is not None:
+        direction = str(direction).upper()
+        if direction not in ("BUY", "SELL"):
+            raise ValueError("direction must be BUY or SELL")
+    magic = raw.get("magic")
+    return PositionFilter(
+        symbol=raw.get("symbol") or None,
+        direction=direction,
+        magic=int(magic) if magic is not None else None,
+        comment=raw.get("comment") or None,
+    )
+
+
+def validate_operation(op: str, params: dict[str, Any]) -> None:
+    """Raise ValueError when `params` don't make sense for `op`."""
+    if op not in OPS:
+        raise ValueError(f"unknown operation: {op}")
+    if op == OP_PARTIAL_CLOSE:
+        fraction = params.get("fraction")
+        if fraction is None or not 0 < float(fraction) <= 1:
+            raise ValueError("partial_close needs 0 < fraction <= 1")
+    if op == OP_MODIFY and params.get("sl") is None and params.get("tp") is None and not params.get("sl_to_entry"):
+        raise ValueError("modify needs sl, tp or sl_to_entry")
+
+
+def partial_volume(volume: float, fraction: float, step: float, minimum: float) -> float:
+    """Volume to close for `fraction` of `volume`, floored to the broker step.
+
+    0.0 when that is below the broker minimum or would leave less than the
+    minimum open — the position is skipped rather than closed in full.
+    """
+    return close_volume(volume, volume * fraction, step, minimum)
+
+
+def modify_targets(pos: dict[str, Any], params: dict[str, Any]) -> tuple[float, float]:
+    """New (sl, tp) for `pos` — omitted values keep the position's current level."""
+    sl = pos.get("sl") or 0.0
+    tp = pos.get("tp") or 0.0
+    if params.get("sl_to_entry"):
+        sl = pos["price_open"]
+    elif params.get("sl") is not None:
+        sl = float(params["sl"])
+    if params.get("tp") is not None:
+        tp = float(params["tp"])
+    return sl, tp
+
+
+# ── Master side ───────────────────────────────────────────────────────────────
+class BulkPoolLike(Protocol):
+    def is_active(self, account_db_id: int) -> bool: ...
+    async def call(self, account_db_id: int, method: str, params: dict | None = None, *, timeout: float = 10.0): ...
+
+
+@dataclass
+class BulkOutcome:
+    account_db_id: int
+    status: str                      # ok | partial | failed | not_running | error
+    matched: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed_ms: float = 0.0
+    results: list[dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+async def _bulk_one(pool: BulkPoolLike, account_db_id: int, payload: dict[str, Any], timeout: float) -> BulkOutcome:
+    started = time.perf_counter()
+    outcome = BulkOutcome(account_db_id, "error")
+    try:
+        if not pool.is_active(account_db_id):
+            outcome.status = "not_running"
+            outcome.error = "worker not running"
+            return outcome
+        res = await pool.call(account_db_id, "bulk_positions", payload, timeout=timeout)
+        outcome.matched = res.get("matched", 0)
+        outcome.succeeded = res.get("succeeded", 0)
+        outcome.failed = res.get("failed", 0)
+        outcome.results = res.get("results", [])
+        if outcome.failed == 0:
+            outcome.status = "ok"
+        else:
+            outcome.status = "partial" if outcome.succeeded else "failed"
+    except asyncio.TimeoutError:
+        outcome.error = "worker call timed out"
+    except Exception as e:
+        outcome.error = str(e) or type(e).__name__
+    finally:
+        outcome.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    return outcome
+
+
+async def run_bulk(
+    pool: BulkPoolLike,
+    account_ids: list[int],
+    op: str,
+    position_filter: dict[str, Any],
+    params: dict[str, Any],
+    *,
+    timeout: float = _BULK_TIMEOUT,
+) -> list[BulkOutcome]:
+    """Run `op` on every matching position of every account, all accounts at once."""
+    validate_operation(op, params)
+    parse_filter(position_filter)   # fail fast before touching any worker
+    payload = {"op": op, "filter": position_filter, **params}
+    return list(await asyncio.gather(*(_bulk_one(pool, aid, payload, timeout) for aid in account_ids)))
@@ -0,0 +1,201 @@
+"""Cold archive tier: old equity snapshots and trade records in per-month files.
+
+Rows older than `ARCHIVE_AFTER_DAYS` are moved out of `traderdiary.db`
+into `archive/YYYY-MM.db`, one small SQLite file per calendar month with
+the same table definitions (and indexes) as the hot tables. `manifest.json`
+beside them records, per month and table, the row count and the first/last
+timestamp, so readers only open the months a query can touch.
+
+Moves happen in chunks on the single DB writer: each intent copies a chunk
+into its month files (`INSERT OR IGNORE`, ids preserved), commits them,
+then deletes the same ids from the hot table in the writer's transaction.
+If the process dies between the two commits, the next run re-copies
+(ignored) and deletes, so rows are never lost. Trades still waiting for
+their realized P&L stay hot. The newest row of each table always stays hot
+too, so SQLite never reuses an archived id. Archived trades are read-only.
+
+Readers open archive sessions with `sessions(table, start, end)` and run the
+same ORM queries against them as against the hot session.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import ARCHIVE_AFTER_DAYS
+from app.database import _db_path
+from app.models.equity_snapshot import EquitySnapshot
+from app.models.trade_record import TradeRecord
+from app.services.db_writer import db_writer
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+_CHUNK = 2000
+
+# table name → (model, timestamp column)
+_TABLES = {
+    EquitySnapshot.__tablename__: (EquitySnapshot, EquitySnapshot.recorded_at),
+    TradeRecord.__tablename__: (TradeRecord, TradeRecord.executed_at),
+}
+
+
+def month_of(ts: datetime) -> str:
+    return ts.strftime("%Y-%m")
+
+
+class ColdArchive:
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._engines: dict[str, Engine] = {}
+        self._manifest: Optional[dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    # ── Manifest ──────────────────────────────────────────────────────────────
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def manifest(self) -> dict[str, Any]:
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except FileNotFoundError:
+                self._manifest = {"version": MANIFEST_VERSION, "months": {}}
+        return self._manifest
+
+    def _save_manifest(self, manifest: dict[str, Any]) -> None:
+        manifest["updated_at"] = datetime.utcnow().isoformat()
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.manifest_path)
+        self._manifest = manifest
+
+    def months_for(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> list[str]:
+        """Archived months holding `table` rows that overlap [start, end), newest first."""
+        found = []
+        for month, entry in self.manifest()["months"].items():
+            t = entry["tables"].get(table)
+            if not t or not t["rows"]:
+                continue
+            if start is not None and datetime.fromisoformat(t["last"]) < start:
+                continue
+            if end is not None and datetime.fromisoformat(t["first"]) >= end:
+                continue
+            found.append(month)
+        return sorted(found, reverse=True)
+
+    def last_at(self, table: str, month: str) -> datetime:
+        return datetime.fromisoformat(self.manifest()["months"][month]["tables"][table]["last"])
+
+    # ── Files ─────────────────────────────────────────────────────────────────
+    def _engine(self, month: str) -> Engine:
+        with self._lock:
+            engine = self._engines.get(month)
+            if engine is None:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f"{month}.db")
+                engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+                tables = [model.__table__ for model, _ in _TABLES.values()]
+                tables[0].metadata.create_all(bind=engine, tables=tables)
+                self._engines[month] = engine
+            return engine
+
+    @contextmanager
+    def sessions(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[list[tuple[str, Session]]]:
+        """(month, session) for each archive month overlapping the range, newest first."""
+        opened = [(m, Session(bind=self._engine(m))) for m in self.months_for(table, start, end)]
+        try:
+            yield opened
+        finally:
+            for _, s in opened:
+                s.close()
+
+    def dispose(self) -> None:
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
+            self._manifest = None
+
+    # ── Archiving ─────────────────────────────────────────────────────────────
+    def archive_chunk(self, session: Session, table: str, cutoff: datetime, limit: int = _CHUNK) -> int:
+        """Writer intent: move up to `limit` rows older than `cutoff`. Returns rows moved."""
+        model, ts_col = _TABLES[table]
+        newest_id = session.query(func.max(model.id)).scalar()
+        if newest_id is None:
+            return 0
+        q = session.query(model).filter(ts_col.isnot(None), ts_col < cutoff, model.id < newest_id)
+        if model is TradeRecord:
+            # Keep trades that the realized-P&L sync may still update.
+            q = q.filter(or_(TradeRecord.order_ticket.is_(None), TradeRecord.realized_pnl.isnot(None)))
+        rows = q.order_by(model.id).limit(limit).all()
+        if not rows:
+            return 0
+
+        columns = [c.name for c in model.__table__.columns]
+        by_month: dict[str, list[dict[str, Any]]] = {}
+        for r in rows:
+            by_month.setdefault(month_of(getattr(r, ts_col.key)), []).append(
+                {c: getattr(r, c) for c in columns}
+            )
+
+        # Readers iterate the cached manifest without a lock; publish a new one.
+        manifest = copy.deepcopy(self.manifest())
+        months = manifest.setdefault("months", {})
+        stmt = model.__table__.insert().prefix_with("OR IGNORE")
+        for month, values in by_month.items():
+            with self._engine(month).begin() as conn:
+                conn.execute(stmt, values)
+                count, first, last = conn.execute(
+                    select(func.count(), func.min(ts_col), func.max(ts_col)).select_from(model.__table__)
+                ).one()
+            entry = months.setdefault(month, {"file": f"{month}.db", "tables": {}})
+            entry["tables"][table] = {
+                "rows": count,
+                "first": _iso(first),
+                "last": _iso(last),
+            }
+        self._save_manifest(manifest)
+
+        session.query(model).filter(model.id.in_([r.id for r in rows])).delete(synchronize_session=False)
+        return len(rows)
+
+    async def run(self, now: Optional[datetime] = None, after_days: int = ARCHIVE_AFTER_DAYS) -> dict[str, int]:
+        """Move everything older than `after_days` out of the hot DB, chunk by chunk."""
+        moved = {table: 0 for table in _TABLES}
+        if after_days <= 0:
+            return moved
+        cutoff = (now or datetime.utcnow()) - timedelta(days=after_days)
+        for table in _TABLES:
+            while True:
+                n = await db_writer.run(lambda s, t=table: self.archive_chunk(s, t, cutoff))
+                moved[table] += n
+                if n < _CHUNK:
+                    break
+        if any(moved.values()):
+            logger.info("Archived %s rows older than %s", moved, cutoff.date())
+        return moved
+
+
+def _iso(ts: Any) -> Optional[str]:
+    if ts is None:
+        return None
+    if isinstance(ts, str):   # raw aggregate over a TIMESTAMP column
+        return datetime.fromisoformat(ts).isoformat()
+    return ts.isoformat()
+
+
+cold_archive = ColdArchive(os.path.join(os.path.dirname(_db_path), "archive"))
@@ -0,0 +1,229 @@
+"""Incremental per-account daily journal aggregates (`daily_account_stats`).
+
+Writers call in with the rows they just wrote, inside the same transaction:
+
+  - `apply_trades`       new trade records → counts, lots, risk, R:R, symbols
+  - `apply_realized_pnl` a trade got its closing P&L → realized_pnl, closed_count
+  - `apply_balances`     daily equity buckets → open/close balance of the day
+
+All of them run on the single DB writer (or inside one request's session),
+so read-modify-write of a day row never races. `rebuild_daily_stats`
+recomputes the table from existing history once per version; `journal_page`
+is the read side used by `/api/analytics/journal`.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.models.daily_account_stats import DailyAccountStats
+from app.models.equity_rollup import EquityRollup
+from app.models.trade_record import TradeRecord
+from app.services.cold_archive import cold_archive
+from app.services.settings import KEY_DAILY_STATS_REBUILT, read_marker, write_marker
+
+logger = logging.getLogger(__name__)
+
+# Bump to make the next startup recompute every day row (e.g. a new column).
+DAILY_STATS_VERSION = "1"
+
+
+def day_of(ts: datetime) -> str:
+    return ts.date().isoformat()
+
+
+class _Days:
+    """Row cache for one batch so repeated (account, day) keys hit the DB once."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self._rows: dict[tuple[int, str], DailyAccountStats] = {}
+
+    def get(self, account_db_id: int, day: str) -> DailyAccountStats:
+        key = (account_db_id, day)
+        row = self._rows.get(key)
+        if row is None:
+            row = (
+                self.session.query(DailyAccountStats)
+                .filter(DailyAccountStats.account_db_id == account_db_id, DailyAccountStats.day == day)
+                .first()
+            )
+            if row is None:
+                row = DailyAccountStats(
+                    account_db_id=account_db_id, day=day,
+                    trade_count=0, success_count=0, buy_count=0, sell_count=0,
+                    total_lots=0.0, total_risk=0.0, rr_sum=0.0, rr_count=0,
+                    symbols="", closed_count=0, realized_pnl=0.0,
+                )
+                self.session.add(row)
+            self._rows[key] = row
+        return row
+
+
+def apply_trades(session: Session, rows: Iterable[dict[str, Any]]) -> None:
+    """Fold freshly inserted trade-record rows (need `executed_at`) into their days."""
+    days = _Days(session)
+    for r in rows:
+        st = days.get(r["account_db_id"], day_of(r["executed_at"]))
+        st.trade_count += 1
+        st.success_count += 1 if r.get("success") else 0
+        st.buy_count += 1 if r.get("direction") == "BUY" else 0
+        st.sell_count += 1 if r.get("direction") == "SELL" else 0
+        st.total_lots += r.get("lot_size") or 0.0
+        if r.get("success"):
+            st.total_risk += r.get("risk_amount") or 0.0
+        rr = r.get("rr_ratio")
+        if rr and rr > 0:
+            st.rr_sum += rr
+            st.rr_count += 1
+        symbols = [s for s in (st.symbols or "").split(",") if s]
+        if r["symbol"] not in symbols:
+            st.symbols = ",".join(symbols + [r["symbol"]])
+    session.flush()
+
+
+def apply_realized_pnl(session: Session, account_db_id: int, executed_at: datetime, pnl: float) -> None:
+    st = _Days(session).get(account_db_id, day_of(executed_at))
+    st.closed_count += 1
+    st.realized_pnl += pnl
+    session.flush()
+
+
+def apply_balances(session: Session, day_buckets: Iterable[dict[str, Any]]) -> None:
+    """Merge daily equity buckets (see `equity_rollups.aggregate`) into open/close balance."""
+    days = _Days(session)
+    for b in day_buckets:
+        st = days.get(b["account_db_id"], day_of(b["bucket_start"]))
+        if st.first_snapshot_at is None or b["first_at"] < st.first_snapshot_at:
+            st.first_snapshot_at, st.open_balance = b["first_at"], b["open_balance"]
+        if st.last_snapshot_at is None or b["last_at"] >= st.last_snapshot_at:
+            st.last_snapshot_at, st.close_balance = b["last_at"], b["close_balance"]
+    session.flush()
+
+
+def _grouped_trades(session: Session) -> list[tuple]:
+    """Per (account, day) trade aggregates of the trade records `session` sees."""
+    day_expr = func.date(TradeRecord.executed_at)
+    return (
+        session.query(
+            TradeRecord.account_db_id,
+            day_expr,
+            func.count(TradeRecord.id),
+            func.sum(case((TradeRecord.success.is_(True), 1), else_=0)),
+            func.sum(case((TradeRecord.direction == "BUY", 1), else_=0)),
+            func.sum(case((TradeRecord.direction == "SELL", 1), else_=0)),
+            func.coalesce(func.sum(TradeRecord.lot_size), 0.0),
+            func.coalesce(func.sum(case((TradeRecord.success.is_(True), TradeRecord.risk_amount), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((TradeRecord.rr_ratio > 0, TradeRecord.rr_ratio), else_=0.0)), 0.0),
+            func.sum(case((TradeRecord.rr_ratio > 0, 1), else_=0)),
+            func.group_concat(TradeRecord.symbol),
+            func.count(TradeRecord.realized_pnl),
+            func.coalesce(func.sum(TradeRecord.realized_pnl), 0.0),
+        )
+        .filter(TradeRecord.executed_at.isnot(None))
+        .group_by(TradeRecord.account_db_id, day_expr)
+        .all()
+    )
+
+
+def rebuild_daily_stats(session: Session) -> int:
+    """Recompute the table from trade records (hot and cold-archived) + daily
+    rollups, once per `DAILY_STATS_VERSION`. Does not commit.
+
+    Rows live writers added before this ran are replaced, not kept: the
+    rebuild reads the same source rows in the same transaction, and the
+    version marker is committed with it.
+    """
+    if read_marker(session, KEY_DAILY_STATS_REBUILT) == DAILY_STATS_VERSION:
+        return 0
+    session.query(DailyAccountStats).delete(synchronize_session=False)
+    days = _Days(session)
+    grouped = _grouped_trades(session)
+    # A day can straddle the archive cutoff, so months are added onto the hot rows.
+    with cold_archive.sessions(TradeRecord.__tablename__) as archived:
+        for _, month_session in archived:
+            grouped.extend(_grouped_trades(month_session))
+    for (account_db_id, day, n, ok, buys, sells, lots, risk, rr_sum, rr_n, symbols, closed, pnl) in grouped:
+        st = days.get(account_db_id, day)
+        st.trade_count += n
+        st.success_count += ok or 0
+        st.buy_count += buys or 0
+        st.sell_count += sells or 0
+        st.total_lots += lots
+        st.total_risk += risk
+        st.rr_sum += rr_sum
+        st.rr_count += rr_n or 0
+        st.symbols = ",".join(dict.fromkeys(sym for sym in f"{st.symbols},{symbols or ''}".split(",") if sym))
+        st.closed_count += closed
+        st.realized_pnl += pnl
+    # `apply_balances` looks days up afresh; writer sessions don't autoflush.
+    session.flush()
+
+    buckets = session.query(EquityRollup).filter(EquityRollup.resolution == "1d").all()
+    apply_balances(session, [
+        {
+            "account_db_id": b.account_db_id, "bucket_start": b.bucket_start,
+            "first_at": b.first_at, "last_at": b.last_at,
+            "open_balance": b.open_balance, "close_balance": b.close_balance,
+        }
+        for b in buckets
+    ])
+    session.flush()
+    write_marker(session, KEY_DAILY_STATS_REBUILT, DAILY_STATS_VERSION)
+    total = session.query(func.count(DailyAccountStats.id)).scalar() or 0
+    if total:
+        logger.info("Rebuilt %d daily account stats rows", total)
+    return total
+
+
+# ── Read side ─────────────────────────────────────────────────────────────────
+def journal_page(
+    db: Session,
+    since_day: str,
+    *,
+    account_id: Optional[int] = None,
+    before: Optional[str] = None,
+    limit: int = 90,
+) -> list[dict[str, Any]]:
+    """Journal days newest first, summed across accounts unless `account_id` is set."""
+    d = DailyAccountStats
+    q = db.query(
+        d.day,
+        func.sum(d.trade_count),
+        func.sum(d.success_count),
+        func.sum(d.buy_count),
+        func.sum(d.sell_count),
+        func.sum(d.total_lots),
+        func.sum(d.total_risk),
+        func.sum(d.rr_sum),
+        func.sum(d.rr_count),
+        func.group_concat(d.symbols, ","),
+        func.sum(d.close_balance - d.open_balance),
+        func.sum(d.realized_pnl),
+    ).filter(d.day >= since_day)
+    if account_id is not None:
+        q = q.filter(d.account_db_id == account_id)
+    if before is not None:
+        q = q.filter(d.day < before)
+    rows = q.group_by(d.day).order_by(d.day.desc()).limit(limit).all()
+
+    page = []
+    for (day, n, ok, buys, sells, lots, risk, rr_sum, rr_n, symbols, balance_change, pnl) in rows:
+        page.append({
+            "date": day,
+            "trade_count": n,
+            "success_count": ok,
+            "symbols": list(dict.fromkeys(s for s in (symbols or "").split(",") if s)),
+            "buy_count": buys,
+            "sell_count": sells,
+            "total_lots": round(lots or 0.0, 2),
+            "total_risk": round(risk or 0.0, 2),
+            "avg_rr": round(rr_sum / rr_n, 2) if rr_n else None,
+            "balance_change": round(balance_change, 2) if balance_change is not None else None,
+            "realized_pnl": round(pnl or 0.0, 2),
+        })
+    return page
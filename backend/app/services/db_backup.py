@@ -0,0 +1,362 @@
+"""Online backups and streamed restores of the SQLite journal.
+
+Backups use SQLite's online backup API instead of copying the live file, so
+the copy is a consistent snapshot that includes pages still sitting in the
+WAL. The copy runs `pages` at a time with a short sleep in between, releasing
+the source lock so the db-writer keeps committing. A commit from another
+connection makes SQLite restart the copy; if that happens `max_restarts`
+times the backup falls back to one step, which in WAL mode is a plain read
+transaction and still does not block writers. The result can be gzipped.
+
+Once rows have been moved to the cold archive (`archive/` beside the DB),
+a database file alone is no longer the whole journal, so the backup becomes
+a tar bundle: the hot snapshot plus a copy of `manifest.json` and every
+month file. The hot copy is taken first and the archive copy second, on the
+DB writer where no archive move can be half done; a row moved in between is
+in both copies and is dropped from the hot one, as the move would have done.
+
+Restores never hold the upload in memory. `UploadSpool` writes it to a
+temp file next to the database in fixed chunks (gunzipping if needed), then
+`verify` checks it is a SQLite file that passes `PRAGMA integrity_check`.
+Only then does `swap_in` replace the live file with an atomic rename. It also
+deletes the old `-wal`/`-shm` files so stale frames are never replayed onto
+the restored database. A bundle is unpacked by `unpack` (database and month
+files verified the same way) and `swap_archive` installs its archive; the
+archive being replaced is renamed aside, never deleted.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+import zlib
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+GZIP_MAGIC = b"\x1f\x8b"
+
+BACKUP_PAGES_PER_STEP = 1024      # 4 MB per step at the default 4 KB page size
+BACKUP_STEP_PAUSE = 0.005
+BACKUP_MAX_RESTARTS = 5
+CHUNK_SIZE = 1024 * 1024
+
+BUNDLE_DB = "traderdiary.db"
+_MONTH_FILE = re.compile(r"\d{4}-\d{2}\.db")
+_BUNDLE_ARCHIVE = re.compile(r"archive/(manifest\.json|\d{4}-\d{2}\.db)")
+
+
+class InvalidBackupError(ValueError):
+    """The uploaded file is not a usable SQLite database."""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _temp_path(db_path: str, suffix: str) -> str:
+    fd, path = tempfile.mkstemp(prefix=".traderdiary-", suffix=suffix, dir=os.path.dirname(db_path) or ".")
+    os.close(fd)
+    return path
+
+
+def _temp_dir(db_path: str, suffix: str) -> str:
+    return tempfile.mkdtemp(prefix=".traderdiary-", suffix=suffix, dir=os.path.dirname(db_path) or ".")
+
+
+def _remove(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning("Could not remove %s: %s", path, e)
+
+
+def _month_files(directory: str) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if _MONTH_FILE.fullmatch(name))
+
+
+# ── Backup ────────────────────────────────────────────────────────────────────
+def backup_to(
+    db_path: str,
+    dest_path: str,
+    *,
+    pages: int = BACKUP_PAGES_PER_STEP,
+    pause: float = BACKUP_STEP_PAUSE,
+    max_restarts: int = BACKUP_MAX_RESTARTS,
+) -> None:
+    """Copy `db_path` into `dest_path` with the SQLite backup API."""
+    src = sqlite3.connect(db_path, timeout=5.0)
+    try:
+        restarts = 0
+        last_remaining = None
+
+        def progress(_status: int, remaining: int, _total: int) -> None:
+            nonlocal restarts, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                restarts += 1
+                if restarts > max_restarts:
+                    raise _Restarted()
+            last_remaining = remaining
+            if remaining and pause:
+                time.sleep(pause)   # source is unlocked between steps; let writers in
+
+        try:
+            _copy(src, dest_path, pages=pages, progress=progress)
+        except _Restarted:
+            logger.info("Backup restarted %d times under write load; copying in one step", restarts)
+            _copy(src, dest_path, pages=-1)
+    finally:
+        src.close()
+
+
+def _copy(src: sqlite3.Connection, dest_path: str, *, pages: int, progress=None) -> None:
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst, pages=pages, progress=progress)
+        # Make the file self-contained: no -wal next to the downloaded copy.
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+
+
+def create_backup(db_path: str, *, compress: bool = False) -> str:
+    """Write a consistent snapshot to a temp file and return its path (caller deletes it)."""
+    raw = _temp_path(db_path, ".db")
+    try:
+        backup_to(db_path, raw)
+        if not compress:
+            return raw
+        packed = _temp_path(db_path, ".db.gz")
+        try:
+            with open(raw, "rb") as f_in, gzip.open(packed, "wb", compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, CHUNK_SIZE)
+        except Exception:
+            _remove(packed)
+            raise
+        _remove(raw)
+        return packed
+    except Exception:
+        _remove(raw)
+        raise
+
+
+def snapshot_archive(archive_dir: str, db_path: str) -> Optional[str]:
+    """Copy the cold archive into a temp dir beside the DB (caller deletes it).
+
+    Returns None when nothing has been archived. Run it as a DB writer intent:
+    archive moves only happen there, so the copy never sees half a chunk.
+    """
+    manifest = os.path.join(archive_dir, "manifest.json")
+    if not os.path.exists(manifest):
+        return None
+    staging = _temp_dir(db_path, ".archive")
+    try:
+        shutil.copyfile(manifest, os.path.join(staging, "manifest.json"))
+        for name in _month_files(archive_dir):
+            backup_to(os.path.join(archive_dir, name), os.path.join(staging, name), pause=0)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return staging
+
+
+def _drop_archived(db_path: str, archive_copy: str) -> None:
+    """Delete rows from the hot copy that the archive copy already holds."""
+    conn = sqlite3.connect(db_path)
+    try:
+        for name in _month_files(archive_copy):
+            conn.execute("ATTACH DATABASE ? AS month", (os.path.join(archive_copy, name),))
+            tables = [r[0] for r in conn.execute("SELECT name FROM month.sqlite_master WHERE type = 'table'")]
+            for table in tables:
+                conn.execute(f'DELETE FROM main."{table}" WHERE id IN (SELECT id FROM month."{table}")')
+            conn.commit()
+            conn.execute("DETACH DATABASE month")
+    finally:
+        conn.close()
+
+
+def create_bundle(db_copy: str, archive_copy: str, *, compress: bool = False) -> str:
+    """Tar a hot snapshot (`create_backup`) taken before `archive_copy`; consumes both inputs."""
+    path = _temp_path(db_copy, ".tar.gz" if compress else ".tar")
+    try:
+        _drop_archived(db_copy, archive_copy)
+        with (tarfile.open(path, "w:gz", compresslevel=6) if compress else tarfile.open(path, "w")) as tar:
+            tar.add(db_copy, arcname=BUNDLE_DB)
+            tar.add(os.path.join(archive_copy, "manifest.json"), arcname="archive/manifest.json")
+            for name in _month_files(archive_copy):
+                tar.add(os.path.join(archive_copy, name), arcname=f"archive/{name}")
+        return path
+    except Exception:
+        _remove(path)
+        raise
+    finally:
+        _remove(db_copy)
+        shutil.rmtree(archive_copy, ignore_errors=True)
+
+
+# ── Restore ───────────────────────────────────────────────────────────────────
+class UploadSpool:
+    """Incrementally writes an uploaded backup to a temp file beside the DB.
+
+    Feed it chunks with `write`; gzip uploads (sniffed from the first bytes)
+    are decompressed on the fly. `close()` returns the spooled path.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.path = _temp_path(db_path, ".restore")
+        self._file = open(self.path, "wb")
+        self._inflater = None  # zlib decompressobj once gzip is detected
+        self._head = b""
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.bytes_in += len(chunk)
+        if self._head is not None:
+            # Buffer until we can tell gzip from raw SQLite.
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            chunk, self._head = self._head, None
+            if chunk.startswith(GZIP_MAGIC):
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflater is not None:
+            try:
+                chunk = self._inflater.decompress(chunk)
+            except zlib.error as e:
+                raise InvalidBackupError(f"Corrupt gzip stream: {e}") from e
+        self._file.write(chunk)
+        self.bytes_out += len(chunk)
+
+    def close(self) -> str:
+        if self._head:
+            self._file.write(self._head)
+            self.bytes_out += len(self._head)
+        if self._inflater is not None:
+            tail = self._inflater.flush()
+            self._file.write(tail)
+            self.bytes_out += len(tail)
+            if not self._inflater.eof:
+                self._file.close()
+                raise InvalidBackupError("Truncated gzip stream")
+        self._file.close()
+        return self.path
+
+    def discard(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        _remove(self.path)
+
+
+def verify(path: str) -> None:
+    """Raise `InvalidBackupError` unless `path` is an intact SQLite database."""
+    with open(path, "rb") as f:
+        if f.read(len(SQLITE_MAGIC)) != SQLITE_MAGIC:
+            raise InvalidBackupError("Invalid file: not a SQLite database")
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            rows = conn.execute("PRAGMA integrity_check").fetchall()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise InvalidBackupError(f"Invalid database: {e}") from e
+    if rows != [("ok",)]:
+        detail = "; ".join(r[0] for r in rows[:3])
+        raise InvalidBackupError(f"Integrity check failed: {detail}")
+
+
+def unpack(path: str, db_path: str) -> tuple[str, Optional[str]]:
+    """Verify a spooled upload: (database file, archive dir or None for a plain backup).
+
+    A bundle is extracted beside the DB. Only the database, the manifest and
+    month files are accepted, and each database must pass `verify`. The
+    spooled bundle itself is left for the caller to discard.
+    """
+    with open(path, "rb") as f:
+        head = f.read(len(SQLITE_MAGIC))
+    if head == SQLITE_MAGIC or not tarfile.is_tarfile(path):
+        verify(path)
+        return path, None
+
+    archive = _temp_dir(db_path, ".restore-archive")
+    db_file = None
+    try:
+        with tarfile.open(path) as tar:
+            for member in tar:
+                match = _BUNDLE_ARCHIVE.fullmatch(member.name)
+                if not member.isfile() or (member.name != BUNDLE_DB and match is None):
+                    raise InvalidBackupError(f"Unexpected entry in backup: {member.name}")
+                if member.name == BUNDLE_DB:
+                    target = db_file = _temp_path(db_path, ".restore")
+                else:
+                    target = os.path.join(archive, match.group(1))
+                with tar.extractfile(member) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        if db_file is None:
+            raise InvalidBackupError("Backup bundle has no database")
+        verify(db_file)
+        try:
+            with open(os.path.join(archive, "manifest.json"), encoding="utf-8") as f:
+                json.load(f)
+        except (OSError, ValueError) as e:
+            raise InvalidBackupError(f"Invalid archive manifest: {e}") from e
+        for name in _month_files(archive):
+            verify(os.path.join(archive, name))
+    except tarfile.TarError as e:
+        _remove(db_file)
+        shutil.rmtree(archive, ignore_errors=True)
+        raise InvalidBackupError(f"Corrupt backup bundle: {e}") from e
+    except Exception:
+        _remove(db_file)
+        shutil.rmtree(archive, ignore_errors=True)
+        raise
+    return db_file, archive
+
+
+def swap_archive(archive_dir: str, new_dir: Optional[str]) -> Optional[str]:
+    """Install the restored archive (none for a plain backup) at `archive_dir`.
+
+    The caller must have disposed the archive engines first. The archive
+    being replaced is renamed aside; its new path is returned.
+    """
+    aside = None
+    if os.path.exists(archive_dir):
+        base = aside = f"{archive_dir}.replaced-{time.strftime('%Y%m%d-%H%M%S')}"
+        n = 1
+        while os.path.exists(aside):
+            aside = f"{base}-{n}"
+            n += 1
+        os.replace(archive_dir, aside)
+    if new_dir is not None:
+        os.replace(new_dir, archive_dir)
+    return aside
+
+
+def swap_in(db_path: str, new_path: str, *, attempts: int = 10, delay: float = 0.1) -> None:
+    """Atomically replace `db_path` with `new_path` and drop stale WAL/SHM files.
+
+    The caller must have disposed its engine first. On Windows the rename
+    fails while any connection still has the file open, so it is retried
+    briefly to let in-flight requests finish.
+    """
+    for attempt in range(attempts):
+        try:
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+            os.replace(new_path, db_path)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(delay)
@@ -0,0 +1,220 @@
+"""Single-writer actor for SQLite.
+
+SQLite allows one writer at a time; with writes coming from route handlers,
+`run_db` threads and gathered trade batches, callers used to collide and hit
+"database is locked". Background writers hand their work to this actor
+instead: one dedicated thread drains a queue of write intents, groups
+everything that arrived within `linger` seconds (up to `max_batch` intents)
+into ONE transaction, and commits once.
+
+An intent is a callable taking a `Session`; it must not commit. Consecutive
+`insert` intents for the same table are merged into a single executemany
+(per distinct column set).
+If a batch fails, it is rolled back and each intent is replayed in its own
+transaction so one bad row only fails its own caller.
+
+`exclusive` intents take no session: the writer commits whatever it has
+gathered, runs them alone, and only then opens the next batch. File-level
+work (swapping the database under a restore) goes through them.
+
+Readers are unaffected: the engine runs in WAL mode (see `database.py`), so
+analytics queries read the last committed snapshot while the writer works.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class _Intent:
+    fn: Optional[Callable[[Session], Any]] = None
+    table: Optional[Table] = None
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    future: Future = field(default_factory=Future)
+    exclusive: bool = False
+
+
+class DBWriter:
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        *,
+        max_batch: int = 256,
+        linger: float = 0.005,
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._linger = linger
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.intents = 0
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Drain pending intents, then stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    # ── Submission ────────────────────────────────────────────────────────────
+    def submit(self, fn: Callable[[Session], Any]) -> Future:
+        return self._put(_Intent(fn=fn))
+
+    def submit_insert(self, table: Table, rows: list[dict[str, Any]]) -> Future:
+        return self._put(_Intent(table=table, rows=list(rows)))
+
+    def submit_exclusive(self, fn: Callable[[], Any]) -> Future:
+        return self._put(_Intent(fn=fn, exclusive=True))
+
+    async def run(self, fn: Callable[[Session], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit(fn))
+
+    async def exclusive(self, fn: Callable[[], Any]) -> Any:
+        """Run `fn` on the writer thread between batches, with no session open."""
+        return await asyncio.wrap_future(self.submit_exclusive(fn))
+
+    async def insert(self, table: Table, rows: list[dict[str, Any]]) -> None:
+        await asyncio.wrap_future(self.submit_insert(table, rows))
+
+    def _put(self, intent: _Intent) -> Future:
+        self.start()
+        self._queue.put(intent)
+        return intent.future
+
+    # ── Writer thread ─────────────────────────────────────────────────────────
+    def _run(self) -> None:
+        pending = None
+        while True:
+            first = pending if pending is not None else self._queue.get()
+            pending = None
+            if first is _STOP:
+                return
+            if first.exclusive:
+                self._run_exclusive(first)
+                continue
+            batch = [first]
+            stopping = False
+            while len(batch) < self._max_batch:
+                try:
+                    nxt = self._queue.get(timeout=self._linger)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stopping = True
+                    break
+                if nxt.exclusive:
+                    pending = nxt       # runs after this batch commits
+                    break
+                batch.append(nxt)
+            self._write_batch(batch)
+            if stopping:
+                # Drain anything queued behind the stop marker before exiting.
+                rest = []
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is _STOP:
+                        continue
+                    if item.exclusive:
+                        if rest:
+                            self._write_batch(rest)
+                            rest = []
+                        self._run_exclusive(item)
+                    else:
+                        rest.append(item)
+                if rest:
+                    self._write_batch(rest)
+                return
+
+    def _run_exclusive(self, intent: _Intent) -> None:
+        try:
+            result = intent.fn()
+        except Exception as e:
+            _settle(intent.future, error=e)
+            return
+        _settle(intent.future, result)
+
+    def _write_batch(self, batch: list[_Intent]) -> None:
+        self.batches += 1
+        self.intents += len(batch)
+        session = self._session_factory()
+        try:
+            results = self._apply(session, batch)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            session.close()
+            if len(batch) > 1:
+                logger.warning("db-writer batch of %d failed (%s); replaying one by one", len(batch), e)
+                for intent in batch:
+                    self._write_batch([intent])
+            else:
+                _settle(batch[0].future, error=e)
+            return
+        session.close()
+        for intent, result in zip(batch, results):
+            _settle(intent.future, result)
+
+    @staticmethod
+    def _apply(session: Session, batch: list[_Intent]) -> list[Any]:
+        results: list[Any] = []
+        i = 0
+        while i < len(batch):
+            intent = batch[i]
+            if intent.table is None:
+                results.append(intent.fn(session))
+                i += 1
+                continue
+            # Merge the run of inserts into the same table into one executemany.
+            j = i
+            rows: list[dict[str, Any]] = []
+            while j < len(batch) and batch[j].table is intent.table:
+                rows.extend(batch[j].rows)
+                j += 1
+            by_keys: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+            for row in rows:
+                by_keys.setdefault(tuple(sorted(row)), []).append(row)
+            for same_shape in by_keys.values():
+                session.execute(insert(intent.table), same_shape)
+            results.extend([None] * (j - i))
+            i = j
+        return results
+
+
+def _settle(future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+    """Resolve an intent's future; the caller may have cancelled it meanwhile
+    (e.g. a task awaiting `run` was cancelled at shutdown)."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+db_writer = DBWriter()
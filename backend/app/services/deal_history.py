@@ -0,0 +1,147 @@
+"""Reads and writes for the local deal mirror (`deals`).
+
+`upsert_deals` is called by the realized-P&L sync with whatever the worker
+returned since the account's watermark; deals are immutable once booked,
+so re-delivered tickets are ignored. The read side (history pages, closing
+deals for P&L matching, per-symbol summaries) runs entirely on the
+`(account, time)` / `(account, order)` / `(account, position)` indexes.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.deal import Deal
+
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_OUT = 1
+_TRADE_TYPES = (DEAL_TYPE_BUY, DEAL_TYPE_SELL)
+_COLUMNS = (
+    "ticket", "order", "position_id", "symbol", "type", "entry", "volume", "price",
+    "sl", "tp", "profit", "commission", "swap", "fee", "magic", "comment",
+)
+
+
+def upsert_deals(session: Session, account_db_id: int, deals: Iterable[dict[str, Any]]) -> int:
+    """Insert new deals (deal dicts from `protocol.deal_to_dict`). Does not commit."""
+    rows = [
+        {
+            "account_db_id": account_db_id,
+            **{c: d.get(c) for c in _COLUMNS},
+            "time": datetime.fromtimestamp(d["time"]),
+        }
+        for d in deals
+    ]
+    if not rows:
+        return 0
+    stmt = sqlite_insert(Deal.__table__).on_conflict_do_nothing(index_elements=["account_db_id", "ticket"])
+    return session.execute(stmt, rows).rowcount or 0
+
+
+def closing_deals(session: Session, account_db_id: int, tickets: Iterable[int]) -> list[dict[str, Any]]:
+    """Closing (OUT) deals whose order or position is one of `tickets`, as deal dicts."""
+    tickets = list(tickets)
+    if not tickets:
+        return []
+    rows = (
+        session.query(Deal)
+        .filter(
+            Deal.account_db_id == account_db_id,
+            Deal.entry == DEAL_ENTRY_OUT,
+            or_(Deal.order.in_(tickets), Deal.position_id.in_(tickets)),
+        )
+        .all()
+    )
+    return [
+        {**{c: getattr(d, c) for c in _COLUMNS}, "time": int(d.time.timestamp())}
+        for d in rows
+    ]
+
+
+def serialize_deal(d: Deal) -> dict[str, Any]:
+    return {
+        "ticket": d.ticket,
+        "order": d.order,
+        "position_id": d.position_id,
+        "time": d.time.isoformat(),
+        "symbol": d.symbol,
+        "type": "BUY" if d.type == DEAL_TYPE_BUY else "SELL",
+        "entry": d.entry,
+        "volume": d.volume,
+        "price": d.price,
+        "sl": d.sl,
+        "tp": d.tp,
+        "profit": d.profit,
+        "commission": d.commission,
+        "swap": d.swap,
+        "comment": d.comment,
+    }
+
+
+def history(
+    db: Session,
+    account_db_id: int,
+    since: datetime,
+    *,
+    until: Optional[datetime] = None,
+    symbol: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> list[Deal]:
+    """Buy/sell deals (no balance/credit operations) in time order."""
+    q = db.query(Deal).filter(
+        Deal.account_db_id == account_db_id,
+        Deal.time >= since,
+        Deal.type.in_(_TRADE_TYPES),
+    )
+    if until is not None:
+        q = q.filter(Deal.time < until)
+    if symbol:
+        q = q.filter(Deal.symbol == symbol)
+    q = q.order_by(Deal.time.asc(), Deal.ticket.asc())
+    if limit:
+        q = q.limit(limit)
+    return q.all()
+
+
+def summary(db: Session, account_db_id: int, since: datetime) -> list[dict[str, Any]]:
+    """Per-symbol closing-deal totals: count, wins, losses, gross/net P&L, volume."""
+    net = Deal.profit + func.coalesce(Deal.commission, 0.0) + func.coalesce(Deal.swap, 0.0)
+    rows = (
+        db.query(
+            Deal.symbol,
+            func.count(Deal.id),
+            func.sum(case((net > 0, 1), else_=0)),
+            func.sum(case((net < 0, 1), else_=0)),
+            func.coalesce(func.sum(case((net > 0, net), else_=0.0)), 0.0),
+            func.coalesce(func.sum(case((net < 0, net), else_=0.0)), 0.0),
+            func.coalesce(func.sum(net), 0.0),
+            func.coalesce(func.sum(Deal.volume), 0.0),
+        )
+        .filter(
+            Deal.account_db_id == account_db_id,
+            Deal.time >= since,
+            Deal.entry == DEAL_ENTRY_OUT,
+            Deal.type.in_(_TRADE_TYPES),
+        )
+        .group_by(Deal.symbol)
+        .order_by(Deal.symbol)
+        .all()
+    )
+    return [
+        {
+            "symbol": symbol,
+            "closed": n,
+            "wins": wins or 0,
+            "losses": losses or 0,
+            "gross_profit": round(gross_profit, 2),
+            "gross_loss": round(gross_loss, 2),
+            "net_pnl": round(net_pnl, 2),
+            "volume": round(volume, 2),
+        }
+        for symbol, n, wins, losses, gross_profit, gross_loss, net_pnl, volume in rows
+    ]
@@ -0,0 +1,323 @@
+"""Multi-resolution equity rollups (5m / 1h / 1d OHLC) and raw-tier retention.
+
+Every batch of raw snapshots written by the snapshot writer (or the legacy
+WS loop) is folded into `equity_rollups` in the same transaction: rows are
+grouped per (account, resolution, bucket) in Python, then merged with one
+`INSERT … ON CONFLICT DO UPDATE` executemany — high/low widen, open/close
+follow the earliest/latest sample, `samples` accumulates. Buckets are UTC
+aligned like the raw `recorded_at` values.
+
+Readers call `select_tier` to get the finest tier whose bucket count over the
+requested range fits the point budget — a 1-year chart reads ~365 daily rows,
+a 2-hour chart still reads raw snapshots. Raw rows older than
+`RAW_SNAPSHOT_RETENTION_DAYS` (opt-in; 0 keeps them) are pruned by
+`prune_raw_snapshots` once the backfill has finished; the raw tier is only
+chosen for ranges it still fully covers.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.config import ARCHIVE_AFTER_DAYS, RAW_SNAPSHOT_RETENTION_DAYS, ROLLUP_MAINTENANCE_SECONDS
+from app.models.equity_rollup import EquityRollup
+from app.models.equity_snapshot import EquitySnapshot
+from app.services import daily_stats, trade_stats
+from app.services.cold_archive import cold_archive
+from app.services.db_writer import db_writer
+from app.services.settings import KEY_ROLLUP_BACKFILL, read_marker, write_marker
+
+logger = logging.getLogger(__name__)
+
+TIER_RAW = "raw"
+RESOLUTIONS: dict[str, int] = {"5m": 300, "1h": 3600, "1d": 86400}
+_RAW_NOMINAL_SECONDS = 60          # snapshots arrive roughly once a minute
+_BACKFILL_CHUNK = 5000
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_start(ts: datetime, seconds: int) -> datetime:
+    """Floor a naive UTC timestamp to its bucket."""
+    epoch = int((ts - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=epoch - epoch % seconds)
+
+
+@dataclass
+class _Bucket:
+    account_db_id: int
+    resolution: str
+    bucket_start: datetime
+    open_equity: float
+    high_equity: float
+    low_equity: float
+    close_equity: float
+    open_balance: float
+    high_balance: float
+    low_balance: float
+    close_balance: float
+    samples: int
+    first_at: datetime
+    last_at: datetime
+
+    def add(self, equity: float, balance: float, at: datetime) -> None:
+        self.high_equity = max(self.high_equity, equity)
+        self.low_equity = min(self.low_equity, equity)
+        self.high_balance = max(self.high_balance, balance)
+        self.low_balance = min(self.low_balance, balance)
+        if at < self.first_at:
+            self.first_at, self.open_equity, self.open_balance = at, equity, balance
+        if at >= self.last_at:
+            self.last_at, self.close_equity, self.close_balance = at, equity, balance
+        self.samples += 1
+
+
+def aggregate(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fold raw snapshot rows into one bucket dict per (account, resolution, bucket)."""
+    buckets: dict[tuple[int, str, datetime], _Bucket] = {}
+    for row in rows:
+        at = row.get("recorded_at")
+        if at is None:
+            continue
+        equity, balance = float(row["equity"]), float(row["balance"])
+        for res, seconds in RESOLUTIONS.items():
+            start = bucket_start(at, seconds)
+            key = (row["account_db_id"], res, start)
+            b = buckets.get(key)
+            if b is None:
+                buckets[key] = _Bucket(
+                    row["account_db_id"], res, start,
+                    equity, equity, equity, equity,
+                    balance, balance, balance, balance,
+                    1, at, at,
+                )
+            else:
+                b.add(equity, balance, at)
+    return [vars(b) for b in buckets.values()]
+
+
+def upsert_rollups(session: Session, rows: list[dict[str, Any]]) -> int:
+    """Merge raw rows into the rollup tables. Does not commit. Returns buckets touched."""
+    return _upsert_buckets(session, aggregate(rows))
+
+
+def _upsert_buckets(session: Session, buckets: list[dict[str, Any]]) -> int:
+    if not buckets:
+        return 0
+    stmt = sqlite_insert(EquityRollup.__table__)
+    ex = stmt.excluded
+    t = EquityRollup.__table__.c
+    earlier = ex.first_at < t.first_at
+    later = ex.last_at >= t.last_at
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["account_db_id", "resolution", "bucket_start"],
+        set_={
+            "high_equity": func.max(t.high_equity, ex.high_equity),
+            "low_equity": func.min(t.low_equity, ex.low_equity),
+            "high_balance": func.max(t.high_balance, ex.high_balance),
+            "low_balance": func.min(t.low_balance, ex.low_balance),
+            "open_equity": _case(earlier, ex.open_equity, t.open_equity),
+            "open_balance": _case(earlier, ex.open_balance, t.open_balance),
+            "first_at": _case(earlier, ex.first_at, t.first_at),
+            "close_equity": _case(later, ex.close_equity, t.close_equity),
+            "close_balance": _case(later, ex.close_balance, t.close_balance),
+            "last_at": _case(later, ex.last_at, t.last_at),
+            "samples": t.samples + ex.samples,
+        },
+    )
+    session.execute(stmt, buckets)
+    return len(buckets)
+
+
+def _case(cond, then, otherwise):
+    return case((cond, then), else_=otherwise)
+
+
+def insert_snapshots_with_rollups(session: Session, rows: list[dict[str, Any]]) -> None:
+    """Writer intent: raw rows, their rollups and daily balances in one transaction."""
+    session.execute(EquitySnapshot.__table__.insert(), rows)
+    buckets = aggregate(rows)
+    _upsert_buckets(session, buckets)
+    daily_stats.apply_balances(session, [b for b in buckets if b["resolution"] == "1d"])
+
+
+# ── Tier selection / reads ────────────────────────────────────────────────────
+def raw_cutoff(now: Optional[datetime] = None) -> Optional[datetime]:
+    """Oldest raw snapshot still kept, or None when raw history is kept forever
+    (no retention, or old rows go to the cold archive instead)."""
+    if RAW_SNAPSHOT_RETENTION_DAYS <= 0 or ARCHIVE_AFTER_DAYS > 0:
+        return None
+    return (now or datetime.utcnow()) - timedelta(days=RAW_SNAPSHOT_RETENTION_DAYS)
+
+
+def select_tier(start: datetime, end: datetime, max_points: int, now: Optional[datetime] = None) -> str:
+    """Finest tier whose bucket count over [start, end] fits `max_points`."""
+    span = max((end - start).total_seconds(), 1.0)
+    cutoff = raw_cutoff(now)
+    if span / _RAW_NOMINAL_SECONDS <= max_points and (cutoff is None or start >= cutoff):
+        return TIER_RAW
+    for res, seconds in RESOLUTIONS.items():
+        if span / seconds <= max_points:
+            return res
+    return "1d"
+
+
+def query_rollups(
+    db: Session,
+    resolution: str,
+    start: datetime,
+    end: datetime,
+    account_id: Optional[int] = None,
+) -> list[EquityRollup]:
+    q = db.query(EquityRollup).filter(
+        EquityRollup.resolution == resolution,
+        EquityRollup.bucket_start >= bucket_start(start, RESOLUTIONS[resolution]),
+        EquityRollup.bucket_start <= end,
+    )
+    if account_id is not None:
+        q = q.filter(EquityRollup.account_db_id == account_id)
+    return q.order_by(EquityRollup.bucket_start.asc(), EquityRollup.account_db_id.asc()).all()
+
+
+# ── Maintenance ───────────────────────────────────────────────────────────────
+def _month_after(ts: datetime) -> datetime:
+    return datetime(ts.year + ts.month // 12, ts.month % 12 + 1, 1)
+
+
+def backfill_slice(db: Session) -> Optional[int]:
+    """Roll up the next (account, month) of pre-rollup raw snapshots. Does not commit.
+
+    Returns the rows folded in, or None once the backfill is complete. The
+    plan and cursor live in `app_settings` and advance in the same
+    transaction as the slice, so each slice is one short writer intent and
+    an interrupted backfill resumes without counting a row twice. Only rows
+    older than the first live rollup (if any) are backfilled — later ones
+    were rolled up as they were written.
+    """
+    raw = read_marker(db, KEY_ROLLUP_BACKFILL)
+    if raw is None:
+        first_live = db.query(func.min(EquityRollup.first_at)).scalar()
+        state: dict[str, Any] = {"before": first_live.isoformat() if first_live else None, "cursor": None, "rows": 0}
+    else:
+        state = json.loads(raw)
+    if state.get("done"):
+        return None
+
+    q = db.query(EquitySnapshot.account_db_id, EquitySnapshot.recorded_at).filter(EquitySnapshot.recorded_at.isnot(None))
+    before = datetime.fromisoformat(state["before"]) if state["before"] else None
+    if before is not None:
+        q = q.filter(EquitySnapshot.recorded_at < before)
+    if state["cursor"] is not None:
+        account, month_end = state["cursor"][0], datetime.fromisoformat(state["cursor"][1])
+        q = q.filter(or_(
+            EquitySnapshot.account_db_id > account,
+            and_(EquitySnapshot.account_db_id == account, EquitySnapshot.recorded_at >= month_end),
+        ))
+    head = q.order_by(EquitySnapshot.account_db_id, EquitySnapshot.recorded_at).first()
+    if head is None:
+        state["done"] = True
+        write_marker(db, KEY_ROLLUP_BACKFILL, json.dumps(state))
+        if state["rows"]:
+            logger.info("Backfilled equity rollups from %d raw snapshots", state["rows"])
+        return None
+
+    account, first_at = head
+    month_end = _month_after(first_at)
+    rows_q = db.query(
+        EquitySnapshot.account_db_id, EquitySnapshot.balance,
+        EquitySnapshot.equity, EquitySnapshot.recorded_at,
+    ).filter(
+        EquitySnapshot.account_db_id == account,
+        EquitySnapshot.recorded_at < (min(month_end, before) if before is not None else month_end),
+    )
+    # The lower bound is the previous slice's upper bound (same bound value, so
+    # slices partition the stored values even where their formats differ).
+    if state["cursor"] is not None and state["cursor"][0] == account:
+        rows_q = rows_q.filter(EquitySnapshot.recorded_at >= datetime.fromisoformat(state["cursor"][1]))
+    rows = [
+        {"account_db_id": a, "balance": balance, "equity": equity, "recorded_at": at}
+        for a, balance, equity, at in rows_q.yield_per(_BACKFILL_CHUNK)
+    ]
+    upsert_rollups(db, rows)
+    state["cursor"] = [account, month_end.isoformat()]
+    state["rows"] += len(rows)
+    write_marker(db, KEY_ROLLUP_BACKFILL, json.dumps(state))
+    return len(rows)
+
+
+def backfill_done(db: Session) -> bool:
+    raw = read_marker(db, KEY_ROLLUP_BACKFILL)
+    return raw is not None and bool(json.loads(raw).get("done"))
+
+
+def backfill_rollups(db: Session) -> int:
+    """Run the whole backfill in one session (bench, tests). Does not commit.
+
+    The app runs `backfill_slice` one writer intent at a time instead.
+    """
+    total = 0
+    while (n := backfill_slice(db)) is not None:
+        total += n
+    return total
+
+
+def prune_raw_snapshots(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete raw snapshots past retention (their rollups stay). Does not commit.
+
+    Nothing is pruned until the backfill has rolled up the pre-rollup history.
+    """
+    cutoff = raw_cutoff(now)
+    if cutoff is None or not backfill_done(db):
+        return 0
+    return (
+        db.query(EquitySnapshot)
+        .filter(EquitySnapshot.recorded_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+
+
+async def maintenance_loop() -> None:
+    """Backfill once, then archive/prune the raw tier every ROLLUP_MAINTENANCE_SECONDS.
+
+    Everything goes through the single writer, so it never races live
+    snapshot batches; the backfill is one (account, month) slice per intent,
+    so trade-record saves queue behind a slice, not the whole history. Daily
+    journal stats are rebuilt only once the backfill is done, because their
+    balances come from the daily buckets; trade statistics do not depend on
+    it. Each step fails on its own and is retried on the next start.
+    """
+    backfilled = False
+    try:
+        while await db_writer.run(backfill_slice) is not None:
+            pass
+        backfilled = True
+    except Exception as e:
+        logger.warning("equity rollup backfill failed: %s", e)
+    if backfilled:
+        try:
+            await db_writer.run(daily_stats.rebuild_daily_stats)
+        except Exception as e:
+            logger.warning("daily stats rebuild failed: %s", e)
+    try:
+        await db_writer.run(trade_stats.rebuild_trade_stats)
+    except Exception as e:
+        logger.warning("trade stats rebuild failed: %s", e)
+    while True:
+        try:
+            await cold_archive.run()
+        except Exception as e:
+            logger.warning("cold archive run failed: %s", e)
+        try:
+            removed = await db_writer.run(prune_raw_snapshots)
+            if removed:
+                logger.info("Pruned %d raw equity snapshots past retention", removed)
+        except Exception as e:
+            logger.warning("equity snapshot retention failed: %s", e)
+        await asyncio.sleep(ROLLUP_MAINTENANCE_SECONDS)
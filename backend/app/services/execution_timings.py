@@ -0,0 +1,147 @@
+"""Stage latency of batch trades (`execution_timings`).
+
+The batch routes give every account's order a `StageTimer`. Stages are
+timed with `time.perf_counter` (monotonic) and summed per stage; a batch-
+wide step such as the vectorised rule gate is added to every leg it
+covered. The timer travels with `save_trade_record`, whose writer intent
+inserts the trade record, closes the `db` and `total` stages and inserts
+the timing row linked to it — so the numbers include the DB write queue.
+
+`latency_report` is the read side behind `/api/analytics/execution-latency`:
+p50/p95/p99 per stage, overall, per route, per broker server and per
+account, plus fill slippage. Routes time different spans (a `v2_ticket`
+row covers only the `/execute` request), so compare totals per route or
+filter on one.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Iterator, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.accounts import Account
+from app.models.execution_timing import ExecutionTiming
+
+STAGES = ("connect", "resolve", "quote", "size", "rules", "margin", "order", "db", "total")
+_QUANTILES = (50, 95, 99)
+
+
+class StageTimer:
+    def __init__(self, route: str, started: Optional[float] = None) -> None:
+        self.route = route
+        self.started = time.perf_counter() if started is None else started
+        self.stages: dict[str, float] = {}
+        self.requested_price: Optional[float] = None
+        self.fill_price: Optional[float] = None
+        self.slippage_points: Optional[float] = None
+        self._save_started: Optional[float] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def fill(self, result: dict[str, Any], direction: str, point: Optional[float] = None) -> None:
+        """Requested vs fill price from a `place_market_order` result."""
+        self.requested_price = result.get("requested_price")
+        self.fill_price = result.get("price") if result.get("success") else None
+        if self.requested_price and self.fill_price and point:
+            sign = 1 if direction.upper() == "BUY" else -1
+            self.slippage_points = round((self.fill_price - self.requested_price) / point * sign, 1)
+
+    def saving(self) -> None:
+        """Mark the start of the trade-record write (the queue wait counts as `db`)."""
+        self._save_started = time.perf_counter()
+
+    def row(self, trade_record_id: int, account_db_id: int, server: Optional[str]) -> dict[str, Any]:
+        now = time.perf_counter()
+        if self._save_started is not None:
+            self.add("db", (now - self._save_started) * 1000)
+        self.stages["total"] = (now - self.started) * 1000
+        return {
+            "trade_record_id": trade_record_id,
+            "account_db_id": account_db_id,
+            "server": server,
+            "route": self.route,
+            **{f"{s}_ms": round(self.stages[s], 3) if s in self.stages else None for s in STAGES},
+            "requested_price": self.requested_price,
+            "fill_price": self.fill_price,
+            "slippage_points": self.slippage_points,
+            "recorded_at": datetime.utcnow(),
+        }
+
+
+def _percentiles(values: np.ndarray) -> dict[str, Any]:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {"count": 0, **{f"p{q}": None for q in _QUANTILES}}
+    return {"count": int(len(values)), **{
+        f"p{q}": round(float(v), 2) for q, v in zip(_QUANTILES, np.percentile(values, _QUANTILES))
+    }}
+
+
+def _stage_table(columns: dict[str, np.ndarray], mask: Optional[np.ndarray] = None) -> dict[str, Any]:
+    return {s: _percentiles(columns[s] if mask is None else columns[s][mask]) for s in STAGES}
+
+
+def latency_report(
+    db: Session,
+    days: int = 30,
+    account_db_id: Optional[int] = None,
+    server: Optional[str] = None,
+    route: Optional[str] = None,
+) -> dict[str, Any]:
+    since = datetime.utcnow() - timedelta(days=days)
+    q = (
+        db.query(ExecutionTiming, Account.account_id)
+        .join(Account, Account.id == ExecutionTiming.account_db_id)
+        .filter(ExecutionTiming.recorded_at >= since)
+    )
+    if account_db_id is not None:
+        q = q.filter(ExecutionTiming.account_db_id == account_db_id)
+    if server is not None:
+        q = q.filter(ExecutionTiming.server == server)
+    if route is not None:
+        q = q.filter(ExecutionTiming.route == route)
+    rows = q.all()
+
+    def column(get) -> np.ndarray:
+        return np.array([np.nan if (v := get(t)) is None else v for t, _ in rows], dtype=np.float64)
+
+    columns = {s: column(lambda t, s=s: getattr(t, f"{s}_ms")) for s in STAGES}
+    routes = np.array([t.route for t, _ in rows], dtype=object)
+    servers = np.array([t.server or "" for t, _ in rows], dtype=object)
+    logins = np.array([login for _, login in rows], dtype=object)
+    return {
+        "since": since.isoformat(),
+        "orders": len(rows),
+        "stages": _stage_table(columns),
+        "by_route": {
+            r: {"orders": int((routes == r).sum()), "stages": _stage_table(columns, routes == r)}
+            for r in sorted(set(routes))
+        },
+        "by_server": {
+            s or "unknown": {"orders": int((servers == s).sum()), "stages": _stage_table(columns, servers == s)}
+            for s in sorted(set(servers))
+        },
+        "by_account": {
+            login: {"orders": int((logins == login).sum()), "stages": _stage_table(columns, logins == login)}
+            for login in sorted(set(logins))
+        },
+        "slippage_points": _percentiles(column(lambda t: t.slippage_points)),
+    }
+
+
+def record_timings(session: Session, rows: list[dict[str, Any]]) -> None:
+    if rows:
+        session.execute(ExecutionTiming.__table__.insert(), rows)
@@ -0,0 +1,291 @@
+"""Live cross-account net exposure and open risk, from worker tick events.
+
+Every v2 tick carries the account's full position list. `ExposureBook`
+remembers the last-seen legs per account (by ticket) and applies only the
+legs that were opened, closed or changed to running totals:
+
+  - per symbol: net lots (long − short), long / short lots, notional,
+    open risk, position count and positions without a stop;
+  - per (account, symbol): the same, so account groups (fund name or
+    "personal") are summed at read time over the accounts holding positions.
+
+Symbols are added up under `canonical_symbol`, so EURUSD.m on one broker and
+EURUSDi on another are one instrument. Values use the position sizer's
+basis — one lot is `contract_size` units per price unit, in account
+currency. Open risk is the loss if every stop is hit: distance from the open
+price to the SL on the losing side × lots × contract size. A stop past
+break-even contributes 0; a position without a stop is counted as
+unprotected instead.
+
+A tick with the same positions as the last one changes nothing. When a tick
+does change the book, the background task publishes an `exposure` event with
+the changed symbols' totals to pool subscribers, i.e. the v2 `/stream`.
+
+`check()` is the pre-trade hook: given the orders a batch would open, it
+returns warnings when a symbol's combined net lots or the total open risk
+would pass the limits in settings (`exposure_max_net_lots`,
+`exposure_max_open_risk`). It warns; it never blocks.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
+
+from app.services.settings import KEY_EXPOSURE_MAX_NET_LOTS, KEY_EXPOSURE_MAX_OPEN_RISK
+from app.services.symbol_resolver import canonical_symbol
+
+logger = logging.getLogger(__name__)
+
+EXPOSURE_EVENT = "exposure"
+
+
+@dataclass(frozen=True)
+class Leg:
+    symbol: str          # canonical
+    lots: float          # signed: + long, − short
+    notional: float
+    risk: float
+    unprotected: bool
+
+
+def leg_from_position(pos: Mapping[str, Any]) -> Leg:
+    volume = float(pos.get("volume") or 0.0)
+    long = pos.get("type") == "BUY"
+    price = float(pos.get("price_open") or 0.0)
+    sl = float(pos.get("sl") or 0.0)
+    size = float(pos.get("contract_size") or 0.0)
+    risk = 0.0
+    if sl > 0:
+        risk = max(0.0, price - sl if long else sl - price) * volume * size
+    return Leg(
+        symbol=canonical_symbol(str(pos.get("symbol") or "")),
+        lots=volume if long else -volume,
+        notional=volume * price * size,
+        risk=risk,
+        unprotected=sl <= 0,
+    )
+
+
+def _signature(pos: Mapping[str, Any]) -> tuple:
+    return (pos.get("symbol"), pos.get("type"), pos.get("volume"), pos.get("price_open"),
+            pos.get("sl"), pos.get("contract_size"))
+
+
+@dataclass
+class Totals:
+    net_lots: float = 0.0
+    long_lots: float = 0.0
+    short_lots: float = 0.0
+    notional: float = 0.0
+    open_risk: float = 0.0
+    positions: int = 0
+    unprotected: int = 0
+
+    def add(self, leg: Leg, sign: int) -> None:
+        self.net_lots += sign * leg.lots
+        if leg.lots >= 0:
+            self.long_lots += sign * leg.lots
+        else:
+            self.short_lots -= sign * leg.lots
+        self.notional += sign * leg.notional
+        self.open_risk += sign * leg.risk
+        self.positions += sign
+        self.unprotected += sign * int(leg.unprotected)
+
+    def merge(self, other: "Totals") -> None:
+        self.net_lots += other.net_lots
+        self.long_lots += other.long_lots
+        self.short_lots += other.short_lots
+        self.notional += other.notional
+        self.open_risk += other.open_risk
+        self.positions += other.positions
+        self.unprotected += other.unprotected
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "net_lots": round(self.net_lots, 2),
+            "long_lots": round(self.long_lots, 2),
+            "short_lots": round(self.short_lots, 2),
+            "notional": round(self.notional, 2),
+            "open_risk": round(self.open_risk, 2),
+            "positions": self.positions,
+            "unprotected": self.unprotected,
+        }
+
+
+def _bump(book: dict[str, Totals], leg: Leg, sign: int) -> None:
+    totals = book.get(leg.symbol)
+    if totals is None:
+        totals = book[leg.symbol] = Totals()
+    totals.add(leg, sign)
+    if totals.positions == 0:
+        del book[leg.symbol]          # drop float residue with the last position
+
+
+def _parse_limit(raw: Optional[str]) -> Optional[float]:
+    try:
+        value = float(raw) if raw else 0.0
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def exposure_limits(settings: Mapping[str, str]) -> tuple[Optional[float], Optional[float]]:
+    """(max net lots per symbol, max total open risk); None = no limit."""
+    return (_parse_limit(settings.get(KEY_EXPOSURE_MAX_NET_LOTS)),
+            _parse_limit(settings.get(KEY_EXPOSURE_MAX_OPEN_RISK)))
+
+
+class ExposureBook:
+    """Background task: pool tick events → position deltas → exposure totals."""
+
+    def __init__(self) -> None:
+        self._legs: dict[int, dict[int, tuple[tuple, Leg]]] = {}
+        self._by_symbol: dict[str, Totals] = {}
+        self._by_account: dict[int, dict[str, Totals]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pool = None
+        self.deltas_applied = 0
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+    def _apply(self, account_db_id: int, leg: Leg, sign: int) -> None:
+        _bump(self._by_symbol, leg, sign)
+        _bump(self._by_account.setdefault(account_db_id, {}), leg, sign)
+        self.deltas_applied += 1
+
+    def apply_positions(self, account_db_id: int, positions: Iterable[Mapping[str, Any]]) -> set[str]:
+        """Diff this tick's positions against the last; return the changed symbols."""
+        known = self._legs.setdefault(account_db_id, {})
+        changed: set[str] = set()
+        seen: set[int] = set()
+        for pos in positions:
+            ticket = int(pos.get("ticket") or 0)
+            seen.add(ticket)
+            sig = _signature(pos)
+            old = known.get(ticket)
+            if old is not None and old[0] == sig:
+                continue
+            if old is not None:
+                self._apply(account_db_id, old[1], -1)
+                changed.add(old[1].symbol)
+            leg = leg_from_position(pos)
+            known[ticket] = (sig, leg)
+            self._apply(account_db_id, leg, +1)
+            changed.add(leg.symbol)
+        for ticket in [t for t in known if t not in seen]:
+            _, leg = known.pop(ticket)
+            self._apply(account_db_id, leg, -1)
+            changed.add(leg.symbol)
+        if not known:
+            self._legs.pop(account_db_id, None)
+            self._by_account.pop(account_db_id, None)
+        return changed
+
+    def forget(self, account_db_id: int) -> set[str]:
+        """Worker gone: its positions no longer count."""
+        return self.apply_positions(account_db_id, ())
+
+    def handle_event(self, account_db_id: int, event: dict[str, Any]) -> set[str]:
+        kind = event.get("event")
+        data = event.get("data") or {}
+        if kind == "tick":
+            if data.get("account_info") is not None:
+                return self.apply_positions(account_db_id, data.get("positions") or ())
+        elif kind == "health" and data.get("state") == "exited":
+            return self.forget(account_db_id)
+        return set()
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+    def symbol_totals(self, symbols: Optional[Iterable[str]] = None) -> dict[str, dict[str, Any]]:
+        keys = sorted(self._by_symbol) if symbols is None else sorted(symbols)
+        empty = Totals()
+        return {s: self._by_symbol.get(s, empty).as_dict() for s in keys}
+
+    def account_totals(self) -> dict[int, dict[str, dict[str, Any]]]:
+        return {
+            aid: {s: t.as_dict() for s, t in sorted(book.items())}
+            for aid, book in sorted(self._by_account.items())
+        }
+
+    def group_totals(self, group_of: Mapping[int, str]) -> dict[str, dict[str, dict[str, Any]]]:
+        """Per group and symbol; accounts missing from `group_of` fall under "personal"."""
+        groups: dict[str, dict[str, Totals]] = {}
+        for aid, book in self._by_account.items():
+            group = groups.setdefault(group_of.get(aid, "personal"), {})
+            for symbol, totals in book.items():
+                group.setdefault(symbol, Totals()).merge(totals)
+        return {
+            g: {s: t.as_dict() for s, t in sorted(book.items())}
+            for g, book in sorted(groups.items())
+        }
+
+    def total_open_risk(self) -> float:
+        return sum(t.open_risk for t in self._by_symbol.values())
+
+    def check(
+        self,
+        orders: Iterable[tuple[str, str, float, float]],
+        *,
+        max_net_lots: Optional[float] = None,
+        max_open_risk: Optional[float] = None,
+    ) -> list[str]:
+        """Warnings for a batch of (symbol, direction, lots, risk_amount) orders."""
+        orders = list(orders)
+        warnings: list[str] = []
+        if max_net_lots:
+            delta: dict[str, float] = {}
+            for symbol, direction, lots, _ in orders:
+                key = canonical_symbol(symbol)
+                delta[key] = delta.get(key, 0.0) + (lots if direction.upper() == "BUY" else -lots)
+            for key, d in sorted(delta.items()):
+                current = self._by_symbol[key].net_lots if key in self._by_symbol else 0.0
+                after = current + d
+                if abs(after) > max_net_lots and abs(after) > abs(current):
+                    warnings.append(
+                        f"{key}: combined net exposure would be {after:+.2f} lots (limit {max_net_lots:g})"
+                    )
+        if max_open_risk:
+            after = self.total_open_risk() + sum(risk for *_, risk in orders)
+            if after > max_open_risk:
+                warnings.append(f"Combined open risk would be {after:,.2f} (limit {max_open_risk:,.2f})")
+        return warnings
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    async def start(self, pool) -> None:
+        if self._task is not None:
+            return
+        self._pool = pool
+        queue = await pool.subscribe()
+        self._task = asyncio.create_task(self._run(queue))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        try:
+            while True:
+                account_db_id, event = await queue.get()
+                try:
+                    changed = self.handle_event(account_db_id, event)
+                except Exception as e:
+                    logger.warning("exposure update failed for account_db_id=%d: %s", account_db_id, e)
+                    continue
+                if changed:
+                    await self._pool.publish(account_db_id, {
+                        "event": EXPOSURE_EVENT,
+                        "data": {"symbols": self.symbol_totals(changed), "total_open_risk": round(self.total_open_risk(), 2)},
+                    })
+        finally:
+            await self._pool.unsubscribe(queue)
+
+
+exposure = ExposureBook()
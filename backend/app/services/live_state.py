@@ -0,0 +1,200 @@
+"""Live per-account state from worker tick events.
+
+Every v2 worker emits a `tick` (account_info + positions) each second.
+`LiveStateStore` keeps the latest one per account in memory: balance,
+equity, profit, margin figures and open positions. Reads are dict lookups,
+so `/summary` and `/fund-status` overlay live numbers onto the stored
+account rows without calling MT5.
+
+The store also writes balance/equity/profit through to `accounts` so
+offline views and restarts see recent values. Changed accounts are
+coalesced and flushed every `LIVE_STATE_FLUSH_SECONDS` as ONE bulk UPDATE
+on the db-writer, however many ticks arrived in between.
+
+Responses built from the store are cached under the `live` pseudo-table
+(see `table_versions`), bumped whenever an account's numbers change.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import LIVE_STATE_FLUSH_SECONDS
+from app.models.accounts import Account
+from app.services.db_writer import db_writer
+from app.services.snapshot_writer import parse_tick_ts
+from app.services.table_versions import table_versions
+
+logger = logging.getLogger(__name__)
+
+_PERSISTED = ("balance", "equity", "profit")
+_SERVED = _PERSISTED + ("margin",)
+LIVE_TABLE = "live"
+
+
+@dataclass(frozen=True)
+class LiveAccount:
+    balance: float
+    equity: float
+    profit: Optional[float]
+    margin: Optional[float]
+    margin_free: Optional[float]
+    margin_level: Optional[float]
+    currency: Optional[str]
+    positions: tuple[dict[str, Any], ...]
+    updated_at: datetime
+    margin_used_pct: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Same basis as RuleChecker's margin rule: percent of balance.
+        used = (self.margin or 0.0) / self.balance * 100 if self.balance else 0.0
+        object.__setattr__(self, "margin_used_pct", used)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "balance": self.balance,
+            "equity": self.equity,
+            "profit": self.profit,
+            "margin": self.margin,
+            "margin_free": self.margin_free,
+            "margin_level": self.margin_level,
+            "margin_used_pct": round(self.margin_used_pct, 2),
+            "currency": self.currency,
+            "positions": list(self.positions),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class AccountView:
+    """An Account row with live balance/equity/profit in front of the stored ones."""
+
+    __slots__ = ("_account", "live", "balance", "equity", "profit")
+
+    def __init__(self, account: Any, live: Optional[LiveAccount]) -> None:
+        self._account = account
+        self.live = live
+        self.balance = live.balance if live else account.balance
+        self.equity = live.equity if live else account.equity
+        self.profit = live.profit if live else account.profit
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._account, name)
+
+
+def write_through(session: Session, rows: list[dict[str, Any]]) -> None:
+    """Writer intent: bulk UPDATE of `accounts` by primary key."""
+    session.execute(update(Account), rows)
+
+
+class LiveStateStore:
+    """Background task: pool tick events → latest state per account → coalesced write-through."""
+
+    def __init__(self) -> None:
+        self._state: dict[int, LiveAccount] = {}
+        self._pending: dict[int, dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pool = None
+        self.rows_written = 0
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+    def get(self, account_db_id: int) -> Optional[LiveAccount]:
+        return self._state.get(account_db_id)
+
+    def snapshot(self) -> dict[int, LiveAccount]:
+        return dict(self._state)
+
+    def overlay(self, accounts: Iterable[Any]) -> list[AccountView]:
+        state = self._state
+        return [AccountView(a, state.get(a.id)) for a in accounts]
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+    def update(self, account_db_id: int, info: dict[str, Any], positions: Iterable[dict[str, Any]], at: datetime) -> None:
+        if info.get("equity") is None:
+            return
+        live = LiveAccount(
+            balance=float(info.get("balance") or 0.0),
+            equity=float(info["equity"]),
+            profit=info.get("profit"),
+            margin=info.get("margin"),
+            margin_free=info.get("margin_free"),
+            margin_level=info.get("margin_level"),
+            currency=info.get("currency"),
+            positions=tuple(positions or ()),
+            updated_at=at,
+        )
+        previous = self._state.get(account_db_id)
+        self._state[account_db_id] = live
+        if previous is None or any(getattr(previous, c) != getattr(live, c) for c in _PERSISTED):
+            self._pending[account_db_id] = {"id": account_db_id, **{c: getattr(live, c) for c in _PERSISTED}}
+        if previous is None or any(getattr(previous, c) != getattr(live, c) for c in _SERVED):
+            table_versions.bump((LIVE_TABLE,))
+
+    def forget(self, account_db_id: int) -> None:
+        """Worker gone: stop serving its numbers (a pending write still goes out)."""
+        if self._state.pop(account_db_id, None) is not None:
+            table_versions.bump((LIVE_TABLE,))
+
+    def handle_event(self, account_db_id: int, event: dict[str, Any]) -> None:
+        kind = event.get("event")
+        data = event.get("data") or {}
+        if kind == "tick":
+            info = data.get("account_info")
+            if info:
+                self.update(account_db_id, info, data.get("positions") or (), parse_tick_ts(data.get("ts")))
+        elif kind == "health" and data.get("state") == "exited":
+            self.forget(account_db_id)
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = list(self._pending.values()), {}
+        try:
+            await db_writer.run(lambda session: write_through(session, rows))
+            self.rows_written += len(rows)
+        except Exception as e:
+            logger.warning("failed to write live state of %d accounts: %s", len(rows), e)
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    async def start(self, pool) -> None:
+        if self._task is not None:
+            return
+        self._pool = pool
+        queue = await pool.subscribe()
+        self._task = asyncio.create_task(self._run(queue))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        next_flush = loop.time() + LIVE_STATE_FLUSH_SECONDS
+        try:
+            while True:
+                timeout = max(0.0, next_flush - loop.time())
+                try:
+                    account_db_id, event = await asyncio.wait_for(queue.get(), timeout=timeout)
+                    self.handle_event(account_db_id, event)
+                except asyncio.TimeoutError:
+                    pass
+                if loop.time() >= next_flush:
+                    await self.flush()
+                    next_flush = loop.time() + LIVE_STATE_FLUSH_SECONDS
+        finally:
+            await self._pool.unsubscribe(queue)
+
+
+live_state = LiveStateStore()
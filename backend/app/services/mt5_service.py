@@ -365,5 +365,6 @@ class MT5Service:
             "order": result.order,
             "volume": result.volume,
             "price": result.price,
+            "requested_price": price,
             "comment": result.comment,
         }
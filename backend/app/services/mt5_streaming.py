@@ -15,7 +15,8 @@ from app.services.mt5_provider import mt5 as _mt5
 
 from app.database import SessionLocal
 from app.models.accounts import Account
-from app.models.equity_snapshot import EquitySnapshot
+from app.services.db_writer import db_writer
+from app.services.equity_rollups import insert_snapshots_with_rollups
 from app.services.mt5_singleton import mt5_service
 from app.services.mt5_auth import login_account
 from app.utils.async_helpers import run_mt5
@@ -27,21 +28,18 @@ TRAILING_STOPS: dict = {}
 
 
 def save_snapshot(account_db_id: int, info: dict) -> None:
-    """Persist an equity snapshot to the database."""
-    db = SessionLocal()
+    """Persist an equity snapshot through the single DB writer."""
+    row = {
+        "account_db_id": account_db_id,
+        "balance": info.get("balance", 0),
+        "equity": info.get("equity", 0),
+        "profit": info.get("profit"),
+        "recorded_at": datetime.utcnow(),
+    }
     try:
-        snapshot = EquitySnapshot(
-            account_db_id=account_db_id,
-            balance=info.get("balance", 0),
-            equity=info.get("equity", 0),
-            profit=info.get("profit"),
-        )
-        db.add(snapshot)
-        db.commit()
+        db_writer.submit(lambda session: insert_snapshots_with_rollups(session, [row])).result()
     except Exception as e:
         logger.warning("Failed to save equity snapshot: %s", e)
-    finally:
-        db.close()
 
 
 def maybe_reset_daily_open(account_db_id: int, info: dict) -> None:
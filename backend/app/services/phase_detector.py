@@ -53,6 +53,14 @@ def parse_starting_balance(mt5_name: str) -> Optional[float]:
     return None
 
 
+def find_fund_by_server(server: str, funds: list):
+    """Return the first fund whose server_pattern is a substring of `server`."""
+    for fund in funds:
+        if fund.server_pattern.lower() in server.lower():
+            return fund
+    return None
+
+
 def detect_phase(mt5_account_name: str, fund) -> Optional[Dict[str, str]]:
     """Detect program and phase from an MT5 account name.
 
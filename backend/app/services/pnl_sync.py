@@ -0,0 +1,254 @@
+"""Incremental deal sync and realized-P&L matching for every account.
+
+Each account keeps a watermark, `accounts.deals_synced_at`: the broker
+timestamp of the newest deal already seen. A sync asks the account's worker
+for deals since that watermark (`history_deals` RPC) and, in ONE db-writer
+transaction:
+
+  1. inserts them into the local `deals` mirror (see `deal_history`),
+  2. matches the account's pending trade records against the mirror's
+     closing deals by order/position ticket, applies all matches with one
+     bulk UPDATE, and folds them into `daily_stats` and `trade_stats`,
+  3. advances the watermark.
+
+Accounts sync in parallel. Matching reads the mirror, not just the new
+batch, so a trade recorded after its closing deal was mirrored still gets
+its P&L.
+
+The first sync of an account has no watermark. It backfills
+`DEALS_BACKFILL_DAYS` of history, or from one day before the oldest pending
+trade if that is earlier, because broker server time runs ahead of UTC.
+Later syncs re-read the last `PNL_SYNC_OVERLAP_SECONDS` before the
+watermark, so deals in the same second are never skipped. Both steps are
+idempotent: re-delivered deals are ignored, and only trades still without
+P&L are updated.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.config import DEALS_BACKFILL_DAYS, PNL_SYNC_INTERVAL_SECONDS, PNL_SYNC_OVERLAP_SECONDS
+from app.database import SessionLocal
+from app.models.accounts import Account
+from app.models.trade_record import TradeRecord
+from app.services import daily_stats, deal_history, trade_stats
+from app.services.db_writer import db_writer
+from app.utils.async_helpers import run_db, run_mt5
+from app.workers.protocol import deal_to_dict
+
+logger = logging.getLogger(__name__)
+
+DEAL_ENTRY_OUT = 1
+_RPC_TIMEOUT = 60.0
+_EPOCH = datetime(1970, 1, 1)
+
+FetchDeals = Callable[[int], Awaitable[Optional[list[dict[str, Any]]]]]
+
+
+class DealsPoolLike(Protocol):
+    def active_account_ids(self) -> set[int]: ...
+    async def call(self, account_db_id: int, method: str, params: dict | None = None, *, timeout: float = 10.0): ...
+
+
+@dataclass(frozen=True)
+class PendingTrade:
+    id: int
+    order_ticket: int
+    executed_at: Optional[datetime]
+    symbol: str = ""
+    tags: Optional[str] = None
+    risk_amount: Optional[float] = None
+
+
+@dataclass
+class SyncResult:
+    account_db_id: int
+    pending: int = 0
+    deals: int = 0
+    synced: int = 0
+    watermark: Optional[int] = None
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return dict(vars(self))
+
+
+# ── Pure matching ─────────────────────────────────────────────────────────────
+def match_closing_deals(pending: list[PendingTrade], deals: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Update rows (`id`, `realized_pnl`, `close_price`, `closed_at`) for trades with closing deals.
+
+    A closing deal belongs to a trade when its position id (the ticket of the
+    opening order) or its order equals the trade's `order_ticket`; partial
+    closes are summed, price/time come from the last one.
+    """
+    by_ticket: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    for d in deals:
+        if d.get("entry") != DEAL_ENTRY_OUT:
+            continue
+        by_ticket[d["order"]].append(d)
+        if d.get("position_id") and d["position_id"] != d["order"]:
+            by_ticket[d["position_id"]].append(d)
+
+    updates = []
+    for trade in pending:
+        closing = by_ticket.get(trade.order_ticket)
+        if not closing:
+            continue
+        total = sum(d["profit"] + d.get("commission", 0) + d.get("swap", 0) for d in closing)
+        last = max(closing, key=lambda d: d["time"])
+        updates.append({
+            "id": trade.id,
+            "realized_pnl": round(total, 2),
+            "close_price": last["price"],
+            "closed_at": datetime.fromtimestamp(last["time"]),
+        })
+    return updates
+
+
+# ── DB steps ──────────────────────────────────────────────────────────────────
+def load_pending(db: Session, account_db_id: int) -> list[PendingTrade]:
+    """Trade records of one account that have an order ticket but no realized P&L yet."""
+    rows = (
+        db.query(
+            TradeRecord.id, TradeRecord.order_ticket, TradeRecord.executed_at,
+            TradeRecord.symbol, TradeRecord.tags, TradeRecord.risk_amount,
+        )
+        .filter(
+            TradeRecord.account_db_id == account_db_id,
+            TradeRecord.order_ticket.isnot(None),
+            TradeRecord.realized_pnl.is_(None),
+        )
+        .all()
+    )
+    return [PendingTrade(*r) for r in rows]
+
+
+def load_state(db: Session, account_db_id: int) -> tuple[list[PendingTrade], Optional[int]]:
+    watermark = db.query(Account.deals_synced_at).filter(Account.id == account_db_id).scalar()
+    return load_pending(db, account_db_id), watermark
+
+
+def fetch_from(pending: list[PendingTrade], watermark: Optional[int], now: Optional[datetime] = None) -> int:
+    if watermark is not None:
+        return max(0, watermark - PNL_SYNC_OVERLAP_SECONDS)
+    start = (now or datetime.utcnow()) - timedelta(days=DEALS_BACKFILL_DAYS)
+    oldest = min((t.executed_at for t in pending if t.executed_at), default=None)
+    if oldest is not None:
+        start = min(start, oldest - timedelta(days=1))
+    return max(0, int((start - _EPOCH).total_seconds()))
+
+
+def apply_sync(session: Session, account_db_id: int, deals: list[dict[str, Any]], watermark: Optional[int]) -> tuple[int, int]:
+    """Writer intent: mirror deals, bulk-apply P&L matches, advance the watermark.
+
+    Returns (new deals stored, trades updated).
+    """
+    stored = deal_history.upsert_deals(session, account_db_id, deals)
+
+    pending = load_pending(session, account_db_id)
+    closing = deal_history.closing_deals(session, account_db_id, {t.order_ticket for t in pending})
+    updates = match_closing_deals(pending, closing)
+    if updates:
+        session.execute(update(TradeRecord), updates)
+        by_id = {t.id: t for t in pending}
+        closed = []
+        for u in updates:
+            t = by_id[u["id"]]
+            if t.executed_at:
+                daily_stats.apply_realized_pnl(session, account_db_id, t.executed_at, u["realized_pnl"])
+                closed.append({
+                    "account_db_id": account_db_id, "symbol": t.symbol, "tags": t.tags,
+                    "risk_amount": t.risk_amount, "executed_at": t.executed_at, **u,
+                })
+        trade_stats.apply_closed(session, closed)
+
+    if watermark is not None:
+        session.query(Account).filter(Account.id == account_db_id).update(
+            {Account.deals_synced_at: func.max(func.coalesce(Account.deals_synced_at, 0), watermark)},
+            synchronize_session=False,
+        )
+    return stored, len(updates)
+
+
+# ── Orchestration ─────────────────────────────────────────────────────────────
+async def sync_account(account_db_id: int, fetch: FetchDeals) -> SyncResult:
+    """Sync one account; `fetch(from_ts)` returns deal dicts (see `protocol.deal_to_dict`)."""
+    result = SyncResult(account_db_id)
+    try:
+        pending, watermark = await run_db(_in_session, load_state, account_db_id)
+        result.pending = len(pending)
+        deals = await fetch(fetch_from(pending, watermark))
+        if deals is None:
+            result.error = "Failed to fetch deal history"
+            return result
+        newest = max((d["time"] for d in deals), default=None)
+        result.watermark = max(filter(None, (watermark, newest)), default=None)
+        result.deals, result.synced = await db_writer.run(
+            lambda s: apply_sync(s, account_db_id, deals, newest)
+        )
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    return result
+
+
+async def sync_all(pool: DealsPoolLike, account_ids: Optional[set[int]] = None) -> list[SyncResult]:
+    """Sync every account with a live worker (or the given subset) in parallel."""
+    ids = pool.active_account_ids() if account_ids is None else account_ids & pool.active_account_ids()
+
+    def fetch_for(account_db_id: int) -> FetchDeals:
+        async def fetch(from_ts: int):
+            return await pool.call(account_db_id, "history_deals", {"from_ts": from_ts}, timeout=_RPC_TIMEOUT)
+        return fetch
+
+    return list(await asyncio.gather(*(sync_account(aid, fetch_for(aid)) for aid in sorted(ids))))
+
+
+async def _legacy_history_deals(from_ts: int) -> Optional[list[dict[str, Any]]]:
+    from app.services.mt5_provider import mt5
+
+    deals = await run_mt5(mt5.history_deals_get, from_ts, int(time.time()) + 2 * 86400)
+    return None if deals is None else [deal_to_dict(d) for d in deals]
+
+
+async def sync_connected(pool: DealsPoolLike) -> list[SyncResult]:
+    """All live workers, plus the legacy in-process connection if its account has no worker."""
+    from app.services.mt5_singleton import get_connected_account_id, mt5_service
+
+    results = await sync_all(pool)
+    legacy_id = get_connected_account_id()
+    if mt5_service.is_initialized and legacy_id and legacy_id not in pool.active_account_ids():
+        results.append(await sync_account(legacy_id, _legacy_history_deals))
+    return results
+
+
+async def sync_loop(pool: DealsPoolLike) -> None:
+    """Keep the deal mirror and realized P&L current every PNL_SYNC_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(PNL_SYNC_INTERVAL_SECONDS)
+        try:
+            results = await sync_connected(pool)
+            synced = sum(r.synced for r in results)
+            if synced:
+                logger.info("Realized P&L synced for %d trade(s)", synced)
+            for r in results:
+                if r.error:
+                    logger.warning("Deal sync failed for account_db_id=%d: %s", r.account_db_id, r.error)
+        except Exception as e:
+            logger.warning("Deal sync pass failed: %s", e)
+
+
+def _in_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
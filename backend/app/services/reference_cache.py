@@ -0,0 +1,185 @@
+"""Process-wide cache of rarely-changing reference data.
+
+Funds, programs, phase rules, app settings and per-account symbol aliases
+change only through CRUD routes, yet the rule checker, `/fund-status` and
+every trading request used to re-query them per account. They are compiled
+here into frozen objects (fund → program → phase rule, settings map, decoded
+alias maps) shared by all requests.
+
+Consistency is a version counter: writers call `reference_cache.invalidate()`
+after their commit, which bumps the version; the next `get(db)` sees a
+stale snapshot and rebuilds it (five small queries). A rebuild that overlaps
+a commit is followed by that writer's invalidate, so it never sticks.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.accounts import Account
+from app.models.app_settings import AppSetting
+from app.models.funds import Fund, FundPhaseRule, FundProgram
+from app.services.symbol_resolver import parse_aliases
+
+
+@dataclass(frozen=True)
+class PhaseRuleRef:
+    phase_name: str
+    phase_order: int
+    profit_target: Optional[float]
+    daily_drawdown: float
+    max_drawdown: float
+    drawdown_type: str
+
+
+@dataclass(frozen=True)
+class ProgramRef:
+    id: int
+    fund_id: int
+    fund_name: str
+    program_name: str
+    min_trading_days: Optional[int]
+    max_margin_pct: Optional[float]
+    best_day_rule_pct: Optional[float]
+    max_risk_per_trade_pct: Optional[float]
+    phase_rules: tuple[PhaseRuleRef, ...]  # sorted by phase_order
+
+    def phase(self, phase_name: Optional[str]) -> Optional[PhaseRuleRef]:
+        """Exact phase match, or None."""
+        return next((r for r in self.phase_rules if r.phase_name == phase_name), None)
+
+    def phase_or_first(self, phase_name: Optional[str]) -> Optional[PhaseRuleRef]:
+        """The account's phase rule, falling back to the program's first phase."""
+        rule = self.phase(phase_name) if phase_name else None
+        if rule is None and self.phase_rules:
+            rule = self.phase_rules[0]
+        return rule
+
+    def next_phase(self, phase_name: str) -> Optional[str]:
+        names = [r.phase_name for r in self.phase_rules]
+        if phase_name in names:
+            i = names.index(phase_name)
+            if i + 1 < len(names):
+                return names[i + 1]
+        return None
+
+
+@dataclass(frozen=True)
+class FundRef:
+    """Duck-types `Fund` for `find_fund_by_server` / `detect_phase`."""
+    id: int
+    fund_name: str
+    server_pattern: str
+    name_format: Optional[str]
+    account_name_patterns: Optional[str]
+    mt5_base_path: Optional[str]
+    programs: tuple[ProgramRef, ...]
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    version: int
+    funds: tuple[FundRef, ...]
+    programs: Mapping[int, ProgramRef]
+    settings: Mapping[str, str]
+    aliases: Mapping[int, Mapping[str, str]]
+
+    def aliases_for(self, account_db_id: int) -> Mapping[str, str]:
+        return self.aliases.get(account_db_id, _EMPTY)
+
+
+_EMPTY: Mapping[str, str] = MappingProxyType({})
+
+
+def load_reference_data(db: Session, version: int = 0) -> ReferenceData:
+    rules_by_program: dict[int, list[PhaseRuleRef]] = {}
+    for r in db.query(FundPhaseRule).order_by(FundPhaseRule.program_id, FundPhaseRule.phase_order).all():
+        rules_by_program.setdefault(r.program_id, []).append(PhaseRuleRef(
+            phase_name=r.phase_name,
+            phase_order=r.phase_order,
+            profit_target=r.profit_target,
+            daily_drawdown=r.daily_drawdown,
+            max_drawdown=r.max_drawdown,
+            drawdown_type=r.drawdown_type or "static",
+        ))
+
+    fund_rows = db.query(Fund).order_by(Fund.id).all()
+    fund_names = {f.id: f.fund_name for f in fund_rows}
+    programs: dict[int, ProgramRef] = {}
+    for p in db.query(FundProgram).order_by(FundProgram.id).all():
+        programs[p.id] = ProgramRef(
+            id=p.id,
+            fund_id=p.fund_id,
+            fund_name=fund_names.get(p.fund_id, ""),
+            program_name=p.program_name,
+            min_trading_days=p.min_trading_days,
+            max_margin_pct=p.max_margin_pct,
+            best_day_rule_pct=p.best_day_rule_pct,
+            max_risk_per_trade_pct=p.max_risk_per_trade_pct,
+            phase_rules=tuple(rules_by_program.get(p.id, ())),
+        )
+
+    funds = tuple(
+        FundRef(
+            id=f.id,
+            fund_name=f.fund_name,
+            server_pattern=f.server_pattern,
+            name_format=f.name_format,
+            account_name_patterns=f.account_name_patterns,
+            mt5_base_path=f.mt5_base_path,
+            programs=tuple(p for p in programs.values() if p.fund_id == f.id),
+        )
+        for f in fund_rows
+    )
+
+    settings = {s.key: s.value for s in db.query(AppSetting).all() if s.value is not None}
+    aliases = {
+        account_db_id: MappingProxyType(parse_aliases(raw))
+        for account_db_id, raw in db.query(Account.id, Account.symbol_aliases)
+        .filter(Account.symbol_aliases.isnot(None))
+        .all()
+    }
+    return ReferenceData(
+        version=version,
+        funds=funds,
+        programs=MappingProxyType(programs),
+        settings=MappingProxyType(settings),
+        aliases=MappingProxyType(aliases),
+    )
+
+
+class ReferenceCache:
+    def __init__(self) -> None:
+        self._version = 0
+        self._data: Optional[ReferenceData] = None
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, db: Session) -> ReferenceData:
+        """Current snapshot; queries only when a writer invalidated it."""
+        data = self._data
+        if data is not None and data.version == self._version:
+            return data
+        with self._lock:
+            data = self._data
+            if data is None or data.version != self._version:
+                data = load_reference_data(db, self._version)
+                self._data = data
+                self.loads += 1
+            return data
+
+    def invalidate(self) -> None:
+        """Call after committing a change to funds, programs, rules, settings or aliases."""
+        with self._lock:
+            self._version += 1
+
+
+reference_cache = ReferenceCache()
@@ -0,0 +1,170 @@
+"""Monte-Carlo risk of ruin for fund phase rules.
+
+Answers "at X % risk per trade, how likely am I to pass this phase, and how
+likely to breach it?" from the trader's own closed-trade R-multiples
+(realized P&L / risk amount, hot table and cold archive).
+
+`RiskOfRuin.simulate` runs `ruin_paths.simulate_chunk` over chunks of
+`RISK_SIM_CHUNK_PATHS` paths: one chunk runs inline, more are spread over a
+`ProcessPoolExecutor` of `RISK_SIM_WORKERS` processes. Chunk seeds derive
+from the distribution hash only, so every risk value replays the same
+random draws — a risk slider moves smoothly instead of jittering.
+
+Two caches keep the slider interactive:
+  - the R distribution per account, until `trade_records` is written
+    (see `table_versions`);
+  - results per (program, phase, rules, risk, distribution hash, run size),
+    in a small LRU. Rule values are part of the key, so editing a phase
+    rule never serves an old answer.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import RISK_SIM_CACHE_ENTRIES, RISK_SIM_CHUNK_PATHS, RISK_SIM_WORKERS
+from app.models.trade_record import TradeRecord
+from app.services import ruin_paths
+from app.services.reference_cache import ProgramRef
+from app.services.ruin_paths import PhaseRules
+from app.services.table_versions import table_versions
+from app.services.trade_stats import load_closed
+
+logger = logging.getLogger(__name__)
+
+MIN_TRADES = 20
+
+
+@dataclass(frozen=True)
+class Distribution:
+    r_multiples: np.ndarray
+    trades_per_day: float
+    digest: str
+
+    def as_dict(self) -> dict[str, Any]:
+        r = self.r_multiples
+        return {
+            "trades": len(r),
+            "win_rate": round(float((r > 0).mean()) * 100, 2) if len(r) else 0.0,
+            "mean_r": round(float(r.mean()), 3) if len(r) else 0.0,
+            "trades_per_day": round(self.trades_per_day, 2),
+            "hash": self.digest,
+        }
+
+
+def load_distribution(db: Session, account_db_id: Optional[int] = None) -> Distribution:
+    """R-multiples of closed trades with a risk amount, and trades per traded day."""
+    closed = load_closed(db, account_db_id)
+    has_r = closed.risk > 0
+    r = closed.pnl[has_r] / closed.risk[has_r]
+    days = len(np.unique(closed.executed[has_r].astype("datetime64[D]")))
+    return Distribution(
+        r_multiples=r,
+        trades_per_day=len(r) / days if days else 0.0,
+        digest=hashlib.sha1(r.tobytes()).hexdigest()[:16],
+    )
+
+
+def phase_rules(program: ProgramRef, phase: Optional[str]) -> Optional[PhaseRules]:
+    """Simulator rules of one phase (the program's first when `phase` is None)."""
+    rule = program.phase(phase) if phase else program.phase_or_first(None)
+    if rule is None:
+        return None
+    return PhaseRules(
+        daily_dd_pct=rule.daily_drawdown,
+        max_dd_pct=rule.max_drawdown,
+        trailing=rule.drawdown_type == "eod_trailing",
+        profit_target_pct=rule.profit_target,
+        best_day_pct=program.best_day_rule_pct,
+        max_risk_pct=program.max_risk_per_trade_pct,
+        min_trading_days=program.min_trading_days or 0,
+    )
+
+
+class RiskOfRuin:
+    def __init__(
+        self,
+        max_workers: int = RISK_SIM_WORKERS,
+        chunk_paths: int = RISK_SIM_CHUNK_PATHS,
+        max_entries: int = RISK_SIM_CACHE_ENTRIES,
+    ) -> None:
+        self.max_workers = max_workers
+        self.chunk_paths = chunk_paths
+        self.max_entries = max_entries
+        self._results: "OrderedDict[tuple, dict[str, Any]]" = OrderedDict()
+        self._distributions: dict[Optional[int], tuple[tuple[int, ...], Distribution]] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def distribution(self, db: Session, account_db_id: Optional[int] = None) -> Distribution:
+        versions = table_versions.get((TradeRecord.__tablename__,))
+        with self._lock:
+            cached = self._distributions.get(account_db_id)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+        dist = load_distribution(db, account_db_id)
+        with self._lock:
+            self._distributions[account_db_id] = (versions, dist)
+        return dist
+
+    def simulate(
+        self,
+        key: tuple,
+        rules: PhaseRules,
+        dist: Distribution,
+        risk_pct: float,
+        paths: int,
+        max_days: int,
+        trades_per_day: int,
+    ) -> tuple[dict[str, Any], bool]:
+        """(summary, served_from_cache) for `paths` paths; `key` names the program and phase."""
+        cache_key = (*key, rules, risk_pct, dist.digest, paths, max_days, trades_per_day)
+        with self._lock:
+            hit = self._results.get(cache_key)
+            if hit is not None:
+                self._results.move_to_end(cache_key)
+                self.hits += 1
+                return hit, True
+        self.misses += 1
+
+        sizes = [self.chunk_paths] * (paths // self.chunk_paths)
+        if paths % self.chunk_paths:
+            sizes.append(paths % self.chunk_paths)
+        seeds = np.random.SeedSequence(int(dist.digest, 16)).spawn(len(sizes))
+        args = [(rules, dist.r_multiples, risk_pct, n, max_days, trades_per_day, seed) for n, seed in zip(sizes, seeds)]
+        if len(args) > 1 and self.max_workers > 1:
+            chunks = list(self._pool().map(ruin_paths.simulate_chunk, *zip(*args)))
+        else:
+            chunks = [ruin_paths.simulate_chunk(*a) for a in args]
+        summary = ruin_paths.summarize(ruin_paths.merge(chunks))
+
+        with self._lock:
+            self._results[cache_key] = summary
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return summary, False
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+risk_of_ruin = RiskOfRuin()
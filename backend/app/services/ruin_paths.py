@@ -0,0 +1,180 @@
+"""Vectorised Monte-Carlo paths through one fund phase.
+
+Pure NumPy, no app imports: `simulate_chunk` is what process-pool workers
+run, so importing this module must stay cheap.
+
+A path starts a phase at balance 1.0 (= starting balance) and trades
+`trades_per_day` times a day for up to `max_days` days, each trade drawing
+an R-multiple from the trader's history and risking `risk_pct` of the
+current balance. Rules follow `RuleChecker.get_pre_trade_status`:
+
+  - daily DD: breached once the loss from the day's opening equity reaches
+    `daily_dd_pct` of it (daily room ≤ 0);
+  - max DD: breached once the loss from the baseline reaches `max_dd_pct`
+    of it; the baseline is the starting balance, or for `eod_trailing` the
+    highest end-of-day balance (never below starting);
+  - best day: once today's profit reaches `best_day_pct` of the starting
+    balance, no more trades that day;
+  - per-trade cap: a trade risks at most `max_risk_pct` of the starting
+    balance (the sizer would be blocked above it, so the trader sizes down);
+  - profit target: reached when profit ≥ `profit_target_pct` of starting;
+    trading stops, and the phase passes once `min_trading_days` days have
+    been traded (remaining days are assumed traded at negligible risk).
+
+A non-positive or missing limit is treated as "no limit". Closed trades are
+the only equity changes, so equity = balance at every check.
+
+Results are counts, per-day histograms and a final-return quantile grid,
+so chunks run on different processes merge cheaply (`merge`).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+_OPEN, _PASSED, _FAILED_DAILY, _FAILED_MAX, _UNRESOLVED = 0, 1, 2, 3, 4
+
+
+@dataclass(frozen=True)
+class PhaseRules:
+    daily_dd_pct: Optional[float]
+    max_dd_pct: Optional[float]
+    trailing: bool
+    profit_target_pct: Optional[float]
+    best_day_pct: Optional[float]
+    max_risk_pct: Optional[float]
+    min_trading_days: int = 0
+
+
+def _limit(pct: Optional[float]) -> float:
+    return pct / 100.0 if pct and pct > 0 else np.inf
+
+
+def simulate_chunk(
+    rules: PhaseRules,
+    r_multiples: np.ndarray,
+    risk_pct: float,
+    n_paths: int,
+    max_days: int,
+    trades_per_day: int,
+    seed: Any,
+) -> dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    r_multiples = np.asarray(r_multiples, dtype=np.float64)
+    frac = risk_pct / 100.0
+    cap = _limit(rules.max_risk_pct)
+    daily_pct, max_pct = _limit(rules.daily_dd_pct), _limit(rules.max_dd_pct)
+    target, best_day = _limit(rules.profit_target_pct), _limit(rules.best_day_pct)
+    min_days = max(0, int(rules.min_trading_days or 0))
+
+    balance = np.ones(n_paths)
+    peak_eod = np.ones(n_paths)
+    days_traded = np.zeros(n_paths, dtype=np.int32)
+    state = np.zeros(n_paths, dtype=np.int8)
+    end_day = np.full(n_paths, -1, dtype=np.int32)
+    trades = 0
+    best_day_stops = 0
+
+    for day in range(max_days):
+        idx = np.flatnonzero(state == _OPEN)
+        if not len(idx):
+            break
+        b = balance[idx]
+        day_open = b.copy()
+        base = np.maximum(1.0, peak_eod[idx]) if rules.trailing else 1.0
+        daily_floor = day_open - day_open * daily_pct
+        max_floor = base - base * max_pct
+        draws = r_multiples[rng.integers(0, len(r_multiples), size=(len(idx), trades_per_day))]
+
+        trading = np.ones(len(idx), dtype=bool)
+        traded = np.zeros(len(idx), dtype=bool)
+        outcome = np.zeros(len(idx), dtype=np.int8)
+        for k in range(trades_per_day):
+            risk = np.minimum(frac * b, cap)
+            b = b + np.where(trading, draws[:, k] * risk, 0.0)
+            traded |= trading
+            trades += int(trading.sum())
+
+            daily_breach = trading & (b <= daily_floor)
+            max_breach = trading & ~daily_breach & (b <= max_floor)
+            outcome[daily_breach] = _FAILED_DAILY
+            outcome[max_breach] = _FAILED_MAX
+            trading &= ~(daily_breach | max_breach)
+
+            hit = trading & (b - 1.0 >= target)
+            outcome[hit] = _PASSED
+            trading &= ~hit
+
+            stop = trading & (b - day_open >= best_day)
+            best_day_stops += int(stop.sum())
+            trading &= ~stop
+
+        days = days_traded[idx] + traded
+        # Target reached before the minimum trading days: passes on the day the minimum is met.
+        pass_day = day + np.maximum(0, min_days - days)
+        outcome[(outcome == _PASSED) & (pass_day >= max_days)] = _UNRESOLVED
+
+        balance[idx] = b
+        peak_eod[idx] = np.maximum(peak_eod[idx], b)
+        days_traded[idx] = days
+        state[idx] = outcome
+        end_day[idx] = np.where(outcome == _PASSED, pass_day, np.where(outcome == _OPEN, -1, day))
+
+    passed = state == _PASSED
+    failed_daily = state == _FAILED_DAILY
+    failed_max = state == _FAILED_MAX
+    return {
+        "paths": n_paths,
+        "passed": int(passed.sum()),
+        "failed_daily": int(failed_daily.sum()),
+        "failed_max": int(failed_max.sum()),
+        "trades": trades,
+        "best_day_stops": best_day_stops,
+        "pass_days": np.bincount(end_day[passed] + 1, minlength=max_days + 1),
+        "fail_days": np.bincount(end_day[failed_daily | failed_max] + 1, minlength=max_days + 1),
+        "final_return": np.sort(balance - 1.0)[np.linspace(0, n_paths - 1, 21).astype(int)] if n_paths else np.zeros(21),
+    }
+
+
+def merge(chunks: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    chunks = list(chunks)
+    out: dict[str, Any] = {}
+    for key in ("paths", "passed", "failed_daily", "failed_max", "trades", "best_day_stops", "pass_days", "fail_days"):
+        out[key] = sum(c[key] for c in chunks)
+    # Per-chunk quantile grids averaged by path count: chunks are i.i.d. samples.
+    weights = np.array([c["paths"] for c in chunks], dtype=np.float64)
+    out["final_return"] = np.average(np.stack([c["final_return"] for c in chunks]), axis=0, weights=weights)
+    return out
+
+
+def _day_quantile(hist: np.ndarray, q: float) -> Optional[int]:
+    total = hist.sum()
+    if not total:
+        return None
+    return int(np.searchsorted(np.cumsum(hist), q * total, side="left"))
+
+
+def summarize(counts: dict[str, Any]) -> dict[str, Any]:
+    """Probabilities and day percentiles from merged counts (day 1 = first trading day)."""
+    n = counts["paths"] or 1
+    passed, daily, maximum = counts["passed"], counts["failed_daily"], counts["failed_max"]
+    quantiles = counts["final_return"]
+    return {
+        "paths": counts["paths"],
+        "pass_probability": round(passed / n, 4),
+        "fail_probability": round((daily + maximum) / n, 4),
+        "daily_dd_breach_probability": round(daily / n, 4),
+        "max_dd_breach_probability": round(maximum / n, 4),
+        "unresolved_probability": round((n - passed - daily - maximum) / n, 4),
+        "days_to_pass": {f"p{int(q * 100)}": _day_quantile(counts["pass_days"], q) for q in (0.25, 0.5, 0.75)},
+        "days_to_fail": {f"p{int(q * 100)}": _day_quantile(counts["fail_days"], q) for q in (0.25, 0.5, 0.75)},
+        "avg_trades": round(counts["trades"] / n, 2),
+        "best_day_stops_per_path": round(counts["best_day_stops"] / n, 3),
+        "final_return_pct": {
+            "p5": round(float(quantiles[1]) * 100, 2),
+            "p50": round(float(quantiles[10]) * 100, 2),
+            "p95": round(float(quantiles[19]) * 100, 2),
+        },
+    }
@@ -0,0 +1,504 @@
+"""Vectorised fund-rule evaluation for many accounts at once.
+
+`RuleChecker.get_pre_trade_status` and `check_account_rules` are scalar and
+run once per account. This module evaluates the same rules over NumPy
+arrays in one pass: `pack_accounts` turns accounts + cached program rules
+into column arrays (None → NaN), `evaluate_pre_trade` computes rooms,
+breach flags and warning classes for a risk array (or one risk for all),
+and `evaluate_account_rules` does the same for the `/fund-status` checks.
+
+Every arithmetic step mirrors the scalar code operation for operation, so
+float results are bit-identical; `PreTradeBatch.status(i)` and
+`AccountRulesBatch.result(i)` rebuild the exact dicts (messages included)
+the scalar methods return. Messages are only formatted on demand, so a
+risk slider over a whole portfolio only pays for the array math.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from app.services.reference_cache import ProgramRef
+
+# Row kinds
+KIND_PERSONAL = 0   # not a fund account / no program id
+KIND_NO_RULES = 1   # program or phase rule missing
+KIND_RULES = 2
+
+# Block reasons (bit flags)
+BLOCK_TRADE_RISK = 1
+BLOCK_DAILY_DD = 2
+BLOCK_MAX_DD = 4
+BLOCK_BEST_DAY = 8
+
+# Warning classes (bit flags)
+WARN_DAILY_NEAR = 1        # ≥ 80 % of daily DD used
+WARN_DAILY_SL_BREACH = 2   # SL hit would breach daily DD
+WARN_DAILY_ROOM_SHARE = 4  # trade uses > 50 % of the daily room
+WARN_MAX_NEAR = 8          # ≥ 80 % of max DD used
+WARN_MAX_SL_BREACH = 16    # SL hit would breach max DD (with ≥ 60 % used)
+WARN_BEST_DAY_NEAR = 32    # < 20 % best-day headroom left
+
+LEVEL_OK, LEVEL_WARNING, LEVEL_BLOCKED = 0, 1, 2
+_LEVEL_NAMES = ("ok", "warning", "blocked")
+
+
+def _f(values: Sequence[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+def _or(a: np.ndarray, b: Union[np.ndarray, float]) -> np.ndarray:
+    """Vectorised `a or b` for floats where NaN stands for None."""
+    return np.where(np.isnan(a) | (a == 0), b, a)
+
+
+def _opt(x: float) -> Optional[float]:
+    return None if np.isnan(x) else float(x)
+
+
+# ── Packing ───────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class PackedAccounts:
+    """Column arrays for N accounts; NaN = NULL. Reusable across risk values."""
+    kind: np.ndarray             # int8, KIND_*
+    equity: np.ndarray
+    balance: np.ndarray
+    starting_balance: np.ndarray
+    daily_open_equity: np.ndarray
+    peak_eod_balance: np.ndarray
+    daily_dd_pct: np.ndarray
+    max_dd_pct: np.ndarray
+    trailing: np.ndarray         # bool, drawdown_type == "eod_trailing"
+    best_day_pct: np.ndarray
+    max_risk_pct: np.ndarray
+    max_margin_pct: np.ndarray
+    drawdown_types: tuple[str, ...]
+    has_program: np.ndarray      # bool, program found in the reference cache
+    profit_target: np.ndarray    # target of the exact current phase (no fallback)
+    phases: tuple[Optional[str], ...]      # account.current_phase
+    rule_phases: tuple[Optional[str], ...]  # phase name of the rule actually applied
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+
+def pack_accounts(accounts: Sequence[Any], programs: Mapping[int, ProgramRef]) -> PackedAccounts:
+    """Pack Account rows with their compiled program rules (see `reference_cache`)."""
+    kind, daily, mx, trailing, best, risk_cap, margin, dd_types, rule_phases = [], [], [], [], [], [], [], [], []
+    has_program, targets = [], []
+    for a in accounts:
+        program = programs.get(a.fund_program_id) if a.fund_program_id else None
+        rule = program.phase_or_first(a.current_phase) if program else None
+        exact = program.phase(a.current_phase) if program and a.current_phase else None
+        has_program.append(program is not None)
+        targets.append(exact.profit_target if exact else None)
+        if a.account_type != "fund" or not a.fund_program_id:
+            kind.append(KIND_PERSONAL)
+        elif rule is None:
+            kind.append(KIND_NO_RULES)
+        else:
+            kind.append(KIND_RULES)
+        daily.append(rule.daily_drawdown if rule else None)
+        mx.append(rule.max_drawdown if rule else None)
+        dd_type = (rule.drawdown_type if rule else None) or "static"
+        dd_types.append(dd_type)
+        trailing.append(dd_type == "eod_trailing")
+        rule_phases.append(rule.phase_name if rule else None)
+        best.append(program.best_day_rule_pct if program else None)
+        risk_cap.append(program.max_risk_per_trade_pct if program else None)
+        margin.append(program.max_margin_pct if program else None)
+    return PackedAccounts(
+        kind=np.array(kind, dtype=np.int8),
+        equity=_f([a.equity for a in accounts]),
+        balance=_f([a.balance for a in accounts]),
+        starting_balance=_f([a.starting_balance for a in accounts]),
+        daily_open_equity=_f([a.daily_open_equity for a in accounts]),
+        peak_eod_balance=_f([getattr(a, "peak_eod_balance", None) for a in accounts]),
+        daily_dd_pct=_f(daily),
+        max_dd_pct=_f(mx),
+        trailing=np.array(trailing, dtype=bool),
+        best_day_pct=_f(best),
+        max_risk_pct=_f(risk_cap),
+        max_margin_pct=_f(margin),
+        has_program=np.array(has_program, dtype=bool),
+        profit_target=_f(targets),
+        drawdown_types=tuple(dd_types),
+        phases=tuple(a.current_phase for a in accounts),
+        rule_phases=tuple(rule_phases),
+    )
+
+
+# ── Pre-trade status ──────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class PreTradeBatch:
+    packed: PackedAccounts
+    risk: np.ndarray
+    level: np.ndarray            # int8, LEVEL_*
+    blocks: np.ndarray           # int8 bit flags, BLOCK_*
+    warnings: np.ndarray         # int8 bit flags, WARN_*
+    daily_loss_amount: np.ndarray
+    daily_loss_pct: np.ndarray
+    daily_dd_limit_pct: np.ndarray
+    daily_dd_limit_amount: np.ndarray
+    daily_room_amount: np.ndarray
+    daily_room_pct: np.ndarray
+    max_loss_amount: np.ndarray
+    max_loss_pct: np.ndarray
+    max_dd_limit_pct: np.ndarray
+    max_dd_limit_amount: np.ndarray
+    max_room_amount: np.ndarray
+    effective_baseline: np.ndarray
+    today_pnl: np.ndarray
+    best_day_limit_amount: np.ndarray   # NaN when the program has no best-day rule
+    best_day_room: np.ndarray
+    would_breach_daily_if_sl: np.ndarray
+    would_breach_max_if_sl: np.ndarray
+    daily_room_after_sl: np.ndarray
+    max_room_after_sl: np.ndarray
+    starting_balance: np.ndarray
+    daily_used_pct: np.ndarray
+    max_used_pct: np.ndarray
+
+    @property
+    def blocked(self) -> np.ndarray:
+        return self.level == LEVEL_BLOCKED
+
+    def status(self, i: int) -> dict[str, Any]:
+        """The dict `RuleChecker.get_pre_trade_status` returns for row `i`."""
+        p = self.packed
+        if p.kind[i] == KIND_PERSONAL:
+            return {
+                "level": "ok", "blocked": False, "block_reasons": [], "warnings": [],
+                "daily_room_amount": None, "max_room_amount": None,
+            }
+        if p.kind[i] == KIND_NO_RULES:
+            return {"level": "ok", "blocked": False, "block_reasons": [], "warnings": []}
+
+        risk = float(self.risk[i])
+        daily_loss_pct = float(self.daily_loss_pct[i])
+        daily_dd_limit_pct = float(self.daily_dd_limit_pct[i])
+        daily_room = float(self.daily_room_amount[i])
+        max_loss_pct = float(self.max_loss_pct[i])
+        max_dd_limit_pct = float(self.max_dd_limit_pct[i])
+        max_room = float(self.max_room_amount[i])
+        starting = float(self.starting_balance[i])
+        today_pnl = float(self.today_pnl[i])
+        best_day_limit_pct = _opt(p.best_day_pct[i])
+        bd_amount = _opt(self.best_day_limit_amount[i])
+        bd_room = _opt(self.best_day_room[i])
+        drawdown_type = p.drawdown_types[i]
+        trailing_tag = f" [{drawdown_type.replace('_', ' ')}]" if drawdown_type == "eod_trailing" else ""
+
+        block_reasons: list = []
+        b = int(self.blocks[i])
+        if b & BLOCK_TRADE_RISK:
+            max_allowed = float(p.max_risk_pct[i])
+            trade_risk_pct = (risk / starting) * 100.0
+            block_reasons.append(
+                f"Trade risk {trade_risk_pct:.1f}% exceeds {max_allowed}% per-trade limit "
+                f"(${risk:.0f} > ${starting * max_allowed / 100:.0f} max)"
+            )
+        if b & BLOCK_DAILY_DD:
+            block_reasons.append(
+                f"Daily DD breached: {daily_loss_pct:.1f}% used of {daily_dd_limit_pct}% limit "
+                f"(${abs(daily_room):.0f} over limit)"
+            )
+        if b & BLOCK_MAX_DD:
+            block_reasons.append(
+                f"Max DD breached: {max_loss_pct:.1f}% used of {max_dd_limit_pct}% limit" + trailing_tag
+            )
+        if b & BLOCK_BEST_DAY:
+            block_reasons.append(
+                f"Best day limit reached: +${today_pnl:.0f} today ≥ ${bd_amount:.0f} limit "
+                f"({best_day_limit_pct}% of account). Stop trading for today."
+            )
+
+        warnings: list = []
+        w = int(self.warnings[i])
+        if w & WARN_DAILY_NEAR:
+            warnings.append(
+                f"Daily DD at {float(self.daily_used_pct[i]):.0f}% — only ${daily_room:.0f} remaining today"
+            )
+        if w & WARN_DAILY_SL_BREACH:
+            over = risk - daily_room
+            warnings.append(
+                f"⚠ If SL hits: daily DD breached by ${over:.0f} "
+                f"(risk ${risk:.0f} > ${daily_room:.0f} room)"
+            )
+        if w & WARN_DAILY_ROOM_SHARE:
+            pct_used = (risk / daily_room * 100)
+            warnings.append(
+                f"Risk ${risk:.0f} uses {pct_used:.0f}% of "
+                f"${daily_room:.0f} daily room remaining"
+            )
+        if w & WARN_MAX_NEAR:
+            warnings.append(
+                f"Max DD at {float(self.max_used_pct[i]):.0f}% — only ${max_room:.0f} remaining" + trailing_tag
+            )
+        if w & WARN_MAX_SL_BREACH:
+            warnings.append(
+                f"⚠ If SL hits: max DD would be breached (${float(self.max_room_after_sl[i]):.0f})"
+            )
+        if w & WARN_BEST_DAY_NEAR:
+            warnings.append(
+                f"Near best day limit — only ${bd_room:.0f} profit headroom left today"
+            )
+
+        return {
+            "level": _LEVEL_NAMES[int(self.level[i])],
+            "blocked": len(block_reasons) > 0,
+            "block_reasons": block_reasons,
+            "warnings": warnings,
+            "daily_loss_amount": round(float(self.daily_loss_amount[i]), 2),
+            "daily_loss_pct": round(daily_loss_pct, 2),
+            "daily_dd_limit_pct": daily_dd_limit_pct,
+            "daily_dd_limit_amount": round(float(self.daily_dd_limit_amount[i]), 2),
+            "daily_room_amount": round(daily_room, 2),
+            "daily_room_pct": round(max(0.0, float(self.daily_room_pct[i])), 2),
+            "max_loss_amount": round(float(self.max_loss_amount[i]), 2),
+            "max_loss_pct": round(max_loss_pct, 2),
+            "max_dd_limit_pct": max_dd_limit_pct,
+            "max_dd_limit_amount": round(float(self.max_dd_limit_amount[i]), 2),
+            "max_room_amount": round(max_room, 2),
+            "effective_baseline": round(float(self.effective_baseline[i]), 2),
+            "drawdown_type": drawdown_type,
+            "today_pnl": round(today_pnl, 2),
+            "best_day_limit_pct": best_day_limit_pct,
+            "best_day_limit_amount": round(bd_amount, 2) if bd_amount is not None else None,
+            "best_day_room": round(bd_room, 2) if bd_room is not None else None,
+            "risk_amount": round(risk, 2),
+            "would_breach_daily_if_sl": bool(self.would_breach_daily_if_sl[i]),
+            "would_breach_max_if_sl": bool(self.would_breach_max_if_sl[i]),
+            "daily_room_after_sl": round(float(self.daily_room_after_sl[i]), 2),
+            "max_room_after_sl": round(float(self.max_room_after_sl[i]), 2),
+            "phase": p.phases[i],
+        }
+
+    def statuses(self) -> list[dict[str, Any]]:
+        return [self.status(i) for i in range(len(self.packed))]
+
+
+def evaluate_pre_trade(packed: PackedAccounts, risk: Union[float, Sequence[float], np.ndarray]) -> PreTradeBatch:
+    """Pre-trade rule status for every packed account at the proposed risk amount(s)."""
+    p = packed
+    risk = np.broadcast_to(np.asarray(risk, dtype=np.float64), p.kind.shape)
+    rules = p.kind == KIND_RULES
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = _or(p.balance, 0.0)
+        equity = _or(_or(p.equity, p.balance), 0.0)
+        starting = _or(p.starting_balance, balance)
+        starting = np.where(starting <= 0, balance, starting)
+        daily_starting = _or(p.daily_open_equity, balance)
+        daily_starting = np.where(daily_starting <= 0, balance, daily_starting)
+
+        # Daily drawdown
+        daily_dd_limit_pct = _or(p.daily_dd_pct, 0.0)
+        daily_dd_limit_amount = daily_starting * (daily_dd_limit_pct / 100.0)
+        daily_loss_amount = np.maximum(0.0, daily_starting - equity)
+        daily_loss_pct = np.where(daily_starting > 0, daily_loss_amount / daily_starting * 100.0, 0.0)
+        daily_room = daily_dd_limit_amount - daily_loss_amount
+        daily_room_pct = np.where(daily_starting > 0, daily_room / daily_starting * 100.0, 0.0)
+
+        # Max drawdown (static or EOD trailing)
+        max_dd_limit_pct = _or(p.max_dd_pct, 0.0)
+        peak_eod = _or(p.peak_eod_balance, starting)
+        baseline = np.where(p.trailing, np.maximum(starting, peak_eod), starting)
+        max_dd_limit_amount = baseline * (max_dd_limit_pct / 100.0)
+        max_loss_amount = np.maximum(0.0, baseline - equity)
+        max_loss_pct = np.where(baseline > 0, max_loss_amount / baseline * 100.0, 0.0)
+        max_room = max_dd_limit_amount - max_loss_amount
+
+        # Best day
+        today_pnl = equity - daily_starting
+        has_best_day = ~np.isnan(p.best_day_pct) & (starting > 0)
+        best_day_limit_amount = np.where(has_best_day, starting * (p.best_day_pct / 100.0), np.nan)
+        best_day_room = best_day_limit_amount - today_pnl
+
+        # Trade projection
+        would_breach_daily = np.where(daily_room > 0, risk > daily_room, True)
+        would_breach_max = np.where(max_room > 0, risk > max_room, True)
+
+        # Hard blocks
+        trade_risk_pct = (risk / starting) * 100.0
+        block_trade = ~np.isnan(p.max_risk_pct) & (risk > 0) & (starting > 0) & (trade_risk_pct > p.max_risk_pct)
+        block_daily = daily_room <= 0
+        block_max = max_room <= 0
+        block_best = has_best_day & (today_pnl >= best_day_limit_amount)
+        blocks = (
+            block_trade * BLOCK_TRADE_RISK + block_daily * BLOCK_DAILY_DD
+            + block_max * BLOCK_MAX_DD + block_best * BLOCK_BEST_DAY
+        ).astype(np.int8)
+        open_ = blocks == 0
+
+        # Warnings (only when not blocked)
+        daily_used_pct = np.where(daily_dd_limit_amount > 0, daily_loss_amount / daily_dd_limit_amount * 100, 0.0)
+        max_used_pct = np.where(max_dd_limit_amount > 0, max_loss_amount / max_dd_limit_amount * 100, 0.0)
+        daily_open_room = open_ & (daily_room > 0)
+        max_open_room = open_ & (max_room > 0)
+        warnings = (
+            (daily_open_room & (daily_used_pct >= 80)) * WARN_DAILY_NEAR
+            + (daily_open_room & would_breach_daily) * WARN_DAILY_SL_BREACH
+            + (daily_open_room & ~would_breach_daily & (risk > daily_room * 0.5)) * WARN_DAILY_ROOM_SHARE
+            + (max_open_room & (max_used_pct >= 80)) * WARN_MAX_NEAR
+            + (max_open_room & would_breach_max & (max_used_pct >= 60)) * WARN_MAX_SL_BREACH
+            + (open_ & has_best_day & (today_pnl > 0) & (best_day_room < best_day_limit_amount * 0.2)) * WARN_BEST_DAY_NEAR
+        ).astype(np.int8)
+
+    blocks = np.where(rules, blocks, 0).astype(np.int8)
+    warnings = np.where(rules, warnings, 0).astype(np.int8)
+    level = np.where(blocks != 0, LEVEL_BLOCKED, np.where(warnings != 0, LEVEL_WARNING, LEVEL_OK)).astype(np.int8)
+
+    return PreTradeBatch(
+        packed=p,
+        risk=risk,
+        level=level,
+        blocks=blocks,
+        warnings=warnings,
+        daily_loss_amount=daily_loss_amount,
+        daily_loss_pct=daily_loss_pct,
+        daily_dd_limit_pct=daily_dd_limit_pct,
+        daily_dd_limit_amount=daily_dd_limit_amount,
+        daily_room_amount=daily_room,
+        daily_room_pct=daily_room_pct,
+        max_loss_amount=max_loss_amount,
+        max_loss_pct=max_loss_pct,
+        max_dd_limit_pct=max_dd_limit_pct,
+        max_dd_limit_amount=max_dd_limit_amount,
+        max_room_amount=max_room,
+        effective_baseline=baseline,
+        today_pnl=today_pnl,
+        best_day_limit_amount=best_day_limit_amount,
+        best_day_room=best_day_room,
+        would_breach_daily_if_sl=would_breach_daily,
+        would_breach_max_if_sl=would_breach_max,
+        daily_room_after_sl=daily_room - risk,
+        max_room_after_sl=max_room - risk,
+        starting_balance=starting,
+        daily_used_pct=daily_used_pct,
+        max_used_pct=max_used_pct,
+    )
+
+
+# ── Account rule checks (/fund-status) ────────────────────────────────────────
+@dataclass(frozen=True)
+class AccountRulesBatch:
+    """`check_account_rules` + `check_profit_target` for every packed account,
+    from the inputs `/fund-status` derives from the stored account values."""
+    packed: PackedAccounts
+    daily_loss_pct: np.ndarray
+    max_loss_pct: np.ndarray
+    best_day_pct: np.ndarray     # today's profit % of starting balance; NaN if not applicable
+    margin_used_pct: np.ndarray
+    violations: np.ndarray       # bool (N, 4): daily, max, best day, margin
+    profit_pct: np.ndarray
+
+    @property
+    def locked(self) -> np.ndarray:
+        return self.violations.any(axis=1)
+
+    def result(self, i: int) -> dict[str, Any]:
+        """The dict `RuleChecker.check_account_rules` returns for row `i`."""
+        p = self.packed
+        if p.kind[i] == KIND_PERSONAL:
+            return {"locked": False, "violations": [], "messages": []}
+        if p.kind[i] == KIND_NO_RULES:
+            message = "No phase rules found" if p.has_program[i] else "Program not found"
+            return {"locked": False, "violations": [], "messages": [message]}
+
+        daily_loss_pct = float(self.daily_loss_pct[i])
+        max_loss_pct = float(self.max_loss_pct[i])
+        best_day_pct = _opt(self.best_day_pct[i])
+        best_day_limit = _opt(p.best_day_pct[i])
+        violations, messages = [], []
+        daily, maximum, best_day, margin = self.violations[i]
+        if daily:
+            violations.append("daily_drawdown")
+            messages.append(
+                f"Daily drawdown limit exceeded: {daily_loss_pct:.2f}% > {float(p.daily_dd_pct[i])}%"
+            )
+        if maximum:
+            violations.append("max_drawdown")
+            messages.append(
+                f"Max drawdown limit exceeded: {max_loss_pct:.2f}% > {float(p.max_dd_pct[i])}% ({p.drawdown_types[i]})"
+            )
+        if best_day:
+            violations.append("best_day_rule")
+            messages.append(
+                f"Best day rule exceeded: today +{float(self.best_day_pct[i]):.2f}% > limit {best_day_limit}%"
+            )
+        if margin:
+            violations.append("max_margin")
+            messages.append(
+                f"Margin usage exceeded: {float(self.margin_used_pct[i]):.2f}% > {float(p.max_margin_pct[i])}%"
+            )
+        return {
+            "locked": len(violations) > 0,
+            "violations": violations,
+            "messages": messages,
+            "daily_loss_pct": round(daily_loss_pct, 2),
+            "max_loss_pct": round(max_loss_pct, 2),
+            "drawdown_type": p.drawdown_types[i],
+            "phase": p.rule_phases[i],
+            "best_day_pct": round(best_day_pct, 2) if best_day_pct is not None else None,
+            "best_day_limit": best_day_limit,
+        }
+
+    def profit_target(self, i: int) -> dict[str, Any]:
+        """The dict `RuleChecker.check_profit_target` returns for row `i` (exact phase match)."""
+        target = _opt(self.packed.profit_target[i])
+        if target is None:
+            return {"achieved": False, "progress": 0, "target": None}
+        profit_pct = float(self.profit_pct[i])
+        return {
+            "achieved": profit_pct >= target,
+            "target": target,
+            "current": round(profit_pct, 2),
+            "progress": round((profit_pct / target) * 100, 2) if target > 0 else 0,
+        }
+
+
+def evaluate_account_rules(
+    packed: PackedAccounts,
+    margin_used_pct: Union[float, Sequence[float], np.ndarray] = 0.0,
+) -> AccountRulesBatch:
+    p = packed
+    margin_used_pct = np.broadcast_to(np.asarray(margin_used_pct, dtype=np.float64), p.kind.shape)
+    rules = p.kind == KIND_RULES
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Inputs as /fund-status derives them from the stored account values.
+        balance = _or(p.balance, 0)
+        equity = _or(p.equity, 0)
+        starting = _or(p.starting_balance, balance)
+        daily_starting = _or(p.daily_open_equity, balance)
+
+        daily_loss = daily_starting - equity
+        daily_loss_pct = np.where(daily_starting > 0, (daily_loss / daily_starting) * 100, 0)
+        max_loss = starting - equity
+        max_loss_pct = np.where(starting > 0, (max_loss / starting) * 100, 0)
+
+        has_best_day = ~np.isnan(p.best_day_pct) & (daily_starting > 0) & (starting > 0)
+        today_profit_pct = ((equity - daily_starting) / starting) * 100
+        best_day_pct = np.where(has_best_day, today_profit_pct, np.nan)
+
+        violations = np.stack([
+            daily_loss_pct > p.daily_dd_pct,
+            max_loss_pct > p.max_dd_pct,
+            has_best_day & (today_profit_pct > p.best_day_pct),
+            ~np.isnan(p.max_margin_pct) & (margin_used_pct > p.max_margin_pct),
+        ], axis=1) & rules[:, None]
+
+        profit_pct = np.where(starting > 0, ((equity - starting) / starting) * 100, 0)
+
+    return AccountRulesBatch(
+        packed=p,
+        daily_loss_pct=daily_loss_pct,
+        max_loss_pct=max_loss_pct,
+        best_day_pct=best_day_pct,
+        margin_used_pct=margin_used_pct,
+        violations=violations,
+        profit_pct=profit_pct,
+    )
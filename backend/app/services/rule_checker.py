@@ -1,11 +1,28 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Union
 from sqlalchemy.orm import Session
 
+from app.services.reference_cache import ProgramRef, reference_cache
+from app.services.rule_batch import (
+    AccountRulesBatch,
+    PreTradeBatch,
+    evaluate_account_rules,
+    evaluate_pre_trade,
+    pack_accounts,
+)
+
 
 class RuleChecker:
+    """Fund-rule checks. Program/phase metadata comes from the reference cache,
+    so checking N accounts issues no rule queries once the cache is warm."""
+
     def __init__(self, db: Session):
         self.db = db
 
+    def _program(self, fund_program_id: Optional[int]) -> Optional[ProgramRef]:
+        if fund_program_id is None:
+            return None
+        return reference_cache.get(self.db).programs.get(fund_program_id)
+
     def check_account_rules(
         self,
         account_type: str,
@@ -36,32 +53,12 @@ class RuleChecker:
         if account_type != "fund" or fund_program_id is None:
             return {"locked": False, "violations": [], "messages": []}
 
-        from app.models.funds import FundProgram, FundPhaseRule
-
-        program = self.db.query(FundProgram).filter(FundProgram.id == fund_program_id).first()
+        program = self._program(fund_program_id)
         if not program:
             return {"locked": False, "violations": [], "messages": ["Program not found"]}
 
-        # Find the phase rule for the current phase
-        phase_rule = None
-        if current_phase:
-            phase_rule = (
-                self.db.query(FundPhaseRule)
-                .filter(
-                    FundPhaseRule.program_id == program.id,
-                    FundPhaseRule.phase_name == current_phase,
-                )
-                .first()
-            )
-
-        if not phase_rule:
-            phase_rule = (
-                self.db.query(FundPhaseRule)
-                .filter(FundPhaseRule.program_id == program.id)
-                .order_by(FundPhaseRule.phase_order)
-                .first()
-            )
-
+        # Phase rule for the current phase, else the program's first phase
+        phase_rule = program.phase_or_first(current_phase)
         if not phase_rule:
             return {"locked": False, "violations": [], "messages": ["No phase rules found"]}
 
@@ -121,6 +118,20 @@ class RuleChecker:
             "best_day_limit": program.best_day_rule_pct,
         }
 
+    # ── Batch (vectorised) variants ──────────────────────────────────────────
+    def evaluate_pre_trade(self, accounts: Sequence[Any], proposed_risk_amounts) -> PreTradeBatch:
+        """`get_pre_trade_status` for many accounts in one NumPy pass.
+
+        `proposed_risk_amounts` is one amount per account or a single amount for all.
+        """
+        return evaluate_pre_trade(pack_accounts(accounts, reference_cache.get(self.db).programs), proposed_risk_amounts)
+
+    def evaluate_account_rules(
+        self, accounts: Sequence[Any], margin_used_pct: Union[float, Sequence[float]] = 0.0,
+    ) -> AccountRulesBatch:
+        """`check_account_rules` + `check_profit_target` from stored account values, batched."""
+        return evaluate_account_rules(pack_accounts(accounts, reference_cache.get(self.db).programs), margin_used_pct)
+
     def get_pre_trade_status(
         self,
         account,  # Account model instance
@@ -158,30 +169,12 @@ class RuleChecker:
                 "max_room_amount": None,
             }
 
-        from app.models.funds import FundProgram, FundPhaseRule
-
-        program = self.db.query(FundProgram).filter(FundProgram.id == account.fund_program_id).first()
+        program = self._program(account.fund_program_id)
         if not program:
             return {"level": "ok", "blocked": False, "block_reasons": [], "warnings": []}
 
         # Find phase rule
-        phase_rule = None
-        if account.current_phase:
-            phase_rule = (
-                self.db.query(FundPhaseRule)
-                .filter(
-                    FundPhaseRule.program_id == program.id,
-                    FundPhaseRule.phase_name == account.current_phase,
-                )
-                .first()
-            )
-        if not phase_rule:
-            phase_rule = (
-                self.db.query(FundPhaseRule)
-                .filter(FundPhaseRule.program_id == program.id)
-                .order_by(FundPhaseRule.phase_order)
-                .first()
-            )
+        phase_rule = program.phase_or_first(account.current_phase)
         if not phase_rule:
             return {"level": "ok", "blocked": False, "block_reasons": [], "warnings": []}
 
@@ -364,16 +357,8 @@ class RuleChecker:
         current_equity: float,
     ) -> Dict[str, Any]:
         """Check if profit target is achieved for the current phase"""
-        from app.models.funds import FundProgram, FundPhaseRule
-
-        phase_rule = (
-            self.db.query(FundPhaseRule)
-            .filter(
-                FundPhaseRule.program_id == fund_program_id,
-                FundPhaseRule.phase_name == current_phase,
-            )
-            .first()
-        )
+        program = self._program(fund_program_id)
+        phase_rule = program.phase(current_phase) if program else None
 
         if not phase_rule or phase_rule.profit_target is None:
             return {"achieved": False, "progress": 0, "target": None}
@@ -394,17 +379,5 @@ class RuleChecker:
 
     def get_next_phase(self, fund_program_id: int, current_phase: str) -> Optional[str]:
         """Return the next phase name in sequence, or None if already at last phase."""
-        from app.models.funds import FundPhaseRule
-
-        rules = (
-            self.db.query(FundPhaseRule)
-            .filter(FundPhaseRule.program_id == fund_program_id)
-            .order_by(FundPhaseRule.phase_order)
-            .all()
-        )
-
-        for i, rule in enumerate(rules):
-            if rule.phase_name == current_phase and i + 1 < len(rules):
-                return rules[i + 1].phase_name
-
-        return None
+        program = self._program(fund_program_id)
+        return program.next_phase(current_phase) if program else None
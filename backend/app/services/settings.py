@@ -10,19 +10,33 @@ from typing import Optional
 from sqlalchemy.orm import Session
 
 from app.models.app_settings import AppSetting
+from app.services.reference_cache import reference_cache
 
 # Known settings keys
 KEY_DEFAULT_MT5_BASE_PATH = "default_mt5_base_path"
 KEY_DEFAULT_TERMINALS_DIR = "default_terminals_dir"
 KEY_STEALTH_MODE = "stealth_mode"
+KEY_EXPOSURE_MAX_NET_LOTS = "exposure_max_net_lots"      # per symbol, across all accounts
+KEY_EXPOSURE_MAX_OPEN_RISK = "exposure_max_open_risk"    # sum of distance-to-SL losses
 
-KNOWN_KEYS = {KEY_DEFAULT_MT5_BASE_PATH, KEY_DEFAULT_TERMINALS_DIR, KEY_STEALTH_MODE}
+# Progress markers of one-off startup maintenance. Internal, so not in KNOWN_KEYS;
+# written inside writer intents with `write_marker`.
+KEY_ROLLUP_BACKFILL = "maintenance_rollup_backfill"
+KEY_DAILY_STATS_REBUILT = "maintenance_daily_stats_version"
+KEY_TRADE_STATS_REBUILT = "maintenance_trade_stats_version"
+
+KNOWN_KEYS = {
+    KEY_DEFAULT_MT5_BASE_PATH,
+    KEY_DEFAULT_TERMINALS_DIR,
+    KEY_STEALTH_MODE,
+    KEY_EXPOSURE_MAX_NET_LOTS,
+    KEY_EXPOSURE_MAX_OPEN_RISK,
+}
 
 
 def get_setting(db: Session, key: str) -> Optional[str]:
-    """Return the stored value for a key, or None if not set."""
-    row = db.query(AppSetting).filter(AppSetting.key == key).first()
-    return row.value if row else None
+    """Return the stored value for a key, or None if not set (served from the reference cache)."""
+    return reference_cache.get(db).settings.get(key)
 
 
 def set_setting(db: Session, key: str, value: Optional[str]) -> None:
@@ -32,6 +46,7 @@ def set_setting(db: Session, key: str, value: Optional[str]) -> None:
         if row:
             db.delete(row)
             db.commit()
+            reference_cache.invalidate()
         return
     if row:
         row.value = value
@@ -39,10 +54,26 @@ def set_setting(db: Session, key: str, value: Optional[str]) -> None:
         row = AppSetting(key=key, value=value)
         db.add(row)
     db.commit()
+    reference_cache.invalidate()
 
 
 def get_all_settings(db: Session) -> dict[str, Optional[str]]:
     """Return all known settings keys with their current values (None if unset)."""
-    rows = db.query(AppSetting).all()
-    found = {r.key: r.value for r in rows}
+    found = reference_cache.get(db).settings
     return {key: found.get(key) for key in KNOWN_KEYS}
+
+
+def read_marker(db: Session, key: str) -> Optional[str]:
+    """Read a setting inside the caller's transaction (bypasses the reference cache)."""
+    row = db.get(AppSetting, key)
+    return row.value if row is not None else None
+
+
+def write_marker(db: Session, key: str, value: str) -> None:
+    """Upsert a setting inside the caller's transaction. Does not commit."""
+    row = db.get(AppSetting, key)
+    if row is None:
+        db.add(AppSetting(key=key, value=value))
+    else:
+        row.value = value
+    db.flush()
@@ -0,0 +1,195 @@
+"""Equity snapshots for every v2 account, sampled from worker tick events.
+
+Workers emit a `tick` (account_info + positions) every second. Persisting
+every tick would be ~86k rows/account/day, so `SnapshotSampler` applies a
+deadband policy per account:
+
+  - write when equity moved more than `deadband_pct` % since the last write,
+  - or when `max_interval` seconds passed since the last write,
+  - or on the first tick of a new UTC day.
+
+Between writes the sampler remembers the highest and lowest equity seen. When
+the next write happens those extremes are written too (with their own
+timestamps), so intraday highs/lows — what drawdown rules care about — are
+never lost to sampling.
+
+`SnapshotWriter` subscribes to the pool, buffers sampled rows and inserts
+them through the single DB writer as one `executemany` every few seconds,
+never on the event loop, updating the 5m/1h/1d rollups in the same
+transaction.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from app.config import (
+    SNAPSHOT_DEADBAND_PCT,
+    SNAPSHOT_FLUSH_MAX_ROWS,
+    SNAPSHOT_FLUSH_SECONDS,
+    SNAPSHOT_INTERVAL_SECONDS,
+)
+from app.services.db_writer import db_writer
+from app.services.equity_rollups import insert_snapshots_with_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def parse_tick_ts(ts: Optional[str]) -> datetime:
+    """Tick timestamps are ISO UTC with a trailing Z; stored naive like CURRENT_TIMESTAMP."""
+    if not ts:
+        return datetime.utcnow()
+    try:
+        return datetime.fromisoformat(ts.rstrip("Z")).replace(tzinfo=None)
+    except ValueError:
+        return datetime.utcnow()
+
+
+@dataclass
+class _Sample:
+    balance: float
+    equity: float
+    profit: Optional[float]
+    recorded_at: datetime
+
+    def row(self, account_db_id: int) -> dict[str, Any]:
+        return {
+            "account_db_id": account_db_id,
+            "balance": self.balance,
+            "equity": self.equity,
+            "profit": self.profit,
+            "recorded_at": self.recorded_at,
+        }
+
+
+@dataclass
+class _AccountState:
+    last: _Sample
+    high: Optional[_Sample] = None      # extremes seen since `last` was written
+    low: Optional[_Sample] = None
+
+
+class SnapshotSampler:
+    """Pure deadband sampler. `offer` returns the rows to persist for one tick."""
+
+    def __init__(self, deadband_pct: float = SNAPSHOT_DEADBAND_PCT, max_interval: float = SNAPSHOT_INTERVAL_SECONDS) -> None:
+        self.deadband_pct = deadband_pct
+        self.max_interval = max_interval
+        self._state: dict[int, _AccountState] = {}
+
+    def forget(self, account_db_id: int) -> None:
+        self._state.pop(account_db_id, None)
+
+    def offer(self, account_db_id: int, info: dict[str, Any], recorded_at: datetime) -> list[dict[str, Any]]:
+        equity = info.get("equity")
+        if equity is None:
+            return []
+        sample = _Sample(
+            balance=float(info.get("balance") or 0.0),
+            equity=float(equity),
+            profit=info.get("profit"),
+            recorded_at=recorded_at,
+        )
+        state = self._state.get(account_db_id)
+        if state is None:
+            self._state[account_db_id] = _AccountState(last=sample)
+            return [sample.row(account_db_id)]
+
+        last = state.last
+        moved_pct = abs(sample.equity - last.equity) / abs(last.equity) * 100 if last.equity else float("inf")
+        due = (
+            moved_pct > self.deadband_pct
+            or (sample.recorded_at - last.recorded_at).total_seconds() >= self.max_interval
+            or sample.recorded_at.date() != last.recorded_at.date()
+        )
+        if not due:
+            if state.high is None or sample.equity > state.high.equity:
+                state.high = sample
+            if state.low is None or sample.equity < state.low.equity:
+                state.low = sample
+            return []
+
+        # Keep extremes that lie outside both the last written and the new point.
+        band_hi = max(last.equity, sample.equity)
+        band_lo = min(last.equity, sample.equity)
+        extras = []
+        if state.high is not None and state.high.equity > band_hi:
+            extras.append(state.high)
+        if state.low is not None and state.low.equity < band_lo:
+            extras.append(state.low)
+        extras.sort(key=lambda s: s.recorded_at)
+
+        self._state[account_db_id] = _AccountState(last=sample)
+        return [s.row(account_db_id) for s in extras] + [sample.row(account_db_id)]
+
+
+class SnapshotWriter:
+    """Background task: pool tick events → sampler → batched inserts."""
+
+    def __init__(self, sampler: Optional[SnapshotSampler] = None) -> None:
+        self.sampler = sampler or SnapshotSampler()
+        self._buffer: list[dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._pool = None
+        self.rows_written = 0
+
+    async def start(self, pool) -> None:
+        if self._task is not None:
+            return
+        self._pool = pool
+        queue = await pool.subscribe()
+        self._task = asyncio.create_task(self._run(queue))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    def handle_event(self, account_db_id: int, event: dict[str, Any]) -> None:
+        kind = event.get("event")
+        data = event.get("data") or {}
+        if kind == "tick":
+            info = data.get("account_info")
+            if info:
+                self._buffer.extend(self.sampler.offer(account_db_id, info, parse_tick_ts(data.get("ts"))))
+        elif kind == "health" and data.get("state") == "exited":
+            self.sampler.forget(account_db_id)
+
+    async def flush(self) -> None:
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            await db_writer.run(lambda session: insert_snapshots_with_rollups(session, rows))
+            self.rows_written += len(rows)
+        except Exception as e:
+            logger.warning("failed to write %d equity snapshots: %s", len(rows), e)
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        next_flush = loop.time() + SNAPSHOT_FLUSH_SECONDS
+        try:
+            while True:
+                timeout = max(0.0, next_flush - loop.time())
+                try:
+                    account_db_id, event = await asyncio.wait_for(queue.get(), timeout=timeout)
+                    self.handle_event(account_db_id, event)
+                except asyncio.TimeoutError:
+                    pass
+                if loop.time() >= next_flush or len(self._buffer) >= SNAPSHOT_FLUSH_MAX_ROWS:
+                    await self.flush()
+                    next_flush = loop.time() + SNAPSHOT_FLUSH_SECONDS
+        finally:
+            await self._pool.unsubscribe(queue)
+
+
+snapshot_writer = SnapshotWriter()
@@ -0,0 +1,288 @@
+"""Per-broker-server symbol catalog (`symbol_catalog`, `symbol_catalog_servers`).
+
+Accounts on the same broker server see the same symbols with the same
+contract specs, so the catalog is stored once per server. When a worker
+reports `ready`, the background task asks it for the catalog with the hash
+it already has (the `symbol_catalog` RPC is a single local `symbols_get`);
+an unchanged hash costs nothing more, otherwise the rows are diffed —
+inserted, updated, removed — in one writer intent. A server is re-checked
+at most every `SYMBOL_CATALOG_REFRESH_SECONDS`.
+
+In memory each server has a `ServerCatalog`: exact names, a sorted upper-case
+name list for prefix search and a trigram index for substring search, plus
+a memo of symbol resolutions keyed by the requested name. A new hash
+replaces the object, which drops the memo with it.
+
+Readers: `resolve_symbol` (dict lookups instead of ~40 `get_symbol_info`
+RPCs), the v2 prepare step (spec without an RPC), and `/api/mt5/v2/symbols`
+and `/api/mt5/symbols` for autocomplete.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import SYMBOL_CATALOG_MEMO_ENTRIES, SYMBOL_CATALOG_REFRESH_SECONDS
+from app.database import SessionLocal
+from app.models.accounts import Account
+from app.models.symbol_catalog import SymbolCatalogEntry, SymbolCatalogServer
+from app.services.db_writer import db_writer
+from app.utils.async_helpers import run_db
+from app.workers.protocol import CATALOG_SPEC_FIELDS as SPEC_FIELDS, catalog_hash
+
+logger = logging.getLogger(__name__)
+
+_GRAM = 3
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i:i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+class ServerCatalog:
+    """One server's symbols, indexed for lookup and autocomplete."""
+
+    def __init__(self, server: str, catalog_hash: str, entries: Iterable[dict[str, Any]],
+                 memo_entries: int = SYMBOL_CATALOG_MEMO_ENTRIES) -> None:
+        self.server = server
+        self.hash = catalog_hash
+        self.entries: dict[str, dict[str, Any]] = {e["name"]: e for e in entries}
+        self._by_upper: dict[str, str] = {}
+        for name in sorted(self.entries):
+            self._by_upper.setdefault(name.upper(), name)
+        self._sorted = sorted(self._by_upper)
+        self._index: dict[str, set[str]] = {}
+        for upper in self._sorted:
+            for gram in _grams(upper):
+                self._index.setdefault(gram, set()).add(upper)
+        self._memo: OrderedDict[str, tuple] = OrderedDict()
+        self._memo_entries = memo_entries
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def spec(self, name: str) -> Optional[dict[str, Any]]:
+        """Spec in the shape of the worker's `get_symbol_info` result."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        return {
+            "symbol": name,
+            "point": entry.get("point"),
+            "digits": entry.get("digits"),
+            "trade_contract_size": entry.get("contract_size"),
+            "volume_min": entry.get("volume_min"),
+            "volume_max": entry.get("volume_max"),
+            "volume_step": entry.get("volume_step"),
+            "filling": entry.get("filling"),
+        }
+
+    def search(self, query: str, limit: int = 50) -> list[str]:
+        """Case-insensitive: names starting with `query` first, then names containing it."""
+        q = query.strip().upper()
+        if not q:
+            return [self._by_upper[u] for u in self._sorted[:limit]]
+        start = bisect.bisect_left(self._sorted, q)
+        out: list[str] = []
+        for upper in self._sorted[start:]:
+            if not upper.startswith(q) or len(out) >= limit:
+                break
+            out.append(upper)
+        if len(out) < limit:
+            if len(q) >= _GRAM:
+                grams = sorted(_grams(q), key=lambda g: len(self._index.get(g, ())))
+                candidates = set(self._index.get(grams[0], ()))
+                for gram in grams[1:]:
+                    candidates &= self._index.get(gram, set())
+                    if not candidates:
+                        break
+            else:
+                candidates = self._sorted
+            prefixed = set(out)
+            rest = sorted(u for u in candidates if q in u and u not in prefixed)
+            out.extend(rest[: limit - len(out)])
+        return [self._by_upper[u] for u in out]
+
+    def recall(self, requested: str) -> Optional[tuple]:
+        hit = self._memo.get(requested)
+        if hit is not None:
+            self._memo.move_to_end(requested)
+        return hit
+
+    def remember(self, requested: str, resolution: tuple) -> None:
+        self._memo[requested] = resolution
+        self._memo.move_to_end(requested)
+        while len(self._memo) > self._memo_entries:
+            self._memo.popitem(last=False)
+
+
+def _entry(row: SymbolCatalogEntry) -> dict[str, Any]:
+    return {"name": row.name, **{f: getattr(row, f) for f in SPEC_FIELDS}}
+
+
+def load_catalogs(db: Session) -> dict[str, ServerCatalog]:
+    rows: dict[str, list[dict[str, Any]]] = {}
+    for row in db.query(SymbolCatalogEntry).all():
+        rows.setdefault(row.server, []).append(_entry(row))
+    return {
+        s.server: ServerCatalog(s.server, s.catalog_hash, rows.get(s.server, ()))
+        for s in db.query(SymbolCatalogServer).all()
+    }
+
+
+def apply_catalog(session: Session, server: str, new_hash: str, entries: list[dict[str, Any]]) -> dict[str, int]:
+    """Writer intent: bring the server's rows in line with `entries`; no commit."""
+    existing = {
+        row.name: row
+        for row in session.query(SymbolCatalogEntry).filter(SymbolCatalogEntry.server == server)
+    }
+    added: list[dict[str, Any]] = []
+    updated = 0
+    for entry in entries:
+        row = existing.pop(entry["name"], None)
+        if row is None:
+            added.append({"server": server, "name": entry["name"], **{f: entry.get(f) for f in SPEC_FIELDS}})
+            continue
+        changed = False
+        for f in SPEC_FIELDS:
+            if getattr(row, f) != entry.get(f):
+                setattr(row, f, entry.get(f))
+                changed = True
+        updated += changed
+    if added:
+        session.execute(insert(SymbolCatalogEntry), added)
+    if existing:
+        session.query(SymbolCatalogEntry).filter(
+            SymbolCatalogEntry.server == server,
+            SymbolCatalogEntry.name.in_(list(existing)),
+        ).delete(synchronize_session=False)
+
+    state = session.get(SymbolCatalogServer, server)
+    if state is None:
+        state = SymbolCatalogServer(server=server)
+        session.add(state)
+    state.catalog_hash = new_hash
+    state.symbol_count = len(entries)
+    state.refreshed_at = datetime.utcnow()
+    return {"added": len(added), "updated": updated, "removed": len(existing)}
+
+
+def account_server(account_db_id: int) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        row = db.query(Account.server).filter(Account.id == account_db_id).first()
+        return row[0] if row else None
+    finally:
+        db.close()
+
+
+class SymbolCatalog:
+    """Background task: worker `ready` → refresh that server's catalog if due."""
+
+    def __init__(self, refresh_seconds: float = SYMBOL_CATALOG_REFRESH_SECONDS) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._servers: dict[str, ServerCatalog] = {}
+        self._checked: dict[str, float] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refreshing: set[asyncio.Task] = set()
+        self._pool = None
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+    def get(self, server: Optional[str]) -> Optional[ServerCatalog]:
+        return self._servers.get(server) if server else None
+
+    def servers(self) -> dict[str, int]:
+        return {s: len(c) for s, c in sorted(self._servers.items())}
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+    def load(self, db: Session) -> None:
+        self._servers = load_catalogs(db)
+
+    def _due(self, server: str) -> bool:
+        checked = self._checked.get(server)
+        return checked is None or time.monotonic() - checked >= self.refresh_seconds
+
+    async def refresh(self, pool, account_db_id: int, server: str, *, force: bool = False) -> dict[str, Any]:
+        """Fetch the catalog through `account_db_id`'s worker; write only the diff."""
+        lock = self._locks.setdefault(server, asyncio.Lock())
+        async with lock:
+            current = self._servers.get(server)
+            if not force and current is not None and not self._due(server):
+                return {"server": server, "changed": False, "symbols": len(current)}
+            result = await pool.call(
+                account_db_id, "symbol_catalog",
+                {"known_hash": current.hash if current else None},
+                timeout=30.0,
+            )
+            self._checked[server] = time.monotonic()
+            if result.get("unchanged") and current is not None:
+                return {"server": server, "changed": False, "symbols": len(current)}
+            entries = result.get("symbols") or []
+            new_hash = result["hash"]
+            diff = await db_writer.run(lambda s: apply_catalog(s, server, new_hash, entries))
+            self._servers[server] = ServerCatalog(server, new_hash, entries)
+            logger.info("symbol catalog %s: %d symbols (%s)", server, len(entries), diff)
+            return {"server": server, "changed": True, "symbols": len(entries), **diff}
+
+    async def _refresh_account(self, account_db_id: int) -> None:
+        try:
+            server = await run_db(account_server, account_db_id)
+            if server and self._due(server):
+                await self.refresh(self._pool, account_db_id, server)
+        except Exception as e:
+            logger.warning("symbol catalog refresh failed for account_db_id=%d: %s", account_db_id, e)
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+    async def start(self, pool) -> None:
+        if self._task is not None:
+            return
+        self._pool = pool
+
+        def load() -> None:
+            db = SessionLocal()
+            try:
+                self.load(db)
+            finally:
+                db.close()
+
+        await run_db(load)
+        queue = await pool.subscribe()
+        self._task = asyncio.create_task(self._run(queue))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        for task in [self._task, *self._refreshing]:
+            task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        try:
+            while True:
+                account_db_id, event = await queue.get()
+                if event.get("event") == "health" and (event.get("data") or {}).get("state") == "ready":
+                    # Off the queue loop: the RPC must not hold up other events.
+                    task = asyncio.create_task(self._refresh_account(account_db_id))
+                    self._refreshing.add(task)
+                    task.add_done_callback(self._refreshing.discard)
+        finally:
+            await self._pool.unsubscribe(queue)
+
+
+symbol_catalog = SymbolCatalog()
@@ -12,7 +12,11 @@ Returns a `ResolveResult` with the resolved name (or None), the confidence
 band (`exact`, `user_alias`, `suffix`, `fuzzy`, `not_found`), and a list of
 alternative candidates that the UI can show as a dropdown.
 
-The resolver is async because each step calls the worker pool.
+The resolver is async because each step calls the worker pool — unless the
+caller passes the account's broker `server` and that server's catalog is
+loaded (services/symbol_catalog.py): then every layer is a dict or index
+lookup, and the outcome of layers 2-4 is memoised per (server, requested)
+until the catalog changes.
 """
 from __future__ import annotations
 
@@ -23,6 +27,8 @@ from dataclasses import dataclass
 from difflib import SequenceMatcher
 from typing import Optional, Protocol
 
+from app.services.symbol_catalog import ServerCatalog, symbol_catalog
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,6 +94,44 @@ def serialize_aliases(d: dict[str, str]) -> str:
     return json.dumps(d, ensure_ascii=False)
 
 
+def _fold(name: str) -> str:
+    return name.upper().replace("/", "").replace("-", "")
+
+
+# Equivalent name → the name it is aggregated under (GOLD → XAUUSD).
+_CANONICAL: dict[str, str] = {}
+for _canon, _names in KNOWN_EQUIVALENTS.items():
+    if _fold(_canon) not in _CANONICAL:
+        for _name in _names:
+            _CANONICAL.setdefault(_fold(_name), _fold(_canon))
+
+_SEPARATED_SUFFIXES = sorted((s for s in KNOWN_SUFFIXES if s[0] in "._"), key=len, reverse=True)
+_BARE_SUFFIXES = ("mini", "m", "i", "r")
+
+
+def canonical_symbol(name: str) -> str:
+    """Broker-neutral name, for adding up one instrument across accounts.
+
+    Strips a dotted/underscore suffix (EURUSD.m, EURUSD_) or a lowercase
+    bare one (EURUSDm, EURUSDi — an uppercase trailing letter is part of
+    the name, as in EUR), then folds known equivalents (GOLD → XAUUSD).
+    """
+    s = name.strip()
+    lower = s.lower()
+    for suffix in _SEPARATED_SUFFIXES:
+        if len(s) > len(suffix) and lower.endswith(suffix):
+            s = s[: -len(suffix)]
+            break
+    else:
+        for suffix in _BARE_SUFFIXES:
+            stem = s[: -len(suffix)]
+            if s.endswith(suffix) and len(stem) >= 3 and stem.isupper():
+                s = stem
+                break
+    folded = _fold(s)
+    return _CANONICAL.get(folded, folded)
+
+
 def _generate_candidates(requested: str) -> list[str]:
     """Enumerate broker-variant candidates for the requested name."""
     out: list[str] = []
@@ -136,14 +180,41 @@ def _rank_fuzzy(requested: str, candidates: list[str]) -> list[tuple[str, float]
     return scored[:FUZZY_MAX_RETURN]
 
 
+def _resolve_in_catalog(catalog: ServerCatalog, requested: str, symbol_aliases: dict[str, str]) -> ResolveResult:
+    """The same layers as `resolve_symbol`, against the server's catalog."""
+    alias = symbol_aliases.get(requested) or symbol_aliases.get(requested.upper())
+    if alias and alias in catalog:
+        return ResolveResult(requested, alias, "user_alias", [alias])
+
+    memo = catalog.recall(requested)
+    if memo is None:
+        if requested in catalog:
+            memo = (requested, "exact", [requested])
+        else:
+            matched = [c for c in _generate_candidates(requested) if c in catalog]
+            if matched:
+                memo = (matched[0], "suffix", matched[:FUZZY_MAX_RETURN])
+            else:
+                ranked = _rank_fuzzy(requested, catalog.search(requested[:4], 200))
+                alternatives = [name for name, _ in ranked]
+                if ranked and ranked[0][1] >= FUZZY_THRESHOLD:
+                    memo = (ranked[0][0], "fuzzy", alternatives)
+                else:
+                    memo = (None, "not_found", alternatives)
+        catalog.remember(requested, memo)
+    resolved, confidence, alternatives = memo
+    return ResolveResult(requested, resolved, confidence, list(alternatives))
+
+
 # ── Public API ────────────────────────────────────────────────────────────────
 async def resolve_symbol(
     pool: WorkerPoolLike,
     account_db_id: int,
     requested: str,
     symbol_aliases: dict[str, str],
+    server: Optional[str] = None,
 ) -> ResolveResult:
-    """Resolve `requested` for the given account using the worker pool."""
+    """Resolve `requested` for the given account, from the server catalog when loaded."""
     requested = requested.strip()
     if not requested:
         return ResolveResult(requested, None, "not_found", [])
@@ -151,6 +222,10 @@ async def resolve_symbol(
     if not pool.is_active(account_db_id):
         return ResolveResult(requested, None, "not_found", [])
 
+    catalog = symbol_catalog.get(server)
+    if catalog is not None:
+        return _resolve_in_catalog(catalog, requested, symbol_aliases)
+
     # Layer 1: user alias
     alias = symbol_aliases.get(requested) or symbol_aliases.get(requested.upper())
     if alias and await _symbol_exists(pool, account_db_id, alias):
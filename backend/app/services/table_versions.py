@@ -0,0 +1,110 @@
+"""Per-table version counters, bumped after every committed write.
+
+Session hooks record which tables a transaction touched: flushed ORM
+objects (`after_flush`) and ORM-level bulk INSERT/UPDATE/DELETE statements
+(`do_orm_execute`). The counters for those tables are bumped in
+`after_commit`, i.e. only once the write is visible to other connections.
+A reader that snapshots the versions before querying can therefore tag
+what it built with them: if a commit lands in between, the versions have
+moved on and the result is never served as current.
+
+Writes that bypass the ORM session (a database restore swapping the file)
+call `bump_all()`. In-memory sources that feed responses (the live account
+state) bump their own pseudo-table names with `bump()`.
+
+`watch()` names a subset of a table's columns as a pseudo-table of its own,
+bumped only when a commit writes one of those columns: inserts and deletes
+always count, flushed ORM updates count by attribute history, bulk UPDATEs
+by primary key by their parameter keys. Any other UPDATE statement counts
+as writing every column.
+"""
+from __future__ import annotations
+
+import threading
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import ORMExecuteState, Session
+
+_INFO_KEY = "touched_tables"
+
+
+class TableVersions:
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self._epoch = 0
+        self._watches: dict[str, list[tuple[frozenset[str], str]]] = {}
+        self._lock = threading.Lock()
+
+    def watch(self, table: str, columns: Iterable[str], name: str) -> None:
+        """Bump `name` too whenever a commit writes one of `columns` of `table`."""
+        with self._lock:
+            self._watches.setdefault(table, []).append((frozenset(columns), name))
+
+    def watching(self, table: str, columns: Optional[Iterable[str]] = None) -> list[str]:
+        """Watch names hit by a write to `columns` of `table` (None: every column)."""
+        watches = self._watches.get(table)
+        if not watches:
+            return []
+        if columns is None:
+            return [name for _, name in watches]
+        written = set(columns)
+        return [name for cols, name in watches if cols & written]
+
+    def bump(self, tables: Iterable[str]) -> None:
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def bump_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+
+    def get(self, tables: Iterable[str]) -> tuple[int, ...]:
+        """(epoch, version of each table): changes whenever any of them was written."""
+        with self._lock:
+            return (self._epoch, *(self._versions.get(t, 0) for t in tables))
+
+
+table_versions = TableVersions()
+
+
+def _touched(session: Session) -> set[str]:
+    return session.info.setdefault(_INFO_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, _flush_context) -> None:
+    tables = _touched(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        state = inspect(obj)
+        columns = None
+        if obj in session.dirty:
+            columns = [attr.key for attr in state.attrs if attr.history.has_changes()]
+        for t in state.mapper.tables:
+            tables.add(t.name)
+            tables.update(table_versions.watching(t.name, columns))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_dml(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None and getattr(table, "name", None):
+            columns = None
+            if state.is_update and isinstance(state.parameters, list):
+                columns = {key for row in state.parameters for key in row}     # bulk UPDATE by primary key
+            _touched(state.session).update((table.name, *table_versions.watching(table.name, columns)))
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session: Session) -> None:
+    tables = session.info.pop(_INFO_KEY, None)
+    if tables:
+        table_versions.bump(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session: Session) -> None:
+    session.info.pop(_INFO_KEY, None)
@@ -0,0 +1,205 @@
+"""Filterable, keyset-paginated trade history and streaming export.
+
+Pages are ordered newest first on `(executed_at, id)` and continue from an
+opaque cursor holding the last row's key, so page N costs the same as page 1
+(no OFFSET scans). Filters map onto the composite indexes declared on
+`TradeRecord`.
+
+`iter_export` streams CSV or NDJSON row by row from its own session using
+`yield_per`, so exporting 100k trades never materialises the result set.
+
+Both also read trades moved to the cold archive: the hot query and each
+overlapping archive month are ordered the same way and merged on the key.
+"""
+from __future__ import annotations
+
+import base64
+import csv
+import heapq
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Query, Session
+
+from app.database import SessionLocal
+from app.models.trade_record import TradeRecord
+from app.services.cold_archive import cold_archive
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_FIELDS = (
+    "id", "account_login", "symbol", "direction", "lot_size", "entry_price",
+    "sl_price", "tp_price", "sl_pips", "tp_pips", "risk_pct", "risk_amount",
+    "reward_amount", "rr_ratio", "order_ticket", "success", "error_msg", "notes",
+    "tags", "close_price", "realized_pnl", "closed_at", "executed_at",
+)
+_EXPORT_CHUNK = 1000
+_CSV_FLUSH_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class TradeFilters:
+    account_ids: Optional[tuple[int, ...]] = None
+    symbol: Optional[str] = None
+    success: Optional[bool] = None
+    tag: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+def serialize_trade(t: TradeRecord) -> dict:
+    """API/export shape of a trade record (keys match EXPORT_FIELDS)."""
+    return {
+        "id": t.id,
+        "account_login": t.account_login,
+        "symbol": t.symbol,
+        "direction": t.direction,
+        "lot_size": t.lot_size,
+        "entry_price": t.entry_price,
+        "sl_price": t.sl_price,
+        "tp_price": t.tp_price,
+        "sl_pips": t.sl_pips,
+        "tp_pips": t.tp_pips,
+        "risk_pct": t.risk_pct,
+        "risk_amount": t.risk_amount,
+        "reward_amount": t.reward_amount,
+        "rr_ratio": t.rr_ratio,
+        "order_ticket": t.order_ticket,
+        "success": t.success,
+        "error_msg": t.error_msg,
+        "notes": t.notes,
+        "tags": t.tags,
+        "close_price": t.close_price,
+        "realized_pnl": t.realized_pnl,
+        "closed_at": t.closed_at.isoformat() if t.closed_at else None,
+        "executed_at": t.executed_at.isoformat() if t.executed_at else None,
+    }
+
+
+# ── Cursor ────────────────────────────────────────────────────────────────────
+def encode_cursor(executed_at: datetime, trade_id: int) -> str:
+    raw = f"{executed_at.isoformat()}|{trade_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, trade_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(ts), int(trade_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+# ── Stored format ─────────────────────────────────────────────────────────────
+def normalize_legacy_timestamps(conn: Connection | Session) -> int:
+    """Rewrite `executed_at` values stored by CURRENT_TIMESTAMP to SQLAlchemy's format.
+
+    SQLite compares TIMESTAMP values as text, and 'YYYY-MM-DD HH:MM:SS' sorts
+    before 'YYYY-MM-DD HH:MM:SS.000000' for the same instant, so a keyset
+    bound rendered by SQLAlchemy would keep returning the legacy row. Run from
+    the startup migration; a no-op once every row carries microseconds.
+    """
+    return conn.execute(text(
+        "UPDATE trade_records SET executed_at = executed_at || '.000000' "
+        "WHERE length(executed_at) = 19"
+    )).rowcount
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+def apply_filters(query: Query, f: TradeFilters) -> Query:
+    if f.account_ids:
+        query = query.filter(TradeRecord.account_db_id.in_(f.account_ids))
+    if f.symbol:
+        query = query.filter(TradeRecord.symbol == f.symbol.upper())
+    if f.success is not None:
+        query = query.filter(TradeRecord.success.is_(f.success))
+    if f.tag:
+        # tags is a comma list ("scalp, news"); match whole tags only.
+        normalized = "," + func.replace(func.lower(TradeRecord.tags), " ", "") + ","
+        query = query.filter(normalized.like(f"%,{f.tag.strip().lower()},%"))
+    if f.date_from:
+        query = query.filter(TradeRecord.executed_at >= f.date_from)
+    if f.date_to:
+        query = query.filter(TradeRecord.executed_at < f.date_to)
+    return query
+
+
+def _ordered(query: Query) -> Query:
+    return query.filter(TradeRecord.executed_at.isnot(None)).order_by(
+        TradeRecord.executed_at.desc(), TradeRecord.id.desc(),
+    )
+
+
+def _sort_key(t: TradeRecord) -> tuple[datetime, int]:
+    return t.executed_at, t.id
+
+
+def page(db: Session, f: TradeFilters, *, cursor: Optional[str] = None, limit: int = 200) -> tuple[list[TradeRecord], Optional[str]]:
+    """One page of trades (newest first) and the cursor for the next page, if any."""
+    after = decode_cursor(cursor) if cursor else None
+
+    def fetch(session: Session) -> list[TradeRecord]:
+        query = apply_filters(session.query(TradeRecord), f)
+        if after:
+            ts, trade_id = after
+            query = query.filter(or_(
+                TradeRecord.executed_at < ts,
+                and_(TradeRecord.executed_at == ts, TradeRecord.id < trade_id),
+            ))
+        return _ordered(query).limit(limit + 1).all()
+
+    rows = fetch(db)
+    end = f.date_to
+    if after and (end is None or after[0] < end):
+        end = after[0] + timedelta(microseconds=1)
+    with cold_archive.sessions(TradeRecord.__tablename__, f.date_from, end) as archived:
+        for month, session in archived:
+            # Months are newest first; stop once a full page is newer than this one.
+            if len(rows) > limit and cold_archive.last_at(TradeRecord.__tablename__, month) < rows[limit].executed_at:
+                break
+            rows = sorted(rows + fetch(session), key=_sort_key, reverse=True)[: limit + 1]
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].executed_at, rows[-1].id)
+
+
+def iter_export(f: TradeFilters, fmt: str) -> Iterator[str]:
+    """Yield the export body chunk by chunk. Sync generator: Starlette runs it in a thread."""
+    db = SessionLocal()
+    try:
+        with cold_archive.sessions(TradeRecord.__tablename__, f.date_from, f.date_to) as archived:
+            streams = [
+                _ordered(apply_filters(s.query(TradeRecord), f)).yield_per(_EXPORT_CHUNK)
+                for s in [db] + [session for _, session in archived]
+            ]
+            rows = heapq.merge(*streams, key=_sort_key, reverse=True)
+            yield from _render(rows, fmt)
+    finally:
+        db.close()
+
+
+def _render(rows: Iterator[TradeRecord], fmt: str) -> Iterator[str]:
+    if fmt == "ndjson":
+        for t in rows:
+            yield json.dumps(serialize_trade(t)) + "\n"
+        return
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for t in rows:
+        writer.writerow(serialize_trade(t))
+        if buf.tell() > _CSV_FLUSH_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
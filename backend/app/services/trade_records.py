@@ -0,0 +1,88 @@
+"""Trade record persistence shared by the v1 and v2 trading routes.
+
+Records go through the single DB writer, so the records of a batch trade
+that finish within a few milliseconds of each other land in one commit.
+Each write also folds the trade into its `daily_account_stats` day.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.accounts import Account
+from app.models.trade_record import TradeRecord
+from app.services import daily_stats
+from app.services.db_writer import db_writer
+from app.services.execution_timings import StageTimer, record_timings
+
+logger = logging.getLogger(__name__)
+
+
+def trade_record_row(
+    account: Account,
+    symbol: str,
+    direction: str,
+    calc: Optional[dict],
+    success: bool,
+    order_ticket: Any = None,
+    error_msg: Optional[str] = None,
+) -> dict[str, Any]:
+    calc = calc or {}
+    return {
+        "account_db_id": account.id,
+        "account_login": account.account_id,
+        "symbol": symbol,
+        "direction": direction,
+        "lot_size": calc.get("lot_size", 0),
+        "entry_price": calc.get("entry_price"),
+        "sl_price": calc.get("sl_price"),
+        "tp_price": calc.get("tp_price"),
+        "sl_pips": calc.get("sl_pips"),
+        "tp_pips": calc.get("tp_pips"),
+        "risk_pct": calc.get("risk_pct"),
+        "risk_amount": calc.get("risk_amount"),
+        "reward_amount": calc.get("reward_amount"),
+        "rr_ratio": calc.get("rr_ratio"),
+        "order_ticket": order_ticket,
+        "success": success,
+        "error_msg": error_msg,
+        "executed_at": datetime.utcnow(),
+    }
+
+
+def record_trades(session: Session, rows: list[dict[str, Any]]) -> None:
+    """Writer intent: insert trade rows and update their journal days."""
+    session.execute(TradeRecord.__table__.insert(), rows)
+    daily_stats.apply_trades(session, rows)
+
+
+def record_timed_trade(session: Session, row: dict[str, Any], timer: StageTimer, server: Optional[str]) -> None:
+    """Writer intent: one trade row plus its `execution_timings` row."""
+    trade_id = session.execute(TradeRecord.__table__.insert(), row).inserted_primary_key[0]
+    daily_stats.apply_trades(session, [row])
+    record_timings(session, [timer.row(trade_id, row["account_db_id"], server)])
+
+
+async def save_trade_record(
+    account: Account,
+    symbol: str,
+    direction: str,
+    calc: Optional[dict],
+    success: bool,
+    order_ticket: Any = None,
+    error_msg: Optional[str] = None,
+    timer: Optional[StageTimer] = None,
+) -> None:
+    """Persist a trade record (and its stage timings). Failures are logged, never raised to the trade path."""
+    row = trade_record_row(account, symbol, direction, calc, success, order_ticket, error_msg)
+    try:
+        if timer is None:
+            await db_writer.run(lambda session: record_trades(session, [row]))
+        else:
+            timer.saving()
+            await db_writer.run(lambda session: record_timed_trade(session, row, timer, account.server))
+    except Exception as e:
+        logger.warning("Failed to save trade record for %s: %s", account.account_id, e)
@@ -0,0 +1,376 @@
+"""Performance statistics of closed trades (`trade_stats`).
+
+Each closed trade belongs to one group per dimension: `all`, its `symbol`,
+each of its `tag`s, and the `weekday` / `hour` (UTC) it was opened. A group
+row holds running sums, counts and extremes only, so:
+
+  - `apply_closed` folds trades that just got their realized P&L into their
+    groups with O(1) work each, on the db-writer next to `daily_stats`.
+    Streaks and drawdown depend on close order; a close older than a
+    group's last one marks the group stale instead, and `recompute` rebuilds
+    it from its trades.
+  - `compute` is the NumPy path over the realized-P&L arrays of many trades.
+    `rebuild_trade_stats` uses it to rebuild the table once per version,
+    `recompute` to refresh single groups (late closes, retagged trades).
+  - `group_stats` derives win rate, expectancy, profit factor, average R,
+    streaks, drawdown and a per-trade Sharpe-like ratio from the rows.
+
+Archived trades are read from the cold archive, so rebuilds see them too.
+"""
+from __future__ import annotations
+
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+from sqlalchemy import func, insert, null
+from sqlalchemy.orm import Session
+
+from app.models.equity_rollup import EquityRollup
+from app.models.trade_record import TradeRecord
+from app.models.trade_stats import TradeStats
+from app.services.cold_archive import cold_archive
+from app.services.settings import KEY_TRADE_STATS_REBUILT, read_marker, write_marker
+
+logger = logging.getLogger(__name__)
+
+# Bump to make the next startup recompute every group (e.g. a new aggregate).
+TRADE_STATS_VERSION = "1"
+
+DIMENSIONS = ("all", "symbol", "tag", "weekday", "hour")
+
+_AGGREGATES = (
+    "closed_count", "win_count", "loss_count", "pnl_sum", "pnl_sq_sum", "gross_profit", "gross_loss",
+    "largest_win", "largest_loss", "r_sum", "r_count", "streak", "max_win_streak", "max_loss_streak",
+    "cum_pnl", "peak_pnl", "max_drawdown",
+)
+
+
+def tag_keys(tags: Optional[str]) -> list[str]:
+    """Normalised tags, matching how the trade-history tag filter compares them."""
+    return list(dict.fromkeys(t for t in (tags or "").replace(" ", "").lower().split(",") if t))
+
+
+def group_keys(symbol: str, tags: Optional[str], executed_at: datetime) -> list[tuple[str, str]]:
+    return [
+        ("all", ""),
+        ("symbol", symbol),
+        *(("tag", t) for t in tag_keys(tags)),
+        ("weekday", str(executed_at.weekday())),
+        ("hour", f"{executed_at.hour:02d}"),
+    ]
+
+
+# ── Incremental ───────────────────────────────────────────────────────────────
+class _Groups:
+    """Row cache for one batch so repeated groups hit the DB once."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self._rows: dict[tuple[int, str, str], TradeStats] = {}
+
+    def get(self, account_db_id: int, dimension: str, key: str) -> TradeStats:
+        k = (account_db_id, dimension, key)
+        row = self._rows.get(k)
+        if row is None:
+            row = (
+                self.session.query(TradeStats)
+                .filter(
+                    TradeStats.account_db_id == account_db_id,
+                    TradeStats.dimension == dimension,
+                    TradeStats.key == key,
+                )
+                .first()
+            )
+            if row is None:
+                row = TradeStats(account_db_id=account_db_id, dimension=dimension, key=key,
+                                 **{c: 0 for c in _AGGREGATES})
+                self.session.add(row)
+            self._rows[k] = row
+        return row
+
+
+def _fold(st: TradeStats, pnl: float, risk: Optional[float], closed_at: datetime) -> None:
+    st.closed_count += 1
+    st.pnl_sum += pnl
+    st.pnl_sq_sum += pnl * pnl
+    if pnl > 0:
+        st.win_count += 1
+        st.gross_profit += pnl
+        st.largest_win = max(st.largest_win, pnl)
+        st.streak = st.streak + 1 if st.streak > 0 else 1
+        st.max_win_streak = max(st.max_win_streak, st.streak)
+    elif pnl < 0:
+        st.loss_count += 1
+        st.gross_loss += pnl
+        st.largest_loss = min(st.largest_loss, pnl)
+        st.streak = st.streak - 1 if st.streak < 0 else -1
+        st.max_loss_streak = max(st.max_loss_streak, -st.streak)
+    else:
+        st.streak = 0
+    if risk and risk > 0:
+        st.r_sum += pnl / risk
+        st.r_count += 1
+    st.cum_pnl += pnl
+    st.peak_pnl = max(st.peak_pnl, st.cum_pnl)
+    st.max_drawdown = max(st.max_drawdown, st.peak_pnl - st.cum_pnl)
+    st.last_closed_at = closed_at
+
+
+def apply_closed(session: Session, trades: Iterable[dict[str, Any]]) -> None:
+    """Fold trades that just got their realized P&L into their groups.
+
+    Each trade needs `account_db_id`, `symbol`, `tags`, `risk_amount`,
+    `executed_at`, `closed_at` and `realized_pnl`, already written.
+    """
+    groups = _Groups(session)
+    stale: dict[int, set[tuple[str, str]]] = defaultdict(set)
+    for t in sorted(trades, key=lambda t: t["closed_at"] or t["executed_at"]):
+        account_db_id = t["account_db_id"]
+        closed_at = t["closed_at"] or t["executed_at"]
+        for dimension, key in group_keys(t["symbol"], t["tags"], t["executed_at"]):
+            if (dimension, key) in stale[account_db_id]:
+                continue
+            st = groups.get(account_db_id, dimension, key)
+            if st.last_closed_at is not None and closed_at < st.last_closed_at:
+                stale[account_db_id].add((dimension, key))
+                continue
+            _fold(st, t["realized_pnl"], t["risk_amount"], closed_at)
+    session.flush()
+    for account_db_id, keys in stale.items():
+        if keys:
+            recompute(session, account_db_id, keys)
+
+
+# ── Vectorised ────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class ClosedTrades:
+    """Closed trades as column arrays, in close order."""
+    account: np.ndarray      # int64
+    pnl: np.ndarray          # float64
+    risk: np.ndarray         # float64, NaN = no risk amount
+    symbol: np.ndarray       # str
+    tags: list[list[str]]
+    executed: np.ndarray     # datetime64[s]
+    closed: np.ndarray       # datetime64[s]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Any]) -> "ClosedTrades":
+        rows = sorted({r.id: r for r in rows}.values(), key=lambda r: (r.closed_at or r.executed_at, r.id))
+        return cls(
+            account=np.array([r.account_db_id for r in rows], dtype=np.int64),
+            pnl=np.array([r.realized_pnl for r in rows], dtype=np.float64),
+            risk=np.array([np.nan if r.risk_amount is None else r.risk_amount for r in rows], dtype=np.float64),
+            symbol=np.array([r.symbol for r in rows], dtype=str),
+            tags=[tag_keys(r.tags) for r in rows],
+            executed=np.array([r.executed_at for r in rows], dtype="datetime64[s]"),
+            closed=np.array([r.closed_at or r.executed_at for r in rows], dtype="datetime64[s]"),
+        )
+
+
+def _closed_query(session: Session, account_db_id: Optional[int]):
+    q = session.query(
+        TradeRecord.id, TradeRecord.account_db_id, TradeRecord.symbol, TradeRecord.tags,
+        TradeRecord.risk_amount, TradeRecord.realized_pnl, TradeRecord.executed_at, TradeRecord.closed_at,
+    ).filter(TradeRecord.realized_pnl.isnot(None), TradeRecord.executed_at.isnot(None))
+    if account_db_id is not None:
+        q = q.filter(TradeRecord.account_db_id == account_db_id)
+    return q.all()
+
+
+def load_closed(session: Session, account_db_id: Optional[int] = None) -> ClosedTrades:
+    """Closed trades from the hot table and every cold-archive month."""
+    rows = _closed_query(session, account_db_id)
+    with cold_archive.sessions(TradeRecord.__tablename__) as archived:
+        for _, s in archived:
+            rows.extend(_closed_query(s, account_db_id))
+    return ClosedTrades.from_rows(rows)
+
+
+def aggregate(pnl: np.ndarray, risk: np.ndarray) -> dict[str, Any]:
+    """The `_AGGREGATES` of one group's P&L sequence (close order), as `_fold` would leave them."""
+    wins, losses = pnl > 0, pnl < 0
+    cum = np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.maximum(cum, 0.0))
+    sign = np.sign(pnl).astype(np.int8)
+    starts = np.flatnonzero(np.r_[True, sign[1:] != sign[:-1]])
+    lengths = np.diff(np.r_[starts, len(sign)])
+    kinds = sign[starts]
+    has_r = risk > 0   # False for NaN
+    return {
+        "closed_count": len(pnl),
+        "win_count": int(wins.sum()),
+        "loss_count": int(losses.sum()),
+        "pnl_sum": float(pnl.sum()),
+        "pnl_sq_sum": float(pnl @ pnl),
+        "gross_profit": float(pnl[wins].sum()),
+        "gross_loss": float(pnl[losses].sum()),
+        "largest_win": float(pnl.max(initial=0.0)),
+        "largest_loss": float(pnl.min(initial=0.0)),
+        "r_sum": float((pnl[has_r] / risk[has_r]).sum()),
+        "r_count": int(has_r.sum()),
+        "streak": int(lengths[-1] * kinds[-1]),
+        "max_win_streak": int(lengths[kinds > 0].max(initial=0)),
+        "max_loss_streak": int(lengths[kinds < 0].max(initial=0)),
+        "cum_pnl": float(cum[-1]),
+        "peak_pnl": float(peak[-1]),
+        "max_drawdown": float((peak - cum).max()),
+    }
+
+
+def _memberships(c: ClosedTrades) -> Iterator[tuple[str, np.ndarray, np.ndarray]]:
+    """(dimension, group key per membership, trade index per membership)."""
+    rows = np.arange(len(c.pnl))
+    yield "all", np.full(len(rows), "", dtype=str), rows
+    yield "symbol", c.symbol, rows
+    tag_rows = [i for i, tags in enumerate(c.tags) for _ in tags]
+    yield "tag", np.array([t for tags in c.tags for t in tags], dtype=str), np.array(tag_rows, dtype=np.int64)
+    days = c.executed.astype("datetime64[D]").astype(np.int64)
+    yield "weekday", ((days + 3) % 7).astype(str), rows       # 1970-01-01 was a Thursday
+    hours = c.executed.astype("datetime64[h]").astype(np.int64) % 24
+    yield "hour", np.char.zfill(hours.astype(str), 2), rows
+
+
+def compute(
+    c: ClosedTrades, only: Optional[set[tuple[str, str]]] = None,
+) -> Iterator[tuple[int, str, str, dict[str, Any]]]:
+    """(account, dimension, key, column values) for every group (or the `only` ones)."""
+    for dimension, keys, rows in _memberships(c):
+        if not len(rows):
+            continue
+        accounts = c.account[rows]
+        order = np.lexsort((rows, keys, accounts))
+        accounts, keys, rows = accounts[order], keys[order], rows[order]
+        bounds = np.r_[0, np.flatnonzero((accounts[1:] != accounts[:-1]) | (keys[1:] != keys[:-1])) + 1, len(rows)]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            key = str(keys[start])
+            if only is not None and (dimension, key) not in only:
+                continue
+            idx = rows[start:end]
+            values = aggregate(c.pnl[idx], c.risk[idx])
+            values["last_closed_at"] = c.closed[idx[-1]].item()
+            yield int(accounts[start]), dimension, key, values
+
+
+def recompute(session: Session, account_db_id: int, keys: Optional[set[tuple[str, str]]] = None) -> None:
+    """Rebuild one account's groups (all, or the given (dimension, key) ones) from its trades."""
+    session.flush()
+    computed = {
+        (dimension, key): values
+        for _, dimension, key, values in compute(load_closed(session, account_db_id), keys)
+    }
+    existing = {
+        (r.dimension, r.key): r
+        for r in session.query(TradeStats).filter(TradeStats.account_db_id == account_db_id)
+    }
+    for k in (keys if keys is not None else set(existing) | set(computed)):
+        values, row = computed.get(k), existing.get(k)
+        if values is None:
+            if row is not None:
+                session.delete(row)
+            continue
+        if row is None:
+            row = TradeStats(account_db_id=account_db_id, dimension=k[0], key=k[1])
+            session.add(row)
+        for column, value in values.items():
+            setattr(row, column, value)
+    session.flush()
+
+
+def rebuild_trade_stats(session: Session) -> int:
+    """Recompute the table from closed trades, once per `TRADE_STATS_VERSION`.
+    Does not commit.
+
+    Groups that live closes folded in before this ran are replaced; the
+    version marker is committed with the rebuild.
+    """
+    if read_marker(session, KEY_TRADE_STATS_REBUILT) == TRADE_STATS_VERSION:
+        return 0
+    session.query(TradeStats).delete(synchronize_session=False)
+    rows = [
+        {"account_db_id": account_db_id, "dimension": dimension, "key": key, **values}
+        for account_db_id, dimension, key, values in compute(load_closed(session))
+    ]
+    if rows:
+        session.execute(insert(TradeStats), rows)
+        logger.info("Rebuilt %d trade stats groups", len(rows))
+    write_marker(session, KEY_TRADE_STATS_REBUILT, TRADE_STATS_VERSION)
+    return len(rows)
+
+
+# ── Read side ─────────────────────────────────────────────────────────────────
+def _metrics(
+    key: str, n: int, wins: int, losses: int, pnl_sum: float, pnl_sq_sum: float,
+    gross_profit: float, gross_loss: float, largest_win: float, largest_loss: float,
+    r_sum: float, r_count: int, streak: Optional[int], max_win_streak: int, max_loss_streak: int,
+    max_drawdown: float,
+) -> dict[str, Any]:
+    mean = pnl_sum / n
+    variance = (pnl_sq_sum - pnl_sum * pnl_sum / n) / (n - 1) if n > 1 else 0.0
+    std = math.sqrt(variance) if variance > 0 else 0.0
+    return {
+        "key": key,
+        "closed": n,
+        "wins": wins,
+        "losses": losses,
+        "win_rate": round(wins / n * 100, 2),
+        "net_pnl": round(pnl_sum, 2),
+        "expectancy": round(mean, 2),
+        "avg_win": round(gross_profit / wins, 2) if wins else None,
+        "avg_loss": round(gross_loss / losses, 2) if losses else None,
+        "profit_factor": round(gross_profit / -gross_loss, 2) if gross_loss else None,
+        "avg_r": round(r_sum / r_count, 2) if r_count else None,
+        "largest_win": round(largest_win, 2),
+        "largest_loss": round(largest_loss, 2),
+        "current_streak": streak,
+        "max_win_streak": max_win_streak,
+        "max_loss_streak": max_loss_streak,
+        "max_drawdown": round(max_drawdown, 2),
+        "sharpe": round(mean / std, 3) if std else None,
+    }
+
+
+def group_stats(db: Session, dimension: str, account_id: Optional[int] = None) -> list[dict[str, Any]]:
+    """Statistics per group of `dimension`, ordered by key.
+
+    Without `account_id` the sums are combined across accounts; streaks and
+    drawdown are then the worst single account's, and there is no current
+    streak.
+    """
+    s = TradeStats
+    q = db.query(
+        s.key,
+        func.sum(s.closed_count), func.sum(s.win_count), func.sum(s.loss_count),
+        func.sum(s.pnl_sum), func.sum(s.pnl_sq_sum), func.sum(s.gross_profit), func.sum(s.gross_loss),
+        func.max(s.largest_win), func.min(s.largest_loss), func.sum(s.r_sum), func.sum(s.r_count),
+        func.max(s.streak) if account_id is not None else null(),
+        func.max(s.max_win_streak), func.max(s.max_loss_streak), func.max(s.max_drawdown),
+    ).filter(s.dimension == dimension, s.closed_count > 0)
+    if account_id is not None:
+        q = q.filter(s.account_db_id == account_id)
+    return [_metrics(*row) for row in q.group_by(s.key).order_by(s.key).all()]
+
+
+def equity_drawdown(db: Session, account_id: int) -> Optional[dict[str, Any]]:
+    """Largest peak-to-trough equity drop of an account, from its daily rollups."""
+    rows = (
+        db.query(EquityRollup.open_equity, EquityRollup.high_equity, EquityRollup.low_equity)
+        .filter(EquityRollup.account_db_id == account_id, EquityRollup.resolution == "1d")
+        .order_by(EquityRollup.bucket_start)
+        .all()
+    )
+    if not rows:
+        return None
+    opens, highs, lows = (np.array(col, dtype=np.float64) for col in zip(*rows))
+    # Intraday order is unknown: a day's low is measured from the peak before it, plus its own open.
+    peak = np.maximum(np.maximum.accumulate(np.r_[opens[0], highs[:-1]]), opens)
+    drop = peak - lows
+    i = int(drop.argmax())
+    return {
+        "max_drawdown": round(float(drop[i]), 2),
+        "max_drawdown_pct": round(float(drop[i] / peak[i] * 100), 2) if peak[i] > 0 else None,
+    }
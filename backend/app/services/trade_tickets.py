@@ -0,0 +1,85 @@
+"""Short-lived prepared trade tickets (`/api/trading/v2/prepare` → `/execute`).
+
+`prepare` does all the work that does not need the final click: per account
+it resolves the broker symbol, fetches spec, filling mode and quote, sizes
+the order and runs the fund-rule gate and exposure check. The result is
+kept here for `TRADE_TICKET_TTL_SECONDS` under a random id.
+
+`execute` takes the ticket — once: a second click finds nothing and never
+sends a duplicate order — and sends one `place_market_order` per account.
+The worker re-checks only price drift against the prepared entry and the
+margin for the prepared volume, both from its local terminal state, so the
+click costs one order round trip.
+
+Rule results are kept unless the gate's inputs were written since prepare
+(another order, a daily equity reset, a phase change); then the DB-only gate
+runs again before anything is sent. Those inputs are `trade_records` and the
+`GATE_ACCOUNT_COLUMNS` of `accounts`, watched as the `account_rules`
+pseudo-table: the live-state write-through of balance/equity/profit every
+few seconds does not touch them.
+"""
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app.config import TRADE_TICKET_TTL_SECONDS
+from app.services.table_versions import table_versions
+
+GATE_ACCOUNT_COLUMNS = (
+    "account_type", "fund_program_id", "current_phase", "starting_balance",
+    "daily_open_equity", "daily_open_date", "peak_eod_balance",
+)
+table_versions.watch("accounts", GATE_ACCOUNT_COLUMNS, "account_rules")
+
+GATE_TABLES = ("account_rules", "trade_records")
+
+
+@dataclass
+class TradeTicket:
+    symbol: str
+    direction: str
+    legs: list[dict[str, Any]]
+    exposure_warnings: list[str]
+    versions: tuple[int, ...] = field(default_factory=lambda: table_versions.get(GATE_TABLES))
+    id: str = field(default_factory=lambda: secrets.token_urlsafe(12))
+    expires_at: float = 0.0
+
+    def rules_stale(self) -> bool:
+        return table_versions.get(GATE_TABLES) != self.versions
+
+
+class TicketStore:
+    def __init__(self, ttl: float = TRADE_TICKET_TTL_SECONDS) -> None:
+        self.ttl = ttl
+        self._tickets: dict[str, TradeTicket] = {}
+        self._lock = threading.Lock()
+
+    def put(self, ticket: TradeTicket) -> TradeTicket:
+        now = time.monotonic()
+        ticket.expires_at = now + self.ttl
+        with self._lock:
+            self._purge(now)
+            self._tickets[ticket.id] = ticket
+        return ticket
+
+    def take(self, ticket_id: str) -> Optional[TradeTicket]:
+        """Remove and return the ticket; None when unknown, used or expired."""
+        with self._lock:
+            ticket = self._tickets.pop(ticket_id, None)
+        if ticket is None or ticket.expires_at < time.monotonic():
+            return None
+        return ticket
+
+    def _purge(self, now: float) -> None:
+        for tid in [tid for tid, t in self._tickets.items() if t.expires_at < now]:
+            del self._tickets[tid]
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+
+trade_tickets = TicketStore()
@@ -206,6 +206,12 @@ class WorkerPool:
             if h.process.returncode is None
         }
 
+    def free_slots(self) -> int | None:
+        """How many more workers may be spawned right now (None = unlimited)."""
+        if self._max_workers is None:
+            return None
+        return max(0, self._max_workers - len(self.active_account_ids()))
+
     def is_active(self, account_db_id: int) -> bool:
         h = self._workers.get(account_db_id)
         return h is not None and h.process.returncode is None
@@ -224,6 +230,10 @@ class WorkerPool:
             except ValueError:
                 pass
 
+    async def publish(self, account_db_id: int, event: dict) -> None:
+        """Fan an event derived in the master (e.g. exposure) out like a worker event."""
+        await self._fanout_event(account_db_id, event)
+
     async def shutdown_all(self) -> None:
         ids = list(self._workers.keys())
         await asyncio.gather(*(self.kill(aid) for aid in ids), return_exceptions=True)
@@ -7,11 +7,22 @@ executor serializes them while keeping the asyncio event loop responsive.
 
 DB calls can use `run_db` which has a slightly larger pool (SQLite with
 check_same_thread=False is fine across threads).
+
+Route handlers never touch a Session on the event loop:
+
+  - handlers that only do DB work are plain `def` — FastAPI runs them in
+    its threadpool;
+  - `async def` handlers that also await workers/MT5 take an `AsyncDB`
+    (`Depends(get_async_db)`) and do every DB step via `await adb.run(fn)`.
 """
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial
-from typing import Any, Callable, TypeVar
+from typing import Any, AsyncIterator, Callable, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
 
 T = TypeVar("T")
 
@@ -29,3 +40,34 @@ async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
     """Run a synchronous DB call off the event loop on the DB thread pool."""
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(_db_executor, partial(fn, *args, **kwargs))
+
+
+class AsyncDB:
+    """Executor-backed async facade over one request's Session.
+
+    `run(fn, *args)` calls `fn(session, *args)` on the DB pool. Calls are
+    serialised with a lock because a Session is not thread-safe, which also
+    makes it safe to share between coroutines gathered by one request.
+    The session does not expire objects on commit, so ORM instances returned
+    by `run` can be read on the event loop without a lazy reload.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self._lock = asyncio.Lock()
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        async with self._lock:
+            return await run_db(fn, self.session, *args, **kwargs)
+
+    async def close(self) -> None:
+        await run_db(self.session.close)
+
+
+async def get_async_db() -> AsyncIterator[AsyncDB]:
+    """FastAPI dependency: the async counterpart of `get_db`."""
+    adb = AsyncDB(SessionLocal(expire_on_commit=False))
+    try:
+        yield adb
+    finally:
+        await adb.close()
@@ -10,7 +10,10 @@ Lifecycle:
 1. Boot: read account from SQLite, decrypt password, auto-launch terminal,
    init MT5 with backoff, log in, verify connection.
 2. Main loop: read RPC requests, dispatch to handlers, write responses.
-3. Tick thread: every 1s emit a `tick` event with account_info + positions.
+3. Tick thread: every 1s emit a `tick` event with account_info + positions,
+   then evaluate the account's position rules (trailing / break-even /
+   scale-out) against one quote per symbol. Rules live in `position_rules`
+   and are reloaded at boot, so a respawned worker keeps managing trades.
 4. Watchdog thread: every 5s check connection; on drop, reconnect + emit
    `health` events.
 5. Shutdown on `shutdown` RPC, SIGTERM, or stdin EOF.
@@ -20,6 +23,7 @@ reads events. The worker has no global state shared with the master.
 """
 from __future__ import annotations
 
+import json
 import logging
 import os
 import signal
@@ -41,6 +45,7 @@ from app.services.mt5_provider import mt5  # noqa: E402
 
 from app.database import SessionLocal  # noqa: E402
 from app.models.accounts import Account  # noqa: E402
+from app.models.position_rule import PositionRule  # noqa: E402
 from app.services.encryption import decrypt_password  # noqa: E402
 from app.workers import protocol as p  # noqa: E402
 from app.workers.mt5_health import (  # noqa: E402
@@ -49,7 +54,14 @@ from app.workers.mt5_health import (  # noqa: E402
     launch_terminal_if_needed,
     verify_login_connected,
 )
+from app.services import bulk_positions  # noqa: E402
 from app.services.stealth import apply_stealth  # noqa: E402
+from app.workers.position_rules import (  # noqa: E402
+    ACTION_MODIFY,
+    Rule,
+    RuleEngine,
+    validate_params,
+)
 
 # ── Logging to stderr (stdout is reserved for the protocol) ──────────────────
 logging.basicConfig(
@@ -64,6 +76,9 @@ logger = logging.getLogger(__name__)
 _account: Account | None = None
 _stop_event = threading.Event()
 _stdout_lock = threading.Lock()
+_rule_engine = RuleEngine()
+_rules_lock = threading.Lock()
+_symbol_specs: dict[str, dict[str, Any]] = {}
 
 
 def _emit(line: str) -> None:
@@ -135,9 +150,51 @@ def _bootstrap(account_db_id: int) -> None:
     if not _do_login_and_verify():
         raise SystemExit("MT5 login failed or connection unverified")
 
+    _load_position_rules(account_db_id)
+
     logger.info("Worker ready for account_db_id=%d", account_db_id)
 
 
+# ── Position rule persistence ────────────────────────────────────────────────
+def _load_position_rules(account_db_id: int) -> None:
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(PositionRule)
+            .filter(PositionRule.account_db_id == account_db_id, PositionRule.active.is_(True))
+            .all()
+        )
+        rules = [
+            Rule(id=r.id, ticket=r.ticket, kind=r.kind, params=json.loads(r.params), state=json.loads(r.state or "{}"))
+            for r in rows
+        ]
+    finally:
+        db.close()
+    with _rules_lock:
+        _rule_engine.load(rules)
+    if rules:
+        logger.info("Restored %d position rule(s)", len(rules))
+
+
+def _persist_rule_states(rules: list[Rule], *, deactivate: bool = False) -> None:
+    """Write rule state (and optionally active=False) back to SQLite in one commit."""
+    if not rules:
+        return
+    db = SessionLocal()
+    try:
+        by_id = {r.id: r for r in rules}
+        for row in db.query(PositionRule).filter(PositionRule.id.in_(list(by_id))).all():
+            row.state = json.dumps(by_id[row.id].state)
+            if deactivate:
+                row.active = False
+        db.commit()
+    except Exception as e:
+        logger.warning("failed to persist position rule state: %s", e)
+        db.rollback()
+    finally:
+        db.close()
+
+
 # ── RPC handlers ──────────────────────────────────────────────────────────────
 def _handle_ping(_params: dict[str, Any]) -> str:
     return "pong"
@@ -161,9 +218,14 @@ def _handle_get_account_info(_params: dict[str, Any]) -> dict[str, Any] | None:
 
 
 def _handle_get_positions(_params: dict[str, Any]) -> list[dict[str, Any]]:
+    return _positions() or []
+
+
+def _positions() -> list[dict[str, Any]] | None:
+    """Open positions, or None when the terminal could not say (e.g. disconnected)."""
     positions = mt5.positions_get()
     if positions is None:
-        return []
+        return None
     from datetime import datetime as _dt
 
     return [
@@ -173,9 +235,13 @@ def _handle_get_positions(_params: dict[str, Any]) -> list[dict[str, Any]]:
             "type": "BUY" if pos.type == mt5.ORDER_TYPE_BUY else "SELL",
             "volume": pos.volume,
             "price_open": pos.price_open,
+            "price_current": pos.price_current,
             "sl": pos.sl,
             "tp": pos.tp,
             "profit": pos.profit,
+            "contract_size": _symbol_spec(pos.symbol).get("contract_size"),
+            "magic": pos.magic,
+            "comment": pos.comment,
             "time": _dt.fromtimestamp(pos.time).isoformat(),
         }
         for pos in positions
@@ -200,6 +266,34 @@ def _handle_symbols_search(params: dict[str, Any]) -> list[str]:
     return [s.name for s in syms[:limit]]
 
 
+def _handle_symbol_catalog(params: dict[str, Any]) -> dict[str, Any]:
+    """Every symbol with its spec, or just the hash when it equals `known_hash`.
+
+    One local `symbols_get`; the master keeps the result per broker server
+    (see services/symbol_catalog.py).
+    """
+    syms = mt5.symbols_get() or ()
+    entries = [
+        {
+            "name": info.name,
+            "description": info.description,
+            "path": info.path,
+            "digits": info.digits,
+            "point": info.point,
+            "contract_size": info.trade_contract_size,
+            "volume_min": info.volume_min,
+            "volume_max": info.volume_max,
+            "volume_step": info.volume_step,
+            "filling": _filling_for(info),
+        }
+        for info in syms
+    ]
+    digest = p.catalog_hash(entries)
+    if digest == params.get("known_hash"):
+        return {"hash": digest, "unchanged": True}
+    return {"hash": digest, "symbols": entries}
+
+
 def _handle_get_symbol_info(params: dict[str, Any]) -> dict[str, Any] | None:
     symbol = params.get("symbol")
     if not symbol:
@@ -215,6 +309,7 @@ def _handle_get_symbol_info(params: dict[str, Any]) -> dict[str, Any] | None:
         "volume_min": info.volume_min,
         "volume_max": info.volume_max,
         "volume_step": info.volume_step,
+        "filling": _filling_for(info),
     }
 
 
@@ -228,10 +323,7 @@ def _handle_get_tick_price(params: dict[str, Any]) -> dict[str, float] | None:
     return {"bid": tick.bid, "ask": tick.ask, "last": tick.last}
 
 
-def _filling_mode(symbol: str) -> int:
-    info = mt5.symbol_info(symbol)
-    if info is None:
-        return mt5.ORDER_FILLING_IOC
+def _filling_for(info: Any) -> int:
     filling = info.filling_mode
     if filling & 2:
         return mt5.ORDER_FILLING_IOC
@@ -240,7 +332,18 @@ def _filling_mode(symbol: str) -> int:
     return mt5.ORDER_FILLING_RETURN
 
 
+def _filling_mode(symbol: str) -> int:
+    return _symbol_spec(symbol).get("filling", mt5.ORDER_FILLING_IOC)
+
+
 def _handle_place_market_order(params: dict[str, Any]) -> dict[str, Any]:
+    """Market order. Optional guards, checked against local terminal state only:
+
+    - `reference_price` + `max_drift`: refuse when the quote moved further
+      than `max_drift` (price units) from the prepared entry;
+    - `check_margin`: refuse when the volume needs more than the free margin.
+    `type_filling` skips the filling-mode lookup when the caller has it.
+    """
     symbol = params["symbol"]
     volume = float(params["volume"])
     order_type = str(params["order_type"]).upper()
@@ -255,6 +358,26 @@ def _handle_place_market_order(params: dict[str, Any]) -> dict[str, Any]:
     price = tick.ask if order_type == "BUY" else tick.bid
     type_order = mt5.ORDER_TYPE_BUY if order_type == "BUY" else mt5.ORDER_TYPE_SELL
 
+    filling = params.get("type_filling")
+    reference = params.get("reference_price")
+    max_drift = params.get("max_drift")
+    if reference and max_drift is not None and abs(price - reference) > max_drift:
+        return {
+            "success": False,
+            "error": f"price moved from {reference} to {price} since prepare",
+            "drift": True,
+            "price": price,
+        }
+    if params.get("check_margin"):
+        margin = mt5.order_calc_margin(type_order, symbol, volume, price)
+        account = mt5.account_info()
+        if margin is not None and account is not None and margin > account.margin_free:
+            return {
+                "success": False,
+                "error": f"not enough margin: needs {margin:.2f}, free {account.margin_free:.2f}",
+                "margin": True,
+            }
+
     request = apply_stealth({
         "action": mt5.TRADE_ACTION_DEAL,
         "symbol": symbol,
@@ -267,7 +390,7 @@ def _handle_place_market_order(params: dict[str, Any]) -> dict[str, Any]:
         "magic": 234000,
         "comment": comment,
         "type_time": mt5.ORDER_TIME_GTC,
-        "type_filling": _filling_mode(symbol),
+        "type_filling": filling if filling is not None else _filling_mode(symbol),
     })
     result = mt5.order_send(request)
     if result is None:
@@ -282,6 +405,7 @@ def _handle_place_market_order(params: dict[str, Any]) -> dict[str, Any]:
         "order": result.order,
         "volume": result.volume,
         "price": result.price,
+        "requested_price": price,
     }
 
 
@@ -314,6 +438,37 @@ def _handle_close_position(params: dict[str, Any]) -> dict[str, Any]:
     return {"success": True, "order": result.order, "volume": result.volume, "price": result.price}
 
 
+def _handle_partial_close(params: dict[str, Any]) -> dict[str, Any]:
+    ticket = int(params["ticket"])
+    volume = float(params["volume"])
+    positions = mt5.positions_get(ticket=ticket)
+    if not positions:
+        return {"success": False, "error": f"position #{ticket} not found"}
+    pos = positions[0]
+    close_vol = min(round(volume, 8), pos.volume)
+    close_type = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
+    tick = mt5.symbol_info_tick(pos.symbol)
+    if tick is None:
+        return {"success": False, "error": f"no tick for {pos.symbol}"}
+    price = tick.bid if pos.type == mt5.ORDER_TYPE_BUY else tick.ask
+    result = mt5.order_send(apply_stealth({
+        "action": mt5.TRADE_ACTION_DEAL,
+        "symbol": pos.symbol,
+        "volume": close_vol,
+        "type": close_type,
+        "position": ticket,
+        "price": price,
+        "deviation": 20,
+        "magic": 234000,
+        "comment": "TraderDiary Partial",
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": _filling_mode(pos.symbol),
+    }, volume_variance=0.0))  # never alter a partial-close's volume
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        return {"success": False, "error": f"partial close failed: {result.comment if result else 'order_send None'}"}
+    return {"success": True, "order": result.order, "volume": result.volume, "price": result.price}
+
+
 def _handle_modify_position(params: dict[str, Any]) -> dict[str, Any]:
     ticket = int(params["ticket"])
     sl = float(params.get("sl", 0.0))
@@ -334,6 +489,107 @@ def _handle_modify_position(params: dict[str, Any]) -> dict[str, Any]:
     return {"success": True, "ticket": ticket, "sl": sl, "tp": tp}
 
 
+def _handle_bulk_positions(params: dict[str, Any]) -> dict[str, Any]:
+    """Filter this account's positions and close / partial-close / modify them all.
+
+    One RPC per account; the master fans it out across workers in parallel.
+    """
+    op = str(params.get("op") or "")
+    bulk_positions.validate_operation(op, params)
+    flt = bulk_positions.parse_filter(params.get("filter"))
+    started = time.perf_counter()
+
+    results: list[dict[str, Any]] = []
+    for pos in _handle_get_positions({}):
+        if not flt.matches(pos):
+            continue
+        if op == bulk_positions.OP_CLOSE:
+            res = _handle_close_position({"ticket": pos["ticket"]})
+        elif op == bulk_positions.OP_PARTIAL_CLOSE:
+            spec = _symbol_spec(pos["symbol"])
+            volume = bulk_positions.partial_volume(
+                pos["volume"],
+                float(params["fraction"]),
+                float(spec.get("volume_step") or 0.01),
+                float(spec.get("volume_min") or 0.01),
+            )
+            if volume <= 0:
+                res = {"success": False, "skipped": True, "error": "partial volume below the broker minimum lot"}
+            else:
+                res = _handle_partial_close({"ticket": pos["ticket"], "volume": volume})
+        else:
+            sl, tp = bulk_positions.modify_targets(pos, params)
+            res = _handle_modify_position({"ticket": pos["ticket"], "sl": sl, "tp": tp})
+        results.append({"ticket": pos["ticket"], "symbol": pos["symbol"], **res})
+
+    succeeded = sum(1 for r in results if r.get("success"))
+    return {
+        "op": op,
+        "matched": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def _handle_history_deals(params: dict[str, Any]) -> list[dict[str, Any]]:
+    """Deals from `from_ts` (broker epoch seconds) up to `to_ts`, oldest first.
+
+    `to_ts` defaults to two days ahead of now: broker server time runs ahead
+    of UTC, and the window must include deals made a moment ago.
+    """
+    from_ts = int(params.get("from_ts") or 0)
+    to_ts = int(params.get("to_ts") or time.time() + 2 * 86400)
+    deals = mt5.history_deals_get(from_ts, to_ts)
+    if deals is None:
+        raise RuntimeError("history_deals_get returned None")
+    return sorted((p.deal_to_dict(d) for d in deals), key=lambda d: (d["time"], d["ticket"]))
+
+
+def _handle_set_position_rule(params: dict[str, Any]) -> dict[str, Any]:
+    assert _account is not None
+    ticket = int(params.get("ticket") or 0)
+    kind = str(params.get("kind") or "")
+    rule_params = validate_params(kind, params.get("params") or {})
+    if not mt5.positions_get(ticket=ticket):
+        raise ValueError(f"position #{ticket} not found")
+
+    db = SessionLocal()
+    try:
+        row = PositionRule(
+            account_db_id=_account.id,
+            ticket=ticket,
+            kind=kind,
+            params=json.dumps(rule_params),
+            state="{}",
+            active=True,
+        )
+        db.add(row)
+        db.commit()
+        rule = Rule(id=row.id, ticket=ticket, kind=kind, params=rule_params)
+    finally:
+        db.close()
+    with _rules_lock:
+        _rule_engine.add(rule)
+    return rule.to_dict()
+
+
+def _handle_remove_position_rule(params: dict[str, Any]) -> dict[str, Any]:
+    rule_id = int(params.get("rule_id") or 0)
+    with _rules_lock:
+        rule = _rule_engine.remove(rule_id)
+    if rule is None:
+        raise ValueError(f"rule #{rule_id} not found")
+    _persist_rule_states([rule], deactivate=True)
+    return {"id": rule_id, "active": False}
+
+
+def _handle_list_position_rules(_params: dict[str, Any]) -> list[dict[str, Any]]:
+    with _rules_lock:
+        return [r.to_dict() for r in _rule_engine.rules()]
+
+
 def _handle_shutdown(_params: dict[str, Any]) -> str:
     _stop_event.set()
     return "ok"
@@ -345,28 +601,100 @@ _HANDLERS: dict[str, Any] = {
     "get_positions": _handle_get_positions,
     "get_symbol_info": _handle_get_symbol_info,
     "symbols_search": _handle_symbols_search,
+    "symbol_catalog": _handle_symbol_catalog,
     "get_tick_price": _handle_get_tick_price,
     "place_market_order": _handle_place_market_order,
     "close_position": _handle_close_position,
     "modify_position": _handle_modify_position,
+    "partial_close": _handle_partial_close,
+    "bulk_positions": _handle_bulk_positions,
+    "history_deals": _handle_history_deals,
+    "set_position_rule": _handle_set_position_rule,
+    "remove_position_rule": _handle_remove_position_rule,
+    "list_position_rules": _handle_list_position_rules,
     "shutdown": _handle_shutdown,
 }
 
 
 # ── Tick stream ───────────────────────────────────────────────────────────────
+def _symbol_spec(symbol: str) -> dict[str, Any]:
+    """Digits/volume/contract spec per symbol, fetched once per worker lifetime."""
+    spec = _symbol_specs.get(symbol)
+    if spec is None:
+        info = mt5.symbol_info(symbol)
+        if info is None:
+            return {}
+        spec = {
+            "digits": info.digits,
+            "volume_step": info.volume_step,
+            "volume_min": info.volume_min,
+            "contract_size": info.trade_contract_size,
+            "filling": _filling_for(info),
+        }
+        _symbol_specs[symbol] = spec
+    return spec
+
+
+def _run_position_rules(positions: list[dict[str, Any]] | None) -> None:
+    """Evaluate rules against this tick's positions with one quote per symbol.
+
+    `positions` is None when the terminal did not answer: that says nothing
+    about which positions are open, so rules are neither evaluated nor
+    pruned until a tick brings a real list. The lock only guards the engine;
+    quotes, broker calls and DB writes run outside it.
+    """
+    if positions is None:
+        return
+    with _rules_lock:
+        if not len(_rule_engine):
+            return
+        closed = _rule_engine.prune(positions)
+        symbols = _rule_engine.symbols(positions)
+    if closed:
+        _persist_rule_states(closed, deactivate=True)
+
+    quotes: dict[str, dict[str, float]] = {}
+    for symbol in symbols:
+        tick = mt5.symbol_info_tick(symbol)
+        if tick is not None:
+            quotes[symbol] = {"bid": tick.bid, "ask": tick.ask}
+    specs = {symbol: _symbol_spec(symbol) for symbol in quotes}
+
+    with _rules_lock:
+        actions = _rule_engine.evaluate(positions, quotes, specs)
+
+    changed: dict[int, Rule] = {}
+    for action in actions:
+        if action.kind == ACTION_MODIFY:
+            result = _handle_modify_position({"ticket": action.ticket, "sl": action.sl, "tp": action.tp})
+        else:
+            result = _handle_partial_close({"ticket": action.ticket, "volume": action.volume})
+        if result.get("success"):
+            with _rules_lock:
+                committed = _rule_engine.commit(action)
+            for rule in committed:
+                changed[rule.id] = rule
+            logger.info("Rule %s: #%d %s", action.reason, action.ticket, action.kind)
+        else:
+            logger.warning("Rule %s on #%d failed: %s", action.reason, action.ticket, result.get("error"))
+        _send_event("position_rule", {**action.to_dict(), "success": bool(result.get("success")), "error": result.get("error")})
+    _persist_rule_states(list(changed.values()))
+
+
 def _tick_loop() -> None:
     """Background thread: emit a 'tick' event every 1s with account + positions."""
     while not _stop_event.wait(1.0):
         try:
             info = _handle_get_account_info({})
-            positions = _handle_get_positions({})
+            positions = _positions()
             from datetime import datetime as _dt
 
             _send_event("tick", {
                 "account_info": info,
-                "positions": positions,
+                "positions": positions or [],
                 "ts": _dt.utcnow().isoformat() + "Z",
             })
+            _run_position_rules(positions)
         except Exception as e:
             logger.warning("tick loop error: %s", e)
 
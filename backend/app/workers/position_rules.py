@@ -0,0 +1,294 @@
+"""Worker-resident position-management rules: trailing stop, break-even, scale-out.
+
+Pure logic — no MT5, no DB. The worker's tick loop already fetches every open
+position once per tick; it then fetches ONE quote per symbol that has a rule
+attached and calls `RuleEngine.evaluate`, which returns the broker actions to
+send. After an action succeeds the worker calls `commit` so the rule's state
+(break-even done, filled ladder steps) advances, and persists that
+state to the `position_rules` table so a respawned worker picks up where the
+previous one stopped.
+
+Rule kinds and params:
+  trailing   {"trail_pips": 15}
+  breakeven  {"trigger_pips": 20, "offset_pips": 1}
+  scale_out  {"steps": [{"pips": 20, "fraction": 0.5}, {"pips": 40, "fraction": 0.25}]}
+
+Scale-out steps are sized off the initial volume and floored to the broker
+step; a step below the minimum lot, or one that would leave less than the
+minimum open, is skipped. When the fractions add up to 1 the last step
+closes whatever is left.
+
+Several rules on one ticket are merged into a single SLTP modification per
+tick (the tightest stop wins, every contributing rule counts as satisfied).
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+KIND_TRAILING = "trailing"
+KIND_BREAKEVEN = "breakeven"
+KIND_SCALE_OUT = "scale_out"
+KINDS = (KIND_TRAILING, KIND_BREAKEVEN, KIND_SCALE_OUT)
+
+ACTION_MODIFY = "modify"
+ACTION_PARTIAL_CLOSE = "partial_close"
+
+_DEFAULT_DIGITS = 5
+
+
+def pip_size(digits: int) -> float:
+    """1 pip = 10 points on 3/5-digit quotes, 1 point otherwise (same as the legacy trail)."""
+    return 10 ** (-digits) * (10 if digits in (3, 5) else 1)
+
+
+def validate_params(kind: str, params: dict[str, Any]) -> dict[str, Any]:
+    """Return normalized params for `kind`. Raises ValueError on bad input."""
+    if kind == KIND_TRAILING:
+        trail = float(params.get("trail_pips", 0))
+        if trail <= 0:
+            raise ValueError("trail_pips must be greater than 0")
+        return {"trail_pips": trail}
+
+    if kind == KIND_BREAKEVEN:
+        trigger = float(params.get("trigger_pips", 0))
+        offset = float(params.get("offset_pips", 0))
+        if trigger <= 0:
+            raise ValueError("trigger_pips must be greater than 0")
+        if offset < 0 or offset >= trigger:
+            raise ValueError("offset_pips must be >= 0 and below trigger_pips")
+        return {"trigger_pips": trigger, "offset_pips": offset}
+
+    if kind == KIND_SCALE_OUT:
+        raw_steps = params.get("steps") or []
+        if not isinstance(raw_steps, list) or not raw_steps:
+            raise ValueError("steps must be a non-empty list")
+        steps = []
+        for s in raw_steps:
+            pips = float(s.get("pips", 0))
+            fraction = float(s.get("fraction", 0))
+            if pips <= 0 or not 0 < fraction <= 1:
+                raise ValueError("each step needs pips > 0 and 0 < fraction <= 1")
+            steps.append({"pips": pips, "fraction": fraction})
+        steps.sort(key=lambda s: s["pips"])
+        if sum(s["fraction"] for s in steps) > 1.0 + 1e-9:
+            raise ValueError("step fractions add up to more than the whole position")
+        return {"steps": steps}
+
+    raise ValueError(f"unknown rule kind: {kind}")
+
+
+@dataclass
+class Rule:
+    id: int
+    ticket: int
+    kind: str
+    params: dict[str, Any]
+    state: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"id": self.id, "ticket": self.ticket, "kind": self.kind, "params": self.params, "state": self.state}
+
+
+@dataclass
+class Action:
+    kind: str                                 # modify | partial_close
+    ticket: int
+    symbol: str
+    reason: str
+    sl: Optional[float] = None
+    tp: Optional[float] = None
+    volume: Optional[float] = None
+    # rule_id -> state keys to merge once the broker accepted the action
+    updates: dict[int, dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "ticket": self.ticket,
+            "symbol": self.symbol,
+            "reason": self.reason,
+            "sl": self.sl,
+            "tp": self.tp,
+            "volume": self.volume,
+            "rule_ids": sorted(self.updates),
+        }
+
+
+def round_volume(volume: float, step: float, minimum: float) -> float:
+    """Floor `volume` to the broker step, at least `minimum`."""
+    if step > 0:
+        volume = math.floor(volume / step + 1e-9) * step
+    return round(max(volume, minimum), 8)
+
+
+def close_volume(open_volume: float, requested: float, step: float, minimum: float) -> float:
+    """Volume to partially close for `requested` lots of an `open_volume` position.
+
+    Floored to the broker step and capped at the position. 0.0 when that is
+    below the broker minimum or would leave less than the minimum open, so
+    a partial close is skipped rather than closing the position in full.
+    """
+    target = min(round_volume(requested, step, 0.0), open_volume)
+    remainder = open_volume - target
+    if target < minimum - 1e-9 or 1e-9 < remainder < minimum - 1e-9:
+        return 0.0
+    return target
+
+
+class RuleEngine:
+    """In-memory rule set for one account. Not thread-safe; the worker holds a lock."""
+
+    def __init__(self) -> None:
+        self._rules: dict[int, Rule] = {}
+
+    # ── Registry ──────────────────────────────────────────────────────────────
+    def load(self, rules: list[Rule]) -> None:
+        self._rules = {r.id: r for r in rules}
+
+    def add(self, rule: Rule) -> None:
+        self._rules[rule.id] = rule
+
+    def remove(self, rule_id: int) -> Optional[Rule]:
+        return self._rules.pop(rule_id, None)
+
+    def get(self, rule_id: int) -> Optional[Rule]:
+        return self._rules.get(rule_id)
+
+    def rules(self) -> list[Rule]:
+        return list(self._rules.values())
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def symbols(self, positions: list[dict[str, Any]]) -> set[str]:
+        """Symbols that need a quote this tick (only positions with rules attached)."""
+        tickets = {r.ticket for r in self._rules.values()}
+        return {p["symbol"] for p in positions if p["ticket"] in tickets}
+
+    def prune(self, positions: list[dict[str, Any]]) -> list[Rule]:
+        """Drop rules whose position is no longer open. Returns the dropped rules."""
+        open_tickets = {p["ticket"] for p in positions}
+        gone = [r for r in self._rules.values() if r.ticket not in open_tickets]
+        for r in gone:
+            self._rules.pop(r.id, None)
+        return gone
+
+    # ── Evaluation ────────────────────────────────────────────────────────────
+    def evaluate(
+        self,
+        positions: list[dict[str, Any]],
+        quotes: dict[str, dict[str, float]],
+        specs: dict[str, dict[str, Any]],
+    ) -> list[Action]:
+        """Return the actions to send this tick. Does not mutate rule state."""
+        by_ticket: dict[int, list[Rule]] = {}
+        for r in self._rules.values():
+            by_ticket.setdefault(r.ticket, []).append(r)
+
+        actions: list[Action] = []
+        for pos in positions:
+            rules = by_ticket.get(pos["ticket"])
+            quote = quotes.get(pos["symbol"])
+            if not rules or not quote:
+                continue
+            actions.extend(self._evaluate_position(pos, rules, quote, specs.get(pos["symbol"]) or {}))
+        return actions
+
+    def commit(self, action: Action) -> list[Rule]:
+        """Apply an accepted action's state updates. Returns the rules that changed."""
+        changed = []
+        for rule_id, upd in action.updates.items():
+            rule = self._rules.get(rule_id)
+            if rule is not None and upd:
+                rule.state.update(upd)
+                changed.append(rule)
+        return changed
+
+    def _evaluate_position(
+        self,
+        pos: dict[str, Any],
+        rules: list[Rule],
+        quote: dict[str, float],
+        spec: dict[str, Any],
+    ) -> list[Action]:
+        digits = int(spec.get("digits") or _DEFAULT_DIGITS)
+        pip = pip_size(digits)
+        is_buy = pos["type"] == "BUY"
+        price = quote["bid"] if is_buy else quote["ask"]   # price the position would close at
+        open_price = pos["price_open"]
+        current_sl = pos.get("sl") or 0.0
+        profit_pips = ((price - open_price) if is_buy else (open_price - price)) / pip
+
+        def improves(sl: float, than: float) -> bool:
+            if is_buy:
+                return sl > than + pip * 0.5
+            return than == 0 or sl < than - pip * 0.5
+
+        sl_candidates: list[tuple[float, int, dict[str, Any], str]] = []
+        partial: Optional[Action] = None
+
+        for rule in rules:
+            if rule.kind == KIND_TRAILING:
+                distance = rule.params["trail_pips"] * pip
+                new_sl = round(price - distance if is_buy else price + distance, digits)
+                if improves(new_sl, current_sl):
+                    sl_candidates.append((new_sl, rule.id, {}, "trailing"))
+
+            elif rule.kind == KIND_BREAKEVEN:
+                if rule.state.get("done") or profit_pips < rule.params["trigger_pips"]:
+                    continue
+                offset = rule.params.get("offset_pips", 0.0) * pip
+                target = round(open_price + offset if is_buy else open_price - offset, digits)
+                if improves(target, current_sl):
+                    sl_candidates.append((target, rule.id, {"done": True}, "breakeven"))
+
+            elif rule.kind == KIND_SCALE_OUT and partial is None:
+                filled = list(rule.state.get("filled", []))
+                initial = rule.state.get("initial_volume") or pos["volume"]
+                steps = rule.params["steps"]
+                closes_all = sum(s["fraction"] for s in steps) >= 1.0 - 1e-9
+                for idx, step in enumerate(steps):
+                    if idx in filled:
+                        continue
+                    if profit_pips < step["pips"]:
+                        break
+                    if closes_all and len(filled) == len(steps) - 1:
+                        # The last open step of a full ladder takes what rounding left.
+                        volume = pos["volume"]
+                    else:
+                        volume = close_volume(
+                            pos["volume"],
+                            initial * step["fraction"],
+                            float(spec.get("volume_step") or 0.01),
+                            float(spec.get("volume_min") or 0.01),
+                        )
+                    if volume <= 0:
+                        continue    # too small for the broker: skip rather than close in full
+                    partial = Action(
+                        kind=ACTION_PARTIAL_CLOSE,
+                        ticket=pos["ticket"],
+                        symbol=pos["symbol"],
+                        volume=volume,
+                        reason=f"scale_out step {idx + 1} at +{step['pips']:g} pips",
+                        updates={rule.id: {"filled": filled + [idx], "initial_volume": initial}},
+                    )
+                    break
+
+        actions: list[Action] = []
+        if partial is not None:
+            actions.append(partial)
+        if sl_candidates:
+            best = max(sl_candidates, key=lambda c: c[0]) if is_buy else min(sl_candidates, key=lambda c: c[0])
+            actions.append(Action(
+                kind=ACTION_MODIFY,
+                ticket=pos["ticket"],
+                symbol=pos["symbol"],
+                sl=best[0],
+                tp=pos.get("tp") or 0.0,
+                reason=best[3],
+                # The tightest stop satisfies every candidate, so all of them advance.
+                updates={rule_id: upd for _, rule_id, upd, _ in sl_candidates},
+            ))
+        return actions
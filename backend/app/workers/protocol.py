@@ -10,12 +10,16 @@ Three message kinds:
 
 The id correlates request and response. The same string flows back so the
 master can resolve the right awaiting future.
+
+Payload helpers shared by both sides (`deal_to_dict`, `catalog_hash`) live
+here too, so the worker never imports master-side services.
 """
 from __future__ import annotations
 
+import hashlib
 import json
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Iterable, Optional
 
 
 # ── Error codes ───────────────────────────────────────────────────────────────
@@ -83,3 +87,43 @@ def is_response(obj: dict[str, Any]) -> bool:
 
 def is_event(obj: dict[str, Any]) -> bool:
     return "event" in obj and "id" not in obj
+
+
+# ── Payloads ──────────────────────────────────────────────────────────────────
+# Contract-spec keys of a `symbol_catalog` entry besides its name.
+CATALOG_SPEC_FIELDS = (
+    "description", "path", "digits", "point", "contract_size",
+    "volume_min", "volume_max", "volume_step", "filling",
+)
+
+
+def catalog_hash(entries: Iterable[dict[str, Any]]) -> str:
+    """Order-independent hash of names + specs (the worker's and the stored catalog's)."""
+    h = hashlib.sha1()
+    for entry in sorted(entries, key=lambda e: e["name"]):
+        h.update(json.dumps([entry["name"], *(entry.get(f) for f in CATALOG_SPEC_FIELDS)]).encode())
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+def deal_to_dict(d: Any) -> dict[str, Any]:
+    """JSON shape of an MT5 `TradeDeal` (worker RPC and legacy path alike)."""
+    return {
+        "ticket": d.ticket,
+        "order": d.order,
+        "position_id": getattr(d, "position_id", 0),
+        "symbol": d.symbol,
+        "type": d.type,
+        "entry": d.entry,
+        "volume": d.volume,
+        "price": d.price,
+        "sl": getattr(d, "sl", 0.0),
+        "tp": getattr(d, "tp", 0.0),
+        "profit": d.profit,
+        "commission": getattr(d, "commission", 0.0),
+        "swap": getattr(d, "swap", 0.0),
+        "fee": getattr(d, "fee", 0.0),
+        "magic": getattr(d, "magic", 0),
+        "comment": getattr(d, "comment", ""),
+        "time": int(d.time),
+    }
@@ -0,0 +1,235 @@
+"""Benchmark the analytics endpoints against a synthetic DB.
+
+    python -m bench.run                                  # full scale, prints a table
+    python -m bench.run --out bench/baseline.json        # record a baseline
+    python -m bench.run --compare bench/baseline.json    # exit 1 on a regression
+
+Each case is called once to warm up, then `--repeat` times with the response
+cache cleared before every call, so the timings are the cost of building the
+response (the ETag cache would otherwise answer from memory). Reference data
+and other process caches stay warm, as in a running backend.
+
+A separate pass per case records the SQL statements issued and the peak
+Python allocation (`tracemalloc`); that pass is slower and not timed.
+
+`--compare` flags a case when its p50 exceeds the baseline's by more than
+`--tolerance` (plus `--slack-ms`, absorbing noise on sub-millisecond cases),
+when it issues more queries, or when its peak memory grows past the same
+tolerance. Baselines only compare across the same `--scale`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator, Optional
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import get_db
+from app.routes import analytics
+from app.services import pnl_sync, trade_history, trade_stats
+from app.services.cold_archive import ColdArchive
+from app.services.response_cache import response_cache
+from bench.synth import SCALES, Scale, bench_engine, closing_deals, generate
+
+
+@dataclass
+class Case:
+    name: str
+    call: Callable[[], Any]
+
+
+class QueryCounter:
+    def __init__(self, engine: Engine) -> None:
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_args: Any) -> None:
+        self.count += 1
+
+
+@contextmanager
+def _empty_archive() -> Iterator[None]:
+    """Point the modules that read the cold archive at an empty one for the run."""
+    modules = (analytics, trade_history, trade_stats)
+    saved = [m.cold_archive for m in modules]
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ColdArchive(tmp)
+        for m in modules:
+            m.cold_archive = archive
+        try:
+            yield
+        finally:
+            for m, original in zip(modules, saved):
+                m.cold_archive = original
+            archive.dispose()
+
+
+def build_cases(engine: Engine, meta: dict[str, Any]) -> list[Case]:
+    factory = sessionmaker(bind=engine, autoflush=False)
+
+    def get_session():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/analytics")
+    app.dependency_overrides[get_db] = get_session
+    client = TestClient(app)
+
+    def get(path: str) -> Callable[[], Any]:
+        def call() -> Any:
+            r = client.get(f"/api/analytics{path}")
+            r.raise_for_status()
+            return r
+        return call
+
+    end = datetime.fromisoformat(meta["end"])
+    week_ago = (end - timedelta(days=7)).isoformat()
+    with factory() as db:
+        sync_account, deals = closing_deals(db)
+
+    def pnl_sync_match() -> int:
+        # The writer step of POST /sync-realized-pnl for one account, rolled back.
+        with factory() as db:
+            _, updated = pnl_sync.apply_sync(db, sync_account, deals, None)
+            db.rollback()
+        return updated
+
+    return [
+        Case("summary", get("/summary")),
+        Case("fund_status", get("/fund-status")),
+        Case("equity_curve_all", get("/equity-curve")),
+        Case("equity_curve_account_7d", get(f"/equity-curve?account_id=1&from={week_ago}&max_points=2000")),
+        Case("journal", get(f"/journal?days={meta['scale']['days']}")),
+        Case("trade_history_page", get("/trade-history")),
+        Case("trade_history_filtered", get("/trade-history?tag=news&symbol=XAUUSD")),
+        Case("pnl_sync_match", pnl_sync_match),
+    ]
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def measure(case: Case, counter: QueryCounter, repeat: int) -> dict[str, Any]:
+    response_cache.clear()
+    case.call()
+    timings = []
+    for _ in range(repeat):
+        response_cache.clear()
+        started = time.perf_counter()
+        case.call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    response_cache.clear()
+    before = counter.count
+    tracemalloc.start()
+    try:
+        case.call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(_percentile(timings, 0.95), 2),
+        "min_ms": round(min(timings), 2),
+        "queries": counter.count - before,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(db_path: str, scale: Scale, repeat: int = 5, only: Optional[set[str]] = None) -> dict[str, Any]:
+    meta = generate(db_path, scale)
+    engine = bench_engine(db_path)
+    counter = QueryCounter(engine)
+    try:
+        with _empty_archive():
+            results = {
+                case.name: measure(case, counter, repeat)
+                for case in build_cases(engine, meta)
+                if only is None or case.name in only
+            }
+    finally:
+        engine.dispose()
+    return {
+        "scale": meta["scale"],
+        "counts": meta["counts"],
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "recorded_at": datetime.utcnow().replace(microsecond=0).isoformat(),
+        "results": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float = 0.25, slack_ms: float = 2.0) -> list[str]:
+    """Human-readable regressions of `current` against `baseline` (empty when none)."""
+    if current["scale"] != baseline["scale"]:
+        return [f"scale differs from the baseline ({baseline['scale']}); re-record it"]
+    problems = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None:
+            continue
+        if now["p50_ms"] > base["p50_ms"] * (1 + tolerance) + slack_ms:
+            problems.append(f"{name}: p50 {now['p50_ms']} ms vs {base['p50_ms']} ms")
+        if now["queries"] > base["queries"]:
+            problems.append(f"{name}: {now['queries']} queries vs {base['queries']}")
+        if now["peak_kb"] > base["peak_kb"] * (1 + tolerance) + 64:
+            problems.append(f"{name}: peak {now['peak_kb']} KB vs {base['peak_kb']} KB")
+    return problems
+
+
+def _table(report: dict[str, Any]) -> str:
+    lines = [f"{'case':<26}{'p50 ms':>10}{'p95 ms':>10}{'queries':>9}{'peak KB':>11}"]
+    for name, r in report["results"].items():
+        lines.append(f"{name:<26}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['queries']:>9}{r['peak_kb']:>11}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="synthetic DB path (default: bench-<scale>.db in the temp dir)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="full")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", action="append", help="run only this case (repeatable)")
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--slack-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.gettempdir(), f"bench-{args.scale}.db")
+    report = run_suite(db_path, SCALES[args.scale], args.repeat, set(args.case) if args.case else None)
+    print(_table(report))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance, args.slack_ms)
+        for p in problems:
+            print(f"REGRESSION {p}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Fill a throwaway SQLite DB with production-sized synthetic data.
+
+    python -m bench.synth bench.db                      # 100 accounts, 1M snapshots, 200k trades
+    python -m bench.synth small.db --scale small
+
+Raw rows (funds, accounts, equity snapshots, trade records) are bulk-inserted
+with seeded NumPy random walks, then the derived tables are built by the
+app's own startup rebuilds (`backfill_rollups`, `rebuild_daily_stats`,
+`rebuild_trade_stats`), so the DB looks exactly like a migrated install.
+
+About 10 % of successful trades are left without realized P&L; `closing_deals`
+returns the deals that would close them, for timing the P&L sync's matching.
+
+A `<db>.json` sidecar records the parameters and row counts; `generate`
+returns it and reuses a DB built with the same parameters.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import create_engine, event, func, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.database import Base, apply_sqlite_pragmas
+from app.models.accounts import Account
+from app.models.equity_snapshot import EquitySnapshot
+from app.models.funds import Fund, FundPhaseRule, FundProgram
+from app.models.trade_record import TradeRecord
+from app.services import daily_stats, equity_rollups, trade_stats
+from app.services.pnl_sync import DEAL_ENTRY_OUT
+
+SYMBOLS = ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "US30", "NAS100", "GER40", "AUDUSD")
+TAGS = ("scalp", "swing", "news", "london", "new york", "breakout", "reversal", "a+ setup")
+NOTES = (
+    "Waited for the retest before entry.",
+    "Moved SL to break-even after 1R.",
+    "Early entry, should have waited for the close.",
+    "News spike, spread widened.",
+    "Followed the plan.",
+)
+_CHUNK = 50_000
+_DEAL_ENTRY_IN = 0
+
+
+@dataclass(frozen=True)
+class Scale:
+    accounts: int = 100
+    snapshots: int = 1_000_000
+    trades: int = 200_000
+    days: int = 180
+    seed: int = 7
+
+
+SCALES = {
+    "full": Scale(),
+    "small": Scale(accounts=10, snapshots=50_000, trades=10_000, days=60),
+}
+
+
+def bench_engine(path: str) -> Engine:
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
+
+def _funds(session: Session) -> list[int]:
+    programs = []
+    for i, (name, dd_type) in enumerate((("Alpha", "static"), ("Beta", "eod_trailing"), ("Gamma", "static"))):
+        fund = Fund(fund_name=f"{name} Capital", server_pattern=f"{name}-*")
+        session.add(fund)
+        session.flush()
+        program = FundProgram(fund_id=fund.id, program_name="2-Step", min_trading_days=4,
+                              best_day_rule_pct=None if i else 3.0, max_margin_pct=50.0)
+        session.add(program)
+        session.flush()
+        for order, (phase, target) in enumerate((("Phase 1", 8.0), ("Phase 2", 5.0), ("Funded", None)), start=1):
+            session.add(FundPhaseRule(program_id=program.id, phase_name=phase, phase_order=order, profit_target=target,
+                                      daily_drawdown=5.0, max_drawdown=10.0, drawdown_type=dd_type))
+        programs.append(program.id)
+    return programs
+
+
+def _accounts(session: Session, rng: np.random.Generator, n: int, programs: list[int]) -> list[tuple[int, str, float]]:
+    out = []
+    for i in range(n):
+        fund = i % 10 < 7
+        size = float(rng.choice([10_000, 25_000, 50_000, 100_000, 200_000]))
+        acc = Account(
+            account_id=str(5_000_000 + i), password="x", server="Alpha-Live" if fund else "Broker-Real",
+            account_type="fund" if fund else "personal",
+            fund_program_id=programs[i % len(programs)] if fund else None,
+            current_phase=("Phase 1", "Phase 2", "Funded")[i % 3] if fund else None,
+            starting_balance=size, balance=size, equity=size, profit=0.0,
+        )
+        session.add(acc)
+        session.flush()
+        out.append((acc.id, acc.account_id, size))
+    return out
+
+
+def _snapshots(session: Session, rng: np.random.Generator, accounts, n: int, start: datetime, end: datetime) -> None:
+    per_account = max(2, n // len(accounts))
+    step = (end - start) / per_account
+    finals = {}
+    for aid, _, size in accounts:
+        balance = size * np.cumprod(1 + rng.normal(0.00002, 0.0015, per_account))
+        equity = balance + rng.normal(0, size * 0.002, per_account)
+        rows = [
+            {"account_db_id": aid, "balance": float(b), "equity": float(e), "profit": float(e - b),
+             "recorded_at": start + step * k}
+            for k, (b, e) in enumerate(zip(balance, equity))
+        ]
+        for i in range(0, len(rows), _CHUNK):
+            session.execute(insert(EquitySnapshot), rows[i:i + _CHUNK])
+        finals[aid] = rows[-1]
+    for aid, last in finals.items():
+        session.query(Account).filter(Account.id == aid).update({
+            "balance": last["balance"], "equity": last["equity"], "profit": last["profit"],
+            "daily_open_equity": last["balance"], "daily_open_date": last["recorded_at"].date().isoformat(),
+            "peak_eod_balance": last["balance"],
+        })
+
+
+def _trades(session: Session, rng: np.random.Generator, accounts, n: int, start: datetime, end: datetime) -> int:
+    span = (end - start).total_seconds()
+    owners = rng.integers(0, len(accounts), n)
+    offsets = np.sort(rng.uniform(0, span, n))
+    symbols = rng.integers(0, len(SYMBOLS), n)
+    success = rng.random(n) < 0.95
+    closed = success & (rng.random(n) < 0.9)
+    risk_pct = rng.choice([0.25, 0.5, 1.0, 1.5], n)
+    rr = rng.choice([1.0, 1.5, 2.0, 3.0], n)
+    r_multiple = np.where(rng.random(n) < 0.45, rr, -1.0) * rng.uniform(0.8, 1.0, n)
+    tag_counts = rng.integers(0, 4, n)
+    noted = rng.random(n) < 0.4
+    pending = 0
+    rows: list[dict[str, Any]] = []
+    for i in range(n):
+        aid, login, size = accounts[owners[i]]
+        executed = start + timedelta(seconds=float(offsets[i]))
+        risk = round(size * risk_pct[i] / 100, 2)
+        tags = ", ".join(rng.choice(TAGS, tag_counts[i], replace=False)) if tag_counts[i] else None
+        row = {
+            "account_db_id": aid, "account_login": login, "symbol": SYMBOLS[symbols[i]],
+            "direction": "BUY" if i % 2 else "SELL", "lot_size": round(float(rng.uniform(0.1, 5.0)), 2),
+            "entry_price": 1.1, "sl_price": 1.095, "tp_price": 1.11, "sl_pips": 50.0, "tp_pips": 50.0 * rr[i],
+            "risk_pct": float(risk_pct[i]), "risk_amount": risk, "reward_amount": round(risk * rr[i], 2),
+            "rr_ratio": float(rr[i]), "success": bool(success[i]),
+            "order_ticket": 10_000_000 + i if success[i] else None,
+            "error_msg": None if success[i] else "Requote",
+            "notes": NOTES[i % len(NOTES)] if noted[i] else None, "tags": tags,
+            "realized_pnl": round(risk * float(r_multiple[i]), 2) if closed[i] else None,
+            "close_price": 1.105 if closed[i] else None,
+            "closed_at": executed + timedelta(hours=float(rng.uniform(0.1, 30))) if closed[i] else None,
+            "executed_at": executed,
+        }
+        pending += bool(success[i] and not closed[i])
+        rows.append(row)
+        if len(rows) >= _CHUNK:
+            session.execute(insert(TradeRecord), rows)
+            rows = []
+    if rows:
+        session.execute(insert(TradeRecord), rows)
+    return pending
+
+
+def generate(path: str, scale: Scale = SCALES["full"], *, reuse: bool = True) -> dict[str, Any]:
+    """Build the DB at `path` (reused when the sidecar matches `scale`); return the sidecar."""
+    meta_path = path + ".json"
+    if reuse and os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("scale") == asdict(scale):
+            return meta
+    for stale in (path, path + "-wal", path + "-shm", meta_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(scale.seed)
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=scale.days)
+    engine = bench_engine(path)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        programs = _funds(session)
+        accounts = _accounts(session, rng, scale.accounts, programs)
+        _snapshots(session, rng, accounts, scale.snapshots, start, end)
+        pending = _trades(session, rng, accounts, scale.trades, start, end)
+        session.commit()
+        equity_rollups.backfill_rollups(session)
+        session.commit()
+        daily_stats.rebuild_daily_stats(session)
+        trade_stats.rebuild_trade_stats(session)
+        session.commit()
+        counts = {
+            "accounts": session.query(Account).count(),
+            "equity_snapshots": session.query(EquitySnapshot).count(),
+            "trade_records": session.query(TradeRecord).count(),
+            "pending_trades": pending,
+        }
+    finally:
+        session.close()
+        engine.dispose()
+
+    meta = {
+        "scale": asdict(scale),
+        "counts": counts,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "generated_in_s": round(time.perf_counter() - started, 1),
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def closing_deals(session: Session, account_db_id: Optional[int] = None) -> tuple[int, list[dict[str, Any]]]:
+    """(account, deal dicts) opening and closing every pending trade of the account with the most."""
+    if account_db_id is None:
+        account_db_id = (
+            session.query(TradeRecord.account_db_id)
+            .filter(TradeRecord.order_ticket.isnot(None), TradeRecord.realized_pnl.is_(None))
+            .group_by(TradeRecord.account_db_id)
+            .order_by(func.count().desc())
+            .limit(1)
+            .scalar()
+        )
+    pending = (
+        session.query(TradeRecord.order_ticket, TradeRecord.symbol, TradeRecord.executed_at, TradeRecord.risk_amount)
+        .filter(TradeRecord.account_db_id == account_db_id,
+                TradeRecord.order_ticket.isnot(None), TradeRecord.realized_pnl.is_(None))
+        .all()
+    )
+    deals = []
+    for k, (ticket, symbol, executed_at, risk) in enumerate(pending):
+        opened = int(executed_at.timestamp())
+        base = {"symbol": symbol, "type": 0, "volume": 1.0, "commission": -3.5, "swap": 0.0, "fee": 0.0,
+                "magic": 234000, "comment": "", "position_id": ticket}
+        deals.append({**base, "ticket": 90_000_000 + 2 * k, "order": ticket, "entry": _DEAL_ENTRY_IN,
+                      "price": 1.1, "profit": 0.0, "time": opened})
+        deals.append({**base, "ticket": 90_000_001 + 2 * k, "order": 80_000_000 + k, "entry": DEAL_ENTRY_OUT,
+                      "type": 1, "price": 1.105, "profit": round((risk or 0.0) * 1.5, 2), "time": opened + 3600})
+    return account_db_id, deals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="SQLite file to create")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="full")
+    parser.add_argument("--force", action="store_true", help="rebuild even if a matching DB exists")
+    args = parser.parse_args()
+    meta = generate(args.path, SCALES[args.scale], reuse=not args.force)
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
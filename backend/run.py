@@ -6,6 +6,7 @@
 #      Required so PyInstaller-frozen builds can spawn worker subprocesses
 #      using their own bundled exe (sys.executable) without needing python.
 import asyncio
+import multiprocessing
 import os
 import sys
 
@@ -49,6 +50,10 @@ def _dispatch_worker_if_requested() -> bool:
 
 
 if __name__ == "__main__":
+    # Frozen builds: a risk-of-ruin ProcessPoolExecutor child re-runs this exe;
+    # freeze_support() turns it into the pool worker instead of a second server.
+    multiprocessing.freeze_support()
+
     # Worker mode short-circuits everything else.
     if _dispatch_worker_if_requested():
         sys.exit(0)
@@ -11,3 +11,30 @@ if _BACKEND_DIR not in sys.path:
 if not os.getenv("ENCRYPTION_KEY"):
     from cryptography.fernet import Fernet
     os.environ["ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db_session():
+    """Fresh in-memory SQLite session with the full schema (never touches traderdiary.db)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.database import Base
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.services.reference_cache import reference_cache
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    reference_cache.invalidate()  # process-wide cache must not leak between test DBs
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
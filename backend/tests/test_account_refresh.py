@@ -0,0 +1,108 @@
+"""Parallel refresh-all: bounded fan-out, temporary workers, single batch write."""
+import asyncio
+
+import pytest
+
+from app.models.accounts import Account
+from app.services.account_refresh import RefreshOutcome, apply_refresh_results, refresh_accounts
+
+
+class FakePool:
+    """Pool stub that tracks concurrency and which workers were spawned/killed."""
+
+    def __init__(self, active: set[int], infos: dict[int, dict | None], delay: float = 0.05) -> None:
+        self.active = set(active)
+        self.infos = infos
+        self.delay = delay
+        self.spawned: list[int] = []
+        self.killed: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def is_active(self, account_db_id: int) -> bool:
+        return account_db_id in self.active
+
+    async def spawn(self, account_db_id: int) -> None:
+        self.spawned.append(account_db_id)
+        self.active.add(account_db_id)
+
+    async def kill(self, account_db_id: int, *, graceful: bool = True) -> None:
+        self.killed.append(account_db_id)
+        self.active.discard(account_db_id)
+
+    async def call(self, account_db_id: int, method: str, params: dict | None = None, *, timeout: float = 10.0):
+        if method == "ping":
+            return "pong"
+        if method == "get_account_info":
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(self.delay)
+            self.in_flight -= 1
+            return self.infos.get(account_db_id)
+        if method == "get_positions":
+            return [{"ticket": 1}]
+        raise RuntimeError(f"unexpected method: {method}")
+
+
+async def _collect(pool, accounts, concurrency):
+    return [o async for o in refresh_accounts(pool, accounts, concurrency=concurrency)]
+
+
+@pytest.mark.asyncio
+async def test_refresh_respects_concurrency_bound():
+    infos = {i: {"name": f"acc{i}", "balance": 100.0, "equity": 100.0, "profit": 0.0} for i in range(1, 9)}
+    pool = FakePool(active=set(), infos=infos)
+    outcomes = await _collect(pool, [(i, str(i)) for i in infos], concurrency=3)
+    assert len(outcomes) == 8
+    assert all(o.status == "success" for o in outcomes)
+    assert pool.max_in_flight <= 3
+
+
+@pytest.mark.asyncio
+async def test_refresh_runs_in_parallel_not_serially():
+    infos = {i: {"name": "x", "balance": 1.0} for i in range(1, 11)}
+    pool = FakePool(active=set(), infos=infos, delay=0.2)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await _collect(pool, [(i, str(i)) for i in infos], concurrency=10)
+    assert loop.time() - start < 1.0  # serial would be ~2s
+
+
+@pytest.mark.asyncio
+async def test_temporary_workers_are_killed_live_ones_kept():
+    infos = {1: {"name": "a"}, 2: {"name": "b"}}
+    pool = FakePool(active={1}, infos=infos)
+    outcomes = {o.account_db_id: o for o in await _collect(pool, [(1, "1"), (2, "2")], concurrency=2)}
+    assert pool.spawned == [2]
+    assert pool.killed == [2]
+    assert outcomes[1].temporary_worker is False
+    assert outcomes[2].temporary_worker is True
+    assert pool.is_active(1)
+
+
+@pytest.mark.asyncio
+async def test_missing_account_info_reports_failed():
+    pool = FakePool(active=set(), infos={1: None})
+    [outcome] = await _collect(pool, [(1, "1")], concurrency=1)
+    assert outcome.status == "failed"
+    assert pool.killed == [1]
+
+
+def test_apply_refresh_results_updates_in_one_batch(db_session):
+    a = Account(account_id="111", password="x", server="Srv", account_type="personal")
+    b = Account(account_id="222", password="x", server="Srv", account_type="personal", starting_balance=5000.0)
+    db_session.add_all([a, b])
+    db_session.commit()
+
+    outcomes = [
+        RefreshOutcome(a.id, "111", "success", info={"name": "Trader $10K", "balance": 10100.0, "equity": 10050.0, "profit": -50.0}),
+        RefreshOutcome(b.id, "222", "error", error="boom"),
+    ]
+    updated = apply_refresh_results(db_session, outcomes)
+
+    assert set(updated) == {a.id}
+    db_session.refresh(a)
+    db_session.refresh(b)
+    assert a.balance == 10100.0
+    assert a.starting_balance == 10000.0  # parsed from name
+    assert b.balance is None
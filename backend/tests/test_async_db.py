@@ -0,0 +1,42 @@
+"""Executor-backed AsyncDB: DB work leaves the event loop and is serialised per session."""
+import asyncio
+import threading
+import time
+
+from app.models.accounts import Account
+from app.utils.async_helpers import AsyncDB
+
+
+def test_run_executes_off_the_loop_and_serialises(db_session):
+    adb = AsyncDB(db_session)
+    active, overlaps, threads = [0], [], set()
+
+    def work(session, n):
+        threads.add(threading.current_thread().name)
+        active[0] += 1
+        overlaps.append(active[0])
+        time.sleep(0.01)
+        active[0] -= 1
+        return n
+
+    async def main():
+        loop_thread = threading.current_thread().name
+        results = await asyncio.gather(*(adb.run(work, i) for i in range(5)))
+        return loop_thread, results
+
+    loop_thread, results = asyncio.run(main())
+    assert results == [0, 1, 2, 3, 4]
+    assert loop_thread not in threads
+    assert max(overlaps) == 1
+
+
+def test_orm_objects_usable_after_run(db_session):
+    db_session.add(Account(account_id="1001", password="x", server="S", account_type="fund"))
+    db_session.commit()
+    adb = AsyncDB(db_session)
+
+    async def main():
+        acc = await adb.run(lambda s: s.query(Account).one())
+        return acc.account_id
+
+    assert asyncio.run(main()) == "1001"
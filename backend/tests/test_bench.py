@@ -0,0 +1,28 @@
+"""Benchmark harness: generator output, report shape and regression detection."""
+import copy
+
+from bench.run import compare, run_suite
+from bench.synth import Scale, generate
+
+TINY = Scale(accounts=3, snapshots=3_000, trades=600, days=20)
+
+
+def test_suite_runs_on_a_tiny_db_and_flags_regressions(tmp_path):
+    db_path = str(tmp_path / "bench.db")
+    report = run_suite(db_path, TINY, repeat=1)
+    assert report["counts"]["equity_snapshots"] == 3_000 and report["counts"]["trade_records"] == 600
+    assert set(report["results"]) == {
+        "summary", "fund_status", "equity_curve_all", "equity_curve_account_7d", "journal",
+        "trade_history_page", "trade_history_filtered", "pnl_sync_match",
+    }
+    assert all(r["queries"] >= 1 and r["p50_ms"] >= 0 for r in report["results"].values())
+    # The generator reuses a DB built with the same parameters.
+    assert generate(db_path, TINY)["end"] == generate(db_path, TINY)["end"]
+
+    assert compare(report, report) == []
+    slower = copy.deepcopy(report)
+    slower["results"]["journal"]["p50_ms"] = report["results"]["journal"]["p50_ms"] * 2 + 10
+    slower["results"]["summary"]["queries"] += 3
+    problems = compare(slower, report)
+    assert len(problems) == 2 and problems[0].startswith("summary") and problems[1].startswith("journal")
+    assert compare(report, {**report, "scale": {**report["scale"], "trades": 1}})
@@ -0,0 +1,97 @@
+"""Cross-account bulk position operations: filtering, sizing, parallel fan-out."""
+import asyncio
+import time
+
+import pytest
+
+from app.services.bulk_positions import (
+    modify_targets,
+    parse_filter,
+    partial_volume,
+    run_bulk,
+    validate_operation,
+)
+
+
+def _pos(symbol="EURUSD", type_="BUY", magic=234000, comment="TraderDiary", sl=0.0, tp=0.0):
+    return {"ticket": 1, "symbol": symbol, "type": type_, "volume": 1.0, "price_open": 1.1,
+            "sl": sl, "tp": tp, "magic": magic, "comment": comment}
+
+
+def test_filter_matches_broker_suffix_direction_magic_comment():
+    flt = parse_filter({"symbol": "eurusd", "direction": "buy", "magic": 234000, "comment": "diary"})
+    assert flt.matches(_pos(symbol="EURUSD.r"))
+    assert not flt.matches(_pos(symbol="GBPUSD"))
+    assert not flt.matches(_pos(type_="SELL"))
+    assert not flt.matches(_pos(magic=1))
+    assert not flt.matches(_pos(comment="manual"))
+    assert parse_filter(None).matches(_pos())
+
+
+def test_invalid_requests_raise_value_error():
+    with pytest.raises(ValueError):
+        parse_filter({"direction": "LONG"})
+    with pytest.raises(ValueError):
+        validate_operation("hedge", {})
+    with pytest.raises(ValueError):
+        validate_operation("partial_close", {"fraction": 1.5})
+    with pytest.raises(ValueError):
+        validate_operation("modify", {})
+
+
+def test_partial_volume_floors_to_step_and_respects_min():
+    assert partial_volume(1.0, 0.33, 0.01, 0.01) == pytest.approx(0.33)
+    assert partial_volume(0.05, 0.5, 0.01, 0.01) == pytest.approx(0.02)
+    assert partial_volume(1.0, 1.0, 0.01, 0.01) == pytest.approx(1.0)
+
+
+def test_partial_volume_never_closes_a_minimum_lot_position_in_full():
+    assert partial_volume(0.01, 0.5, 0.01, 0.01) == 0.0      # 0.005 floors below the minimum
+    assert partial_volume(0.02, 0.5, 0.01, 0.01) == pytest.approx(0.01)
+    assert partial_volume(0.15, 0.9, 0.1, 0.1) == 0.0        # 0.1 would leave 0.05 open
+
+
+def test_modify_targets_keeps_omitted_levels():
+    pos = _pos(sl=1.09, tp=1.12)
+    assert modify_targets(pos, {"sl": 1.095}) == (1.095, 1.12)
+    assert modify_targets(pos, {"sl_to_entry": True, "tp": 1.13}) == (1.1, 1.13)
+
+
+class FakePool:
+    def __init__(self, active, delay=0.1, fail=()):
+        self.active = set(active)
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+
+    def is_active(self, account_db_id):
+        return account_db_id in self.active
+
+    async def call(self, account_db_id, method, params=None, *, timeout=10.0):
+        self.calls.append((account_db_id, method, params))
+        await asyncio.sleep(self.delay)
+        if account_db_id in self.fail:
+            return {"matched": 2, "succeeded": 1, "failed": 1, "results": []}
+        return {"matched": 2, "succeeded": 2, "failed": 0, "results": []}
+
+
+def test_run_bulk_fans_out_in_parallel_and_reports_per_account():
+    pool = FakePool(active=range(1, 16), delay=0.1, fail={3})
+    started = time.perf_counter()
+    outcomes = asyncio.run(run_bulk(pool, list(range(1, 17)), "close", {"symbol": "XAUUSD"}, {}))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5   # 15 accounts × 0.1s in series would be 1.5s
+    by_id = {o.account_db_id: o for o in outcomes}
+    assert by_id[1].status == "ok" and by_id[1].elapsed_ms >= 90
+    assert by_id[3].status == "partial"
+    assert by_id[16].status == "not_running"
+    assert all(method == "bulk_positions" for _, method, _ in pool.calls)
+    assert pool.calls[0][2]["filter"] == {"symbol": "XAUUSD"}
+
+
+def test_run_bulk_validates_before_calling_workers():
+    pool = FakePool(active=[1])
+    with pytest.raises(ValueError):
+        asyncio.run(run_bulk(pool, [1], "partial_close", {}, {"fraction": 0}))
+    assert pool.calls == []
@@ -0,0 +1,111 @@
+"""Cold archive: moving old rows into per-month files and reading them back transparently."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.accounts import Account
+from app.models.equity_snapshot import EquitySnapshot
+from app.models.trade_record import TradeRecord
+from app.services import trade_history
+from app.services.cold_archive import ColdArchive
+from app.services.trade_history import TradeFilters
+
+NOW = datetime(2026, 6, 15, 12, 0)
+CUTOFF = NOW - timedelta(days=90)
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    arc = ColdArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(trade_history, "cold_archive", arc)
+    yield arc
+    arc.dispose()
+
+
+def _seed(db):
+    acc = Account(account_id="1001", password="x", server="S", account_type="fund")
+    db.add(acc)
+    db.commit()
+    trades = []
+    # One trade every 10 days from January to June; pairs share a timestamp.
+    for i in range(34):
+        trades.append(TradeRecord(
+            account_db_id=acc.id, account_login="1001", symbol="EURUSD", direction="BUY",
+            lot_size=1.0, success=True, order_ticket=i, realized_pnl=float(i),
+            executed_at=datetime(2026, 1, 1) + timedelta(days=10 * (i // 2)),
+        ))
+    trades[3].realized_pnl = None     # still waiting for the P&L sync
+    db.add_all(trades)
+    db.add_all(
+        EquitySnapshot(account_db_id=acc.id, balance=100.0, equity=100.0 + i,
+                       recorded_at=datetime(2026, 1, 1) + timedelta(hours=12 * i))
+        for i in range(400)
+    )
+    db.commit()
+    return acc
+
+
+def _archive_all(arc, db):
+    moved = 0
+    for table in ("equity_snapshots", "trade_records"):
+        while n := arc.archive_chunk(db, table, CUTOFF, limit=7):
+            db.commit()
+            moved += n
+    return moved
+
+
+def test_moves_old_rows_into_month_files_with_manifest(db_session, archive):
+    _seed(db_session)
+    _archive_all(archive, db_session)
+
+    hot = db_session.query(TradeRecord).all()
+    assert all(t.executed_at >= CUTOFF or t.realized_pnl is None for t in hot)
+    assert any(t.order_ticket == 3 for t in hot)                    # pending P&L stays hot
+    assert db_session.query(EquitySnapshot).filter(EquitySnapshot.recorded_at < CUTOFF).count() == 0
+
+    manifest = json.load(open(archive.manifest_path))
+    assert sorted(manifest["months"]) == ["2026-01", "2026-02", "2026-03"]
+    trades_jan = manifest["months"]["2026-01"]["tables"]["trade_records"]
+    assert trades_jan["rows"] == 7 and trades_jan["first"] == "2026-01-01T00:00:00"   # 8 minus the pending one
+    archived = sum(m["tables"]["trade_records"]["rows"] for m in manifest["months"].values())
+    assert archived + len(hot) == 34
+
+
+def test_interrupted_move_is_repeated_without_duplicates(db_session, archive):
+    _seed(db_session)
+    archive.archive_chunk(db_session, "trade_records", CUTOFF, limit=5)
+    db_session.rollback()                      # archive committed, hot delete lost
+    assert db_session.query(TradeRecord).count() == 34
+
+    _archive_all(archive, db_session)
+    with archive.sessions("trade_records") as archived:
+        ids = [t.id for _, s in archived for t in s.query(TradeRecord).all()]
+    assert len(ids) == len(set(ids))
+    assert len(ids) + db_session.query(TradeRecord).count() == 34
+
+
+def test_history_pages_and_export_span_hot_and_archive(db_session, archive, monkeypatch):
+    _seed(db_session)
+    _archive_all(archive, db_session)
+    assert db_session.query(TradeRecord).count() < 34
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = trade_history.page(db_session, TradeFilters(), cursor=cursor, limit=4)
+        seen.extend((t.executed_at, t.id) for t in rows)
+        if cursor is None:
+            break
+    assert len(seen) == 34 and len(set(seen)) == 34
+    assert seen == sorted(seen, reverse=True)
+
+    ranged, _ = trade_history.page(
+        db_session, TradeFilters(date_from=datetime(2026, 2, 1), date_to=datetime(2026, 2, 15)), limit=50,
+    )
+    assert [t.executed_at for t in ranged] == [datetime(2026, 2, 10)] * 2
+
+    monkeypatch.setattr(trade_history, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+    lines = list(trade_history.iter_export(TradeFilters(), "ndjson"))
+    exported = [json.loads(line)["id"] for line in lines]
+    assert sorted(exported) == list(range(1, 35))
@@ -0,0 +1,128 @@
+"""Incremental daily journal stats: trade inserts, closes, balances, rebuild, paging."""
+from datetime import datetime, timedelta
+
+from app.models.accounts import Account
+from app.models.daily_account_stats import DailyAccountStats
+from app.models.trade_record import TradeRecord
+from app.services import daily_stats
+from app.services.cold_archive import ColdArchive
+from app.services.equity_rollups import insert_snapshots_with_rollups
+from app.services.trade_records import record_trades
+
+D1 = datetime(2026, 3, 2, 9, 0)
+D2 = datetime(2026, 3, 3, 9, 0)
+
+
+def _accounts(db, n=2):
+    accs = [Account(account_id=str(1000 + i), password="x", server="S", account_type="fund") for i in range(n)]
+    db.add_all(accs)
+    db.commit()
+    return accs
+
+
+def _trade(acc, at, symbol="EURUSD", direction="BUY", success=True, lots=1.0, risk=100.0, rr=2.0):
+    return {
+        "account_db_id": acc.id, "account_login": acc.account_id, "symbol": symbol,
+        "direction": direction, "lot_size": lots, "risk_amount": risk, "rr_ratio": rr,
+        "success": success, "executed_at": at,
+    }
+
+
+def _snap(acc, at, balance):
+    return {"account_db_id": acc.id, "balance": balance, "equity": balance, "profit": 0.0, "recorded_at": at}
+
+
+def test_trade_inserts_update_day_row(db_session):
+    a, _ = _accounts(db_session)
+    record_trades(db_session, [_trade(a, D1), _trade(a, D1 + timedelta(hours=1), symbol="XAUUSD", direction="SELL", rr=None)])
+    record_trades(db_session, [_trade(a, D1 + timedelta(hours=2), success=False, risk=50.0, rr=3.0)])
+    db_session.commit()
+
+    st = db_session.query(DailyAccountStats).one()
+    assert (st.trade_count, st.success_count, st.buy_count, st.sell_count) == (3, 2, 2, 1)
+    assert st.total_lots == 3.0 and st.total_risk == 200.0
+    assert st.rr_sum / st.rr_count == 2.5
+    assert st.symbols == "EURUSD,XAUUSD"
+    assert db_session.query(TradeRecord).count() == 3
+
+
+def test_journal_page_sums_accounts_and_pages_by_day(db_session):
+    a, b = _accounts(db_session)
+    record_trades(db_session, [_trade(a, D1), _trade(b, D1, symbol="GBPUSD"), _trade(a, D2)])
+    insert_snapshots_with_rollups(db_session, [
+        _snap(a, D1, 1000), _snap(a, D1 + timedelta(hours=5), 1100),
+        _snap(b, D1, 500), _snap(b, D1 + timedelta(hours=5), 450),
+    ])
+    daily_stats.apply_realized_pnl(db_session, a.id, D1, 42.0)
+    db_session.commit()
+
+    first = daily_stats.journal_page(db_session, "2026-01-01", limit=1)
+    assert [d["date"] for d in first] == ["2026-03-03"]
+    assert first[0]["balance_change"] is None
+
+    second = daily_stats.journal_page(db_session, "2026-01-01", before="2026-03-03", limit=1)
+    day = second[0]
+    assert day["date"] == "2026-03-02"
+    assert day["trade_count"] == 2
+    assert sorted(day["symbols"]) == ["EURUSD", "GBPUSD"]
+    assert day["balance_change"] == 50.0        # +100 on a, -50 on b
+    assert day["realized_pnl"] == 42.0
+
+    only_b = daily_stats.journal_page(db_session, "2026-01-01", account_id=b.id)
+    assert [(d["date"], d["balance_change"]) for d in only_b] == [("2026-03-02", -50.0)]
+
+
+def test_rebuild_matches_incremental(db_session):
+    a, _ = _accounts(db_session)
+    rows = [_trade(a, D1), _trade(a, D1, symbol="XAUUSD", direction="SELL", success=False), _trade(a, D2, rr=1.5)]
+    record_trades(db_session, rows)
+    db_session.commit()
+    incremental = daily_stats.journal_page(db_session, "2026-01-01")
+
+    db_session.query(DailyAccountStats).delete()
+    db_session.commit()
+    assert daily_stats.rebuild_daily_stats(db_session) == 2
+    db_session.commit()
+    assert daily_stats.journal_page(db_session, "2026-01-01") == incremental
+
+
+def test_rebuild_runs_once_per_version_even_when_live_rows_landed_first(db_session):
+    a, _ = _accounts(db_session)
+    # History from before the upgrade: written without the incremental hooks.
+    db_session.add(TradeRecord(**_trade(a, D1)))
+    db_session.commit()
+    # A live trade and snapshots land before the startup rebuild runs.
+    record_trades(db_session, [_trade(a, D2)])
+    insert_snapshots_with_rollups(db_session, [_snap(a, D2, 10_000.0), _snap(a, D2 + timedelta(hours=1), 10_100.0)])
+    db_session.commit()
+
+    # D2 has trades and a balance bucket: apply_balances must find the flushed day row.
+    assert daily_stats.rebuild_daily_stats(db_session) == 2
+    db_session.commit()
+    by_day = {d["date"]: d for d in daily_stats.journal_page(db_session, "2026-01-01")}
+    assert by_day["2026-03-02"]["trade_count"] == 1 and by_day["2026-03-03"]["trade_count"] == 1
+    assert db_session.query(DailyAccountStats).filter_by(day="2026-03-03").one().close_balance == 10_100.0
+
+    assert daily_stats.rebuild_daily_stats(db_session) == 0
+
+
+def test_rebuild_counts_trades_moved_to_the_cold_archive(db_session, tmp_path, monkeypatch):
+    arc = ColdArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(daily_stats, "cold_archive", arc)
+    a, _ = _accounts(db_session)
+    record_trades(db_session, [
+        _trade(a, D1, symbol="XAUUSD"), _trade(a, D1 + timedelta(hours=1)), _trade(a, D2, lots=2.0),
+    ])
+    db_session.commit()
+    # Archive only the first trade, so 2026-03-02 straddles the hot and cold tiers.
+    assert arc.archive_chunk(db_session, TradeRecord.__tablename__, D1 + timedelta(minutes=30)) == 1
+    db_session.commit()
+    assert db_session.query(TradeRecord).count() == 2
+
+    assert daily_stats.rebuild_daily_stats(db_session) == 2
+    db_session.commit()
+    rows = {r.day: r for r in db_session.query(DailyAccountStats)}
+    assert rows["2026-03-02"].trade_count == 2 and rows["2026-03-02"].symbols == "EURUSD,XAUUSD"
+    assert rows["2026-03-02"].total_risk == 200.0
+    assert rows["2026-03-03"].trade_count == 1 and rows["2026-03-03"].total_lots == 2.0
+    arc.dispose()
@@ -0,0 +1,172 @@
+"""Online SQLite backups and the streamed, verified restore swap."""
+import gzip
+import json
+import os
+import sqlite3
+import tarfile
+import threading
+
+import pytest
+
+from app.services import db_backup
+
+
+def _make_db(path, rows=2000):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO t (payload) VALUES (?)", [("x" * 200,)] * rows)
+    conn.commit()
+    return conn
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _spool(db_path, data, chunk=1000):
+    spool = db_backup.UploadSpool(str(db_path))
+    for i in range(0, len(data), chunk):
+        spool.write(data[i:i + chunk])
+    return spool, spool.close()
+
+
+def test_backup_includes_uncheckpointed_wal_pages(tmp_path):
+    src = tmp_path / "live.db"
+    conn = _make_db(src)       # stays open, so committed rows sit in -wal
+    dest = tmp_path / "copy.db"
+    db_backup.backup_to(str(src), str(dest), pages=8)
+    conn.close()
+
+    assert _count(dest) == 2000
+    assert not (tmp_path / "copy.db-wal").exists()
+    db_backup.verify(str(dest))
+
+
+def test_backup_completes_while_a_writer_keeps_committing(tmp_path):
+    src = tmp_path / "live.db"
+    _make_db(src).close()
+    stop = threading.Event()
+
+    def writer():
+        w = sqlite3.connect(src, timeout=5)
+        while not stop.is_set():
+            w.execute("INSERT INTO t (payload) VALUES ('y')")
+            w.commit()
+        w.close()
+
+    t = threading.Thread(target=writer)
+    t.start()
+    try:
+        dest = tmp_path / "copy.db"
+        db_backup.backup_to(str(src), str(dest), pages=1, pause=0.002, max_restarts=2)
+    finally:
+        stop.set()
+        t.join()
+    assert _count(dest) >= 2000
+    db_backup.verify(str(dest))
+
+
+def test_compressed_backup_round_trips_through_restore(tmp_path):
+    live = tmp_path / "traderdiary.db"
+    _make_db(live).close()
+    packed = db_backup.create_backup(str(live), compress=True)
+    assert packed.endswith(".db.gz")
+
+    with open(packed, "rb") as f:
+        data = f.read()
+    spool, restored = _spool(live, data, chunk=7)
+    assert spool.bytes_in == len(data) and spool.bytes_out > len(data)
+    db_backup.verify(restored)
+    assert _count(restored) == 2000
+
+
+def test_verify_rejects_garbage_and_truncated_files(tmp_path):
+    live = tmp_path / "traderdiary.db"
+    _make_db(live).close()
+
+    _, junk = _spool(live, b"definitely not sqlite" * 100)
+    with pytest.raises(db_backup.InvalidBackupError, match="not a SQLite"):
+        db_backup.verify(junk)
+
+    raw = live.read_bytes()
+    _, truncated = _spool(live, raw[: len(raw) // 2])
+    with pytest.raises(db_backup.InvalidBackupError):
+        db_backup.verify(truncated)
+
+    spool = db_backup.UploadSpool(str(live))
+    spool.write(gzip.compress(raw)[:500])
+    with pytest.raises(db_backup.InvalidBackupError, match="Truncated"):
+        spool.close()
+    spool.discard()
+
+
+def test_swap_replaces_file_and_drops_stale_wal(tmp_path):
+    live = tmp_path / "traderdiary.db"
+    _make_db(live, rows=5).close()
+    (tmp_path / "traderdiary.db-wal").write_bytes(b"stale frames")
+    (tmp_path / "traderdiary.db-shm").write_bytes(b"stale index")
+
+    other = tmp_path / "backup.db"
+    _make_db(other, rows=42).close()
+    _, staged = _spool(live, other.read_bytes())
+    db_backup.swap_in(str(live), staged)
+
+    assert _count(live) == 42
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["backup.db", "traderdiary.db"]
+
+
+def _archive(directory, ids):
+    directory.mkdir()
+    (directory / "manifest.json").write_text(json.dumps({"version": 1, "months": {"2026-01": {}}}))
+    conn = sqlite3.connect(directory / "2026-01.db")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany("INSERT INTO t (id, payload) VALUES (?, 'old')", [(i,) for i in ids])
+    conn.commit()
+    conn.close()
+
+
+def test_bundle_carries_the_archive_and_restore_replaces_it(tmp_path):
+    live = tmp_path / "traderdiary.db"
+    _make_db(live, rows=10).close()
+    # Ids 1-3 were moved after the hot snapshot would have been taken: kept once, in the archive.
+    _archive(tmp_path / "archive", ids=range(1, 4))
+    assert db_backup.snapshot_archive(str(tmp_path / "none"), str(live)) is None
+
+    hot = db_backup.create_backup(str(live))
+    archived = db_backup.snapshot_archive(str(tmp_path / "archive"), str(live))
+    bundle = db_backup.create_bundle(hot, archived, compress=True)
+    assert bundle.endswith(".tar.gz") and not os.path.exists(hot) and not os.path.exists(archived)
+
+    with open(bundle, "rb") as f:
+        spool, spooled = _spool(live, f.read())
+    db_file, archive = db_backup.unpack(spooled, str(live))
+    spool.discard()
+    assert _count(db_file) == 7 and _count(os.path.join(archive, "2026-01.db")) == 3
+
+    db_backup.swap_in(str(live), db_file)
+    aside = db_backup.swap_archive(str(tmp_path / "archive"), archive)
+    assert _count(live) == 7 and _count(tmp_path / "archive" / "2026-01.db") == 3
+    assert sorted(os.listdir(aside)) == ["2026-01.db", "manifest.json"]
+
+    # A plain database predates any archive: the current one is set aside, not merged.
+    plain, none = db_backup.unpack(db_backup.create_backup(str(live)), str(live))
+    assert none is None
+    assert db_backup.swap_archive(str(tmp_path / "archive"), None) and not (tmp_path / "archive").exists()
+    os.remove(plain)
+
+
+def test_unpack_rejects_unexpected_bundle_entries(tmp_path):
+    live = tmp_path / "traderdiary.db"
+    _make_db(live, rows=1).close()
+    bundle = tmp_path / "evil.tar"
+    with tarfile.open(bundle, "w") as tar:
+        tar.add(live, arcname=db_backup.BUNDLE_DB)
+        tar.add(live, arcname="../outside.db")
+    with pytest.raises(db_backup.InvalidBackupError, match="Unexpected entry"):
+        db_backup.unpack(str(bundle), str(live))
+    assert not any(p.name.startswith(".traderdiary-") for p in tmp_path.iterdir())
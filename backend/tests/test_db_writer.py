@@ -0,0 +1,111 @@
+"""Single-writer actor: batching, executemany merging, failure isolation, WAL."""
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, apply_sqlite_pragmas
+from app.services.db_writer import DBWriter
+
+
+@pytest.fixture
+def file_db(tmp_path):
+    import app.models  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'w.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(threading.current_thread().name))
+    yield engine, sessionmaker(bind=engine), commits
+    engine.dispose()
+
+
+def _snap(account_db_id, equity):
+    return {"account_db_id": account_db_id, "balance": 100.0, "equity": equity, "profit": 0.0}
+
+
+def test_engine_runs_in_wal_mode(file_db):
+    engine, _, _ = file_db
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+def test_burst_of_inserts_lands_in_one_commit(file_db):
+    from app.models.equity_snapshot import EquitySnapshot
+
+    engine, factory, commits = file_db
+    writer = DBWriter(factory, linger=0.05)
+
+    async def burst():
+        await asyncio.gather(*(writer.insert(EquitySnapshot.__table__, [_snap(1, float(i))]) for i in range(20)))
+
+    asyncio.run(burst())
+    writer.stop()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM equity_snapshots")).scalar() == 20
+    assert commits == ["db-writer"]
+    assert writer.batches == 1 and writer.intents == 20
+
+
+def test_failing_intent_only_fails_its_own_caller(file_db):
+    from app.models.equity_snapshot import EquitySnapshot
+
+    engine, factory, _ = file_db
+    writer = DBWriter(factory, linger=0.05)
+
+    def boom(_session):
+        raise RuntimeError("bad intent")
+
+    good = writer.submit_insert(EquitySnapshot.__table__, [_snap(1, 1.0)])
+    bad = writer.submit(boom)
+    also_good = writer.submit(lambda s: s.execute(text("SELECT 1")).scalar())
+
+    assert good.result(timeout=5) is None
+    assert also_good.result(timeout=5) == 1
+    with pytest.raises(RuntimeError):
+        bad.result(timeout=5)
+    writer.stop()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM equity_snapshots")).scalar() == 1
+
+
+def test_stop_drains_pending_intents(file_db):
+    from app.models.equity_snapshot import EquitySnapshot
+
+    engine, factory, _ = file_db
+    writer = DBWriter(factory, linger=0.0)
+    futures = [writer.submit_insert(EquitySnapshot.__table__, [_snap(2, float(i))]) for i in range(50)]
+    writer.stop()
+    assert all(f.done() for f in futures)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM equity_snapshots")).scalar() == 50
+
+
+def test_cancelled_caller_does_not_kill_writer(file_db):
+    _, factory, _ = file_db
+    writer = DBWriter(factory)
+    gate = threading.Event()
+
+    fut = writer.submit(lambda _s: gate.wait(5))
+    assert fut.cancel()
+    gate.set()
+    assert writer.submit(lambda _s: 42).result(timeout=5) == 42
+    writer.stop()
+
+
+def test_exclusive_intent_runs_between_batches(file_db):
+    from app.models.equity_snapshot import EquitySnapshot
+
+    _, factory, commits = file_db
+    writer = DBWriter(factory, linger=0.05)
+    before = writer.submit_insert(EquitySnapshot.__table__, [_snap(1, 1.0)])
+    seen = writer.submit_exclusive(lambda: len(commits))
+    after = writer.submit_insert(EquitySnapshot.__table__, [_snap(1, 2.0)])
+
+    assert after.result(timeout=5) is None and before.done()
+    assert seen.result(timeout=5) == 1      # the earlier batch committed, the later one had not
+    assert len(commits) == 2
+    writer.stop()
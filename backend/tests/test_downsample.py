@@ -0,0 +1,26 @@
+"""LTTB downsampling keeps endpoints, size bound and extremes."""
+import math
+
+from app.services.downsample import lttb_indices
+
+
+def test_short_series_returned_unchanged():
+    assert lttb_indices([0, 1, 2], [5, 6, 7], 10) == [0, 1, 2]
+
+
+def test_output_size_and_endpoints():
+    xs = list(range(10_000))
+    ys = [math.sin(x / 200) for x in xs]
+    keep = lttb_indices(xs, ys, 500)
+    assert len(keep) == 500
+    assert keep[0] == 0 and keep[-1] == 9_999
+    assert keep == sorted(set(keep))
+
+
+def test_spikes_survive_downsampling():
+    xs = list(range(5_000))
+    ys = [100.0] * 5_000
+    ys[1234] = 180.0     # equity spike
+    ys[3777] = 20.0      # drawdown trough
+    keep = set(lttb_indices(xs, ys, 50))
+    assert 1234 in keep and 3777 in keep
@@ -0,0 +1,130 @@
+"""Multi-resolution equity rollups: bucketing, incremental merge, tiers, retention."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+
+from app.models.accounts import Account
+from app.models.equity_rollup import EquityRollup
+from app.models.equity_snapshot import EquitySnapshot
+from app.services import equity_rollups as er
+
+T0 = datetime(2026, 3, 2, 10, 0, 0)
+
+
+def _row(at, equity, balance=1000.0, account_db_id=1):
+    return {"account_db_id": account_db_id, "balance": balance, "equity": equity, "profit": None, "recorded_at": at}
+
+
+def _account(db):
+    acc = Account(account_id="1001", password="x", server="S", account_type="personal")
+    db.add(acc)
+    db.commit()
+    return acc
+
+
+def test_bucket_start_floors_to_utc_boundaries():
+    at = datetime(2026, 3, 2, 10, 7, 31)
+    assert er.bucket_start(at, 300) == datetime(2026, 3, 2, 10, 5)
+    assert er.bucket_start(at, 3600) == datetime(2026, 3, 2, 10, 0)
+    assert er.bucket_start(at, 86400) == datetime(2026, 3, 2)
+
+
+def test_aggregate_builds_ohlc_per_resolution():
+    rows = [_row(T0 + timedelta(minutes=m), eq) for m, eq in [(0, 100), (1, 120), (2, 90), (3, 110), (6, 105)]]
+    buckets = {(b["resolution"], b["bucket_start"]): b for b in er.aggregate(rows)}
+    five = buckets[("5m", T0)]
+    assert (five["open_equity"], five["high_equity"], five["low_equity"], five["close_equity"]) == (100, 120, 90, 110)
+    assert five["samples"] == 4
+    assert buckets[("5m", T0 + timedelta(minutes=5))]["samples"] == 1
+    assert buckets[("1h", T0)]["close_equity"] == 105
+    assert buckets[("1d", datetime(2026, 3, 2))]["samples"] == 5
+
+
+def test_incremental_upserts_merge_out_of_order_batches(db_session):
+    acc = _account(db_session)
+    er.insert_snapshots_with_rollups(db_session, [_row(T0 + timedelta(minutes=2), 110, account_db_id=acc.id)])
+    er.insert_snapshots_with_rollups(db_session, [
+        _row(T0 + timedelta(minutes=3), 95, account_db_id=acc.id),
+        _row(T0, 100, account_db_id=acc.id),   # late arrival becomes the open
+    ])
+    db_session.commit()
+
+    hour = db_session.query(EquityRollup).filter_by(resolution="1h").one()
+    assert (hour.open_equity, hour.high_equity, hour.low_equity, hour.close_equity) == (100, 110, 95, 95)
+    assert hour.samples == 3
+    assert db_session.query(EquitySnapshot).count() == 3
+
+
+def test_select_tier_uses_finest_tier_within_budget():
+    now = datetime(2026, 3, 2)
+    assert er.select_tier(now - timedelta(hours=2), now, 500, now=now) == er.TIER_RAW
+    assert er.select_tier(now - timedelta(days=1), now, 500, now=now) == "5m"
+    assert er.select_tier(now - timedelta(days=14), now, 500, now=now) == "1h"
+    assert er.select_tier(now - timedelta(days=365), now, 500, now=now) == "1d"
+
+
+def test_raw_tier_skipped_past_retention(monkeypatch):
+    monkeypatch.setattr(er, "RAW_SNAPSHOT_RETENTION_DAYS", 7)
+    now = datetime(2026, 3, 2)
+    start = now - timedelta(days=10)
+    assert er.select_tier(start, start + timedelta(hours=1), 500, now=now) == "5m"
+
+
+def test_prune_keeps_rollups_and_backfill_rebuilds(db_session, monkeypatch):
+    monkeypatch.setattr(er, "RAW_SNAPSHOT_RETENTION_DAYS", 7)
+    acc = _account(db_session)
+    now = datetime(2026, 3, 20)
+    old, recent = now - timedelta(days=10), now - timedelta(days=1)
+    for at, eq in [(old, 100), (old + timedelta(minutes=1), 101), (recent, 120)]:
+        db_session.add(EquitySnapshot(account_db_id=acc.id, balance=1000, equity=eq, recorded_at=at))
+    db_session.commit()
+
+    assert er.backfill_rollups(db_session) == 3
+    assert er.backfill_rollups(db_session) == 0    # only runs on an empty rollup table
+    assert er.prune_raw_snapshots(db_session, now=now) == 2
+    db_session.commit()
+
+    assert db_session.query(EquitySnapshot).count() == 1
+    daily = er.query_rollups(db_session, "1d", old, now, acc.id)
+    assert [d.close_equity for d in daily] == [101, 120]
+
+
+def test_backfill_runs_in_resumable_account_month_slices(db_session):
+    acc = _account(db_session)
+    other = Account(account_id="1002", password="x", server="S", account_type="personal")
+    db_session.add(other)
+    db_session.commit()
+    history = [(acc.id, datetime(2026, 1, 31, 23, 0)), (acc.id, datetime(2026, 2, 1, 0, 0)),
+               (acc.id, datetime(2026, 2, 14)), (other.id, datetime(2026, 1, 5))]
+    for aid, at in history:
+        db_session.add(EquitySnapshot(account_db_id=aid, balance=1000, equity=1000, recorded_at=at))
+    # A legacy CURRENT_TIMESTAMP-format row right on a month boundary.
+    db_session.execute(EquitySnapshot.__table__.insert().values(
+        account_db_id=acc.id, balance=1000, equity=1000, recorded_at=None))
+    db_session.execute(text("UPDATE equity_snapshots SET recorded_at = '2026-03-01 00:00:00' WHERE recorded_at IS NULL"))
+    # Rolled up live after the upgrade: must not be counted again.
+    er.insert_snapshots_with_rollups(db_session, [_row(datetime(2026, 3, 10), 1000, account_db_id=acc.id)])
+    db_session.commit()
+
+    # acc Jan, then acc Feb — which also takes the boundary row: its shorter string sorts first.
+    assert [er.backfill_slice(db_session) for _ in range(2)] == [1, 3]
+    db_session.commit()
+    assert er.backfill_rollups(db_session) == 1                            # resumes: other Jan
+    assert er.backfill_slice(db_session) is None and er.backfill_done(db_session)
+
+    samples = dict(
+        db_session.query(EquityRollup.account_db_id, func.sum(EquityRollup.samples))
+        .filter(EquityRollup.resolution == "1d").group_by(EquityRollup.account_db_id).all()
+    )
+    assert samples == {acc.id: 5, other.id: 1}
+
+
+def test_retention_is_opt_in_and_waits_for_the_backfill(db_session, monkeypatch):
+    assert er.raw_cutoff(datetime(2026, 3, 2)) is None          # default: keep raw history
+    monkeypatch.setattr(er, "RAW_SNAPSHOT_RETENTION_DAYS", 7)
+    acc = _account(db_session)
+    db_session.add(EquitySnapshot(account_db_id=acc.id, balance=1000, equity=1000, recorded_at=datetime(2026, 1, 1)))
+    db_session.commit()
+    assert er.prune_raw_snapshots(db_session, now=datetime(2026, 3, 2)) == 0
+    er.backfill_rollups(db_session)
+    assert er.prune_raw_snapshots(db_session, now=datetime(2026, 3, 2)) == 1
@@ -0,0 +1,74 @@
+"""Batch-trade stage timings: linked to the trade record, reported as percentiles."""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.accounts import Account
+from app.models.execution_timing import ExecutionTiming
+from app.models.trade_record import TradeRecord
+from app.routes import analytics
+from app.services.execution_timings import StageTimer
+from app.services.trade_records import record_timed_trade, trade_record_row
+
+
+def _accounts(db_session):
+    accounts = [Account(account_id=str(100 + i), password="x", server=server, account_type="personal")
+                for i, server in enumerate(("Alpha-Live", "Alpha-Live", "Beta-Real"))]
+    db_session.add_all(accounts)
+    db_session.commit()
+    return accounts
+
+
+def _timed(db_session, account, order_ms, fill=1.10012, route="v2"):
+    timer = StageTimer(route, started=0.0)
+    timer.add("connect", 1.0)
+    timer.add("order", order_ms)
+    timer.fill({"success": True, "price": fill, "requested_price": 1.10010}, "BUY", 0.00001)
+    timer.saving()
+    row = trade_record_row(account, "EURUSD", "BUY", {"lot_size": 1.0}, True, order_ticket=order_ms)
+    record_timed_trade(db_session, row, timer, account.server)
+
+
+def test_timing_row_is_linked_to_its_trade_record(db_session):
+    acc = _accounts(db_session)[0]
+    _timed(db_session, acc, 42.0)
+    db_session.commit()
+
+    timing = db_session.query(ExecutionTiming).one()
+    trade = db_session.query(TradeRecord).one()
+    assert timing.trade_record_id == trade.id and timing.server == "Alpha-Live" and timing.route == "v2"
+    assert timing.order_ms == 42.0 and timing.resolve_ms is None
+    assert timing.db_ms >= 0 and timing.total_ms >= timing.order_ms
+    assert timing.requested_price == 1.10010 and timing.fill_price == 1.10012
+    assert timing.slippage_points == pytest.approx(2.0)
+
+
+def test_latency_report_per_stage_server_and_account(db_session):
+    a, b, c = _accounts(db_session)
+    for ms in range(1, 101):
+        _timed(db_session, (a, b)[ms % 2], float(ms))
+    _timed(db_session, c, 500.0, fill=1.10008)
+    _timed(db_session, a, 7.0, route="v2_ticket")
+    db_session.commit()
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/analytics")
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    body = client.get("/api/analytics/execution-latency?route=v2").json()
+    assert body["orders"] == 101
+    assert body["stages"]["order"]["p50"] == 51.0 and body["stages"]["order"]["p99"] > 99
+    assert body["stages"]["resolve"] == {"count": 0, "p50": None, "p95": None, "p99": None}
+    assert body["by_server"]["Alpha-Live"]["orders"] == 100
+    assert body["by_server"]["Beta-Real"]["stages"]["order"]["p50"] == 500.0
+    assert set(body["by_account"]) == {"100", "101", "102"}
+    assert body["slippage_points"]["p50"] == pytest.approx(2.0)
+
+    mixed = client.get("/api/analytics/execution-latency").json()
+    assert mixed["orders"] == 102 and {r: g["orders"] for r, g in mixed["by_route"].items()} == {"v2": 101, "v2_ticket": 1}
+    assert mixed["by_route"]["v2_ticket"]["stages"]["order"]["p50"] == 7.0
+
+    only = client.get(f"/api/analytics/execution-latency?account_id={c.id}").json()
+    assert only["orders"] == 1 and only["slippage_points"]["p50"] == pytest.approx(-2.0)
@@ -0,0 +1,102 @@
+"""Cross-account exposure book: delta updates, grouping and pre-trade warnings."""
+import asyncio
+
+import pytest
+
+from app.services.exposure import ExposureBook, exposure_limits
+from app.services.symbol_resolver import canonical_symbol
+
+
+def _pos(ticket, symbol, side, volume, price, sl=0.0, size=100_000):
+    return {"ticket": ticket, "symbol": symbol, "type": side, "volume": volume,
+            "price_open": price, "sl": sl, "contract_size": size, "profit": 0.0}
+
+
+def _tick(*positions):
+    return {"event": "tick", "data": {"account_info": {"equity": 1.0}, "positions": list(positions)}}
+
+
+@pytest.mark.parametrize("name,expected", [
+    ("EURUSD.m", "EURUSD"), ("EURUSDm", "EURUSD"), ("EURUSD.cmd", "EURUSD"),
+    ("GOLD", "XAUUSD"), ("XAU/USD", "XAUUSD"), ("XAUEUR", "XAUEUR"), ("USTEC", "NAS100"),
+])
+def test_canonical_symbol(name, expected):
+    assert canonical_symbol(name) == expected
+
+
+def test_ticks_apply_only_position_deltas():
+    book = ExposureBook()
+    long_a = _pos(1, "EURUSD.m", "BUY", 1.0, 1.1000, sl=1.0950)
+    assert book.handle_event(1, _tick(long_a)) == {"EURUSD"}
+    assert book.handle_event(2, _tick(_pos(9, "EURUSDi", "SELL", 0.4, 1.1010))) == {"EURUSD"}
+
+    eur = book.symbol_totals()["EURUSD"]
+    assert eur["net_lots"] == 0.6 and eur["long_lots"] == 1.0 and eur["short_lots"] == 0.4
+    assert eur["open_risk"] == 500.0 and eur["unprotected"] == 1 and eur["positions"] == 2
+
+    applied = book.deltas_applied
+    assert book.handle_event(1, _tick(long_a)) == set()                      # unchanged tick
+    assert book.deltas_applied == applied
+
+    # SL moved to break-even → no more risk; then account 2's worker exits.
+    assert book.handle_event(1, _tick({**long_a, "sl": 1.1000})) == {"EURUSD"}
+    assert book.symbol_totals()["EURUSD"]["open_risk"] == 0.0
+    assert book.handle_event(2, {"event": "health", "data": {"state": "exited"}}) == {"EURUSD"}
+    assert book.symbol_totals()["EURUSD"]["net_lots"] == 1.0
+    assert list(book.account_totals()) == [1]
+
+    assert book.handle_event(1, _tick()) == {"EURUSD"}                       # closed
+    assert book.symbol_totals() == {} and book.total_open_risk() == 0
+
+
+def test_groups_and_pre_trade_warnings():
+    book = ExposureBook()
+    book.handle_event(1, _tick(_pos(1, "GOLD", "BUY", 2.0, 2000.0, sl=1990.0, size=100)))
+    book.handle_event(2, _tick(_pos(2, "XAUUSD.r", "BUY", 1.0, 2000.0, sl=1995.0, size=100)))
+    book.handle_event(3, _tick(_pos(3, "XAUUSD", "SELL", 0.5, 2001.0, sl=2011.0, size=100)))
+
+    groups = book.group_totals({1: "FTMO", 2: "FTMO"})
+    assert groups["FTMO"]["XAUUSD"]["net_lots"] == 3.0 and groups["FTMO"]["XAUUSD"]["open_risk"] == 2500.0
+    assert groups["personal"]["XAUUSD"]["net_lots"] == -0.5
+    assert book.total_open_risk() == 3000.0
+
+    # Adding 1 lot long takes net 2.5 → 3.5; reducing orders never warn.
+    assert book.check([("XAUUSDm", "BUY", 1.0, 100.0)], max_net_lots=3.0) == [
+        "XAUUSD: combined net exposure would be +3.50 lots (limit 3)"
+    ]
+    assert book.check([("GOLD", "SELL", 1.0, 100.0)], max_net_lots=2.0) == []
+    warnings = book.check([("EURUSD", "BUY", 1.0, 250.0)], max_net_lots=3.0, max_open_risk=3200.0)
+    assert warnings == ["Combined open risk would be 3,250.00 (limit 3,200.00)"]
+
+    assert exposure_limits({"exposure_max_net_lots": "5", "exposure_max_open_risk": "bad"}) == (5.0, None)
+
+
+def test_changes_are_published_to_subscribers():
+    async def scenario():
+        published = []
+
+        class FakePool:
+            def __init__(self):
+                self.queue = asyncio.Queue()
+
+            async def subscribe(self):
+                return self.queue
+
+            async def unsubscribe(self, _queue):
+                pass
+
+            async def publish(self, aid, event):
+                published.append((aid, event))
+
+        pool = FakePool()
+        book = ExposureBook()
+        await book.start(pool)
+        for _ in range(3):
+            pool.queue.put_nowait((7, _tick(_pos(1, "EURUSD", "BUY", 1.0, 1.1, sl=1.099))))
+        await asyncio.sleep(0.05)
+        await book.stop()
+        return published
+
+    (aid, event), = asyncio.run(scenario())
+    assert aid == 7 and event["event"] == "exposure"
+    assert event["data"]["symbols"]["EURUSD"]["open_risk"] == 100.0
@@ -40,3 +40,17 @@ def test_no_route_imports_from_another_route():
         if "from app.routes" in text or "import app.routes" in text:
             offenders.append(py.name)
     assert not offenders, f"Route files importing from other routes: {offenders}"
+
+
+def test_worker_process_does_not_load_master_services():
+    """The per-account worker must stay light: no writer, archive, stats or numpy."""
+    import os
+    import subprocess
+    import sys
+    heavy = ("numpy", "app.services.db_writer", "app.services.cold_archive", "app.services.trade_stats",
+             "app.services.daily_stats", "app.services.pnl_sync", "app.services.symbol_catalog")
+    code = f"import sys, app.workers.mt5_worker; print([m for m in {heavy!r} if m in sys.modules])"
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", code], cwd=backend, env=os.environ.copy(),
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,66 @@
+"""Live account state from worker ticks: overlay reads and coalesced write-through."""
+import asyncio
+
+from app.models.accounts import Account
+from app.routes import analytics
+from app.services import live_state as ls
+from app.services.live_state import LiveStateStore
+
+
+def _tick(equity, balance=10_000.0, margin=500.0, positions=()):
+    return {"event": "tick", "data": {
+        "ts": "2026-03-02T10:00:00Z",
+        "account_info": {"balance": balance, "equity": equity, "profit": equity - balance, "margin": margin},
+        "positions": list(positions),
+    }}
+
+
+def test_ticks_coalesce_into_one_bulk_update(db_session, monkeypatch):
+    a = Account(account_id="1", password="x", server="S", account_type="fund", balance=1.0, equity=1.0)
+    b = Account(account_id="2", password="x", server="S", account_type="fund", balance=2.0, equity=2.0)
+    db_session.add_all([a, b])
+    db_session.commit()
+
+    batches = []
+
+    class FakeWriter:
+        async def run(self, fn):
+            batches.append(fn)
+            fn(db_session)
+            db_session.commit()
+
+    monkeypatch.setattr(ls, "db_writer", FakeWriter())
+    store = LiveStateStore()
+    for equity in (10_010, 10_020, 10_030):
+        store.handle_event(a.id, _tick(equity))
+    store.handle_event(b.id, _tick(5_000, balance=5_000))
+    asyncio.run(store.flush())
+
+    assert len(batches) == 1 and store.rows_written == 2
+    db_session.expire_all()
+    assert db_session.get(Account, a.id).equity == 10_030
+    assert db_session.get(Account, b.id).balance == 5_000
+
+    store.handle_event(b.id, _tick(5_000, balance=5_000))          # unchanged → nothing pending
+    asyncio.run(store.flush())
+    assert len(batches) == 1
+
+
+def test_summary_and_fund_status_overlay_live_values(db_session, monkeypatch):
+    live = Account(account_id="1", password="x", server="S", account_type="personal", balance=100.0, equity=100.0, profit=0.0)
+    idle = Account(account_id="2", password="x", server="S", account_type="personal", balance=50.0, equity=40.0, profit=-10.0)
+    db_session.add_all([live, idle])
+    db_session.commit()
+
+    store = LiveStateStore()
+    store.handle_event(live.id, _tick(10_250, positions=[{"ticket": 7, "symbol": "EURUSD"}]))
+    monkeypatch.setattr(analytics, "live_state", store)
+
+    summary = analytics._summary(db_session)
+    assert summary["total_equity"] == 10_290 and summary["total_balance"] == 10_050
+    assert summary["live_accounts"] == 1
+    assert store.get(live.id).margin_used_pct == 5.0
+    assert store.get(live.id).positions[0]["ticket"] == 7
+
+    store.handle_event(live.id, {"event": "health", "data": {"state": "exited"}})
+    assert analytics._summary(db_session)["total_equity"] == 140.0
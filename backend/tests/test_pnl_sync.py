@@ -0,0 +1,196 @@
+"""Watermark-based deal mirroring and realized-P&L sync over the worker pool."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, apply_sqlite_pragmas
+
+from app.models.accounts import Account
+from app.models.daily_account_stats import DailyAccountStats
+from app.models.deal import Deal
+from app.models.trade_record import TradeRecord
+from app.services import deal_history, pnl_sync
+from app.services.db_writer import DBWriter
+from app.services.pnl_sync import PendingTrade, match_closing_deals
+
+T0 = datetime(2026, 3, 2, 9, 0)
+EPOCH = datetime(1970, 1, 1)
+
+
+def _ts(dt):
+    return int((dt - EPOCH).total_seconds())
+
+
+def _deal(ticket, order, entry, profit=0.0, time=0, position_id=None, price=1.1, symbol="EURUSD", type=0):
+    return {"ticket": ticket, "order": order, "position_id": position_id or order, "entry": entry,
+            "profit": profit, "commission": -1.0, "swap": 0.0, "price": price, "time": time,
+            "symbol": symbol, "type": type, "volume": 1.0, "sl": 1.09, "tp": 1.12}
+
+
+class FakePool:
+    def __init__(self, active, deals):
+        self.active = set(active)
+        self.deals = deals
+        self.calls = []
+
+    def active_account_ids(self):
+        return set(self.active)
+
+    async def call(self, account_db_id, method, params=None, *, timeout=10.0):
+        assert method == "history_deals"
+        self.calls.append((account_db_id, params["from_ts"]))
+        return [d for d in self.deals.get(account_db_id, []) if d["time"] >= params["from_ts"]]
+
+
+@pytest.fixture
+def wired(tmp_path, monkeypatch):
+    # Reads and the writer run on different threads, so they need their own
+    # connections (the in-memory db_session shares one).
+    import app.models  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    writer = DBWriter(factory, linger=0)
+    monkeypatch.setattr(pnl_sync, "SessionLocal", factory)
+    monkeypatch.setattr(pnl_sync, "db_writer", writer)
+    db = factory()
+    yield db
+    db.close()
+    writer.stop()
+    engine.dispose()
+
+
+def test_match_sums_partial_closes_and_ignores_entries():
+    pending = [PendingTrade(1, 100, T0), PendingTrade(2, 200, T0), PendingTrade(3, 300, T0)]
+    deals = [
+        _deal(1, 100, entry=0, profit=0.0, time=10),                       # opening deal
+        _deal(2, 901, entry=1, profit=30.0, time=20, position_id=100),     # partial close by position
+        _deal(3, 902, entry=1, profit=20.0, time=30, position_id=100, price=1.2),
+        _deal(4, 200, entry=1, profit=-5.0, time=40),                      # legacy order match
+    ]
+    updates = {u["id"]: u for u in match_closing_deals(pending, deals)}
+    assert set(updates) == {1, 2}
+    assert updates[1]["realized_pnl"] == 48.0 and updates[1]["close_price"] == 1.2
+    assert updates[1]["closed_at"] == datetime.fromtimestamp(30)
+    assert updates[2]["realized_pnl"] == -6.0
+
+
+@pytest.mark.asyncio
+async def test_sync_all_is_incremental_and_bulk_applied(wired, monkeypatch):
+    db = wired
+    monkeypatch.setattr(pnl_sync, "DEALS_BACKFILL_DAYS", 0)
+    a = Account(account_id="1", password="x", server="S", account_type="fund")
+    b = Account(account_id="2", password="x", server="S", account_type="fund")
+    idle = Account(account_id="3", password="x", server="S", account_type="fund")
+    db.add_all([a, b, idle])
+    db.commit()
+    db.add_all([
+        TradeRecord(account_db_id=a.id, account_login="1", symbol="EURUSD", direction="BUY",
+                    lot_size=1.0, success=True, order_ticket=100, executed_at=T0),
+        TradeRecord(account_db_id=a.id, account_login="1", symbol="EURUSD", direction="BUY",
+                    lot_size=1.0, success=True, order_ticket=101, executed_at=T0 + timedelta(hours=1)),
+        TradeRecord(account_db_id=b.id, account_login="2", symbol="XAUUSD", direction="SELL",
+                    lot_size=1.0, success=True, order_ticket=200, executed_at=T0),
+    ])
+    db.commit()
+
+    close_a = _ts(T0 + timedelta(hours=2))
+    pool = FakePool({a.id, b.id, idle.id}, {
+        a.id: [_deal(1, 555, entry=1, profit=101.0, time=close_a, position_id=100)],
+        b.id: [_deal(2, 200, entry=1, profit=-49.0, time=close_a + 5)],
+    })
+    results = {r.account_db_id: r for r in await pnl_sync.sync_all(pool)}
+
+    assert results[a.id].synced == 1 and results[b.id].synced == 1
+    assert results[idle.id].pending == 0 and results[idle.id].error is None
+    assert sorted(aid for aid, _ in pool.calls) == [a.id, b.id, idle.id]     # idle still mirrored
+    assert dict(pool.calls)[a.id] == _ts(T0 - timedelta(days=1))           # first sync: no watermark
+    assert db.query(Deal).count() == 2
+
+    db.expire_all()
+    pnl = {t.order_ticket: t.realized_pnl for t in db.query(TradeRecord)}
+    assert pnl == {100: 100.0, 101: None, 200: -50.0}
+    assert db.get(Account, a.id).deals_synced_at == close_a
+    day = db.query(DailyAccountStats).filter_by(account_db_id=a.id).one()
+    assert day.closed_count == 1 and day.realized_pnl == 100.0
+
+    # Second pass fetches from the watermark (minus overlap) and doesn't double-apply.
+    pool.calls.clear()
+    pool.deals[a.id].append(_deal(3, 556, entry=1, profit=11.0, time=close_a + 60, position_id=101))
+    results = {r.account_db_id: r for r in await pnl_sync.sync_all(pool)}
+    assert dict(pool.calls)[a.id] == close_a - pnl_sync.PNL_SYNC_OVERLAP_SECONDS
+    assert results[a.id].synced == 1 and results[a.id].deals == 1          # re-delivered deal ignored
+    db.expire_all()
+    assert db.query(DailyAccountStats).filter_by(account_db_id=a.id).one().realized_pnl == 110.0
+    assert db.get(Account, a.id).deals_synced_at == close_a + 60
+
+
+@pytest.mark.asyncio
+async def test_worker_errors_are_reported_per_account(wired):
+    db = wired
+    acc = Account(account_id="1", password="x", server="S", account_type="fund")
+    db.add(acc)
+    db.commit()
+    db.add(TradeRecord(account_db_id=acc.id, account_login="1", symbol="EURUSD", direction="BUY",
+                       lot_size=1.0, success=True, order_ticket=7, executed_at=T0))
+    db.commit()
+
+    class BrokenPool(FakePool):
+        async def call(self, *a, **kw):
+            raise RuntimeError("terminal gone")
+
+    (result,) = await pnl_sync.sync_all(BrokenPool({acc.id}, {}))
+    assert result.error == "terminal gone" and result.synced == 0
+    db.expire_all()
+    assert db.get(Account, acc.id).deals_synced_at is None
+
+
+@pytest.mark.asyncio
+async def test_late_trade_record_matches_from_mirror(wired):
+    db = wired
+    acc = Account(account_id="1", password="x", server="S", account_type="fund")
+    db.add(acc)
+    db.commit()
+    close = _ts(T0 + timedelta(hours=1))
+    pool = FakePool({acc.id}, {acc.id: [_deal(1, 42, entry=1, profit=21.0, time=close)]})
+    await pnl_sync.sync_all(pool)
+
+    # The trade shows up after its closing deal was mirrored and the watermark moved past it.
+    db.add(TradeRecord(account_db_id=acc.id, account_login="1", symbol="EURUSD", direction="BUY",
+                       lot_size=1.0, success=True, order_ticket=42, executed_at=T0))
+    db.commit()
+    (result,) = await pnl_sync.sync_all(pool)
+    assert result.synced == 1 and result.deals == 0
+    db.expire_all()
+    assert db.query(TradeRecord).one().realized_pnl == 20.0
+
+
+def test_history_and_summary_read_the_mirror(db_session):
+    acc = Account(account_id="1", password="x", server="S", account_type="fund")
+    db_session.add(acc)
+    db_session.commit()
+    deals = [
+        _deal(1, 10, entry=0, time=_ts(T0)),
+        _deal(2, 11, entry=1, profit=51.0, time=_ts(T0) + 60, position_id=10),
+        _deal(3, 20, entry=0, time=_ts(T0) + 120, symbol="XAUUSD", type=1),
+        _deal(4, 21, entry=1, profit=-9.0, time=_ts(T0) + 180, position_id=20, symbol="XAUUSD"),
+        _deal(5, 0, entry=0, profit=1000.0, time=_ts(T0), type=2),         # balance operation
+    ]
+    assert deal_history.upsert_deals(db_session, acc.id, deals) == 5
+    assert deal_history.upsert_deals(db_session, acc.id, deals) == 0
+    db_session.commit()
+
+    since = datetime.fromtimestamp(_ts(T0)) - timedelta(days=1)
+    rows = deal_history.history(db_session, acc.id, since)
+    assert [d.ticket for d in rows] == [1, 2, 3, 4]
+    served = deal_history.serialize_deal(rows[2])
+    assert served["type"] == "SELL" and (served["sl"], served["tp"]) == (1.09, 1.12)
+    assert [d.ticket for d in deal_history.history(db_session, acc.id, since, symbol="XAUUSD")] == [3, 4]
+
+    summary = {s["symbol"]: s for s in deal_history.summary(db_session, acc.id, since)}
+    assert summary["EURUSD"]["closed"] == 1 and summary["EURUSD"]["net_pnl"] == 50.0
+    assert summary["XAUUSD"]["losses"] == 1 and summary["XAUUSD"]["gross_loss"] == -10.0
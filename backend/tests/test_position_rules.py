@@ -0,0 +1,172 @@
+"""Worker-resident position rules: trailing, break-even, scale-out."""
+import pytest
+
+from app.workers.position_rules import (
+    ACTION_MODIFY,
+    ACTION_PARTIAL_CLOSE,
+    Rule,
+    RuleEngine,
+    pip_size,
+    validate_params,
+)
+
+SPECS = {"EURUSD": {"digits": 5, "volume_step": 0.01, "volume_min": 0.01}}
+
+
+def _pos(ticket=1, type_="BUY", price_open=1.10000, sl=0.0, tp=0.0, volume=1.0, symbol="EURUSD"):
+    return {
+        "ticket": ticket, "symbol": symbol, "type": type_, "volume": volume,
+        "price_open": price_open, "sl": sl, "tp": tp, "profit": 0.0, "time": 0,
+    }
+
+
+def _engine(*rules: Rule) -> RuleEngine:
+    engine = RuleEngine()
+    engine.load(list(rules))
+    return engine
+
+
+def test_pip_size_matches_legacy_convention():
+    assert pip_size(5) == pytest.approx(0.0001)
+    assert pip_size(3) == pytest.approx(0.01)
+    assert pip_size(2) == pytest.approx(0.01)
+
+
+def test_validate_params_rejects_bad_input():
+    with pytest.raises(ValueError):
+        validate_params("trailing", {"trail_pips": 0})
+    with pytest.raises(ValueError):
+        validate_params("breakeven", {"trigger_pips": 10, "offset_pips": 10})
+    with pytest.raises(ValueError):
+        validate_params("scale_out", {"steps": [{"pips": 10, "fraction": 0.7}, {"pips": 20, "fraction": 0.5}]})
+    with pytest.raises(ValueError):
+        validate_params("martingale", {})
+    steps = validate_params("scale_out", {"steps": [{"pips": 40, "fraction": 0.25}, {"pips": 20, "fraction": 0.5}]})
+    assert [s["pips"] for s in steps["steps"]] == [20, 40]
+
+
+def test_trailing_buy_moves_stop_up_only():
+    engine = _engine(Rule(1, 1, "trailing", {"trail_pips": 10}))
+    quotes = {"EURUSD": {"bid": 1.10300, "ask": 1.10310}}
+    [action] = engine.evaluate([_pos(sl=1.09900)], quotes, SPECS)
+    assert action.kind == ACTION_MODIFY
+    assert action.sl == pytest.approx(1.10200)
+
+    # Stop already tighter than the trail → nothing to do.
+    assert engine.evaluate([_pos(sl=1.10250)], quotes, SPECS) == []
+
+
+def test_trailing_sell_sets_first_stop_from_ask():
+    engine = _engine(Rule(1, 1, "trailing", {"trail_pips": 10}))
+    quotes = {"EURUSD": {"bid": 1.09690, "ask": 1.09700}}
+    [action] = engine.evaluate([_pos(type_="SELL", sl=0.0)], quotes, SPECS)
+    assert action.sl == pytest.approx(1.09800)
+
+
+def test_breakeven_triggers_once():
+    rule = Rule(1, 1, "breakeven", {"trigger_pips": 20, "offset_pips": 1})
+    engine = _engine(rule)
+
+    assert engine.evaluate([_pos()], {"EURUSD": {"bid": 1.10150, "ask": 1.10160}}, SPECS) == []
+
+    [action] = engine.evaluate([_pos()], {"EURUSD": {"bid": 1.10250, "ask": 1.10260}}, SPECS)
+    assert action.sl == pytest.approx(1.10010)
+    engine.commit(action)
+    assert rule.state["done"] is True
+    assert engine.evaluate([_pos()], {"EURUSD": {"bid": 1.10400, "ask": 1.10410}}, SPECS) == []
+
+
+def test_scale_out_one_step_per_tick_with_volume_rounding():
+    rule = Rule(1, 1, "scale_out", {"steps": [{"pips": 20, "fraction": 0.33}, {"pips": 40, "fraction": 0.33}]})
+    engine = _engine(rule)
+    quotes = {"EURUSD": {"bid": 1.10500, "ask": 1.10510}}   # +50 pips, both steps reached
+
+    [first] = engine.evaluate([_pos(volume=1.0)], quotes, SPECS)
+    assert first.kind == ACTION_PARTIAL_CLOSE
+    assert first.volume == pytest.approx(0.33)
+    engine.commit(first)
+
+    # Second step sizes off the original volume, not the reduced one.
+    [second] = engine.evaluate([_pos(volume=0.67)], quotes, SPECS)
+    assert second.volume == pytest.approx(0.33)
+    engine.commit(second)
+    assert rule.state == {"filled": [0, 1], "initial_volume": 1.0}
+    assert engine.evaluate([_pos(volume=0.34)], quotes, SPECS) == []
+
+
+def test_scale_out_never_closes_a_minimum_lot_position_in_full():
+    steps = [{"pips": 20, "fraction": 0.5}, {"pips": 40, "fraction": 0.5}]
+    quotes = {"EURUSD": {"bid": 1.10500, "ask": 1.10510}}   # +50 pips, both steps reached
+
+    # Half of 0.01 is below the minimum lot: no step may send the whole 0.01.
+    assert _engine(Rule(1, 1, "scale_out", {"steps": steps})).evaluate([_pos(volume=0.01)], quotes, SPECS) == []
+
+    # 0.03 → 0.01 (0.015 floored), then the last step closes the 0.02 rounding left.
+    rule = Rule(2, 1, "scale_out", {"steps": steps})
+    engine = _engine(rule)
+    [first] = engine.evaluate([_pos(volume=0.03)], quotes, SPECS)
+    assert first.volume == pytest.approx(0.01)
+    engine.commit(first)
+    [last] = engine.evaluate([_pos(volume=0.02)], quotes, SPECS)
+    assert last.volume == pytest.approx(0.02)
+
+
+def test_sl_candidates_merge_into_one_modify():
+    trail = Rule(1, 1, "trailing", {"trail_pips": 10})
+    be = Rule(2, 1, "breakeven", {"trigger_pips": 20, "offset_pips": 0})
+    engine = _engine(trail, be)
+    [action] = engine.evaluate([_pos()], {"EURUSD": {"bid": 1.10300, "ask": 1.10310}}, SPECS)
+    assert action.sl == pytest.approx(1.10200)   # trailing is tighter than break-even
+    assert action.to_dict()["rule_ids"] == [1, 2]
+    engine.commit(action)
+    assert be.state["done"] is True
+
+
+def test_quotes_only_requested_for_ruled_positions_and_prune():
+    engine = _engine(Rule(1, 1, "trailing", {"trail_pips": 10}), Rule(2, 7, "trailing", {"trail_pips": 10}))
+    positions = [_pos(ticket=1), _pos(ticket=3, symbol="GBPUSD")]
+    assert engine.symbols(positions) == {"EURUSD"}
+
+    gone = engine.prune(positions)
+    assert [r.id for r in gone] == [2]
+    assert len(engine) == 1
+
+
+class _Terminal:
+    """Just enough of the MT5 module for the worker's tick-side rule pass."""
+
+    ORDER_TYPE_BUY = 0
+
+    def __init__(self, positions):
+        self.positions = positions
+
+    def positions_get(self, **_kwargs):
+        return self.positions
+
+    def symbol_info_tick(self, _symbol):
+        return None
+
+
+def test_disconnected_tick_keeps_rules_and_real_list_prunes(monkeypatch):
+    from app.workers import mt5_worker as worker
+
+    persisted = []
+    monkeypatch.setattr(worker, "_persist_rule_states", lambda rules, deactivate=False: persisted.append((rules, deactivate)))
+    monkeypatch.setattr(worker, "_rule_engine", _engine(Rule(1, 1, "trailing", {"trail_pips": 10})))
+
+    monkeypatch.setattr(worker, "mt5", _Terminal(None))      # terminal dropped: positions unknown
+    worker._run_position_rules(worker._positions())
+    assert len(worker._rule_engine) == 1 and persisted == []
+
+    monkeypatch.setattr(worker, "mt5", _Terminal(()))        # a real, empty list: the position closed
+    worker._run_position_rules(worker._positions())
+    assert len(worker._rule_engine) == 0
+    assert [([r.id for r in rules], deactivate) for rules, deactivate in persisted] == [([1], True), ([], False)]
+
+
+def test_trailing_commit_leaves_rule_state_untouched():
+    trail = Rule(1, 1, "trailing", {"trail_pips": 10})
+    engine = _engine(trail)
+    [action] = engine.evaluate([_pos()], {"EURUSD": {"bid": 1.10300, "ask": 1.10310}}, SPECS)
+    assert action.to_dict()["rule_ids"] == [1]
+    assert engine.commit(action) == [] and trail.state == {}
@@ -0,0 +1,92 @@
+"""Versioned reference-data cache: compiled snapshot, zero-query rule checks, invalidation."""
+from sqlalchemy import event
+
+from app.models.accounts import Account
+from app.models.funds import Fund, FundPhaseRule, FundProgram
+from app.services.reference_cache import reference_cache
+from app.services.rule_checker import RuleChecker
+from app.services.settings import KEY_STEALTH_MODE, get_setting, set_setting
+
+
+def _fund(db):
+    fund = Fund(fund_name="F", server_pattern="FundSrv")
+    db.add(fund)
+    db.flush()
+    prog = FundProgram(fund_id=fund.id, program_name="2-Step", best_day_rule_pct=5.0)
+    db.add(prog)
+    db.flush()
+    db.add_all([
+        FundPhaseRule(program_id=prog.id, phase_name="Phase 2", phase_order=2, profit_target=5.0,
+                      daily_drawdown=5.0, max_drawdown=10.0),
+        FundPhaseRule(program_id=prog.id, phase_name="Phase 1", phase_order=1, profit_target=8.0,
+                      daily_drawdown=5.0, max_drawdown=10.0),
+    ])
+    db.commit()
+    return prog
+
+
+def _count_queries(db):
+    seen = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *a: seen.append(a[2]))
+    return seen
+
+
+def test_snapshot_compiles_program_phase_map(db_session):
+    prog = _fund(db_session)
+    ref = reference_cache.get(db_session)
+    p = ref.programs[prog.id]
+    assert p.fund_name == "F"
+    assert [r.phase_name for r in p.phase_rules] == ["Phase 1", "Phase 2"]
+    assert p.phase_or_first("Unknown").phase_name == "Phase 1"
+    assert p.next_phase("Phase 1") == "Phase 2" and p.next_phase("Phase 2") is None
+    assert ref.funds[0].programs == (p,)
+
+
+def test_pre_trade_checks_issue_no_queries_once_warm(db_session):
+    prog = _fund(db_session)
+    accounts = [
+        Account(account_id=str(i), password="x", server="FundSrv", account_type="fund",
+                fund_program_id=prog.id, current_phase="Phase 1", balance=100_000.0,
+                equity=99_000.0, starting_balance=100_000.0)
+        for i in range(30)
+    ]
+    db_session.add_all(accounts)
+    db_session.commit()
+    for a in accounts:
+        db_session.refresh(a)
+    checker = RuleChecker(db_session)
+    checker.get_pre_trade_status(accounts[0], 500.0)     # warm
+
+    queries = _count_queries(db_session)
+    results = [checker.get_pre_trade_status(a, 500.0) for a in accounts]
+    assert queries == []
+    assert all(r["daily_dd_limit_pct"] == 5.0 for r in results)
+
+
+def test_invalidate_picks_up_rule_changes(db_session):
+    prog = _fund(db_session)
+    checker = RuleChecker(db_session)
+    assert checker.check_profit_target(prog.id, "Phase 1", 100.0, 110.0)["target"] == 8.0
+
+    rule = db_session.query(FundPhaseRule).filter_by(phase_name="Phase 1").one()
+    rule.profit_target = 12.0
+    db_session.commit()
+    assert checker.check_profit_target(prog.id, "Phase 1", 100.0, 110.0)["target"] == 8.0  # still cached
+    reference_cache.invalidate()
+    assert checker.check_profit_target(prog.id, "Phase 1", 100.0, 110.0)["target"] == 12.0
+
+
+def test_settings_and_aliases(db_session):
+    set_setting(db_session, KEY_STEALTH_MODE, "on")
+    assert get_setting(db_session, KEY_STEALTH_MODE) == "on"
+    set_setting(db_session, KEY_STEALTH_MODE, None)
+    assert get_setting(db_session, KEY_STEALTH_MODE) is None
+
+    acc = Account(account_id="1", password="x", server="S", account_type="personal",
+                  symbol_aliases='{"GOLD": "XAUUSD.m"}')
+    db_session.add(acc)
+    db_session.commit()
+    reference_cache.invalidate()
+    ref = reference_cache.get(db_session)
+    assert ref.aliases_for(acc.id) == {"GOLD": "XAUUSD.m"}
+    assert ref.aliases_for(999) == {}
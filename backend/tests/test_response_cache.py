@@ -0,0 +1,112 @@
+"""Table version counters and the ETag'd response cache."""
+import gzip
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.models.accounts import Account
+from app.services.response_cache import ResponseCache
+from app.services.table_versions import table_versions
+
+
+def _account(login):
+    return Account(account_id=login, password="x", server="S", account_type="personal", balance=1.0)
+
+
+def test_versions_bump_on_commit_only(db_session):
+    v0 = table_versions.get(["accounts"])
+    acc = _account("1")
+    db_session.add(acc)
+    db_session.flush()
+    assert table_versions.get(["accounts"]) == v0                 # not visible yet
+    db_session.commit()
+    v1 = table_versions.get(["accounts"])
+    assert v1 != v0
+
+    db_session.execute(update(Account), [{"id": acc.id, "equity": 5.0}])   # ORM bulk UPDATE
+    db_session.commit()
+    v2 = table_versions.get(["accounts"])
+    assert v2 != v1
+
+    db_session.query(Account).filter(Account.id == acc.id).update({"profit": 1.0})
+    db_session.rollback()
+    assert table_versions.get(["accounts"]) == v2
+
+
+def test_watched_columns_bump_only_when_written(db_session):
+    table_versions.watch("accounts", ["current_phase"], "accounts_phase")
+    acc = _account("2")
+    db_session.add(acc)
+    db_session.commit()
+    v0 = table_versions.get(["accounts_phase"])
+    assert v0 != (v0[0], 0)                                        # the insert counts
+
+    acc.balance = 2.0
+    db_session.commit()
+    db_session.execute(update(Account), [{"id": acc.id, "equity": 5.0}])
+    db_session.commit()
+    assert table_versions.get(["accounts_phase"]) == v0
+
+    acc.current_phase = "Phase 2"
+    db_session.commit()
+    v1 = table_versions.get(["accounts_phase"])
+    assert v1 != v0
+    db_session.query(Account).filter(Account.id == acc.id).update({"profit": 1.0})
+    db_session.commit()
+    assert table_versions.get(["accounts_phase"]) != v1            # columns unknown: counts as written
+
+
+def test_etag_304_hits_and_invalidation(db_session):
+    cache = ResponseCache(gzip_min_bytes=200)
+    builds = []
+    app = FastAPI()
+
+    def get_db():
+        yield db_session
+
+    @app.get("/accounts")
+    def accounts(request: Request, db=Depends(get_db)):
+        def build():
+            builds.append(1)
+            return {"logins": [a.account_id for a in db.query(Account).order_by(Account.id)], "pad": "x" * 300}
+        return cache.respond(request, ["accounts"], build)
+
+    client = TestClient(app)
+    db_session.add(_account("1"))
+    db_session.commit()
+
+    first = client.get("/accounts", headers={"Accept-Encoding": "identity"})
+    etag = first.headers["etag"]
+    assert first.json()["logins"] == ["1"] and first.headers["cache-control"] == "no-cache"
+
+    assert client.get("/accounts", headers={"If-None-Match": etag}).status_code == 304
+    again = client.get("/accounts", headers={"Accept-Encoding": "gzip"})
+    assert again.headers["content-encoding"] == "gzip" and again.json() == first.json()
+    assert len(builds) == 1 and cache.hits == 1 and cache.not_modified == 1
+
+    # Different parameters are a different entry.
+    client.get("/accounts?page=2")
+    assert len(builds) == 2
+
+    db_session.add(_account("2"))
+    db_session.commit()
+    fresh = client.get("/accounts", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+    assert fresh.json()["logins"] == ["1", "2"] and len(builds) == 3
+
+
+def test_gzip_body_is_compressed_once():
+    cache = ResponseCache(gzip_min_bytes=10)
+    app = FastAPI()
+
+    @app.get("/big")
+    def big(request: Request):
+        return cache.respond(request, ["funds"], lambda: {"rows": list(range(500))})
+
+    client = TestClient(app)
+    for _ in range(3):
+        r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    (entry,) = cache._entries.values()
+    assert gzip.decompress(entry.gzipped) == entry.body
+    assert r.json()["rows"][-1] == 499
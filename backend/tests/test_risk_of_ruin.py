@@ -0,0 +1,115 @@
+"""Monte-Carlo risk of ruin: rule semantics of the path kernel, pooling and caching."""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.models.accounts import Account
+from app.models.funds import Fund, FundPhaseRule, FundProgram
+from app.models.trade_record import TradeRecord
+from app.routes import analytics
+from app.services import trade_stats
+from app.services.cold_archive import ColdArchive
+from app.services.risk_of_ruin import Distribution, RiskOfRuin
+from app.services.ruin_paths import PhaseRules, merge, simulate_chunk, summarize
+
+
+def _run(rules, r, risk_pct, trades_per_day=1, max_days=60, paths=200):
+    return summarize(merge([simulate_chunk(rules, np.array(r, dtype=float), risk_pct, paths, max_days, trades_per_day, 1)]))
+
+
+def test_target_min_days_and_best_day_stop():
+    rules = PhaseRules(daily_dd_pct=5, max_dd_pct=10, trailing=False, profit_target_pct=5,
+                       best_day_pct=None, max_risk_pct=None)
+    # +1R at 1 % compounding: +5.10 % after the 5th trade.
+    assert _run(rules, [1.0], 1.0)["days_to_pass"]["p50"] == 5
+    late = _run(PhaseRules(**{**rules.__dict__, "min_trading_days": 8}), [1.0], 1.0)
+    assert late["pass_probability"] == 1.0 and late["days_to_pass"]["p50"] == 8
+    assert _run(PhaseRules(**{**rules.__dict__, "min_trading_days": 80}), [1.0], 1.0)["unresolved_probability"] == 1.0
+
+    # Best day at 2 %: two +1 % trades reach it, the third is skipped every day.
+    capped = _run(PhaseRules(**{**rules.__dict__, "profit_target_pct": 10, "best_day_pct": 2}), [1.0], 1.0,
+                  trades_per_day=3)
+    assert capped["days_to_pass"]["p50"] == 5 and capped["avg_trades"] == 10
+    assert capped["best_day_stops_per_path"] == 4
+
+
+def test_daily_and_max_drawdown_breaches():
+    # −1R × 3 at 2 %: the day's loss reaches 5.88 % ≥ 5 % on the third trade.
+    daily = _run(PhaseRules(5, 10, False, 8, None, None), [-1.0], 2.0, trades_per_day=3)
+    assert daily["daily_dd_breach_probability"] == 1.0 and daily["days_to_fail"]["p50"] == 1
+    # Daily 10 % never hit; max 8 % of starting is reached on day 2.
+    maximum = _run(PhaseRules(10, 8, False, 8, None, None), [-1.0], 2.0, trades_per_day=3)
+    assert maximum["max_dd_breach_probability"] == 1.0 and maximum["days_to_fail"]["p50"] == 2
+    # Per-trade cap of 1 % of starting: 5 % requested still loses 1 % a trade.
+    assert _run(PhaseRules(50, 4.5, False, 8, None, 1.0), [-1.0], 5.0)["days_to_fail"]["p50"] == 5
+
+    # EOD trailing: the baseline follows the best end-of-day balance.
+    r = [1.0, -1.0]
+    static = _run(PhaseRules(50, 3, False, 50, None, None), r, 1.0, paths=4000, max_days=120)
+    trailing = _run(PhaseRules(50, 3, True, 50, None, None), r, 1.0, paths=4000, max_days=120)
+    assert trailing["fail_probability"] > static["fail_probability"]
+
+
+def test_pool_matches_inline_and_results_are_cached():
+    rng = np.random.default_rng(3)
+    r = rng.choice([-1.0, 1.5, 2.0], size=200, p=[0.55, 0.3, 0.15])
+    dist = Distribution(r_multiples=r, trades_per_day=2.0, digest="00ff00ff00ff00ff")
+    rules = PhaseRules(5, 10, True, 8, 4, 2, 3)
+
+    pooled = RiskOfRuin(max_workers=2, chunk_paths=1_000)
+    inline = RiskOfRuin(max_workers=1, chunk_paths=1_000)
+    try:
+        a, cached = pooled.simulate((1, None), rules, dist, 1.0, 3_000, 40, 2)
+        b, _ = inline.simulate((1, None), rules, dist, 1.0, 3_000, 40, 2)
+        assert a == b and not cached and a["paths"] == 3_000
+        assert pooled.simulate((1, None), rules, dist, 1.0, 3_000, 40, 2) == (a, True)
+        higher, _ = pooled.simulate((1, None), rules, dist, 2.0, 3_000, 40, 2)
+        assert higher["fail_probability"] > a["fail_probability"]
+    finally:
+        pooled.shutdown()
+
+
+def test_route_uses_the_account_r_distribution(db_session, tmp_path, monkeypatch):
+    arc = ColdArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(trade_stats, "cold_archive", arc)
+    monkeypatch.setattr(analytics, "risk_of_ruin", RiskOfRuin(max_workers=1))
+    fund = Fund(fund_name="F", server_pattern="F-*")
+    db_session.add(fund)
+    db_session.flush()
+    program = FundProgram(fund_id=fund.id, program_name="2-step", min_trading_days=3, best_day_rule_pct=None)
+    db_session.add(program)
+    db_session.flush()
+    db_session.add(FundPhaseRule(program_id=program.id, phase_name="Phase 1", phase_order=1, profit_target=8.0,
+                                 daily_drawdown=5.0, max_drawdown=10.0, drawdown_type="static"))
+    acc = Account(account_id="1", password="x", server="F-1", account_type="fund", fund_program_id=program.id)
+    db_session.add(acc)
+    db_session.flush()
+    t0 = datetime(2026, 3, 2, 9)
+    for i in range(30):
+        db_session.add(TradeRecord(account_db_id=acc.id, account_login="1", symbol="EURUSD", direction="BUY",
+                                   lot_size=1.0, success=True, risk_amount=100.0,
+                                   realized_pnl=200.0 if i % 3 == 0 else -100.0,
+                                   executed_at=t0 + timedelta(days=i // 2, hours=i % 2)))
+    db_session.commit()
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/analytics")
+    app.dependency_overrides[get_db] = lambda: db_session
+    client = TestClient(app)
+
+    body = client.get(f"/api/analytics/risk-of-ruin?program_id={program.id}&risk_pct=1&paths=2000").json()
+    assert body["distribution"]["trades"] == 30 and body["trades_per_day"] == 2
+    assert body["distribution"]["mean_r"] == pytest.approx(0.0, abs=1e-9)
+    assert body["rules"]["profit_target_pct"] == 8.0 and body["rules"]["min_trading_days"] == 3
+    total = body["pass_probability"] + body["fail_probability"] + body["unresolved_probability"]
+    assert total == pytest.approx(1.0, abs=1e-3)
+    again = client.get(f"/api/analytics/risk-of-ruin?program_id={program.id}&risk_pct=1&paths=2000").json()
+    assert again["cached"] and again["pass_probability"] == body["pass_probability"]
+
+    assert client.get("/api/analytics/risk-of-ruin?program_id=999").status_code == 404
+    assert client.get(f"/api/analytics/risk-of-ruin?program_id={program.id}&account_id=42").status_code == 400
+    arc.dispose()
@@ -0,0 +1,120 @@
+"""Vectorised rule evaluation must match the scalar RuleChecker exactly (randomised property tests)."""
+import random
+from types import MappingProxyType, SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import rule_batch
+from app.services.reference_cache import PhaseRuleRef, ProgramRef, ReferenceData, reference_cache
+from app.services.rule_checker import RuleChecker
+
+PHASES = ("Phase 1", "Phase 2", "Funded")
+
+
+def _maybe(rng, value, p_none=0.15):
+    return None if rng.random() < p_none else value
+
+
+def _money(rng):
+    return rng.choice([
+        0.0, 100_000.0, 50_000.0, 95_000.0, 105_000.0,
+        round(rng.uniform(80_000, 120_000), 2), round(rng.uniform(-1_000, 200_000), 2),
+    ])
+
+
+def _programs(rng):
+    programs = {}
+    for pid in range(1, 6):
+        phases = tuple(
+            PhaseRuleRef(
+                phase_name=name, phase_order=order,
+                profit_target=_maybe(rng, rng.choice([0.0, 5.0, 8.0, 10.0])),
+                daily_drawdown=rng.choice([0.0, 3.0, 4.0, 5.0]),
+                max_drawdown=rng.choice([0.0, 6.0, 8.0, 10.0]),
+                drawdown_type=rng.choice(["static", "eod_trailing"]),
+            )
+            for order, name in enumerate(PHASES[: rng.randint(0, 3)], start=1)
+        )
+        programs[pid] = ProgramRef(
+            id=pid, fund_id=1, fund_name="F", program_name=f"P{pid}", min_trading_days=None,
+            max_margin_pct=_maybe(rng, rng.choice([10.0, 30.0]), 0.5),
+            best_day_rule_pct=_maybe(rng, rng.choice([2.0, 5.0]), 0.4),
+            max_risk_per_trade_pct=_maybe(rng, rng.choice([1.0, 2.0]), 0.5),
+            phase_rules=phases,
+        )
+    return programs
+
+
+def _near(rng, base):
+    """Mostly small moves around `base` so warning bands (60-100 % of a limit) get hit."""
+    return round(base * (1 + rng.uniform(-0.11, 0.06)), 2)
+
+
+def _account(rng):
+    base = 100_000.0
+    realistic = rng.random() < 0.7
+    return SimpleNamespace(
+        account_type=rng.choice(["fund", "fund", "fund", "personal"]),
+        fund_program_id=_maybe(rng, rng.randint(1, 7), 0.1),   # 6, 7 → program not found
+        current_phase=_maybe(rng, rng.choice(PHASES + ("Unknown",))),
+        equity=_maybe(rng, _near(rng, base) if realistic else _money(rng)),
+        balance=_maybe(rng, _near(rng, base) if realistic else _money(rng)),
+        starting_balance=_maybe(rng, base if realistic else _money(rng), 0.3),
+        daily_open_equity=_maybe(rng, _near(rng, base) if realistic else _money(rng), 0.3),
+        peak_eod_balance=_maybe(rng, _near(rng, base) if realistic else _money(rng), 0.4),
+    )
+
+
+@pytest.fixture
+def world(monkeypatch):
+    def make(seed):
+        rng = random.Random(seed)
+        programs = _programs(rng)
+        data = ReferenceData(version=0, funds=(), programs=MappingProxyType(programs),
+                             settings=MappingProxyType({}), aliases=MappingProxyType({}))
+        monkeypatch.setattr(reference_cache, "get", lambda _db: data)
+        accounts = [_account(rng) for _ in range(60)]
+        return rng, programs, accounts
+    return make
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_pre_trade_matches_scalar(world, seed):
+    rng, programs, accounts = world(seed)
+    risks = [rng.choice([0.0, 250.0, 1_000.0, 2_500.0, round(rng.uniform(0, 12_000), 2)]) for _ in accounts]
+    checker = RuleChecker(None)
+
+    batch = rule_batch.evaluate_pre_trade(rule_batch.pack_accounts(accounts, programs), risks)
+    for i, (account, risk) in enumerate(zip(accounts, risks)):
+        assert batch.status(i) == checker.get_pre_trade_status(account, risk), i
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_account_rules_and_profit_target_match_scalar(world, seed):
+    _, programs, accounts = world(seed)
+    checker = RuleChecker(None)
+
+    batch = checker.evaluate_account_rules(accounts)
+    for i, a in enumerate(accounts):
+        balance = a.balance or 0
+        equity = a.equity or 0
+        starting = a.starting_balance or balance
+        scalar = checker.check_account_rules(
+            account_type=a.account_type, fund_program_id=a.fund_program_id, current_phase=a.current_phase,
+            balance=balance, equity=equity, starting_balance=starting,
+            daily_starting_equity=a.daily_open_equity if a.daily_open_equity else balance,
+        )
+        assert batch.result(i) == scalar, i
+        if a.fund_program_id and a.current_phase:
+            assert batch.profit_target(i) == checker.check_profit_target(
+                a.fund_program_id, a.current_phase, starting, equity,
+            ), i
+
+
+def test_single_risk_broadcasts_for_a_portfolio_slider(world):
+    _, programs, accounts = world(99)
+    packed = rule_batch.pack_accounts(accounts, programs)
+    levels = [rule_batch.evaluate_pre_trade(packed, risk).level for risk in (0.0, 1_000.0, 50_000.0)]
+    # More risk never makes an account's status better.
+    assert all(np.all(a <= b) for a, b in zip(levels, levels[1:]))
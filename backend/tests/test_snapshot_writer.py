@@ -0,0 +1,75 @@
+"""Deadband equity sampling and batched snapshot writes from worker ticks."""
+import asyncio
+from datetime import datetime, timedelta
+
+from app.services import snapshot_writer as sw
+from app.services.snapshot_writer import SnapshotSampler, SnapshotWriter, parse_tick_ts
+
+T0 = datetime(2026, 3, 2, 10, 0, 0)
+
+
+def _info(equity, balance=10_000.0):
+    return {"equity": equity, "balance": balance, "profit": equity - balance}
+
+
+def test_first_tick_always_written_then_deadband_suppresses_noise():
+    s = SnapshotSampler(deadband_pct=0.1, max_interval=60)
+    assert len(s.offer(1, _info(10_000), T0)) == 1
+    assert s.offer(1, _info(10_005), T0 + timedelta(seconds=1)) == []
+    rows = s.offer(1, _info(10_020), T0 + timedelta(seconds=2))
+    assert [r["equity"] for r in rows] == [10_020]
+
+
+def test_max_interval_forces_a_write():
+    s = SnapshotSampler(deadband_pct=1.0, max_interval=60)
+    s.offer(1, _info(10_000), T0)
+    assert s.offer(1, _info(10_001), T0 + timedelta(seconds=59)) == []
+    assert len(s.offer(1, _info(10_001), T0 + timedelta(seconds=60))) == 1
+
+
+def test_intraday_extremes_between_writes_are_kept():
+    s = SnapshotSampler(deadband_pct=1.0, max_interval=60)
+    s.offer(1, _info(10_000), T0)
+    s.offer(1, _info(10_080), T0 + timedelta(seconds=10))   # high, inside deadband
+    s.offer(1, _info(9_930), T0 + timedelta(seconds=20))    # low, inside deadband
+    s.offer(1, _info(10_050), T0 + timedelta(seconds=30))
+    rows = s.offer(1, _info(10_010), T0 + timedelta(seconds=60))
+    assert [r["equity"] for r in rows] == [10_080, 9_930, 10_010]
+    assert rows[0]["recorded_at"] == T0 + timedelta(seconds=10)
+
+
+def test_new_day_forces_a_write_and_accounts_are_independent():
+    s = SnapshotSampler(deadband_pct=1.0, max_interval=3600)
+    before_midnight = T0.replace(hour=23, minute=59, second=30)
+    s.offer(1, _info(10_000), before_midnight)
+    s.offer(2, _info(5_000), T0)
+    # 20 s and then 40 s after the last write: far inside max_interval, only the date differs.
+    assert s.offer(1, _info(10_000), before_midnight + timedelta(seconds=20)) == []
+    assert len(s.offer(1, _info(10_000), before_midnight + timedelta(seconds=40))) == 1
+    assert s.offer(2, _info(5_001), T0 + timedelta(seconds=5)) == []
+
+
+def test_parse_tick_ts_strips_z():
+    assert parse_tick_ts("2026-03-02T10:00:00.500000Z") == datetime(2026, 3, 2, 10, 0, 0, 500000)
+
+
+def test_writer_batches_ticks_into_one_insert(monkeypatch):
+    batches = []
+
+    class FakeWriter:
+        async def run(self, fn):
+            return fn(None)
+
+    monkeypatch.setattr(sw, "db_writer", FakeWriter())
+    monkeypatch.setattr(sw, "insert_snapshots_with_rollups", lambda _session, rows: batches.append(list(rows)))
+    writer = SnapshotWriter(SnapshotSampler(deadband_pct=0.1, max_interval=60))
+    for aid in (1, 2, 3):
+        writer.handle_event(aid, {"event": "tick", "data": {
+            "account_info": _info(10_000), "positions": [], "ts": "2026-03-02T10:00:00Z",
+        }})
+    writer.handle_event(1, {"event": "health", "data": {"state": "exited"}})
+    asyncio.run(writer.flush())
+
+    assert len(batches) == 1
+    assert sorted(r["account_db_id"] for r in batches[0]) == [1, 2, 3]
+    assert writer.rows_written == 3
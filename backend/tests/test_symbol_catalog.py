@@ -0,0 +1,156 @@
+"""Per-server symbol catalog: index, resolver without RPCs, diffed refresh."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.symbol_catalog import SymbolCatalogEntry, SymbolCatalogServer
+from app.routes import mt5 as mt5_v1, mt5_v2
+from app.services import symbol_catalog as catalog_module
+from app.services.symbol_catalog import ServerCatalog, SymbolCatalog, catalog_hash, load_catalogs, symbol_catalog
+from app.services.symbol_resolver import resolve_symbol
+
+NAMES = ["EURUSD.m", "EURGBP.m", "GBPUSD.m", "XAUUSD.m", "USTEC", "US30.cash", "AUDUSD.m"]
+
+
+def _entry(name, **spec):
+    return {"name": name, "description": name, "path": "Forex\\" + name, "digits": 5, "point": 0.00001,
+            "contract_size": 100000.0, "volume_min": 0.01, "volume_max": 100.0, "volume_step": 0.01,
+            "filling": 1, **spec}
+
+
+def _catalog(names=NAMES):
+    entries = [_entry(n) for n in names]
+    return ServerCatalog("Broker-Live", catalog_hash(entries), entries)
+
+
+class NoRpcPool:
+    def is_active(self, account_db_id):
+        return True
+
+    async def call(self, *args, **kwargs):
+        raise AssertionError("catalog resolution must not call the worker")
+
+
+class CatalogPool:
+    def __init__(self, entries):
+        self.entries = entries
+        self.calls = []
+
+    async def call(self, account_db_id, method, params=None, timeout=None):
+        assert method == "symbol_catalog"
+        self.calls.append(params)
+        digest = catalog_hash(self.entries)
+        if digest == params.get("known_hash"):
+            return {"hash": digest, "unchanged": True}
+        return {"hash": digest, "symbols": self.entries}
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    catalog = _catalog()
+    monkeypatch.setattr(symbol_catalog, "_servers", {"Broker-Live": catalog})
+    return catalog
+
+
+def test_search_prefix_before_substring_case_insensitive():
+    catalog = _catalog()
+    assert catalog.search("usd") == ["AUDUSD.m", "EURUSD.m", "GBPUSD.m", "XAUUSD.m"]
+    assert catalog.search("us") == ["US30.cash", "USTEC", "AUDUSD.m", "EURUSD.m", "GBPUSD.m", "XAUUSD.m"]
+    assert catalog.search("eur", limit=1) == ["EURGBP.m"]
+    assert catalog.search("") == sorted(NAMES, key=str.upper)[:50]
+    assert catalog.spec("USTEC")["trade_contract_size"] == 100000.0 and catalog.spec("NOPE") is None
+
+
+@pytest.mark.parametrize("requested,resolved,confidence", [
+    ("USTEC", "USTEC", "exact"),
+    ("EURUSD", "EURUSD.m", "suffix"),
+    ("GOLD", "XAUUSD.m", "suffix"),
+    ("BTCUSD", None, "not_found"),
+])
+def test_resolver_uses_catalog_without_rpcs(loaded, requested, resolved, confidence):
+    result = asyncio.run(resolve_symbol(NoRpcPool(), 1, requested, {}, "Broker-Live"))
+    assert (result.resolved, result.confidence) == (resolved, confidence)
+
+
+def test_resolutions_are_memoised_per_server_but_aliases_are_not(loaded):
+    asyncio.run(resolve_symbol(NoRpcPool(), 1, "EURUSD", {}, "Broker-Live"))
+    assert loaded.recall("EURUSD") == ("EURUSD.m", "suffix", ["EURUSD.m"])
+
+    aliased = asyncio.run(resolve_symbol(NoRpcPool(), 2, "EURUSD", {"EURUSD": "EURGBP.m"}, "Broker-Live"))
+    assert (aliased.resolved, aliased.confidence) == ("EURGBP.m", "user_alias")
+    assert loaded.recall("EURUSD")[0] == "EURUSD.m"
+
+
+def test_refresh_writes_only_the_diff_and_skips_unchanged_hash(db_session, monkeypatch):
+    class Writer:
+        async def run(self, fn):
+            result = fn(db_session)
+            db_session.commit()
+            return result
+
+    monkeypatch.setattr(catalog_module, "db_writer", Writer())
+    catalog = SymbolCatalog(refresh_seconds=0)
+    pool = CatalogPool([_entry(n) for n in ("EURUSD", "GBPUSD", "USDJPY")])
+
+    first = asyncio.run(catalog.refresh(pool, 1, "Broker-Live"))
+    assert first["added"] == 3 and catalog.get("Broker-Live").search("usd") == ["USDJPY", "EURUSD", "GBPUSD"]
+
+    assert asyncio.run(catalog.refresh(pool, 1, "Broker-Live"))["changed"] is False
+    assert pool.calls[-1]["known_hash"] == catalog.get("Broker-Live").hash
+
+    pool.entries = [_entry("EURUSD", volume_min=0.1), _entry("GBPUSD"), _entry("XAUUSD", digits=2)]
+    diff = asyncio.run(catalog.refresh(pool, 1, "Broker-Live"))
+    assert (diff["added"], diff["updated"], diff["removed"]) == (1, 1, 1)
+
+    names = {r.name: r for r in db_session.query(SymbolCatalogEntry).filter_by(server="Broker-Live")}
+    assert set(names) == {"EURUSD", "GBPUSD", "XAUUSD"} and names["EURUSD"].volume_min == 0.1
+    state = db_session.get(SymbolCatalogServer, "Broker-Live")
+    assert state.symbol_count == 3 and state.catalog_hash == catalog_hash(pool.entries)
+    assert load_catalogs(db_session)["Broker-Live"].hash == state.catalog_hash
+
+
+def test_symbols_endpoint_serves_autocomplete_from_catalog(loaded):
+    app = FastAPI()
+    app.include_router(mt5_v2.router, prefix="/api/mt5/v2")
+    client = TestClient(app)
+
+    body = client.get("/api/mt5/v2/symbols?server=Broker-Live&q=gbp").json()
+    assert [s["symbol"] for s in body["symbols"]] == ["GBPUSD.m", "EURGBP.m"]
+    assert body["symbols"][0]["volume_step"] == 0.01 and body["symbols"][0]["description"] == "GBPUSD.m"
+
+    assert client.get("/api/mt5/v2/symbols?server=Other&q=x").status_code == 404
+    assert client.get("/api/mt5/v2/symbols?q=x").status_code == 400
+
+
+def test_symbols_endpoint_uses_the_accounts_server(loaded, monkeypatch):
+    monkeypatch.setattr(mt5_v2, "account_server", lambda account_db_id: "Broker-Live" if account_db_id == 1 else None)
+    app = FastAPI()
+    app.include_router(mt5_v2.router, prefix="/api/mt5/v2")
+    client = TestClient(app)
+
+    assert client.get("/api/mt5/v2/symbols?account_db_id=1&q=gbp").json()["server"] == "Broker-Live"
+    assert client.get("/api/mt5/v2/symbols?account_db_id=1&server=Broker-Live&q=gbp").status_code == 200
+    assert client.get("/api/mt5/v2/symbols?account_db_id=1&server=Other&q=gbp").status_code == 400
+    assert client.get("/api/mt5/v2/symbols?account_db_id=2&server=Broker-Live&q=gbp").status_code == 404
+
+
+def test_v1_search_matches_the_same_with_and_without_a_catalog(loaded, monkeypatch):
+    class Terminal:
+        def symbols_get(self, group=None):
+            assert group is None, "search text is not an MT5 group pattern"
+            return [SimpleNamespace(name=n) for n in NAMES]
+
+    monkeypatch.setattr(mt5_v1, "mt5_service", SimpleNamespace(is_initialized=True))
+    monkeypatch.setattr(mt5_v1, "_mt5", Terminal())
+    monkeypatch.setattr(mt5_v1, "account_server", lambda account_db_id: "Broker-Live")
+    app = FastAPI()
+    app.include_router(mt5_v1.router, prefix="/api/mt5")
+    client = TestClient(app)
+
+    for connected in (1, None):
+        monkeypatch.setattr(mt5_v1, "get_connected_account_id", lambda connected=connected: connected)
+        assert client.get("/api/mt5/symbols?search=us").json() == loaded.search("us", 60)
+        assert client.get("/api/mt5/symbols?search=gbp").json() == ["GBPUSD.m", "EURGBP.m"]
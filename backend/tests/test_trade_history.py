@@ -0,0 +1,106 @@
+"""Keyset-paginated trade history filters and the streaming export."""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.accounts import Account
+from app.models.trade_record import TradeRecord
+from app.services import trade_history
+from app.services.trade_history import TradeFilters, decode_cursor, encode_cursor
+
+T0 = datetime(2026, 3, 2, 9, 0)
+
+
+def _seed(db):
+    a = Account(account_id="1001", password="x", server="S", account_type="fund")
+    b = Account(account_id="1002", password="x", server="S", account_type="fund")
+    db.add_all([a, b])
+    db.commit()
+    rows = []
+    for i in range(10):
+        rows.append(TradeRecord(
+            account_db_id=a.id if i % 2 else b.id,
+            account_login="1001" if i % 2 else "1002",
+            symbol="XAUUSD" if i % 3 == 0 else "EURUSD",
+            direction="BUY", lot_size=1.0, success=i != 4,
+            tags="Scalp, news" if i in (2, 5) else ("scalper" if i == 7 else None),
+            # Pairs share a timestamp so paging must break ties on id.
+            executed_at=T0 + timedelta(minutes=i // 2),
+        ))
+    db.add_all(rows)
+    db.commit()
+    return a, b
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    ts = datetime(2026, 3, 2, 9, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_everything_once_in_order(db_session):
+    _seed(db_session)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = trade_history.page(db_session, TradeFilters(), cursor=cursor, limit=3)
+        seen.extend((t.executed_at, t.id) for t in rows)
+        if cursor is None:
+            break
+    assert len(seen) == 10 and len(set(seen)) == 10
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_filters(db_session):
+    a, _ = _seed(db_session)
+
+    def ids(**kw):
+        rows, _ = trade_history.page(db_session, TradeFilters(**kw), limit=100)
+        return sorted(t.id for t in rows)
+
+    assert ids(symbol="xauusd") == [1, 4, 7, 10]
+    assert ids(success=False) == [5]
+    assert ids(tag="news") == [3, 6]
+    assert ids(tag="scalp") == [3, 6]           # whole tag, not "scalper"
+    assert ids(account_ids=(a.id,)) == [2, 4, 6, 8, 10]
+    assert ids(date_from=T0 + timedelta(minutes=1), date_to=T0 + timedelta(minutes=3)) == [3, 4, 5, 6]
+
+
+def test_export_streams_csv_and_ndjson(db_session, monkeypatch):
+    _seed(db_session)
+    monkeypatch.setattr(trade_history, "SessionLocal", sessionmaker(bind=db_session.get_bind()))
+
+    body = "".join(trade_history.iter_export(TradeFilters(symbol="EURUSD"), "csv"))
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert len(rows) == 6
+    assert tuple(rows[0]) == trade_history.EXPORT_FIELDS
+
+    lines = list(trade_history.iter_export(TradeFilters(success=False), "ndjson"))
+    assert [json.loads(line)["id"] for line in lines] == [5]
+
+    empty = "".join(trade_history.iter_export(TradeFilters(symbol="NONE"), "csv"))
+    assert empty.strip() == ",".join(trade_history.EXPORT_FIELDS)
+
+
+def test_legacy_second_precision_rows_page_once_after_normalizing(db_session):
+    _seed(db_session)
+    # Rows inserted through CURRENT_TIMESTAMP carry no fractional part.
+    db_session.execute(text("UPDATE trade_records SET executed_at = substr(executed_at, 1, 19) WHERE id % 2 = 0"))
+    db_session.commit()
+    assert trade_history.normalize_legacy_timestamps(db_session) == 5
+    db_session.commit()
+    db_session.expire_all()
+
+    seen, cursor = [], None
+    for _ in range(10):
+        rows, cursor = trade_history.page(db_session, TradeFilters(), cursor=cursor, limit=3)
+        seen.extend(t.id for t in rows)
+        if cursor is None:
+            break
+    assert cursor is None and sorted(seen) == list(range(1, 11)) and len(seen) == 10
+    assert trade_history.normalize_legacy_timestamps(db_session) == 0
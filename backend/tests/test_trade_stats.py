@@ -0,0 +1,136 @@
+"""Trade statistics: O(1) folds on close, NumPy rebuilds, derived metrics."""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.accounts import Account
+from app.models.equity_rollup import EquityRollup
+from app.models.trade_record import TradeRecord
+from app.models.trade_stats import TradeStats
+from app.services import trade_stats
+from app.services.cold_archive import ColdArchive
+
+T0 = datetime(2026, 3, 2, 9, 0)   # a Monday
+
+
+@pytest.fixture
+def account(db_session, tmp_path, monkeypatch):
+    arc = ColdArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(trade_stats, "cold_archive", arc)
+    acc = Account(account_id="1", password="x", server="S", account_type="fund")
+    db_session.add(acc)
+    db_session.commit()
+    yield acc
+    arc.dispose()
+
+
+def _close(db, acc, pnl, closed_at, symbol="EURUSD", tags=None, risk=None, executed_at=None):
+    """Write a closed trade and fold it in, the way the P&L sync does."""
+    t = TradeRecord(account_db_id=acc.id, account_login="1", symbol=symbol, direction="BUY", lot_size=1.0,
+                    success=True, tags=tags, risk_amount=risk, realized_pnl=pnl, closed_at=closed_at,
+                    executed_at=executed_at or closed_at - timedelta(minutes=30))
+    db.add(t)
+    db.flush()
+    trade_stats.apply_closed(db, [{
+        "account_db_id": acc.id, "symbol": symbol, "tags": tags, "risk_amount": risk,
+        "executed_at": t.executed_at, "closed_at": closed_at, "realized_pnl": pnl,
+    }])
+    return t
+
+
+def _snapshot(db):
+    cols = ["closed_count", "win_count", "loss_count", "pnl_sum", "pnl_sq_sum", "gross_profit", "gross_loss",
+            "largest_win", "largest_loss", "r_sum", "r_count", "streak", "max_win_streak",
+            "max_loss_streak", "cum_pnl", "peak_pnl", "max_drawdown", "last_closed_at"]
+    return {
+        (r.dimension, r.key): {c: pytest.approx(getattr(r, c)) if isinstance(getattr(r, c), float) else getattr(r, c)
+                               for c in cols}
+        for r in db.query(TradeStats).all()
+    }
+
+
+def test_incremental_folds_match_numpy_rebuild(db_session, account):
+    rng = random.Random(7)
+    for i in range(300):
+        _close(db_session, account, round(rng.uniform(-100, 120), 2), T0 + timedelta(hours=5 * i),
+               symbol=rng.choice(["EURUSD", "XAUUSD", "US30"]),
+               tags=rng.choice([None, "scalp", "news, Scalp", "swing"]),
+               risk=rng.choice([None, 50.0, 80.0]))
+    db_session.commit()
+    incremental = _snapshot(db_session)
+
+    db_session.query(TradeStats).delete()
+    assert trade_stats.rebuild_trade_stats(db_session) == len(incremental)
+    db_session.commit()
+    assert trade_stats.rebuild_trade_stats(db_session) == 0             # once per version
+    assert _snapshot(db_session) == incremental
+
+
+def test_rebuild_replaces_groups_live_closes_added_first(db_session, account):
+    _close(db_session, account, 40.0, T0)
+    late = _close(db_session, account, -10.0, T0 + timedelta(hours=1))
+    db_session.commit()
+    expected = _snapshot(db_session)
+    # Only the newest close was folded live before the first rebuild ran.
+    db_session.query(TradeStats).delete()
+    trade_stats.apply_closed(db_session, [{
+        "account_db_id": account.id, "symbol": late.symbol, "tags": None, "risk_amount": None,
+        "executed_at": late.executed_at, "closed_at": late.closed_at, "realized_pnl": late.realized_pnl,
+    }])
+    db_session.commit()
+
+    assert trade_stats.rebuild_trade_stats(db_session) == len(expected)
+    db_session.commit()
+    assert _snapshot(db_session) == expected
+    assert trade_stats.rebuild_trade_stats(db_session) == 0
+
+
+def test_late_close_recomputes_its_groups(db_session, account):
+    _close(db_session, account, 10.0, T0 + timedelta(hours=2))
+    _close(db_session, account, -30.0, T0 + timedelta(hours=3))
+    _close(db_session, account, 5.0, T0 + timedelta(hours=1))          # arrives after a later close
+    db_session.commit()
+
+    (stats,) = trade_stats.group_stats(db_session, "all", account.id)
+    # In close order: +5, +10, -30 → one loss in a row, drawdown 30 from the 15 peak.
+    assert stats["current_streak"] == -1 and stats["max_win_streak"] == 2
+    assert stats["max_drawdown"] == 30.0 and stats["net_pnl"] == -15.0
+
+
+def test_derived_metrics_and_retagging(db_session, account):
+    for i, (pnl, tags) in enumerate([(100.0, "A"), (-50.0, "a, b"), (200.0, "B"), (-50.0, None)]):
+        _close(db_session, account, pnl, T0 + timedelta(hours=i), tags=tags, risk=50.0)
+    db_session.commit()
+
+    (s,) = trade_stats.group_stats(db_session, "all", account.id)
+    assert s["win_rate"] == 50.0 and s["expectancy"] == 50.0
+    assert s["profit_factor"] == 3.0 and s["avg_r"] == 1.0
+    assert s["avg_win"] == 150.0 and s["avg_loss"] == -50.0
+    assert s["sharpe"] == pytest.approx(50 / 122.474, abs=1e-3)
+    assert [g["key"] for g in trade_stats.group_stats(db_session, "hour", account.id)] == ["08", "09", "10", "11"]
+    assert [g["key"] for g in trade_stats.group_stats(db_session, "weekday", account.id)] == ["0"]
+
+    tags = {g["key"]: g for g in trade_stats.group_stats(db_session, "tag", account.id)}
+    assert tags["a"]["closed"] == 2 and tags["a"]["net_pnl"] == 50.0 and tags["b"]["net_pnl"] == 150.0
+
+    # Retag the first trade from "A" to "c": "a" and "c" are recomputed from trades.
+    first = db_session.query(TradeRecord).order_by(TradeRecord.id).first()
+    first.tags = "c"
+    trade_stats.recompute(db_session, account.id, {("tag", "a"), ("tag", "c")})
+    tags = {g["key"]: g for g in trade_stats.group_stats(db_session, "tag", account.id)}
+    assert tags["a"]["closed"] == 1 and tags["a"]["net_pnl"] == -50.0
+    assert tags["c"]["net_pnl"] == 100.0
+
+
+def test_equity_drawdown_from_daily_rollups(db_session, account):
+    days = [(1000, 1100, 990), (1100, 1150, 1020), (1050, 1080, 1000), (1010, 1200, 1005)]
+    for i, (o, h, lo) in enumerate(days):
+        start = datetime(2026, 3, 1) + timedelta(days=i)
+        db_session.add(EquityRollup(account_db_id=account.id, resolution="1d", bucket_start=start,
+                                    open_equity=o, high_equity=h, low_equity=lo, close_equity=o,
+                                    open_balance=o, high_balance=h, low_balance=lo, close_balance=o,
+                                    samples=1, first_at=start, last_at=start))
+    db_session.commit()
+    dd = trade_stats.equity_drawdown(db_session, account.id)
+    assert dd == {"max_drawdown": 150.0, "max_drawdown_pct": 13.04}   # 1150 peak → 1000 low
@@ -0,0 +1,146 @@
+"""Prepared trade tickets: prepare does the work once, execute only sends orders."""
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.accounts import Account
+from app.models.funds import Fund, FundPhaseRule, FundProgram
+from app.routes import trading_v2
+from app.services.live_state import write_through
+from app.services.symbol_resolver import ResolveResult
+from app.services.trade_tickets import TicketStore, TradeTicket
+from app.utils.async_helpers import AsyncDB, get_async_db
+
+SPEC = {"symbol": "EURUSD.m", "point": 0.00001, "digits": 5, "trade_contract_size": 100_000,
+        "volume_min": 0.01, "volume_max": 100.0, "volume_step": 0.01, "filling": 1}
+
+
+class FakePool:
+    def __init__(self):
+        self.calls = []
+
+    async def call(self, account_db_id, method, params=None, timeout=None):
+        self.calls.append((account_db_id, method, params))
+        if method == "get_account_info":
+            return {"balance": 10_000.0, "equity": 10_000.0, "margin_free": 9_000.0}
+        if method == "get_symbol_info":
+            return SPEC
+        if method == "get_tick_price":
+            return {"bid": 1.10000, "ask": 1.10010, "last": 0.0}
+        if method == "place_market_order":
+            return {"success": True, "order": 1000 + account_db_id, "price": params["reference_price"]}
+        raise AssertionError(method)
+
+
+@pytest.fixture
+def client(db_session, monkeypatch):
+    pool, saved, timers = FakePool(), [], []
+
+    async def resolve(_pool, _aid, symbol, _aliases, _server=None):
+        return ResolveResult(symbol, symbol + ".m", "suffix", [])
+
+    async def ready(_aid):
+        return True
+
+    async def save(account, symbol, direction, calc, success, order_ticket=None, error_msg=None, timer=None):
+        saved.append((account.id, success, error_msg))
+        timers.append(timer)
+
+    monkeypatch.setattr(trading_v2, "pool", pool)
+    monkeypatch.setattr(trading_v2, "resolve_symbol", resolve)
+    monkeypatch.setattr(trading_v2, "_ensure_worker", ready)
+    monkeypatch.setattr(trading_v2, "save_trade_record", save)
+    monkeypatch.setattr(trading_v2, "trade_tickets", TicketStore(ttl=30))
+
+    async def adb():
+        yield AsyncDB(db_session)
+
+    app = FastAPI()
+    app.include_router(trading_v2.router, prefix="/api/trading/v2")
+    app.dependency_overrides[get_async_db] = adb
+    c = TestClient(app)
+    c.pool, c.saved, c.timers = pool, saved, timers
+    return c
+
+
+def _order(account_ids):
+    return {"symbol": "EURUSD", "direction": "BUY", "sl_price": 1.0951, "risk_type": "pct",
+            "risk_value": 1.0, "account_ids": account_ids}
+
+
+def test_execute_sends_one_order_per_account_and_only_once(client, db_session):
+    accounts = [Account(account_id=str(i), password="x", server="S", account_type="personal") for i in (1, 2)]
+    db_session.add_all(accounts)
+    db_session.commit()
+    ids = [a.id for a in accounts]
+
+    prepared = client.post("/api/trading/v2/prepare", json=_order(ids)).json()
+    assert [r["ready"] for r in prepared["results"]] == [True, True]
+    assert prepared["results"][0]["calculation"]["lot_size"] == pytest.approx(0.2, abs=0.011)
+    client.pool.calls.clear()
+
+    body = client.post("/api/trading/v2/execute", json={"ticket_id": prepared["ticket_id"]}).json()
+    assert body["successful"] == 2 and [r["order"] for r in body["results"]] == [1000 + i for i in ids]
+    assert [m for _, m, _ in client.pool.calls] == ["place_market_order"] * 2
+    params = client.pool.calls[0][2]
+    assert params["symbol"] == "EURUSD.m" and params["type_filling"] == 1 and params["check_margin"]
+    assert params["reference_price"] == 1.1001 and params["max_drift"] == pytest.approx(20 * 0.00001)
+    assert client.saved == [(ids[0], True, None), (ids[1], True, None)]
+    # Ticket rows time the execute request only, not the stages prepare ran.
+    assert {t.route for t in client.timers} == {"v2_ticket"} and all(set(t.stages) == {"order"} for t in client.timers)
+
+    again = client.post("/api/trading/v2/execute", json={"ticket_id": prepared["ticket_id"]})
+    assert again.status_code == 404 and len(client.pool.calls) == 2
+
+
+def _fund_account(db_session) -> Account:
+    fund = Fund(fund_name="F", server_pattern="F-*")
+    db_session.add(fund)
+    db_session.flush()
+    program = FundProgram(fund_id=fund.id, program_name="2-step")
+    db_session.add(program)
+    db_session.flush()
+    db_session.add(FundPhaseRule(program_id=program.id, phase_name="Phase 1", phase_order=1, profit_target=8.0,
+                                 daily_drawdown=5.0, max_drawdown=10.0, drawdown_type="static"))
+    acc = Account(account_id="7", password="x", server="F-1", account_type="fund", fund_program_id=program.id,
+                  current_phase="Phase 1", starting_balance=10_000.0, balance=9_400.0, equity=9_400.0,
+                  daily_open_equity=9_400.0, daily_open_date=datetime.utcnow().date().isoformat())
+    db_session.add(acc)
+    db_session.commit()
+    return acc
+
+
+def test_rules_rechecked_when_the_gate_inputs_changed_since_prepare(client, db_session):
+    acc = _fund_account(db_session)
+    prepared = client.post("/api/trading/v2/prepare", json=_order([acc.id])).json()
+    assert prepared["results"][0]["ready"]
+
+    acc.daily_open_equity = 10_000.0  # today's loss is now past 5 % of the day's opening equity
+    db_session.commit()
+    body = client.post("/api/trading/v2/execute", json={"ticket_id": prepared["ticket_id"]}).json()
+    assert body["blocked"] == 1 and body["results"][0]["error"].startswith("Blocked")
+    (timer,) = client.timers
+    assert set(timer.stages) == {"rules"}      # the re-check, counted once
+    assert not any(m == "place_market_order" for _, m, _ in client.pool.calls)
+
+
+def test_live_state_write_through_keeps_the_ticket_fresh(client, db_session):
+    acc = _fund_account(db_session)
+    prepared = client.post("/api/trading/v2/prepare", json=_order([acc.id])).json()
+
+    write_through(db_session, [{"id": acc.id, "balance": 9_300.0, "equity": 9_300.0, "profit": -700.0}])
+    db_session.commit()
+    body = client.post("/api/trading/v2/execute", json={"ticket_id": prepared["ticket_id"]}).json()
+    assert body["results"][0]["success"]
+    (timer,) = client.timers
+    assert "rules" not in timer.stages         # no re-check for balance/equity ticks
+
+
+def test_tickets_expire():
+    store = TicketStore(ttl=0.01)
+    ticket = store.put(TradeTicket("EURUSD", "BUY", [], []))
+    time.sleep(0.02)
+    assert store.take(ticket.id) is None and store.take("nope") is None
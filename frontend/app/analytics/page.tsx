@@ -27,6 +27,24 @@ interface EquityPoint {
     account_db_id: number;
 }
 
+interface EquitySeries {
+    account_db_id: number;
+    times: string[];
+    equity: number[];
+    balance: number[];
+}
+
+// The API returns one columnar series per account; the charts want points.
+function flattenEquitySeries(series: EquitySeries[]): EquityPoint[] {
+    const points: EquityPoint[] = [];
+    for (const s of series) {
+        for (let i = 0; i < s.times.length; i++) {
+            points.push({ time: s.times[i], equity: s.equity[i], balance: s.balance[i], account_db_id: s.account_db_id });
+        }
+    }
+    return points.sort((a, b) => a.time.localeCompare(b.time));
+}
+
 interface TradeRecord {
     id: number;
     account_login: string;
@@ -67,7 +85,6 @@ interface JournalDay {
     total_risk: number;
     avg_rr: number | null;
     balance_change: number | null;
-    trades: JournalTrade[];
 }
 
 // ── Heatmap ───────────────────────────────────────────────────────────────────
@@ -275,6 +292,7 @@ export default function AnalyticsPage() {
     const [journalPeriod, setJournalPeriod] = useState<30 | 60 | 90>(90);
     const [journalAccountFilter, setJournalAccountFilter] = useState<number | "all">("all");
     const [expandedDay, setExpandedDay] = useState<string | null>(null);
+    const [dayTrades, setDayTrades] = useState<Record<string, JournalTrade[]>>({});
     const [loading, setLoading] = useState(true);
     const [refreshing, setRefreshing] = useState(false);
     const [journalLoading, setJournalLoading] = useState(false);
@@ -300,7 +318,7 @@ export default function AnalyticsPage() {
             setSummary(summaryData);
             setFundAccounts(fundData.accounts);
             setAllAccounts(accountsData);
-            setEquityCurve(equityData.data ?? []);
+            setEquityCurve(flattenEquitySeries(equityData.series ?? []));
             setJournalDays(journalData.days ?? []);
             setCalendarDays(calendarData.days ?? []);
         } catch (error: any) {
@@ -380,6 +398,7 @@ export default function AnalyticsPage() {
                 period,
             );
             setJournalDays(data.days ?? []);
+            setDayTrades({});
         } catch (e: any) {
             toast.error(`Journal load failed: ${e.message}`);
         } finally {
@@ -387,6 +406,22 @@ export default function AnalyticsPage() {
         }
     };
 
+    // Day trades are fetched lazily the first time a journal day is expanded.
+    const toggleJournalDay = async (date: string) => {
+        if (expandedDay === date) { setExpandedDay(null); return; }
+        setExpandedDay(date);
+        if (dayTrades[date]) return;
+        try {
+            const data = await apiClient.analytics.getJournalDayTrades(
+                date,
+                journalAccountFilter === "all" ? undefined : journalAccountFilter,
+            );
+            setDayTrades(prev => ({ ...prev, [date]: data.trades ?? [] }));
+        } catch (e: any) {
+            toast.error(`Failed to load trades: ${e.message}`);
+        }
+    };
+
     const fetchTradeHistory = async () => {
         setTradesLoading(true);
         try {
@@ -545,7 +580,7 @@ export default function AnalyticsPage() {
                 </a>
                 <label aria-label="Restore database from file" style={{ display: "flex", alignItems: "center", gap: "6px", padding: "8px 16px", background: "rgba(167,139,250,0.06)", border: "1px solid rgba(167,139,250,0.18)", color: "var(--purple)", borderRadius: "8px", fontSize: "12px", fontWeight: 500, cursor: restoringDb ? "not-allowed" : "pointer", opacity: restoringDb ? 0.5 : 1, fontFamily: "'Sora', sans-serif" }}>
                     <Upload size={14} /> {restoringDb ? "Restoring..." : "Restore DB"}
-                    <input type="file" accept=".db" onChange={handleRestore} style={{ display: "none" }} disabled={restoringDb} />
+                    <input type="file" accept=".db,.gz,.tar" onChange={handleRestore} style={{ display: "none" }} disabled={restoringDb} />
                 </label>
                 <button
                     onClick={handleRefresh}
@@ -1056,7 +1091,7 @@ export default function AnalyticsPage() {
                                             {/* Row */}
                                             <div
                                                 className={`flex items-center gap-3 px-4 py-3 cursor-pointer hover:bg-white/[0.04] border-l-4 ${borderColor} transition-colors`}
-                                                onClick={() => setExpandedDay(isExpanded ? null : day.date)}
+                                                onClick={() => toggleJournalDay(day.date)}
                                             >
                                                 {/* Date */}
                                                 <div className="w-28 shrink-0">
@@ -1133,7 +1168,7 @@ export default function AnalyticsPage() {
                                                                 </tr>
                                                             </thead>
                                                             <tbody>
-                                                                {day.trades.map(t => (
+                                                                {(dayTrades[day.date] ?? []).map(t => (
                                                                     <tr key={t.id} className="border-t border-white/[0.04] hover:bg-white/[0.03]">
                                                                         <td className="px-4 py-2 text-slate-500 whitespace-nowrap">
                                                                             {t.executed_at
@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useState, useRef, useCallback, useMemo } from "react";
-import { apiClient } from "@/lib/api-client";
+import { apiClient, ApiError } from "@/lib/api-client";
 import { useAccountStore } from "@/lib/store";
 import { PreTradeStatus } from "@/lib/types";
 import dynamic from "next/dynamic";
@@ -193,7 +193,8 @@ export default function TradingPage() {
 
         setLoading(true);
         try {
-            const result = await apiClient.tradingV2.calculatePosition({
+            // The preview is kept server-side as a ticket; Execute sends exactly it.
+            const result = await apiClient.tradingV2.prepare({
                 symbol: symbol.trim(),
                 direction,
                 sl_price: slPrice,
@@ -210,8 +211,13 @@ export default function TradingPage() {
         }
     };
 
+    // A ticket is only valid for the inputs it was prepared from.
+    useEffect(() => {
+        setPreview(null);
+    }, [direction, slPrice, tpPrice, riskType, riskValue, selectedAccounts]);
+
     const handleExecute = () => {
-        if (!preview) return;
+        if (!preview?.ticket_id) return;
         setShowExecuteConfirm(true);
     };
 
@@ -239,19 +245,12 @@ export default function TradingPage() {
     }, [preview, selectedAccounts, accounts, blockedAccountIds]);
 
     const doExecute = async () => {
+        if (!preview?.ticket_id) return;
         setShowExecuteConfirm(false);
         setExecuting(true);
         setExecResults(null);
         try {
-            const result = await apiClient.tradingV2.executeBatch({
-                symbol: symbol.trim(),
-                direction,
-                sl_price: slPrice,
-                tp_price: tpPrice || null,
-                risk_type: riskType,
-                risk_value: riskValue,
-                account_ids: executableAccountIds,  // blocked accounts excluded
-            });
+            const result = await apiClient.tradingV2.execute(preview.ticket_id);
             setExecResults(result.results ?? []);
             if (result.successful === result.total) {
                 toast.success(`All ${result.total} order(s) executed successfully`);
@@ -262,7 +261,13 @@ export default function TradingPage() {
             }
             setPreview(null);
         } catch (error: any) {
-            toast.error(`Failed to execute batch: ${error.message ?? "Unknown error"}`);
+            if (error instanceof ApiError && error.status === 404) {
+                // Ticket expired or already used: size again and let the user confirm the new preview.
+                toast.warning("Prepared trade expired — recalculated, review and execute again");
+                await handleCalculate();
+            } else {
+                toast.error(`Failed to execute batch: ${error.message ?? "Unknown error"}`);
+            }
         } finally {
             setExecuting(false);
         }
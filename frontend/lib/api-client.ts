@@ -17,6 +17,26 @@ function resolveApiBaseUrl(): string {
 
 const API_BASE_URL = resolveApiBaseUrl();
 
+type ExposureTotals = {
+    net_lots: number;
+    long_lots: number;
+    short_lots: number;
+    notional: number;
+    open_risk: number;
+    positions: number;
+    unprotected: number;
+};
+
+// Thrown for non-2xx responses; `status` lets callers react to e.g. a 404.
+export class ApiError extends Error {
+    status: number;
+
+    constructor(message: string, status: number) {
+        super(message);
+        this.status = status;
+    }
+}
+
 // API client class
 class ApiClient {
     private baseUrl: string;
@@ -41,7 +61,7 @@ class ApiClient {
 
         if (!response.ok) {
             const error = await response.json().catch(() => ({ detail: "Request failed" }));
-            throw new Error(error.detail || `HTTP error! status: ${response.status}`);
+            throw new ApiError(error.detail || `HTTP error! status: ${response.status}`, response.status);
         }
 
         return response.json();
@@ -150,8 +170,10 @@ class ApiClient {
             }>("/api/mt5/risk-status"),
         searchSymbols: (search: string) =>
             this.request<string[]>(`/api/mt5/symbols?search=${encodeURIComponent(search)}`),
-        getHistory: (days = 30) =>
-            this.request<any[]>(`/api/mt5/history?days=${days}`),
+        getHistory: (days = 30, accountId?: number) =>
+            this.request<any[]>(`/api/mt5/history?days=${days}${accountId != null ? `&account_id=${accountId}` : ""}`),
+        getHistorySummary: (days = 30, accountId?: number) =>
+            this.request<any[]>(`/api/mt5/history/summary?days=${days}${accountId != null ? `&account_id=${accountId}` : ""}`),
         getServerTime: () =>
             this.request<{ server_time: string | null; local_time: string; offset_seconds: number }>("/api/mt5/server-time"),
         setTrailingStop: (ticket: number, trail_pips: number) =>
@@ -181,6 +203,28 @@ class ApiClient {
             this.request<{ active_account_ids: number[]; count: number }>(
                 "/api/mt5/v2/status",
             ),
+        live: () =>
+            this.request<Record<string, { balance: number; equity: number; profit: number | null; margin: number | null; margin_used_pct: number; positions: any[]; updated_at: string }>>(
+                "/api/mt5/v2/live",
+            ),
+        exposure: () =>
+            this.request<{
+                symbols: Record<string, ExposureTotals>;
+                accounts: Record<string, { account_id: string | null; group: string; symbols: Record<string, ExposureTotals> }>;
+                groups: Record<string, Record<string, ExposureTotals>>;
+                total_open_risk: number;
+                limits: { max_net_lots: number | null; max_open_risk: number | null };
+            }>("/api/mt5/v2/exposure"),
+        symbols: (q: string, opts: { accountDbId?: number; server?: string; limit?: number } = {}) => {
+            const params = new URLSearchParams({ q });
+            if (opts.accountDbId != null) params.set("account_db_id", String(opts.accountDbId));
+            if (opts.server) params.set("server", opts.server);
+            if (opts.limit != null) params.set("limit", String(opts.limit));
+            return this.request<{
+                server: string;
+                symbols: { symbol: string; description: string | null; digits: number; point: number; trade_contract_size: number; volume_min: number; volume_max: number; volume_step: number; filling: number }[];
+            }>(`/api/mt5/v2/symbols?${params}`);
+        },
         call: (accountDbId: number, method: string, params: object = {}) =>
             this.request<{ account_db_id: number; method: string; result: unknown }>(
                 `/api/mt5/v2/call/${accountDbId}/${method}`,
@@ -236,6 +280,18 @@ class ApiClient {
                 method: "POST",
                 body: JSON.stringify(request),
             }),
+        // Calculate once and keep the result as a short-lived ticket; execute
+        // then sends the prepared orders (404 once expired or used).
+        prepare: (request: any) =>
+            this.request<any>("/api/trading/v2/prepare", {
+                method: "POST",
+                body: JSON.stringify(request),
+            }),
+        execute: (ticketId: string, maxDriftPoints?: number) =>
+            this.request<any>("/api/trading/v2/execute", {
+                method: "POST",
+                body: JSON.stringify({ ticket_id: ticketId, max_drift_points: maxDriftPoints ?? null }),
+            }),
     };
 
     // Trading API (v1 — single-process singleton, kept for fallback)
@@ -269,13 +325,47 @@ class ApiClient {
             }),
         getEquityCurve: (accountId?: number) =>
             this.request<any>(`/api/analytics/equity-curve${accountId != null ? `?account_id=${accountId}` : ""}`),
-        getTradeHistory: (accountId?: number) =>
-            this.request<any>(`/api/analytics/trade-history${accountId != null ? `?account_id=${accountId}` : ""}`),
+        getTradeHistory: (accountId?: number, cursor?: string) => {
+            const params = new URLSearchParams();
+            if (accountId != null) params.set("account_id", String(accountId));
+            if (cursor) params.set("cursor", cursor);
+            const qs = params.toString();
+            return this.request<any>(`/api/analytics/trade-history${qs ? `?${qs}` : ""}`);
+        },
+        tradeHistoryExport: (format: "csv" | "ndjson" = "csv", accountId?: number) =>
+            `${this.baseUrl}/api/analytics/trade-history/export?format=${format}${accountId != null ? `&account_id=${accountId}` : ""}`,
         getJournal: (accountId?: number, days: number = 90) => {
             const params = new URLSearchParams({ days: String(days) });
             if (accountId != null) params.set("account_id", String(accountId));
             return this.request<any>(`/api/analytics/journal?${params}`);
         },
+        getTradeStats: (dimension: "all" | "symbol" | "tag" | "weekday" | "hour" = "all", accountId?: number) => {
+            const params = new URLSearchParams({ dimension });
+            if (accountId != null) params.set("account_id", String(accountId));
+            return this.request<any>(`/api/analytics/stats?${params}`);
+        },
+        getRiskOfRuin: (
+            programId: number,
+            riskPct: number,
+            opts: { phase?: string; accountId?: number; paths?: number; maxDays?: number; tradesPerDay?: number } = {},
+        ) => {
+            const params = new URLSearchParams({ program_id: String(programId), risk_pct: String(riskPct) });
+            if (opts.phase) params.set("phase", opts.phase);
+            if (opts.accountId != null) params.set("account_id", String(opts.accountId));
+            if (opts.paths != null) params.set("paths", String(opts.paths));
+            if (opts.maxDays != null) params.set("max_days", String(opts.maxDays));
+            if (opts.tradesPerDay != null) params.set("trades_per_day", String(opts.tradesPerDay));
+            return this.request<any>(`/api/analytics/risk-of-ruin?${params}`);
+        },
+        getExecutionLatency: (opts: { days?: number; accountId?: number; server?: string } = {}) => {
+            const params = new URLSearchParams();
+            if (opts.days != null) params.set("days", String(opts.days));
+            if (opts.accountId != null) params.set("account_id", String(opts.accountId));
+            if (opts.server) params.set("server", opts.server);
+            return this.request<any>(`/api/analytics/execution-latency?${params}`);
+        },
+        getJournalDayTrades: (date: string, accountId?: number) =>
+            this.request<any>(`/api/analytics/journal/${date}/trades${accountId != null ? `?account_id=${accountId}` : ""}`),
         updateTradeNote: (tradeId: number, notes: string) =>
             this.request<any>(`/api/analytics/trade/${tradeId}/note`, {
                 method: "PATCH",
@@ -287,7 +377,7 @@ class ApiClient {
                 body: JSON.stringify({ tags }),
             }),
         syncRealizedPnl: () =>
-            this.request<{ synced: number; total_pending: number; message?: string }>("/api/analytics/sync-realized-pnl", {
+            this.request<{ synced: number; total_pending: number; message?: string; accounts?: { account_db_id: number; synced: number; pending: number; error?: string | null }[] }>("/api/analytics/sync-realized-pnl", {
                 method: "POST",
             }),
     };
@@ -300,7 +390,7 @@ class ApiClient {
 
     // System API
     system = {
-        backup: () => `${this.baseUrl}/api/system/backup`,
+        backup: (compress = false) => `${this.baseUrl}/api/system/backup${compress ? "?compress=true" : ""}`,
         restore: async (file: File) => {
             const form = new FormData();
             form.append("file", file);